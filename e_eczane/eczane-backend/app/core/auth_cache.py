@@ -0,0 +1,183 @@
+from uuid import UUID
+from typing import Dict, Optional, Tuple, Type
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.config import settings
+from app.models.user import User
+from app.models.hasta import Hasta
+from app.models.eczane import Eczane
+from app.models.doktor import Doktor
+from app.models.admin import Admin
+from app.utils.cache import TTLCache, attach, snapshot
+from app.utils.enums import UserType
+
+
+# Kullanıcı tipine göre profil modeli
+PROFILE_MODELS: Dict[UserType, Type] = {
+    UserType.HASTA: Hasta,
+    UserType.ECZANE: Eczane,
+    UserType.DOKTOR: Doktor,
+    UserType.ADMIN: Admin,
+}
+
+# Kullanıcı tipine göre User üzerindeki profil ilişkisi
+PROFILE_RELATIONSHIPS = {
+    UserType.HASTA: User.hasta,
+    UserType.ECZANE: User.eczane,
+    UserType.DOKTOR: User.doktor,
+    UserType.ADMIN: User.admin,
+}
+
+# Kimliği doğrulanmış kullanıcı ve rol profili - user_id -> kolon değerleri
+# Süreç içidir; birden fazla worker çalışıyorsa başka worker'daki değişiklikler
+# en geç TTL kadar gecikmeyle görülür.
+_user_cache = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_SIZE)
+_profile_cache = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_SIZE)
+
+# Profil kaydı olmayan kullanıcılar için işaret
+_NO_PROFILE = object()
+
+_PENDING_KEY = "auth_cache_pending_user_ids"
+
+
+def _link(profile, user: User) -> None:
+    """
+    profile.user ilişkisini değişiklik kaydı oluşturmadan doldur
+    
+    Session identity map'i zayıf referans tuttuğundan, aksi halde profil
+    üzerinden kullanıcıya erişmek ek bir SELECT çalıştırabilir.
+    """
+    set_committed_value(profile, "user", user)
+
+
+def get_user(db: Session, user_id: UUID) -> Optional[User]:
+    """
+    Kullanıcıyı cache'ten, yoksa veritabanından getir
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        User veya None
+    """
+    values = _user_cache.get(user_id)
+    if values is not None:
+        return attach(db, User, values)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        _user_cache.set(user_id, snapshot(user))
+    return user
+
+
+def get_profile(db: Session, user: User):
+    """
+    Kullanıcının rol profilini (Hasta/Eczane/Doktor/Admin) cache'ten, yoksa veritabanından getir
+
+    Args:
+        db: Database session
+        user: Kimliği doğrulanmış kullanıcı
+
+    Returns:
+        Profil modeli veya None
+    """
+    model = PROFILE_MODELS.get(user.user_type)
+    if model is None:
+        return None
+
+    values = _profile_cache.get(user.id)
+    if values is _NO_PROFILE:
+        return None
+    if values is not None:
+        return attach(db, model, values)
+
+    profile = db.query(model).filter(model.user_id == user.id).first()
+    _profile_cache.set(user.id, snapshot(profile) if profile is not None else _NO_PROFILE)
+    return profile
+
+
+def get_user_with_profile(db: Session, user_id: UUID, user_type: UserType) -> Tuple[Optional[User], object]:
+    """
+    Kullanıcıyı ve beklenen rol profilini birlikte getir
+    
+    İkisi de cache'teyse veritabanına gidilmez; değilse kullanıcı ve profil
+    tek bir JOIN sorgusu ile yüklenir.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        user_type: Beklenen kullanıcı tipi (yüklenecek profil)
+    
+    Returns:
+        tuple: (User veya None, profil veya None) - kullanıcı başka tipteyse profil None
+    """
+    user_values = _user_cache.get(user_id)
+    profile_values = _profile_cache.get(user_id)
+    if user_values is not None and profile_values is not None:
+        user = attach(db, User, user_values)
+        if profile_values is _NO_PROFILE or user.user_type != user_type:
+            return user, None
+        profile = attach(db, PROFILE_MODELS[user_type], profile_values)
+        _link(profile, user)
+        return user, profile
+    
+    relationship = PROFILE_RELATIONSHIPS[user_type]
+    user = db.query(User).options(
+        joinedload(relationship)
+    ).filter(User.id == user_id).first()
+    if user is None:
+        return None, None
+    
+    _user_cache.set(user_id, snapshot(user))
+    if user.user_type != user_type:
+        return user, None
+    
+    profile = getattr(user, relationship.key)
+    if profile is None:
+        _profile_cache.set(user_id, _NO_PROFILE)
+        return user, None
+    
+    _link(profile, user)
+    _profile_cache.set(user_id, snapshot(profile))
+    return user, profile
+
+
+def invalidate_user(user_id: UUID) -> None:
+    """Kullanıcının cache'teki kaydını ve profilini sil"""
+    _user_cache.pop(user_id)
+    _profile_cache.pop(user_id)
+
+
+def clear() -> None:
+    """Tüm cache'i temizle"""
+    _user_cache.clear()
+    _profile_cache.clear()
+
+
+# ==================== INVALIDATION ====================
+# Kullanıcı veya profil satırı değiştiren her flush (admin is_active değişikliği,
+# profil güncellemesi, şifre değişikliği, eczane onayı...) ilgili kaydı commit
+# sonrasında düşürür. Commit'ten önce silmek, eşzamanlı bir isteğin eski
+# değeri yeniden cache'e yazmasına izin verirdi.
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            pending.add(obj.id)
+        elif isinstance(obj, tuple(PROFILE_MODELS.values())):
+            pending.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_users(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
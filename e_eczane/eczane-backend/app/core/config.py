@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator, ConfigDict
-from typing import List, Union
+from typing import List, Optional, Union
 
 
 class Settings(BaseSettings):
@@ -11,12 +11,63 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Async route handler'ları için (boşsa DATABASE_URL'den türetilir: asyncpg / aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Okuma replikası (opsiyonel): read-only endpoint'ler buraya yönlenir
+    DATABASE_READ_URL: Optional[str] = None
+    # Boşsa DATABASE_READ_URL'den türetilir
+    ASYNC_DATABASE_READ_URL: Optional[str] = None
+    # Yazma yapan istemcinin okumaları bu süre primary'ye gider (replika gecikmesinden uzun olmalı)
+    READ_YOUR_WRITES_SECONDS: int = 5
+    # Bağlantı havuzu (senkron ve async engine için ayrı ayrı uygulanır)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Havuz ve overflow doluyken bağlantı için en fazla bekleme
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    # Bu süreden eski bağlantılar yeniden açılır (-1 = kapalı)
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Sunucu tarafı sorgu zaman aşımı, yalnızca PostgreSQL (0 = kapalı)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # Tüm SQL ifadelerini logla (yalnızca hata ayıklama için; throughput'u ciddi düşürür)
+    DB_ECHO: bool = False
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # İptal edilen token listesi bu aralıkla veritabanından yenilenir (diğer worker'lardaki iptaller için)
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 5
+    # JWT doğrulama: "jose" veya "hmac" (HS* için standart kütüphaneyle hızlı yol)
+    JWT_BACKEND: str = "jose"
+    # Doğrulanmış token cache'i (0 = kapalı)
+    JWT_DECODE_CACHE_TTL_SECONDS: int = 300
+    JWT_DECODE_CACHE_MAX_SIZE: int = 10000
     
+    # bcrypt maliyeti (testlerde 4 yeterli) ve hash işlemleri için sınırlı havuz
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    # Sırada bekleyebilecek en fazla hash işi, aşılırsa 503 (0 = sınırsız)
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    
+    # Kimliği doğrulanmış kullanıcı/profil cache'i (0 = kapalı)
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    
+    # SQLite'ta ilaç araması için bellek içi index'in en fazla yaşı
+    DRUG_SEARCH_INDEX_TTL_SECONDS: int = 300
+    
+    # İlaç kataloğu (id/barkod) cache'i (0 = kapalı)
+    DRUG_CATALOG_CACHE_TTL_SECONDS: int = 300
+    DRUG_CATALOG_CACHE_MAX_SIZE: int = 50000
+
+    # Muadil ilaç grafının en fazla yaşı (diğer worker'lardaki değişiklikler için)
+    DRUG_EQUIVALENCE_GRAPH_TTL_SECONDS: int = 300
+
+    # Admin dashboard istatistik özetinin yenilenme aralığı (0 = her istekte hesapla)
+    DASHBOARD_STATS_CACHE_TTL_SECONDS: int = 60
+
     # CORS
     ALLOWED_ORIGINS: Union[str, List[str]] = "http://localhost:5173,http://localhost:5174,http://localhost:5175,http://localhost:3000"
     
@@ -30,7 +81,19 @@ class Settings(BaseSettings):
     MAIL_PASSWORD: str = ""
     MAIL_FROM: str = "noreply@e-eczane.com"
     MAIL_FROM_NAME: str = "E-Eczane Sistemi"
-    
+    MAIL_STARTTLS: bool = True
+
+    # E-posta outbox worker'ı (yerel test için: python -m app.scripts.dev_smtp_server)
+    EMAIL_WORKER_ENABLED: bool = True
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_POLL_INTERVAL_SECONDS: float = 2.0
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: int = 30
+    EMAIL_RETRY_MAX_SECONDS: int = 3600
+    EMAIL_SMTP_TIMEOUT_SECONDS: int = 30
+    # Bu süre boyunca kullanılmayan SMTP bağlantısı kapatılır
+    EMAIL_SMTP_IDLE_SECONDS: int = 60
+
     # Frontend URL
     FRONTEND_URL: str = "http://localhost:5174"
     
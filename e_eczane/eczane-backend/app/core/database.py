@@ -1,15 +1,119 @@
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.utils.cache import TTLCache
+
+
+class _PoolMetrikleri:
+    """
+    Bağlantı havuzuna metrik ekleyen mixin
+    
+    connect() süresi ölçülür: havuzda boş bağlantı beklemek, gerekiyorsa yeni
+    bağlantı açmak ve pre-ping dahil. Havuz ve overflow doluyken bekleyen
+    istekler burada görünür; DB_POOL_TIMEOUT_SECONDS aşılırsa zaman aşımı sayılır.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrik_lock = threading.Lock()
+        self._alinan = 0
+        self._toplam_bekleme = 0.0
+        self._en_uzun_bekleme = 0.0
+        self._zaman_asimi = 0
+        self._en_fazla_kullanilan = 0
+    
+    def connect(self):
+        baslangic = time.perf_counter()
+        try:
+            baglanti = super().connect()
+        except PoolTimeoutError:
+            with self._metrik_lock:
+                self._zaman_asimi += 1
+            raise
+        bekleme = time.perf_counter() - baslangic
+        
+        with self._metrik_lock:
+            self._alinan += 1
+            self._toplam_bekleme += bekleme
+            self._en_uzun_bekleme = max(self._en_uzun_bekleme, bekleme)
+            self._en_fazla_kullanilan = max(self._en_fazla_kullanilan, self.checkedout())
+        return baglanti
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Havuzun anlık durumu ve süreç başından beri biriken bekleme metrikleri
+        
+        Returns:
+            dict: pool_size, max_overflow, checked_out, checked_in, overflow
+            (pool_size üstünde açılmış bağlantı), peak_checked_out, checkouts,
+            wait_avg_ms, wait_max_ms, timeouts
+        """
+        with self._metrik_lock:
+            return {
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "peak_checked_out": self._en_fazla_kullanilan,
+                "checkouts": self._alinan,
+                "wait_avg_ms": round(self._toplam_bekleme / self._alinan * 1000, 3) if self._alinan else 0.0,
+                "wait_max_ms": round(self._en_uzun_bekleme * 1000, 3),
+                "timeouts": self._zaman_asimi,
+            }
+
+
+class OlculenQueuePool(_PoolMetrikleri, QueuePool):
+    """Metrik yayınlayan QueuePool (senkron engine)"""
+
+
+class OlculenAsyncQueuePool(_PoolMetrikleri, AsyncAdaptedQueuePool):
+    """Metrik yayınlayan AsyncAdaptedQueuePool (async engine)"""
+
+
+def engine_ayarlari(url: URL, async_engine: bool = False) -> Dict[str, Any]:
+    """
+    Settings'teki havuz ayarlarından create_engine / create_async_engine argümanlarını üret
+    
+    Args:
+        url: Veritabanı URL'si
+        async_engine: Async engine için mi
+    
+    Returns:
+        dict: echo, poolclass, pool_size, max_overflow, pool_timeout, pool_recycle,
+        pool_pre_ping ve (PostgreSQL'de statement timeout için) connect_args
+    """
+    ayarlar: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "poolclass": OlculenAsyncQueuePool if async_engine else OlculenQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    
+    # Sunucu tarafında sorgu zaman aşımı (yalnızca PostgreSQL; SQLite'ta karşılığı yok)
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0 and url.get_backend_name() == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            ayarlar["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            ayarlar["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return ayarlar
+
 
 # Database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=True if settings.ENVIRONMENT == "development" else False,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+_sync_url = make_url(settings.DATABASE_URL)
+engine = create_engine(_sync_url, **engine_ayarlari(_sync_url))
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,6 +121,135 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for models
 Base = declarative_base()
 
+# Senkron sürücüye karşılık gelen async sürücü
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> URL:
+    """
+    Senkron veritabanı URL'sini async sürücülü karşılığına çevir
+    
+    Args:
+        url: Veritabanı URL'si (örn. postgresql://... veya sqlite:///./test.db)
+    
+    Returns:
+        URL: Async sürücülü URL (postgresql+asyncpg://..., sqlite+aiosqlite://...)
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername in ASYNC_DRIVERS.values():
+        return parsed
+    return parsed.set(drivername=driver)
+
+
+# Async engine - async def route handler'larında event loop'u bloklamadan sorgu çalıştırır
+_async_url = make_url(settings.ASYNC_DATABASE_URL) if settings.ASYNC_DATABASE_URL else async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_ayarlari(_async_url, async_engine=True))
+
+# Async session factory - commit sonrası nesneler expire edilmez (örtük lazy load I/O'su olmasın)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+# Okuma replikası (opsiyonel) - yalnızca okuma yapan endpoint'ler get_read_db / get_async_read_db
+# ile buraya yönlenir. Ayarlanmamışsa None: okumalar da primary'ye gider.
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+if settings.DATABASE_READ_URL:
+    _read_url = make_url(settings.DATABASE_READ_URL)
+    read_engine = create_engine(_read_url, **engine_ayarlari(_read_url))
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    
+    _async_read_url = (
+        make_url(settings.ASYNC_DATABASE_READ_URL) if settings.ASYNC_DATABASE_READ_URL
+        else async_database_url(settings.DATABASE_READ_URL)
+    )
+    async_read_engine = create_async_engine(_async_read_url, **engine_ayarlari(_async_read_url, async_engine=True))
+    AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Senkron ve async engine havuzlarının (replika varsa onlarınkiler de) metrikleri"""
+    metrikler = {
+        "sync": engine.pool.metrics(),
+        "async": async_engine.sync_engine.pool.metrics(),
+    }
+    if read_engine is not None:
+        metrikler["read"] = read_engine.pool.metrics()
+    if async_read_engine is not None:
+        metrikler["async_read"] = async_read_engine.sync_engine.pool.metrics()
+    return metrikler
+
+
+# ==================== READ-YOUR-OWN-WRITES ====================
+# Yazma yapan (POST/PUT/PATCH/DELETE, 2xx/3xx) istemcinin okumaları READ_YOUR_WRITES_SECONDS
+# boyunca primary'ye gider: sipariş oluşturan hasta hemen ardından siparişlerini
+# replikadan (henüz gelmemiş olabilir) değil primary'den okur. İstemci Authorization
+# header'ının özetiyle tanınır. Süreç içidir; birden fazla worker varsa bu süre için
+# load balancer'da aynı istemcinin aynı worker'a gitmesi gerekir.
+_son_yazanlar = TTLCache(settings.READ_YOUR_WRITES_SECONDS, 100000)
+
+_GUVENLI_METODLAR = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _istemci_anahtari(authorization: Optional[str]) -> Optional[bytes]:
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).digest()
+
+
+def yazma_kaydet(authorization: Optional[str]) -> None:
+    """İstemcinin okumalarını bir süre primary'ye yönlendir"""
+    anahtar = _istemci_anahtari(authorization)
+    if anahtar is not None:
+        _son_yazanlar.set(anahtar, True)
+
+
+def primary_gerekli(authorization: Optional[str]) -> bool:
+    """İstemci yakın zamanda yazma yaptıysa True"""
+    anahtar = _istemci_anahtari(authorization)
+    return anahtar is not None and _son_yazanlar.get(anahtar) is not None
+
+
+class ReadYourWritesMiddleware:
+    """
+    Başarılı yazma isteklerini kaydeden ASGI middleware'i
+    
+    Replika yoksa hiçbir şey yapmaz. Kayıt yanıt başlarken yapılır; istemci
+    yanıtı aldığında sonraki okuması primary'ye gider. Yalnızca okuma
+    dependency'si kullanan POST'lar (ör. eczane listeleme) yazma sayılmaz.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in _GUVENLI_METODLAR or ReadSessionLocal is None:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message):
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                and not scope.get("state", {}).get("salt_okuma")
+            ):
+                authorization = dict(scope["headers"]).get(b"authorization")
+                if authorization:
+                    yazma_kaydet(authorization.decode("latin-1"))
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+
 
 # Dependency
 def get_db():
@@ -27,4 +260,31 @@ def get_db():
         db.close()
 
 
+# Async dependency
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Read-only dependency: replikaya yönlenir (replika yoksa veya istemci az önce
+# yazma yaptıysa get_db'nin session'ını kullanır). Bu session ile yazma yapılmamalı.
+def get_read_db(request: Request, db=Depends(get_db)):
+    request.state.salt_okuma = True
+    if ReadSessionLocal is None or primary_gerekli(request.headers.get("authorization")):
+        yield db
+        return
+    read_db = ReadSessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
 
+
+# Read-only async dependency (get_read_db'nin AsyncSession karşılığı)
+async def get_async_read_db(request: Request, db=Depends(get_async_db)):
+    request.state.salt_okuma = True
+    if AsyncReadSessionLocal is None or primary_gerekli(request.headers.get("authorization")):
+        yield db
+        return
+    async with AsyncReadSessionLocal() as read_db:
+        yield read_db
@@ -1,56 +1,69 @@
 from uuid import UUID
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from app.core import auth_cache, token_denylist
 from app.core.database import get_db
 from app.core.security import decode_access_token
 from app.models.user import User
 from app.utils.enums import UserType
+from app.utils.pagination import CursorKey, decode_cursor
 
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+# Token'sız da çağrılabilen endpoint'ler için (ör. çıkış)
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    JWT token'dan mevcut kullanıcıyı al
-    
-    Args:
-        token: Authorization header'dan alınan JWT token
-        db: Database session
-    
-    Returns:
-        User: Mevcut kullanıcı
-    
-    Raises:
-        HTTPException: Token geçersiz veya kullanıcı bulunamadı
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Kimlik doğrulaması başarısız",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _get_token_user_id(token: str, db: Session) -> UUID:
+    """
+    JWT token'ı decode edip user_id'yi döndür
     
-    # Token'ı decode et
+    İptal kontrolü bellekteki denylist'e bakar; users tablosu okunmaz.
+    
+    Raises:
+        HTTPException: Token geçersiz veya iptal edilmiş
+    """
+    # Token'ı decode et (refresh / şifre sıfırlama token'ları access token yerine geçmez)
     payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
+    if payload is None or "type" in payload:
+        raise _credentials_exception()
+    
+    token_denylist.senkronize_et(db)
+    if token_denylist.iptal_edildi_mi(payload):
+        raise _credentials_exception()
     
     user_id: str = payload.get("user_id")
     if user_id is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    try:
+        return UUID(user_id)
+    except ValueError:
+        raise _credentials_exception()
+
+
+def _check_user(user: Optional[User]) -> None:
+    """
+    Kullanıcı bulundu ve aktif mi kontrol et
     
-    # Kullanıcıyı database'den al
-    user = db.query(User).filter(User.id == UUID(user_id)).first()
+    Raises:
+        HTTPException: Kullanıcı bulunamadı veya pasif
+    """
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     # Kullanıcı aktif mi kontrol et
     if not user.is_active:
@@ -58,7 +71,35 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Kullanıcı hesabı pasif durumda"
         )
+
+
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    JWT token'dan mevcut kullanıcıyı al
+    
+    Senkron Session kullandığı için düz def: FastAPI threadpool'da çalıştırır,
+    cache ıskasında ve denylist senkronizasyonunda event loop bloklanmaz.
+    
+    Args:
+        token: Authorization header'dan alınan JWT token
+        db: Database session
+    
+    Returns:
+        User: Mevcut kullanıcı
     
+    Raises:
+        HTTPException: Token geçersiz veya kullanıcı bulunamadı
+    """
+    user_id = _get_token_user_id(token, db)
+    
+    # Kullanıcıyı cache'ten veya database'den al
+    user = auth_cache.get_user(db, user_id)
+    _check_user(user)
     return user
 
 
@@ -121,8 +162,57 @@ async def get_current_doktor(current_user: User = Depends(require_role(UserType.
 
 
 
+def require_profile(user_type: UserType, profil_adi: str):
+    """
+    Kullanıcıyı ve rol profilini tek sorguda çözen dependency üret
+    
+    Kullanıcı ve profil auth cache'teyse veritabanına hiç gidilmez; değilse
+    User ve profil tek bir JOIN ile yüklenir. Profilin .user ilişkisi aynı
+    session'da olduğundan ek sorgu çalıştırmaz. get_current_user gibi düz def
+    olduğundan threadpool'da çalışır.
+    
+    Args:
+        user_type: İzin verilen rol
+        profil_adi: Hata mesajında kullanılacak profil adı
+    
+    Returns:
+        Dependency function
+    """
+    def profile_resolver(
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db)
+    ):
+        user_id = _get_token_user_id(token, db)
+        user, profile = auth_cache.get_user_with_profile(db, user_id, user_type)
+        _check_user(user)
+        
+        if user.user_type != user_type:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Bu işlem için yetkiniz yok. Gerekli rol: {user_type.value}"
+            )
+        
+        if profile is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{profil_adi} profili bulunamadı"
+            )
+        
+        return profile
+    
+    return profile_resolver
+
+
+# Profil dependency'leri - FastAPI aynı istekte sonucu tekrar kullanır
+get_current_hasta_profile = require_profile(UserType.HASTA, "Hasta")
+get_current_eczane_profile = require_profile(UserType.ECZANE, "Eczane")
+get_current_doktor_profile = require_profile(UserType.DOKTOR, "Doktor")
+
+
+
+
 # Optional current user (token olmadan da çalışır)
-async def get_current_user_optional(
+def get_current_user_optional(
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> Optional[User]:
@@ -134,11 +224,32 @@ async def get_current_user_optional(
         return None
     
     try:
-        return await get_current_user(token, db)
+        return get_current_user(token, db)
     except HTTPException:
         return None
 
 
 
 
-
+def get_cursor_key(
+    cursor: Optional[str] = Query(
+        None,
+        description="Önceki yanıttaki next_cursor değeri. Verilirse page yok sayılır (keyset sayfalama)"
+    )
+) -> Optional[CursorKey]:
+    """
+    Liste endpoint'leri için opsiyonel keyset cursor'ını çöz
+    
+    Raises:
+        HTTPException: Cursor geçersiz
+    """
+    if cursor is None:
+        return None
+    
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Geçersiz cursor"
+        )
@@ -1,12 +1,98 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.utils.cache import TTLCache
 
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context (maliyet ortam başına ayarlanır; mevcut hash'ler kendi maliyetiyle doğrulanır)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+
+
+class PasswordHashPool:
+    """
+    bcrypt işlemleri için sınırlı thread havuzu
+    
+    Hash/doğrulama işleri yalnızca bu havuzun thread'lerinde çalışır. Async
+    endpoint'ler sonucu await ettiği için giriş yoğunluğunda bile event loop ve
+    FastAPI'nin ortak threadpool'u (sipariş, arama) meşgul edilmez. Bekleyen iş
+    sayısı sınırı aşarsa yeni istek 503 ile reddedilir.
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int = 0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._bekleyen = 0
+        self._calisan = 0
+        self._tamamlanan = 0
+        self._reddedilen = 0
+    
+    def _gonder(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self.max_queue and self._bekleyen >= self.max_queue:
+                self._reddedilen += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Sistem şu anda yoğun, lütfen biraz sonra tekrar deneyin",
+                    headers={"Retry-After": "1"}
+                )
+            self._bekleyen += 1
+        return self._executor.submit(self._calistir, fn, *args)
+    
+    def _calistir(self, fn: Callable, *args):
+        with self._lock:
+            self._bekleyen -= 1
+            self._calisan += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._calisan -= 1
+                self._tamamlanan += 1
+    
+    def run(self, fn: Callable, *args):
+        """İşi havuzda çalıştır ve sonucu bekle (senkron çağıranlar için)"""
+        return self._gonder(fn, *args).result()
+    
+    async def run_async(self, fn: Callable, *args):
+        """İşi havuzda çalıştır; event loop'u bloklamadan sonucu bekle"""
+        return await asyncio.wrap_future(self._gonder(fn, *args))
+    
+    def metrics(self) -> Dict[str, int]:
+        """
+        Havuz metrikleri
+        
+        Returns:
+            Dict: queue_depth (sırada bekleyen), active (çalışan), max_workers,
+                max_queue, completed (tamamlanan), rejected (kuyruk dolu diye reddedilen)
+        """
+        with self._lock:
+            return {
+                "queue_depth": self._bekleyen,
+                "active": self._calisan,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "completed": self._tamamlanan,
+                "rejected": self._reddedilen,
+            }
+
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
 
 
 
@@ -22,7 +108,23 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: Şifreler eşleşiyorsa True
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password'ün async karşılığı (bcrypt sınırlı hash havuzunda çalışır)
+    
+    Args:
+        plain_password: Kullanıcının girdiği düz şifre
+        hashed_password: Database'deki hash'lenmiş şifre
+    
+    Returns:
+        bool: Şifreler eşleşiyorsa True
+    """
+    return await password_hash_pool.run_async(pwd_context.verify, plain_password, hashed_password)
 
 
 
@@ -37,10 +139,36 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Hash'lenmiş şifre
     """
-    return pwd_context.hash(password)
+    return password_hash_pool.run(pwd_context.hash, password)
+
+
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    get_password_hash'in async karşılığı (bcrypt sınırlı hash havuzunda çalışır)
+    
+    Args:
+        password: Hash'lenecek düz şifre
+    
+    Returns:
+        str: Hash'lenmiş şifre
+    """
+    return await password_hash_pool.run_async(pwd_context.hash, password)
+
 
 
 
+def _token_kimligi() -> Dict[str, Any]:
+    """
+    Token'ı tek tek iptal edilebilir kılan claim'ler
+    
+    jti: token'a özgü kimlik (iptal listesinde anahtar)
+    iat: saniyenin altı hassasiyetle oluşturulma zamanı; kullanıcının tüm
+    token'ları iptal edildiğinde bu andan önce üretilenler geçersiz sayılır
+    """
+    return {"jti": uuid.uuid4().hex, "iat": time.time()}
+
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -60,7 +188,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, **_token_kimligi()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
@@ -68,28 +196,130 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
 
 
 
+# HS* algoritmaları için hash fonksiyonları (hmac backend'i)
+_HMAC_HASHES = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _jwt_decode_jose(token: str) -> Dict[str, Any]:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def _jwt_decode_hmac(token: str) -> Dict[str, Any]:
+    """
+    HS256/384/512 token'larını standart kütüphane ile doğrula
+    
+    python-jose'nin genel amaçlı yolunun (JWK nesnesi, claim seçenekleri)
+    hızlı karşılığıdır; imza, alg başlığı ve exp/nbf/iat/aud/sub/jti
+    kontrollerini jose ile aynı kurallarla yapar.
+    
+    Raises:
+        JWTError: Token geçersiz veya süresi dolmuş
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64url_decode(header_b64))
+        payload = json.loads(_b64url_decode(payload_b64))
+        signature = _b64url_decode(signature_b64)
+        signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+    except ValueError as e:
+        raise JWTError("Token çözümlenemedi") from e
+    
+    if not isinstance(header, dict) or header.get("alg") != settings.ALGORITHM:
+        raise JWTError("Desteklenmeyen algoritma")
+    if not isinstance(payload, dict):
+        raise JWTError("Geçersiz payload")
+    
+    beklenen = hmac.new(settings.SECRET_KEY.encode(), signing_input, _HMAC_HASHES[settings.ALGORITHM]).digest()
+    if not hmac.compare_digest(beklenen, signature):
+        raise JWTError("İmza doğrulanamadı")
+    
+    simdi = int(time.time())
+    for claim in ("exp", "nbf", "iat"):
+        if claim in payload and (isinstance(payload[claim], bool) or not isinstance(payload[claim], (int, float))):
+            raise JWTError(f"{claim} sayı olmalı")
+    if "exp" in payload and int(payload["exp"]) < simdi:
+        raise JWTError("Token süresi dolmuş")
+    if "nbf" in payload and int(payload["nbf"]) > simdi:
+        raise JWTError("Token henüz geçerli değil")
+    # jose, audience verilmeden aud içeren token'ı reddeder
+    if "aud" in payload:
+        raise JWTError("Geçersiz audience")
+    for claim in ("sub", "jti"):
+        if claim in payload and not isinstance(payload[claim], str):
+            raise JWTError(f"{claim} string olmalı")
+    return payload
+
+
+# JWT doğrulama backend'leri: "jose" (varsayılan) veya "hmac" (yalnızca HS*, standart kütüphane)
+JWT_BACKENDS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "jose": _jwt_decode_jose,
+    "hmac": _jwt_decode_hmac,
+}
+
+if settings.JWT_BACKEND not in JWT_BACKENDS:
+    raise ValueError(f"Bilinmeyen JWT_BACKEND: {settings.JWT_BACKEND}")
+if settings.JWT_BACKEND == "hmac" and settings.ALGORITHM not in _HMAC_HASHES:
+    raise ValueError(f"hmac JWT backend'i {settings.ALGORITHM} algoritmasını desteklemiyor")
+
+_jwt_decode = JWT_BACKENDS[settings.JWT_BACKEND]
+
+# Doğrulanmış access token -> claim'ler. Anahtar token'ın SHA-256 özetidir (ham token
+# bellekte tutulmaz); kayıt en geç token'ın exp anında düşer.
+_token_cache = TTLCache(settings.JWT_DECODE_CACHE_TTL_SECONDS, settings.JWT_DECODE_CACHE_MAX_SIZE)
+
+
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
     """
     JWT token'ı decode et ve içindeki veriyi al
     
+    Aynı token kısa aralıklarla tekrar tekrar doğrulandığından sonuç,
+    token'ın süresi dolana kadar (en fazla JWT_DECODE_CACHE_TTL_SECONDS)
+    cache'lenir.
+    
     Args:
         token: Decode edilecek JWT token
     
     Returns:
         Dict: Token içindeki veriler veya None
     """
+    anahtar = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(anahtar)
+    if payload is not None:
+        if "exp" not in payload or payload["exp"] >= time.time():
+            return dict(payload)
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = _jwt_decode(token)
     except JWTError:
         return None
+    
+    if "exp" in payload:
+        kalan = payload["exp"] - time.time()
+        if kalan > 0:
+            _token_cache.set(anahtar, payload, kalan)
+    else:
+        _token_cache.set(anahtar, payload)
+    return dict(payload)
+
+
+def clear_token_cache() -> None:
+    """Doğrulanmış token cache'ini boşalt"""
+    _token_cache.clear()
 
 
 
 
 def create_refresh_token(data: Dict[str, Any]) -> str:
     """
-    JWT refresh token oluştur (7 günlük)
+    JWT refresh token oluştur (REFRESH_TOKEN_EXPIRE_DAYS, varsayılan 7 gün)
     
     Args:
         data: Token'a eklenecek veriler
@@ -98,13 +328,37 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
         str: JWT refresh token
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=7)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "type": "refresh", **_token_kimligi()})
     
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def decode_refresh_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Refresh token'ı doğrula
+    
+    Refresh token'lar nadiren ve yalnızca bir kez kullanıldığından
+    doğrulanmış token cache'ine alınmaz.
+    
+    Args:
+        token: Doğrulanacak JWT refresh token
+    
+    Returns:
+        Dict: Token içindeki veriler; geçersizse, refresh token değilse veya
+        jti/user_id içermiyorsa None
+    """
+    try:
+        payload = _jwt_decode(token)
+    except JWTError:
+        return None
+    
+    if payload.get("type") != "refresh" or not payload.get("jti") or not payload.get("user_id"):
+        return None
+    return payload
+
+
 def create_password_reset_token(email: str) -> str:
     """
     Şifre sıfırlama token'ı oluştur (1 saatlik)
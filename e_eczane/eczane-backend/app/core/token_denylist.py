@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Mapping, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.repositories.token_iptal_repository import TokenIptalRepository
+
+logger = logging.getLogger(__name__)
+
+
+# İptal edilen token'lar - istek başına kontrol yalnızca bu sözlüklere bakar (O(1)),
+# veritabanına veya users tablosuna gidilmez. Bu süreçte yapılan iptaller hemen,
+# diğer worker'lardakiler en geç TOKEN_REVOCATION_SYNC_SECONDS içinde görülür.
+# jti -> token'ın exp zamanı (epoch)
+_iptal_jtiler: Dict[str, float] = {}
+# user_id -> (bu andan önce üretilen token'lar geçersiz, kaydın son geçerliliği) (epoch)
+_kullanici_esikleri: Dict[str, Tuple[float, float]] = {}
+
+_lock = threading.Lock()
+_son_senkron = 0.0
+# Sonraki senkronizasyonda okunacak kayıtların created_at alt sınırı (None = hepsi)
+_filigran: Optional[datetime] = None
+_son_temizlik = 0.0
+
+# Diğer worker'larda geç commit edilen kayıtlar kaçmasın diye okuma penceresi geriye kaydırılır
+_SENKRON_PAYI = timedelta(seconds=60)
+# Süresi dolmuş iptal kayıtları veritabanından bu aralıkla silinir
+_TEMIZLIK_ARALIGI = 3600
+
+
+def _epoch(zaman: datetime) -> float:
+    # SQLite timezone bilgisini saklamaz; kayıtlar UTC'dir
+    if zaman.tzinfo is None:
+        zaman = zaman.replace(tzinfo=timezone.utc)
+    return zaman.timestamp()
+
+
+def _jti_ekle(jti: str, son_gecerlilik: float) -> None:
+    _iptal_jtiler[jti] = son_gecerlilik
+
+
+def _esik_ekle(user_id: str, oncesi_gecersiz: float, son_gecerlilik: float) -> None:
+    mevcut = _kullanici_esikleri.get(user_id)
+    if mevcut is not None:
+        oncesi_gecersiz = max(oncesi_gecersiz, mevcut[0])
+        son_gecerlilik = max(son_gecerlilik, mevcut[1])
+    _kullanici_esikleri[user_id] = (oncesi_gecersiz, son_gecerlilik)
+
+
+def iptal_edildi_mi(payload: Mapping[str, Any]) -> bool:
+    """
+    Token iptal edilmiş mi kontrol et (sabit zamanlı, veritabanına gitmez)
+    
+    Args:
+        payload: Doğrulanmış token claim'leri
+    
+    Returns:
+        bool: Token tek başına veya kullanıcının tüm token'larıyla birlikte iptal edildiyse True
+    """
+    jti = payload.get("jti")
+    if jti is not None and jti in _iptal_jtiler:
+        return True
+    
+    esik = _kullanici_esikleri.get(payload.get("user_id"))
+    return esik is not None and payload.get("iat", 0) < esik[0]
+
+
+def senkronize_et(db: Session, zorla: bool = False) -> None:
+    """
+    Diğer worker'larda yapılan iptalleri veritabanından al
+    
+    En fazla TOKEN_REVOCATION_SYNC_SECONDS'ta bir, yalnızca son
+    senkronizasyondan sonra eklenen kayıtlar okunur.
+    
+    Args:
+        db: Database session
+        zorla: Süreye bakmadan hemen senkronize et
+    """
+    global _son_senkron, _filigran, _son_temizlik
+    
+    simdi = time.monotonic()
+    with _lock:
+        if not zorla and _son_senkron and simdi - _son_senkron < settings.TOKEN_REVOCATION_SYNC_SECONDS:
+            return
+        # Eşzamanlı istekler aynı sorguyu tekrarlamasın
+        _son_senkron = simdi
+        sonra = _filigran
+    
+    repo = TokenIptalRepository(db)
+    baslangic = datetime.now(timezone.utc)
+    kayitlar = repo.get_yeni_kayitlar(sonra or datetime(1970, 1, 1, tzinfo=timezone.utc))
+    
+    with _lock:
+        for kayit in kayitlar:
+            son_gecerlilik = _epoch(kayit.son_gecerlilik)
+            if kayit.jti is not None:
+                _jti_ekle(kayit.jti, son_gecerlilik)
+            else:
+                _esik_ekle(str(kayit.user_id), _epoch(kayit.oncesi_gecersiz), son_gecerlilik)
+        _filigran = baslangic - _SENKRON_PAYI
+        
+        # Süresi dolmuş token'lar zaten reddedilir: bellekte tutmaya gerek yok
+        simdi_epoch = time.time()
+        for jti in [j for j, son in _iptal_jtiler.items() if son <= simdi_epoch]:
+            del _iptal_jtiler[jti]
+        for user_id in [u for u, (_, son) in _kullanici_esikleri.items() if son <= simdi_epoch]:
+            del _kullanici_esikleri[user_id]
+        
+        temizle = simdi - _son_temizlik >= _TEMIZLIK_ARALIGI
+        if temizle:
+            _son_temizlik = simdi
+    
+    if temizle:
+        _suresi_dolanlari_sil(db)
+
+
+def _suresi_dolanlari_sil(db: Session) -> None:
+    """
+    Süresi dolmuş iptal kayıtlarını ayrı, kısa ömürlü bir session'da sil
+    
+    İsteğin session'ı commit edilmez; silme hatası isteği düşürmez, bir
+    sonraki temizlik aralığında tekrar denenir.
+    
+    Args:
+        db: İsteğin session'ı (yalnızca aynı veritabanına bağlanmak için)
+    """
+    temizlik_db = Session(bind=db.get_bind())
+    try:
+        TokenIptalRepository(temizlik_db).temizle()
+    except Exception:
+        temizlik_db.rollback()
+        logger.exception("Süresi dolmuş token iptal kayıtları silinemedi")
+    finally:
+        temizlik_db.close()
+
+
+def token_iptal_et(db: Session, payload: Mapping[str, Any]) -> bool:
+    """
+    Tek bir access veya refresh token'ı iptal et
+    
+    Args:
+        db: Database session
+        payload: Doğrulanmış token claim'leri (jti, user_id ve exp içermeli)
+    
+    Returns:
+        bool: İptal edildiyse True, token zaten iptal edilmişse False
+    """
+    token_tipi = payload.get("type", "access")
+    son_gecerlilik = float(payload["exp"])
+    eklendi = TokenIptalRepository(db).token_ekle(
+        user_id=UUID(payload["user_id"]),
+        jti=payload["jti"],
+        token_tipi=token_tipi,
+        son_gecerlilik=datetime.fromtimestamp(son_gecerlilik, timezone.utc)
+    )
+    
+    # Refresh token'lar yalnızca /refresh isteğinde (veritabanında) kontrol edilir
+    if token_tipi == "access":
+        with _lock:
+            _jti_ekle(payload["jti"], son_gecerlilik)
+    return eklendi
+
+
+def kullanici_tokenlarini_iptal_et(db: Session, user_id: UUID) -> None:
+    """
+    Kullanıcının şu ana kadar üretilmiş tüm access ve refresh token'larını iptal et
+    
+    Args:
+        db: Database session
+        user_id: Kullanıcı ID
+    """
+    simdi = datetime.now(timezone.utc)
+    son_gecerlilik = simdi + max(
+        timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    TokenIptalRepository(db).kullanici_ekle(user_id, simdi, son_gecerlilik)
+    
+    with _lock:
+        _esik_ekle(str(user_id), simdi.timestamp(), son_gecerlilik.timestamp())
+
+
+def clear() -> None:
+    """Bellekteki iptal listesini temizle (sonraki kontrol veritabanından yeniden yükler)"""
+    global _son_senkron, _filigran, _son_temizlik
+    with _lock:
+        _iptal_jtiler.clear()
+        _kullanici_esikleri.clear()
+        _son_senkron = 0.0
+        _filigran = None
+        _son_temizlik = 0.0
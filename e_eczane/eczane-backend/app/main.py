@@ -1,9 +1,13 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.core.config import settings
-from app.core.database import get_db, engine, Base
+from app.core.database import get_db, engine, Base, pool_metrics, ReadYourWritesMiddleware
+from app.core.security import password_hash_pool
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.services.email_worker import EmailWorker
 
 # Import ALL models to create tables
 from app.models import (
@@ -12,7 +16,9 @@ from app.models import (
     Recete, ReceteIlac,
     Stok,
     Siparis, SiparisDetay, SiparisDurumGecmisi,
-    Bildirim
+    Bildirim,
+    EmailOutbox,
+    TokenIptal
 )
 
 # Import routers
@@ -21,12 +27,25 @@ from app.routers import auth, hasta, eczane, admin, doktor
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+# E-posta outbox worker'ı (her uvicorn worker'ında bir tane; kayıtlar satır kilidiyle paylaşılır)
+email_worker = EmailWorker()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.EMAIL_WORKER_ENABLED:
+        email_worker.baslat()
+    yield
+    await email_worker.durdur()
+
+
 app = FastAPI(
     title="Eczane Yönetim Sistemi API",
     description="Eczane ve ilaç satış yönetim sistemi",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 
@@ -37,8 +56,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Okuma replikası varsa yazma yapan istemcinin sonraki okumaları primary'ye gider
+app.add_middleware(ReadYourWritesMiddleware)
+
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -63,6 +86,15 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+def metrics():
+    """Süreç içi havuz metrikleri (bcrypt kuyruğu, veritabanı bağlantı havuzları)"""
+    return {
+        "password_hash": password_hash_pool.metrics(),
+        "db_pool": pool_metrics()
+    }
+
+
 @app.get("/db-test")
 def test_database(db: Session = Depends(get_db)):
     """Database bağlantısını test et"""
@@ -9,6 +9,8 @@ from app.models.recete import Recete, ReceteIlac, ReceteDurum
 from app.models.stok import Stok
 from app.models.siparis import Siparis, SiparisDetay, SiparisDurumGecmisi
 from app.models.bildirim import Bildirim
+from app.models.email_outbox import EmailOutbox
+from app.models.token_iptal import TokenIptal
 
 __all__ = [
     "BaseModel",
@@ -26,7 +28,9 @@ __all__ = [
     "Siparis",
     "SiparisDetay",
     "SiparisDurumGecmisi",
-    "Bildirim"
+    "Bildirim",
+    "EmailOutbox",
+    "TokenIptal"
 ]
 
 
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Float, ForeignKey, Enum as SQLEnum, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import BaseModel
 from app.utils.enums import OnayDurumu
+from app.utils.geo import geohash_encode
 
 
 class Eczane(BaseModel):
@@ -18,6 +19,11 @@ class Eczane(BaseModel):
     ilce = Column(String(100), nullable=True, index=True)  # İlçe bilgisi
     il = Column(String(100), nullable=True, index=True)  # İl bilgisi
     
+    # Koordinatlar ve en yakın eczane araması için geohash (grid) index'i
+    enlem = Column(Float, nullable=True)
+    boylam = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True)
+    
     # Eczacı bilgileri
     eczaci_adi = Column(String(100), nullable=False)
     eczaci_soyadi = Column(String(100), nullable=False)
@@ -41,6 +47,12 @@ class Eczane(BaseModel):
     stoklar = relationship("Stok", back_populates="eczane", cascade="all, delete-orphan")
     siparisler = relationship("Siparis", back_populates="eczane", cascade="all, delete-orphan")
     
+    # Geohash önek araması (LIKE 'hucre%') için: PostgreSQL'de C dışı collation ile
+    # varsayılan btree index LIKE'ı karşılayamaz, varchar_pattern_ops gerekir
+    __table_args__ = (
+        Index('ix_eczaneler_geohash', 'geohash', postgresql_ops={'geohash': 'varchar_pattern_ops'}),
+    )
+    
     @property
     def eczaci_tam_ad(self):
         return f"Ecz. {self.eczaci_adi} {self.eczaci_soyadi}"
@@ -49,12 +61,11 @@ class Eczane(BaseModel):
         return f"<Eczane(sicil_no={self.sicil_no}, ad={self.eczane_adi})>"
 
 
-
-
-
-
-
-
-
-
-
+@event.listens_for(Eczane, "before_insert")
+@event.listens_for(Eczane, "before_update")
+def _set_geohash(mapper, connection, target):
+    """Koordinatlar değiştiğinde geohash kolonunu güncel tut"""
+    if target.enlem is not None and target.boylam is not None:
+        target.geohash = geohash_encode(target.enlem, target.boylam)
+    else:
+        target.geohash = None
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, Enum as SQLEnum, Index
+from sqlalchemy.sql import func
+from app.models.base import BaseModel
+from app.utils.enums import EmailDurum
+
+
+class EmailOutbox(BaseModel):
+    """Gönderilmeyi bekleyen e-posta kuyruğu (outbox) modeli"""
+    __tablename__ = "email_outbox"
+
+    alici = Column(String(255), nullable=False)
+    konu = Column(String(255), nullable=False)
+    metin = Column(Text, nullable=False)
+    html = Column(Text, nullable=True)
+
+    durum = Column(SQLEnum(EmailDurum), default=EmailDurum.BEKLEMEDE, nullable=False)
+    deneme_sayisi = Column(Integer, default=0, nullable=False)
+    # Worker bu zamandan önce kaydı almaz (yeniden deneme beklemesi / işlemdeki kaydın kilidi)
+    sonraki_deneme = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    son_hata = Column(Text, nullable=True)
+    gonderilme_tarihi = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_durum_sonraki_deneme", "durum", "sonraki_deneme"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(alici={self.alici}, durum={self.durum}, deneme_sayisi={self.deneme_sayisi})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import BaseModel
@@ -16,6 +16,8 @@ class Hasta(BaseModel):
     mahalle = Column(String(100), nullable=True, index=True)
     ilce = Column(String(100), nullable=True, index=True)
     il = Column(String(100), nullable=True, index=True)
+    enlem = Column(Float, nullable=True)
+    boylam = Column(Float, nullable=True)
     telefon = Column(String(20), nullable=False)
     profil_resmi_url = Column(String(500), nullable=True)
     
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Numeric, Boolean, Enum as SQLEnum, ForeignKey, Integer, Text
+from sqlalchemy import Column, String, Numeric, Boolean, Enum as SQLEnum, ForeignKey, Integer, Text, DDL, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import BaseModel
 from app.utils.enums import IlacKategori
+from app.utils.search import normalize_search_text
 
 
 class Ilac(BaseModel):
@@ -22,6 +23,9 @@ class Ilac(BaseModel):
     firma = Column(String(200), nullable=True)
     prospektus_url = Column(String(500), nullable=True)
     
+    # Ad, barkod ve etken maddenin normalize edilmiş hali (PostgreSQL'de trigram index'li)
+    arama_metni = Column(Text, nullable=True)
+    
     # Relationships
     muadiller = relationship(
         "MuadilIlac",
@@ -41,10 +45,35 @@ class Ilac(BaseModel):
     recete_ilaclar = relationship("ReceteIlac", back_populates="ilac", cascade="all, delete-orphan")
     siparis_detaylari = relationship("SiparisDetay", back_populates="ilac")
     
+    # PostgreSQL'de arama_metni LIKE '%terim%' araması için trigram index'i
+    __table_args__ = (
+        Index(
+            "ix_ilaclar_arama_metni_trgm",
+            "arama_metni",
+            postgresql_using="gin",
+            postgresql_ops={"arama_metni": "gin_trgm_ops"}
+        ),
+    )
+    
     def __repr__(self):
         return f"<Ilac(barkod={self.barkod}, ad={self.ad})>"
 
 
+# gin_trgm_ops için pg_trgm eklentisi tablo (ve index) oluşturulmadan önce gerekli
+event.listen(
+    Ilac.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
+@event.listens_for(Ilac, "before_insert")
+@event.listens_for(Ilac, "before_update")
+def _set_arama_metni(mapper, connection, target):
+    """Ad, barkod veya etken madde değiştiğinde arama metnini güncel tut"""
+    target.arama_metni = normalize_search_text(target.ad, target.barkod, target.etken_madde)
+
+
 class MuadilIlac(BaseModel):
     """Muadil ilaç ilişki modeli"""
     __tablename__ = "muadil_ilaclar"
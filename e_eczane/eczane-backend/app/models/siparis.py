@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, Enum as SQLEnum, ForeignKey, Integer, Text
+from sqlalchemy import Column, String, Numeric, Enum as SQLEnum, ForeignKey, Integer, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import BaseModel
@@ -45,6 +45,13 @@ class Siparis(BaseModel):
     detaylar = relationship("SiparisDetay", back_populates="siparis", cascade="all, delete-orphan")
     durum_gecmisi = relationship("SiparisDurumGecmisi", back_populates="siparis", cascade="all, delete-orphan")
     
+    # Sipariş listeleri (keyset sayfalama) ve tarih aralığı filtreleri için
+    __table_args__ = (
+        Index('ix_siparisler_created_at', 'created_at'),
+        Index('ix_siparisler_hasta_id_created_at', 'hasta_id', 'created_at'),
+        Index('ix_siparisler_eczane_id_created_at', 'eczane_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f"<Siparis(siparis_no={self.siparis_no}, durum={self.durum})>"
 
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.models.base import BaseModel
+
+
+class TokenIptal(BaseModel):
+    """
+    İptal edilen token kaydı (denylist)
+
+    jti doluysa tek bir token iptal edilmiştir (çıkış, refresh rotasyonu);
+    boşsa kullanıcının oncesi_gecersiz anından önce üretilen tüm token'ları
+    geçersizdir (hesap pasif yapıldı, şifre sıfırlandı, refresh token tekrar kullanıldı).
+    """
+    __tablename__ = "token_iptalleri"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    jti = Column(String(64), unique=True, nullable=True)
+    # "access" veya "refresh"; kullanıcı geneli iptalde boş
+    token_tipi = Column(String(16), nullable=True)
+    oncesi_gecersiz = Column(DateTime(timezone=True), nullable=True)
+    # Bu andan sonra iptal edilen token'ların süresi zaten dolmuştur, kayıt silinebilir
+    son_gecerlilik = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_token_iptalleri_created_at", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<TokenIptal(user_id={self.user_id}, jti={self.jti}, token_tipi={self.token_tipi})>"
@@ -6,5 +6,6 @@ This layer handles all database queries and operations.
 from app.repositories.ilac_repository import IlacRepository
 from app.repositories.eczane_repository import EczaneRepository
 from app.repositories.stok_repository import StokRepository
+from app.repositories.siparis_repository import SiparisRepository
 
-__all__ = ["IlacRepository", "EczaneRepository", "StokRepository"]
+__all__ = ["IlacRepository", "EczaneRepository", "StokRepository", "SiparisRepository"]
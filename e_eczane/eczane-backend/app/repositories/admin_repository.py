@@ -1,13 +1,30 @@
-from typing import List, Optional
+import threading
+from uuid import UUID
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, cast, Date
-from datetime import date, datetime, timedelta
+from sqlalchemy import func, and_
+from datetime import date, datetime, time, timedelta
+from app.core.config import settings
 from app.models.admin import Admin
 from app.models.user import User
 from app.models.eczane import Eczane
 from app.models.hasta import Hasta
 from app.models.siparis import Siparis
 from app.utils.enums import OnayDurumu, SiparisDurum, OdemeDurum
+from app.utils.cache import TTLCache
+from app.utils.pagination import CursorKey, apply_keyset, split_page
+
+
+# Dashboard özeti - gün -> {"dashboard": ..., "siparis": ...}
+# Her istekte siparisler tablosunu taramak yerine en fazla TTL süresinde bir hesaplanır;
+# sayılar bu süre kadar geride kalabilir.
+_dashboard_cache = TTLCache(settings.DASHBOARD_STATS_CACHE_TTL_SECONDS, 2)
+_dashboard_lock = threading.Lock()
+
+
+def clear_dashboard_cache() -> None:
+    """Dashboard özetini düşür (sonraki istekte yeniden hesaplanır)"""
+    _dashboard_cache.clear()
 
 
 class AdminRepository:
@@ -50,83 +67,127 @@ class AdminRepository:
         self,
         durum: Optional[SiparisDurum] = None,
         baslangic_tarih: Optional[date] = None,
-        bitis_tarih: Optional[date] = None
-    ) -> List[Siparis]:
-        """Tüm siparişleri getir (filtre ile)"""
-        query = self.db.query(Siparis).options(
-            joinedload(Siparis.hasta),
-            joinedload(Siparis.eczane)
-        )
+        bitis_tarih: Optional[date] = None,
+        page: int = 1,
+        page_size: int = 50,
+        cursor_key: Optional[CursorKey] = None
+    ) -> Tuple[List[UUID], int, Optional[str]]:
+        """
+        Siparişleri sayfalı getir (filtre ile)
+        
+        Sayfalama ve toplam sayı veritabanında hesaplanır. Tarih filtreleri
+        created_at üzerinde aralık olarak uygulanır, böylece index kullanılabilir.
+        Cursor verilmişse OFFSET yerine keyset sayfalama kullanılır.
+        
+        Returns:
+            tuple: (sayfadaki sipariş ID'leri, toplam kayıt sayısı, sonraki sayfa cursor'ı)
+        """
+        query = self.db.query(Siparis.id, Siparis.created_at)
         
         if durum:
             query = query.filter(Siparis.durum == durum)
         
         if baslangic_tarih:
-            query = query.filter(cast(Siparis.created_at, Date) >= baslangic_tarih)
+            query = query.filter(
+                Siparis.created_at >= datetime.combine(baslangic_tarih, time.min)
+            )
         
         if bitis_tarih:
-            query = query.filter(cast(Siparis.created_at, Date) <= bitis_tarih)
-        
-        return query.order_by(Siparis.created_at.desc()).all()
-    
-    def get_dashboard_stats(self) -> dict:
-        """Dashboard istatistiklerini hesapla"""
-        bugun = date.today()
-        
-        # Toplam sayılar
-        toplam_hasta = self.db.query(func.count(Hasta.id)).scalar()
-        toplam_eczane = self.db.query(func.count(Eczane.id)).scalar()
-        
-        # Aktif ve bekleyen eczaneler
-        aktif_eczane = self.db.query(func.count(Eczane.id)).filter(
-            Eczane.onay_durumu == OnayDurumu.ONAYLANDI
-        ).scalar()
-        
-        bekleyen_eczane = self.db.query(func.count(Eczane.id)).filter(
-            Eczane.onay_durumu == OnayDurumu.BEKLEMEDE
-        ).scalar()
-        
-        # Sipariş sayıları
-        toplam_siparis = self.db.query(func.count(Siparis.id)).scalar()
-        
-        bugunku_siparis = self.db.query(func.count(Siparis.id)).filter(
-            cast(Siparis.created_at, Date) == bugun
-        ).scalar()
+            query = query.filter(
+                Siparis.created_at < datetime.combine(bitis_tarih + timedelta(days=1), time.min)
+            )
         
-        # Ciro hesaplamaları (sadece teslim edilmiş siparişler)
-        toplam_ciro = self.db.query(func.sum(Siparis.toplam_tutar)).filter(
-            Siparis.durum == SiparisDurum.TESLIM_EDILDI
-        ).scalar() or 0
+        total = query.with_entities(func.count(Siparis.id)).scalar() or 0
         
-        bugunku_ciro = self.db.query(func.sum(Siparis.toplam_tutar)).filter(
-            and_(
-                Siparis.durum == SiparisDurum.TESLIM_EDILDI,
-                cast(Siparis.created_at, Date) == bugun
-            )
-        ).scalar() or 0
+        query = apply_keyset(query, Siparis, cursor_key)
+        if cursor_key is None:
+            query = query.offset((page - 1) * page_size)
         
-        return {
-            "toplam_hasta": toplam_hasta or 0,
-            "toplam_eczane": toplam_eczane or 0,
-            "aktif_eczane": aktif_eczane or 0,
-            "bekleyen_eczane": bekleyen_eczane or 0,
-            "toplam_siparis": toplam_siparis or 0,
-            "bugunku_siparis": bugunku_siparis or 0,
-            "toplam_ciro": float(toplam_ciro),
-            "bugunku_ciro": float(bugunku_ciro)
-        }
+        rows, next_cursor = split_page(query.limit(page_size + 1).all(), page_size)
+        return [row.id for row in rows], total, next_cursor
+    
+    def get_dashboard_stats(self) -> dict:
+        """Dashboard istatistikleri (DASHBOARD_STATS_CACHE_TTL_SECONDS'lık özetten)"""
+        return self._get_ozet()["dashboard"]
     
     def get_siparis_stats(self) -> dict:
-        """Sipariş durum istatistikleri"""
-        stats = {}
-        
-        for durum in SiparisDurum:
-            count = self.db.query(func.count(Siparis.id)).filter(
-                Siparis.durum == durum
-            ).scalar()
-            stats[durum.value] = count or 0
+        """Sipariş durum istatistikleri (dashboard ile aynı özetten)"""
+        return self._get_ozet()["siparis"]
+    
+    def _get_ozet(self) -> dict:
+        """
+        Dashboard özetini cache'ten getir, yoksa veya süresi dolduysa yeniden hesapla
+        
+        Özet eşzamanlı isteklerde tek kez hesaplanır; diğerleri hesaplananı bekler.
+        Gün değişince bugünkü sayılar sıfırdan başlasın diye anahtar tarihi içerir.
+        """
+        anahtar = date.today()
+        ozet = _dashboard_cache.get(anahtar)
+        if ozet is not None:
+            return ozet
+        
+        with _dashboard_lock:
+            ozet = _dashboard_cache.get(anahtar)
+            if ozet is None:
+                ozet = self.hesapla_ozet(anahtar)
+                _dashboard_cache.set(anahtar, ozet)
+        return ozet
+    
+    def hesapla_ozet(self, bugun: date) -> dict:
+        """
+        Dashboard ve sipariş durum istatistiklerini iki aggregate sorguyla hesapla
+        
+        siparisler tablosu tek geçişte taranır: tüm sayılar ve cirolar
+        FILTER (WHERE ...) ile aynı SELECT'te toplanır.
+        
+        Args:
+            bugun: "Bugünkü" sipariş ve ciro için gün
+        
+        Returns:
+            dict: {"dashboard": DashboardIstatistik alanları, "siparis": durum -> sayı}
+        """
+        # Tarih aralığı (cast yerine) created_at index'ini kullanabilir
+        bugun_mu = and_(
+            Siparis.created_at >= datetime.combine(bugun, time.min),
+            Siparis.created_at < datetime.combine(bugun + timedelta(days=1), time.min)
+        )
+        teslim_edildi = Siparis.durum == SiparisDurum.TESLIM_EDILDI
+        
+        siparis = self.db.query(
+            func.count(Siparis.id).label("toplam_siparis"),
+            func.count(Siparis.id).filter(bugun_mu).label("bugunku_siparis"),
+            func.sum(Siparis.toplam_tutar).filter(teslim_edildi).label("toplam_ciro"),
+            func.sum(Siparis.toplam_tutar).filter(and_(teslim_edildi, bugun_mu)).label("bugunku_ciro"),
+            *[
+                func.count(Siparis.id).filter(Siparis.durum == durum).label(durum.value)
+                for durum in SiparisDurum
+            ]
+        ).one()
+        
+        # Hasta sayısı skaler alt sorgu olarak eczane aggregate'ine eklenir
+        eczane = self.db.query(
+            self.db.query(func.count(Hasta.id)).scalar_subquery().label("toplam_hasta"),
+            func.count(Eczane.id).label("toplam_eczane"),
+            func.count(Eczane.id).filter(Eczane.onay_durumu == OnayDurumu.ONAYLANDI).label("aktif_eczane"),
+            func.count(Eczane.id).filter(Eczane.onay_durumu == OnayDurumu.BEKLEMEDE).label("bekleyen_eczane")
+        ).one()
         
-        return stats
+        return {
+            "dashboard": {
+                "toplam_hasta": eczane.toplam_hasta or 0,
+                "toplam_eczane": eczane.toplam_eczane or 0,
+                "aktif_eczane": eczane.aktif_eczane or 0,
+                "bekleyen_eczane": eczane.bekleyen_eczane or 0,
+                "toplam_siparis": siparis.toplam_siparis or 0,
+                "bugunku_siparis": siparis.bugunku_siparis or 0,
+                "toplam_ciro": float(siparis.toplam_ciro or 0),
+                "bugunku_ciro": float(siparis.bugunku_ciro or 0)
+            },
+            "siparis": {
+                durum.value: getattr(siparis, durum.value) or 0
+                for durum in SiparisDurum
+            }
+        }
     
     def get_all_doktorlar(self, is_active: Optional[bool] = None) -> List:
         """Tüm doktorları getir (filtre ile)"""
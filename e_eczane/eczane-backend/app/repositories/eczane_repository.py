@@ -1,10 +1,59 @@
 from uuid import UUID
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Sequence, Union
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, case, literal
 from app.models.eczane import Eczane
 from app.models.stok import Stok
+from app.models.user import User
 from app.utils.enums import OnayDurumu
+from app.utils.geo import GEOHASH_PRECISION, geohash_cells_around, covered_radius_km, haversine_km
+
+
+def _sepeti_karsila(
+    sepet: Dict[UUID, int],
+    secenekler: Dict[UUID, List[UUID]],
+    stok: Dict[UUID, int]
+) -> Optional[Dict[UUID, UUID]]:
+    """
+    Sepetin her kalemini stoğu yeten tek bir seçenekle karşıla (geri izlemeli arama)
+    
+    Kalemler sepet sırasıyla, seçenekler tercih sırasıyla denenir; böylece
+    bulunan ilk atama tercih sırasına en uygun olanıdır. Başarısız ara
+    durumlar hatırlanır, aynı kalan stokla tekrar denenmez.
+    
+    Args:
+        sepet: {ilac_id: miktar} dictionary
+        secenekler: {ilac_id: [tercih sırasına göre ilaç ID'leri]}
+        stok: {ilac_id: eczanedeki stok miktarı}
+    
+    Returns:
+        {istenen_ilac_id: karsilayan_ilac_id} veya karşılanamıyorsa None
+    """
+    kalemler = list(sepet.items())
+    kalan = dict(stok)
+    atama: Dict[UUID, UUID] = {}
+    basarisiz = set()
+    
+    def ara(i: int) -> bool:
+        if i == len(kalemler):
+            return True
+        durum = (i, tuple(sorted(kalan.items())))
+        if durum in basarisiz:
+            return False
+        istenen_ilac_id, miktar = kalemler[i]
+        for aday_id in secenekler.get(istenen_ilac_id, []):
+            if kalan.get(aday_id, 0) >= miktar:
+                kalan[aday_id] -= miktar
+                atama[istenen_ilac_id] = aday_id
+                if ara(i + 1):
+                    return True
+                kalan[aday_id] += miktar
+                del atama[istenen_ilac_id]
+        basarisiz.add(durum)
+        return False
+    
+    return atama if ara(0) else None
 
 
 class EczaneRepository:
@@ -44,92 +93,295 @@ class EczaneRepository:
         ilac_ids: List[str],
         hasta_mahalle: Optional[str] = None,
         hasta_ilce: Optional[str] = None,
-        hasta_il: Optional[str] = None
-    ) -> List[Tuple[Eczane, Dict]]:
+        hasta_il: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[Eczane, Dict, bool]]:
         """
         Belirli ilaçlara sahip eczaneleri bul ve konuma göre sırala
         Sadece hastanın ilindeki eczaneleri döndürür.
         
+        Konum önceliği (mahalle > ilçe > il) SQL tarafında CASE ile hesaplanır;
+        eczaneler sıralanıp limitlendikten sonra yalnızca seçilen eczanelerin
+        stok kayıtları aynı sorguda okunur.
+        
         Args:
             ilac_ids: Aranan ilaç ID'leri (string format)
             hasta_mahalle: Hastanın mahallesi
             hasta_ilce: Hastanın ilçesi
             hasta_il: Hastanın ili
+            limit: En fazla kaç eczane döneceği (None = hepsi)
         
         Returns:
-            List of (Eczane, stok_bilgileri) tuples - konuma göre sıralı, aynı ildeki eczaneler
+            List of (Eczane, stok_bilgileri, tum_urunler_mevcut) tuples - konuma göre sıralı, aynı ildeki eczaneler
         """
         # Convert string IDs to UUIDs
-        uuid_ilac_ids = [UUID(ilac_id) for ilac_id in ilac_ids if ilac_id]
+        uuid_ilac_ids = list({UUID(ilac_id) for ilac_id in ilac_ids if ilac_id})
         
         if not uuid_ilac_ids:
             return []
         
-        # Stokları olan eczaneleri bul
-        stoklar = self.db.query(Stok).filter(
+        # Konum önceliği:
+        # 0 = Aynı mahalle (en yakın)
+        # 1 = Farklı mahalle, aynı ilçe
+        # 2 = Farklı ilçe, aynı il
+        oncelik_kosullari = []
+        if hasta_mahalle:
+            oncelik_kosullari.append((func.lower(Eczane.mahalle) == func.lower(hasta_mahalle), 0))
+        if hasta_ilce:
+            oncelik_kosullari.append((func.lower(Eczane.ilce) == func.lower(hasta_ilce), 1))
+        oncelik = case(*oncelik_kosullari, else_=2) if oncelik_kosullari else literal(2)
+        
+        # Stokta en az bir aranan ilacı olan onaylı ve aktif eczaneler
+        siralama = self.db.query(
+            Eczane.id.label("eczane_id"),
+            oncelik.label("oncelik"),
+            func.count(Stok.id).label("mevcut_ilac_sayisi")
+        ).join(
+            Stok, Stok.eczane_id == Eczane.id
+        ).join(
+            User, User.id == Eczane.user_id
+        ).filter(
             Stok.ilac_id.in_(uuid_ilac_ids),
-            Stok.miktar > 0
-        ).all()
+            Stok.miktar > 0,
+            Eczane.onay_durumu == OnayDurumu.ONAYLANDI,
+            User.is_active == True
+        )
+        
+        # İl filtresi: Sadece hastanın ilindeki eczaneler (kritik!)
+        if hasta_il:
+            siralama = siralama.filter(
+                Eczane.il.isnot(None),
+                Eczane.il.ilike(hasta_il)
+            )
         
-        # Eczaneleri grupla ve stok bilgilerini topla
-        eczane_stok_map = {}
+        siralama = siralama.group_by(Eczane.id).order_by(oncelik, Eczane.eczane_adi, Eczane.id)
+        if limit is not None:
+            siralama = siralama.limit(limit)
+        siralama = siralama.subquery()
         
-        for stok in stoklar:
-            if stok.eczane_id not in eczane_stok_map:
-                eczane_stok_map[stok.eczane_id] = {}
+        # Seçilen eczaneler ve yalnızca onların ilgili stok kayıtları
+        rows = self.db.query(
+            Eczane, Stok, siralama.c.mevcut_ilac_sayisi
+        ).join(
+            siralama, siralama.c.eczane_id == Eczane.id
+        ).join(
+            Stok, and_(
+                Stok.eczane_id == Eczane.id,
+                Stok.ilac_id.in_(uuid_ilac_ids),
+                Stok.miktar > 0
+            )
+        ).order_by(
+            siralama.c.oncelik, Eczane.eczane_adi, Eczane.id
+        ).all()
+        
+        # Satırları sırayı koruyarak eczane bazında grupla
+        result = []
+        for eczane, stok, mevcut_ilac_sayisi in rows:
+            if not result or result[-1][0] is not eczane:
+                result.append((eczane, {}, mevcut_ilac_sayisi == len(uuid_ilac_ids)))
             
-            eczane_stok_map[stok.eczane_id][str(stok.ilac_id)] = {
+            result[-1][1][str(stok.ilac_id)] = {
                 "miktar": stok.miktar,
                 "stok_durumu": stok.stok_durumu
             }
         
-        # Eczane bilgilerini al
-        eczane_ids = list(eczane_stok_map.keys())
+        return result
+    
+    def find_nearest_eczaneler_with_stock(
+        self,
+        ilac_ids: List[str],
+        enlem: float,
+        boylam: float,
+        k: int = 20,
+        hasta_il: Optional[str] = None
+    ) -> List[Tuple[Eczane, Dict, bool, Optional[float]]]:
+        """
+        Belirli ilaçlara sahip en yakın k eczaneyi mesafeye göre sıralı getir
         
-        # Temel filtre: onaylı ve aktif eczaneler
-        query = self.db.query(Eczane).join(Eczane.user).filter(
-            Eczane.id.in_(eczane_ids),
-            Eczane.onay_durumu == OnayDurumu.ONAYLANDI,
-            Eczane.user.has(is_active=True)
-        )
+        Eczaneler geohash hücrelerine göre indekslidir. Arama, noktanın hücresi
+        ve 8 komşusundan başlar; k eczane bulunamazsa veya k. eczane bloğun
+        kesin kapsadığı yarıçapın dışındaysa hücreler büyütülür. Böylece yalnızca
+        noktanın çevresindeki eczaneler okunur. PostGIS gerektirmez; SQLite'ta da
+        aynı şekilde çalışır.
         
-        # İl filtresi: Sadece hastanın ilindeki eczaneler (kritik!)
-        if hasta_il:
-            query = query.filter(
-                Eczane.il.isnot(None),
-                Eczane.il.ilike(hasta_il)
+        Koordinatı olmayan eczaneler mesafe hesaplanamadığından sona, konum
+        önceliğine (mahalle > ilçe > il) göre eklenir.
+        
+        Args:
+            ilac_ids: Aranan ilaç ID'leri (string format)
+            enlem: Hastanın enlemi
+            boylam: Hastanın boylamı
+            k: En fazla kaç eczane döneceği
+            hasta_il: Hastanın ili (verilirse sadece o ildeki eczaneler)
+        
+        Returns:
+            List of (Eczane, stok_bilgileri, tum_urunler_mevcut, mesafe_km) tuples
+        """
+        uuid_ilac_ids = list({UUID(ilac_id) for ilac_id in ilac_ids if ilac_id})
+        
+        if not uuid_ilac_ids or k <= 0:
+            return []
+        
+        adaylar: List[Tuple[float, Eczane]] = []
+        for precision in range(GEOHASH_PRECISION, -1, -1):
+            query = self.db.query(Eczane).join(
+                Stok, Stok.eczane_id == Eczane.id
+            ).join(
+                User, User.id == Eczane.user_id
+            ).filter(
+                Stok.ilac_id.in_(uuid_ilac_ids),
+                Stok.miktar > 0,
+                Eczane.geohash.isnot(None),
+                Eczane.onay_durumu == OnayDurumu.ONAYLANDI,
+                User.is_active == True
             )
+            
+            if hasta_il:
+                query = query.filter(
+                    Eczane.il.isnot(None),
+                    Eczane.il.ilike(hasta_il)
+                )
+            
+            if precision > 0:
+                hucreler = geohash_cells_around(enlem, boylam, precision)
+                query = query.filter(or_(*[Eczane.geohash.like(f"{hucre}%") for hucre in hucreler]))
+            
+            eczaneler = query.distinct().all()
+            adaylar = sorted(
+                ((haversine_km(enlem, boylam, eczane.enlem, eczane.boylam), eczane) for eczane in eczaneler),
+                key=lambda aday: aday[0]
+            )
+            
+            # precision 0 = tüm eczaneler tarandı
+            if precision == 0:
+                break
+            if len(adaylar) >= k and adaylar[k - 1][0] <= covered_radius_km(enlem, precision):
+                break
+        
+        adaylar = adaylar[:k]
+        mesafeler = {eczane.id: mesafe for mesafe, eczane in adaylar}
         
-        eczaneler = query.all()
-        
-        # Eczaneleri konuma göre sırala (mahalle > ilce > il)
-        def get_location_priority(eczane: Eczane) -> int:
-            """
-            Konum önceliği:
-            0 = Aynı mahalle (en yakın)
-            1 = Farklı mahalle, aynı ilçe
-            2 = Farklı ilçe, aynı il
-            """
-            if hasta_mahalle and eczane.mahalle and eczane.mahalle.lower() == hasta_mahalle.lower():
-                return 0
-            if hasta_ilce and eczane.ilce and eczane.ilce.lower() == hasta_ilce.lower():
-                return 1
-            # Aynı il (zaten filtrelenmiş)
-            return 2
-        
-        # Eczaneleri öncelik sırasına göre sırala
-        sorted_eczaneler = sorted(eczaneler, key=get_location_priority)
+        # Koordinatsız eczanelerle tamamla
+        if len(adaylar) < k:
+            for eczane, _, _ in self.find_eczaneler_with_stock(
+                ilac_ids,
+                hasta_il=hasta_il,
+                limit=k + len(adaylar)
+            ):
+                if len(adaylar) >= k:
+                    break
+                if eczane.geohash is None:
+                    adaylar.append((None, eczane))
+        
+        stok_sonuclari = self._get_stok_bilgileri([eczane.id for _, eczane in adaylar], uuid_ilac_ids)
         
         result = []
-        for eczane in sorted_eczaneler:
-            result.append((eczane, eczane_stok_map[eczane.id]))
+        for _, eczane in adaylar:
+            stok_bilgileri = stok_sonuclari.get(eczane.id, {})
+            result.append((
+                eczane,
+                stok_bilgileri,
+                len(stok_bilgileri) == len(uuid_ilac_ids),
+                mesafeler.get(eczane.id)
+            ))
         
         return result
     
+    def find_eczaneler_for_sepet(
+        self,
+        sepet: Dict[UUID, int],
+        secenekler: Dict[UUID, List[UUID]],
+        hasta_mahalle: Optional[str] = None,
+        hasta_ilce: Optional[str] = None,
+        hasta_il: Optional[str] = None,
+        enlem: Optional[float] = None,
+        boylam: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[Eczane, Dict[UUID, Tuple[UUID, int]], Optional[float]]]:
+        """
+        Sepeti asıl ilaçlarla veya muadilleriyle karşılayabilen eczaneler
+        
+        Sepetteki ve muadil ilaçların tümü için find_eczaneler_with_stock bir
+        kez çağrılır (eczane ve stok için iki sorgu); karşılama hesabı bellekte
+        yapılır. Her kalem tek bir ilaçla (asıl ilaç veya bir muadili) karşılanır;
+        bir kalem birden fazla muadile bölünmez. Aynı stok iki kalemi birden
+        karşılamaz. Atama geri izlemeli aramayla bulunur: ilk kalemlerin tercih
+        sırası korunur, ama bir kalemin tercihi sonraki kalemi karşılanamaz
+        bırakıyorsa diğer seçenekler de denenir.
+        
+        Args:
+            sepet: {ilac_id: miktar} dictionary
+            secenekler: {ilac_id: [tercih sırasına göre ilaç ID'leri]} - asıl ilaç ve muadilleri
+            hasta_mahalle: Hastanın mahallesi
+            hasta_ilce: Hastanın ilçesi
+            hasta_il: Hastanın ili
+            enlem: Hastanın enlemi (verilirse koordinatlı eczaneler mesafeye göre öne alınır)
+            boylam: Hastanın boylamı
+            limit: En fazla kaç eczane döneceği (None = hepsi)
+        
+        Returns:
+            List of (Eczane, {istenen_ilac_id: (karsilayan_ilac_id, stok_miktari)}, mesafe_km) tuples
+        """
+        aday_ids = {ilac_id for ilac_ids in secenekler.values() for ilac_id in ilac_ids}
+        if not sepet or not aday_ids:
+            return []
+        
+        eczaneler = self.find_eczaneler_with_stock(
+            [str(ilac_id) for ilac_id in aday_ids],
+            hasta_mahalle,
+            hasta_ilce,
+            hasta_il
+        )
+        
+        result = []
+        for eczane, stok_bilgileri, _ in eczaneler:
+            stok = {UUID(ilac_id): bilgi["miktar"] for ilac_id, bilgi in stok_bilgileri.items()}
+            atama = _sepeti_karsila(sepet, secenekler, stok)
+            if atama is None:
+                continue
+            karsilama = {
+                istenen_ilac_id: (aday_id, stok[aday_id])
+                for istenen_ilac_id, aday_id in atama.items()
+            }
+            
+            mesafe_km = None
+            if enlem is not None and boylam is not None and eczane.enlem is not None and eczane.boylam is not None:
+                mesafe_km = haversine_km(enlem, boylam, eczane.enlem, eczane.boylam)
+            result.append((eczane, karsilama, mesafe_km))
+        
+        if enlem is not None and boylam is not None:
+            # Koordinatlı eczaneler mesafeye göre, diğerleri konum önceliği sırasıyla sonda
+            result.sort(key=lambda kayit: (kayit[2] is None, kayit[2] or 0.0))
+        
+        return result[:limit] if limit is not None else result
+    
+    def _get_stok_bilgileri(
+        self,
+        eczane_ids: List[UUID],
+        ilac_ids: List[UUID]
+    ) -> Dict[UUID, Dict[str, Dict]]:
+        """Verilen eczanelerdeki pozitif stokları tek sorguda {eczane_id: {ilac_id: bilgi}} olarak getir"""
+        if not eczane_ids:
+            return {}
+        
+        stoklar = self.db.query(Stok).filter(
+            Stok.eczane_id.in_(eczane_ids),
+            Stok.ilac_id.in_(ilac_ids),
+            Stok.miktar > 0
+        ).all()
+        
+        result: Dict[UUID, Dict[str, Dict]] = {}
+        for stok in stoklar:
+            result.setdefault(stok.eczane_id, {})[str(stok.ilac_id)] = {
+                "miktar": stok.miktar,
+                "stok_durumu": stok.stok_durumu
+            }
+        return result
+    
     def check_stock_availability(
         self,
         eczane_id: UUID,
-        ilac_miktar_map: Dict[str, int]
+        ilac_miktar_map: Dict[Union[UUID, str], int]
     ) -> Tuple[bool, Dict]:
         """
         Eczanede istenen ilaçların stoğu yeterli mi kontrol et
@@ -141,20 +393,119 @@ class EczaneRepository:
         Returns:
             (tumu_yeterli: bool, eksik_ilaclar: dict)
         """
-        eksik_ilaclar = {}
+        eczane_uuid = eczane_id if isinstance(eczane_id, UUID) else UUID(eczane_id)
+        return self.check_stock_availability_bulk([eczane_uuid], ilac_miktar_map)[eczane_uuid]
+    
+    def check_stock_availability_bulk(
+        self,
+        eczane_ids: Sequence[Union[UUID, str]],
+        ilac_miktar_map: Dict[Union[UUID, str], int]
+    ) -> Dict[UUID, Tuple[bool, Dict]]:
+        """
+        Birden fazla eczanede istenen ilaçların stoğu yeterli mi kontrol et
+        
+        Tüm eczane ve ilaç çiftlerinin stokları tek sorguda okunur; sorgu
+        sayısı eczane ve ilaç sayısıyla artmaz.
+        
+        Args:
+            eczane_ids: Eczane ID'leri
+            ilac_miktar_map: {ilac_id: miktar} dictionary
+        
+        Returns:
+            {eczane_id: (tumu_yeterli, eksik_ilaclar)} dictionary - eksik_ilaclar
+            ilaç ID'sinin standart metin haliyle anahtarlanır
+        """
+        eczane_uuids = [
+            eczane_id if isinstance(eczane_id, UUID) else UUID(eczane_id)
+            for eczane_id in eczane_ids
+        ]
+        ilac_uuids = {
+            ilac_id: ilac_id if isinstance(ilac_id, UUID) else UUID(ilac_id)
+            for ilac_id in ilac_miktar_map
+        }
+        
+        mevcut_map: Dict[Tuple[UUID, UUID], int] = {}
+        if eczane_uuids and ilac_uuids:
+            rows = self.db.query(
+                Stok.eczane_id,
+                Stok.ilac_id,
+                func.sum(Stok.miktar).label("miktar")
+            ).filter(
+                Stok.eczane_id.in_(eczane_uuids),
+                Stok.ilac_id.in_(list(ilac_uuids.values()))
+            ).group_by(
+                Stok.eczane_id,
+                Stok.ilac_id
+            ).all()
+            
+            mevcut_map = {(row.eczane_id, row.ilac_id): row.miktar for row in rows}
         
-        for ilac_id_str, istenen_miktar in ilac_miktar_map.items():
-            stok = self.db.query(Stok).filter(
-                Stok.eczane_id == eczane_id,
-                Stok.ilac_id == UUID(ilac_id_str)
-            ).first()
+        result = {}
+        for eczane_uuid in eczane_uuids:
+            eksik_ilaclar = {}
             
-            if not stok or stok.miktar < istenen_miktar:
-                mevcut_miktar = stok.miktar if stok else 0
-                eksik_ilaclar[ilac_id_str] = {
-                    "istenen": istenen_miktar,
-                    "mevcut": mevcut_miktar,
-                    "eksik": istenen_miktar - mevcut_miktar
-                }
-        
-        return len(eksik_ilaclar) == 0, eksik_ilaclar
\ No newline at end of file
+            for ilac_id, istenen_miktar in ilac_miktar_map.items():
+                mevcut_miktar = mevcut_map.get((eczane_uuid, ilac_uuids[ilac_id]), 0)
+                
+                if mevcut_miktar < istenen_miktar:
+                    eksik_ilaclar[str(ilac_uuids[ilac_id])] = {
+                        "istenen": istenen_miktar,
+                        "mevcut": mevcut_miktar,
+                        "eksik": istenen_miktar - mevcut_miktar
+                    }
+            
+            result[eczane_uuid] = (len(eksik_ilaclar) == 0, eksik_ilaclar)
+        
+        return result
+
+
+class AsyncEczaneRepository:
+    """
+    Eczane repository - async route handler'ları için AsyncSession ile
+    
+    Sorgular EczaneRepository ile aynıdır ve AsyncSession.run_sync ile
+    çalışır; veritabanı beklenirken event loop serbest kalır.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def _run(self, method: str, *args, **kwargs):
+        return await self.db.run_sync(
+            lambda session: getattr(EczaneRepository(session), method)(*args, **kwargs)
+        )
+    
+    async def get_by_id(self, eczane_id: UUID) -> Optional[Eczane]:
+        """ID'ye göre eczane getir"""
+        return await self._run("get_by_id", eczane_id)
+    
+    async def find_eczaneler_with_stock(
+        self,
+        ilac_ids: List[str],
+        hasta_mahalle: Optional[str] = None,
+        hasta_ilce: Optional[str] = None,
+        hasta_il: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[Eczane, Dict, bool]]:
+        """Belirli ilaçlara sahip eczaneleri bul ve konuma göre sırala"""
+        return await self._run("find_eczaneler_with_stock", ilac_ids, hasta_mahalle, hasta_ilce, hasta_il, limit=limit)
+    
+    async def find_nearest_eczaneler_with_stock(
+        self,
+        ilac_ids: List[str],
+        enlem: float,
+        boylam: float,
+        k: int = 20,
+        hasta_il: Optional[str] = None
+    ) -> List[Tuple[Eczane, Dict, bool, Optional[float]]]:
+        """Belirli ilaçlara sahip en yakın k eczaneyi mesafeye göre sıralı getir"""
+        return await self._run("find_nearest_eczaneler_with_stock", ilac_ids, enlem, boylam, k=k, hasta_il=hasta_il)
+    
+    async def find_eczaneler_for_sepet(
+        self,
+        sepet: Dict[UUID, int],
+        secenekler: Dict[UUID, List[UUID]],
+        **konum
+    ) -> List[Tuple[Eczane, Dict[UUID, Tuple[UUID, int]], Optional[float]]]:
+        """Sepeti asıl ilaçlarla veya muadilleriyle karşılayabilen eczaneler"""
+        return await self._run("find_eczaneler_for_sepet", sepet, secenekler, **konum)
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.email_outbox import EmailOutbox
+from app.utils.enums import EmailDurum
+
+
+class EmailOutboxRepository:
+    """E-posta outbox repository"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def ekle(self, alici: str, konu: str, metin: str, html: Optional[str] = None) -> EmailOutbox:
+        """
+        Gönderilmek üzere kuyruğa e-posta ekle
+        
+        Kayıt yalnızca session'a eklenir; e-postayı tetikleyen değişiklikle aynı
+        commit'te yazılması çağıranın sorumluluğundadır.
+        
+        Args:
+            alici: Alıcı e-posta adresi
+            konu: E-posta konusu
+            metin: Düz metin gövde
+            html: HTML gövde
+        
+        Returns:
+            EmailOutbox: Kuyruğa eklenen kayıt
+        """
+        kayit = EmailOutbox(
+            alici=alici,
+            konu=konu,
+            metin=metin,
+            html=html,
+            durum=EmailDurum.BEKLEMEDE,
+            deneme_sayisi=0,
+            sonraki_deneme=datetime.now(timezone.utc)
+        )
+        self.db.add(kayit)
+        return kayit
+    
+    def al_gonderilecekler(self, limit: int, kilit_suresi: timedelta) -> List[EmailOutbox]:
+        """
+        Zamanı gelmiş bekleyen e-postaları al ve kilitle
+        
+        Alınan kayıtların sonraki_deneme'si kilit süresi kadar ileri alınır: aynı kayıt
+        başka bir worker tarafından tekrar alınmaz, gönderim ortasında çöken worker'ın
+        kayıtları ise süre dolunca yeniden denenir. PostgreSQL'de FOR UPDATE SKIP LOCKED
+        ile eşzamanlı worker'lar birbirinin kilidini beklemez.
+        
+        Args:
+            limit: En fazla kaç kayıt alınacağı
+            kilit_suresi: Kayıtların diğer worker'lardan gizleneceği süre
+        
+        Returns:
+            List[EmailOutbox]: Gönderilecek kayıtlar (en eski önce)
+        """
+        simdi = datetime.now(timezone.utc)
+        kayitlar = self.db.query(EmailOutbox).filter(
+            EmailOutbox.durum == EmailDurum.BEKLEMEDE,
+            EmailOutbox.sonraki_deneme <= simdi
+        ).order_by(
+            EmailOutbox.sonraki_deneme
+        ).limit(limit).with_for_update(skip_locked=True).all()
+        
+        for kayit in kayitlar:
+            kayit.sonraki_deneme = simdi + kilit_suresi
+        self.db.commit()
+        return kayitlar
+    
+    def isaretle_gonderildi(self, kayit_ids: List[UUID]) -> None:
+        """Gönderilen e-postaları tek sorguda işaretle"""
+        if not kayit_ids:
+            return
+        self.db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(kayit_ids))
+            .values(
+                durum=EmailDurum.GONDERILDI,
+                deneme_sayisi=EmailOutbox.deneme_sayisi + 1,
+                gonderilme_tarihi=datetime.now(timezone.utc),
+                son_hata=None
+            )
+        )
+        self.db.commit()
+    
+    def isaretle_hatali(self, hatalar: List[Tuple[UUID, str, Optional[datetime]]]) -> None:
+        """
+        Gönderilemeyen e-postaları işaretle
+        
+        Args:
+            hatalar: (kayıt id, hata mesajı, sonraki deneme zamanı) listesi.
+                Sonraki deneme None ise kayıt kalıcı olarak başarısız sayılır.
+        """
+        for kayit_id, hata, sonraki_deneme in hatalar:
+            degerler = {
+                "deneme_sayisi": EmailOutbox.deneme_sayisi + 1,
+                "son_hata": hata[:1000],
+            }
+            if sonraki_deneme is None:
+                degerler["durum"] = EmailDurum.BASARISIZ
+            else:
+                degerler["sonraki_deneme"] = sonraki_deneme
+            self.db.execute(
+                update(EmailOutbox).where(EmailOutbox.id == kayit_id).values(**degerler)
+            )
+        self.db.commit()
@@ -1,13 +1,343 @@
-from typing import List, Optional, Tuple
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, and_, event, false, inspect
+from app.core.config import settings
 from app.models.ilac import Ilac, MuadilIlac
 from app.models.stok import Stok
-from app.schemas.ilac import IlacCreate, IlacUpdate, IlacSearchParams
+from app.schemas.ilac import IlacCreate, IlacUpdate, IlacSearchParams, IlacAutocompleteItem
+from app.utils.cache import TTLCache, attach, snapshot
+from app.utils.equivalence import EquivalenceClasses
+from app.utils.search import PrefixIndex, TrigramIndex, normalize_search_text
 from decimal import Decimal
 from uuid import UUID
 
 
+# Aktif ilaçlar üzerinden kurulan süreç içi index'ler - tür -> (oluşturulma zamanı, index)
+#   "arama": SQLite'ta alt metin araması için TrigramIndex (PostgreSQL'de pg_trgm GIN index'i kullanılır)
+#   "oneri": Otomatik tamamlama için PrefixIndex ve ilac_id -> öneri eşlemesi
+_indeksler: Dict[str, Tuple[float, object]] = {}
+_indeks_lock = threading.Lock()
+
+# Devam eden index kurulumları - tür -> kurulum sırasında commit edilen ilaç
+# değişiklikleri (kurulan index'e yayımlanmadan önce yeniden işlenir)
+_kurulumlar: Dict[str, List[list]] = {}
+
+# invalidate_katalog() ile artar; öncesinde başlamış kurulum yayımlanmaz
+_indeks_nesli = 0
+
+# Süreç içi ilaç kataloğu - ("id", UUID) / ("barkod", str) -> kolon değerleri
+# Pasif ilaçlar da tutulur; aktiflik filtresi okurken uygulanır.
+_katalog_cache = TTLCache(settings.DRUG_CATALOG_CACHE_TTL_SECONDS, settings.DRUG_CATALOG_CACHE_MAX_SIZE)
+_katalog_lock = threading.Lock()
+
+# Her invalidation'da artar; okuma başladıktan sonra katalog değiştiyse
+# veritabanından okunan (artık eski) değer cache'e yazılmaz.
+_katalog_versiyonu = 0
+
+# Bu sayıdan fazla aday eşleşirse IN listesi yerine arama_metni LIKE kullanılır
+_MAX_ARAMA_ADAYI = 5000
+
+_PENDING_KEY = "ilac_katalogu_degisiklikleri"
+
+# Muadil ilişkilerinden kurulan denklik sınıfları - (oluşturulma zamanı, graf)
+# Muadillik iki yönlü ve geçişlidir: A~B ve B~C ise A, B ve C aynı sınıftadır.
+_muadil_grafi: Optional[Tuple[float, EquivalenceClasses]] = None
+_muadil_lock = threading.Lock()
+
+# Her muadil değişikliğinde artar (_katalog_versiyonu gibi)
+_muadil_nesli = 0
+
+_MUADIL_PENDING_KEY = "muadil_grafi_degisiklikleri"
+
+
+class _IlacSatiri(NamedTuple):
+    """Index'lere giren ilaç kolonları (sorgu satırı veya commit edilen değişiklik)"""
+    id: UUID
+    ad: str
+    barkod: str
+    etken_madde: Optional[str]
+    fiyat: Decimal
+    receteli: bool
+
+
+def _oneri_metinleri(row: _IlacSatiri) -> List[str]:
+    return [normalize_search_text(metin) for metin in (row.ad, row.barkod, row.etken_madde) if metin]
+
+
+def _arama_indeksi_olustur(rows) -> TrigramIndex:
+    return TrigramIndex(
+        (row.id, normalize_search_text(row.ad, row.barkod, row.etken_madde))
+        for row in rows
+    )
+
+
+def _arama_indeksi_guncelle(indeks: TrigramIndex, ilac_id: UUID, row: Optional[_IlacSatiri]) -> None:
+    indeks.update(ilac_id, normalize_search_text(row.ad, row.barkod, row.etken_madde) if row else None)
+
+
+def _oneri_indeksi_olustur(rows) -> Tuple[PrefixIndex, Dict[UUID, IlacAutocompleteItem]]:
+    oneriler = {row.id: IlacAutocompleteItem.model_validate(row) for row in rows}
+    indeks = PrefixIndex((row.id, _oneri_metinleri(row)) for row in rows)
+    return indeks, oneriler
+
+
+def _oneri_indeksi_guncelle(indeks, ilac_id: UUID, row: Optional[_IlacSatiri]) -> None:
+    prefix_indeks, oneriler = indeks
+    if row is None:
+        prefix_indeks.update(ilac_id, None)
+        oneriler.pop(ilac_id, None)
+    else:
+        oneriler[ilac_id] = IlacAutocompleteItem.model_validate(row)
+        prefix_indeks.update(ilac_id, _oneri_metinleri(row))
+
+
+_INDEKS_OLUSTURUCULAR = {
+    "arama": _arama_indeksi_olustur,
+    "oneri": _oneri_indeksi_olustur,
+}
+
+_INDEKS_GUNCELLEYICILER = {
+    "arama": _arama_indeksi_guncelle,
+    "oneri": _oneri_indeksi_guncelle,
+}
+
+
+def _get_indeks(db: Session, tur: str):
+    """
+    Aktif ilaçların bellek içi index'ini getir, yoksa veya TTL dolduysa yeniden oluştur
+    
+    Bu süreçteki ilaç değişiklikleri index'e commit sonrasında artımlı işlenir;
+    TTL yalnızca diğer worker'ların değişikliklerini almak içindir. TTL dolunca
+    index'i tek bir istek yeniden kurar, diğerleri bu sırada eski index'ten
+    cevaplanır. Kurulum sırasında commit edilen değişiklikler yeni index'e
+    yayımlanmadan önce işlenir.
+    
+    Args:
+        db: Database session
+        tur: Index türü ("arama" veya "oneri")
+    
+    Returns:
+        İstenen index
+    """
+    with _indeks_lock:
+        kayit = _indeksler.get(tur)
+        if kayit is not None and (
+            time.monotonic() - kayit[0] < settings.DRUG_SEARCH_INDEX_TTL_SECONDS or tur in _kurulumlar
+        ):
+            return kayit[1]
+        # Hiç index yoksa beklenmez (aşağıdaki not), istek kendisi kurar
+        degisiklikler: list = []
+        _kurulumlar.setdefault(tur, []).append(degisiklikler)
+        nesil = _indeks_nesli
+    
+    # Sorgu kilit dışında çalışır: AsyncSession.run_sync içinde sorgu beklenirken
+    # aynı thread'deki başka bir coroutine kilidi beklerse event loop kilitlenirdi.
+    try:
+        baslangic = time.monotonic()
+        rows = db.query(
+            Ilac.id, Ilac.ad, Ilac.barkod, Ilac.etken_madde, Ilac.fiyat, Ilac.receteli
+        ).filter(Ilac.aktif == True).all()
+        indeks = _INDEKS_OLUSTURUCULAR[tur](rows)
+    finally:
+        with _indeks_lock:
+            kurulumlar = _kurulumlar[tur]
+            kurulumlar.remove(degisiklikler)
+            if not kurulumlar:
+                del _kurulumlar[tur]
+    
+    with _indeks_lock:
+        for ilac_id, row in degisiklikler:
+            _INDEKS_GUNCELLEYICILER[tur](indeks, ilac_id, row)
+        if nesil == _indeks_nesli:
+            _indeksler[tur] = (baslangic, indeks)
+    return indeks
+
+
+def _katalog_kaydet(ilaclar: Iterable[Ilac], versiyon: int) -> None:
+    """Okuma sırasında katalog değişmediyse ilaçları id ve barkod ile cache'e yaz"""
+    with _katalog_lock:
+        if versiyon != _katalog_versiyonu:
+            return
+        for ilac in ilaclar:
+            values = snapshot(ilac)
+            _katalog_cache.set(("id", ilac.id), values)
+            _katalog_cache.set(("barkod", ilac.barkod), values)
+
+
+def invalidate_katalog() -> None:
+    """
+    Süreç içi ilaç kataloğunu düşür: id/barkod cache'i ve arama index'leri
+    (sonraki kullanımda veritabanından yeniden yüklenir)
+    """
+    global _katalog_versiyonu, _indeks_nesli
+    with _katalog_lock:
+        _katalog_versiyonu += 1
+        _katalog_cache.clear()
+    with _indeks_lock:
+        _indeks_nesli += 1
+        _indeksler.clear()
+
+
+def _ilac_degisikliklerini_isle(degisiklikler: Dict[UUID, Tuple[Optional[_IlacSatiri], Set[str]]]) -> None:
+    """
+    Commit edilen ilaç değişikliklerini katalog cache'ine ve index'lere işle
+    
+    Cache'ten yalnızca değişen ilacın id/barkod kayıtları düşer; index'lerde
+    yalnızca o ilacın anahtarları çıkarılıp yeniden eklenir.
+    
+    Args:
+        degisiklikler: {ilac_id: (aktif ilacın yeni kolonları veya None, cache'ten düşecek
+            barkodlar - None barkodu bilinmeyen silinmiş ilacı gösterir)}
+    """
+    global _katalog_versiyonu
+    with _katalog_lock:
+        _katalog_versiyonu += 1
+        for ilac_id, (_, barkodlar) in degisiklikler.items():
+            if None in barkodlar:
+                # Silinen ilacın barkodu bilinmiyor: kaydı barkodla bulunamaz
+                _katalog_cache.clear()
+                break
+            _katalog_cache.pop(("id", ilac_id))
+            for barkod in barkodlar:
+                _katalog_cache.pop(("barkod", barkod))
+    with _indeks_lock:
+        for tur, (_, indeks) in _indeksler.items():
+            for ilac_id, (row, _) in degisiklikler.items():
+                _INDEKS_GUNCELLEYICILER[tur](indeks, ilac_id, row)
+        for kurulumlar in _kurulumlar.values():
+            for bekleyen in kurulumlar:
+                bekleyen.extend((ilac_id, row) for ilac_id, (row, _) in degisiklikler.items())
+
+
+def _get_muadil_grafi(db: Session) -> EquivalenceClasses:
+    """
+    Muadil grafını getir, yoksa veya eskidiyse tek sorguyla yeniden oluştur
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        EquivalenceClasses
+    """
+    global _muadil_grafi
+    with _muadil_lock:
+        kayit = _muadil_grafi
+        nesil = _muadil_nesli
+    if kayit is not None and time.monotonic() - kayit[0] < settings.DRUG_EQUIVALENCE_GRAPH_TTL_SECONDS:
+        return kayit[1]
+    
+    # _get_indeks'teki gibi sorgu kilit dışında çalışır
+    rows = db.query(MuadilIlac.ilac_id, MuadilIlac.muadil_ilac_id).all()
+    kayit = (time.monotonic(), EquivalenceClasses(rows))
+    with _muadil_lock:
+        # Sorgu sırasında muadil değişikliği commit edildiyse graf cache'e yazılmaz
+        if nesil == _muadil_nesli:
+            _muadil_grafi = kayit
+    return kayit[1]
+
+
+def invalidate_muadil_grafi() -> None:
+    """Muadil grafını düşür (sonraki kullanımda veritabanından yeniden kurulur)"""
+    global _muadil_grafi, _muadil_nesli
+    with _muadil_lock:
+        _muadil_grafi = None
+        _muadil_nesli += 1
+
+
+def katalog_cache_stats() -> Dict[str, Any]:
+    """İlaç kataloğu cache'inin isabet/ıska sayaçları"""
+    return {**_katalog_cache.stats(), "version": _katalog_versiyonu}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# İlaç ekleyen/değiştiren/silen her commit, değişen ilaçları bu süreçteki
+# katalog cache'ine ve index'lere tek tek işler; diğer worker'lar değişikliği en
+# geç DRUG_CATALOG_CACHE_TTL_SECONDS / DRUG_SEARCH_INDEX_TTL_SECONDS sonra
+# görür. Toplu (query.update()) değişiklikler flush'ta görünmez, TTL ile yansır.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_ilaclar(session, flush_context):
+    for silindi, objs in ((False, session.new), (False, session.dirty), (True, session.deleted)):
+        for obj in objs:
+            if not isinstance(obj, Ilac):
+                continue
+            bekleyen = session.info.setdefault(_PENDING_KEY, {})
+            _, barkodlar = bekleyen.get(obj.id, (None, set()))
+            # Eski barkod (değiştiyse) cache'ten düşmeli; silinen nesnenin
+            # yüklenmemiş kolonları okunamaz, yalnızca bilinen değerler alınır
+            barkodlar.update(b for b in inspect(obj).attrs.barkod.history.sum() if b)
+            row = None
+            if not silindi:
+                barkodlar.add(obj.barkod)
+                if obj.aktif:
+                    row = _IlacSatiri(obj.id, obj.ad, obj.barkod, obj.etken_madde, obj.fiyat, obj.receteli)
+            elif "barkod" not in inspect(obj).dict:
+                barkodlar.add(None)
+            bekleyen[obj.id] = (row, barkodlar)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ilac_changes(session):
+    degisiklikler = session.info.pop(_PENDING_KEY, None)
+    if degisiklikler:
+        _ilac_degisikliklerini_isle(degisiklikler)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+# Muadil eklemeleri/silmeleri commit sonrasında grafa artımlı olarak işlenir;
+# grafın tamamı yalnızca ilk kullanımda ve TTL dolduğunda yeniden kurulur.
+# Flush ile commit arasında graf yeniden kurulduysa değişikliğin ona dahil olup
+# olmadığı bilinemez; bu durumda graf düşürülür. Toplu (query.delete())
+# silmeler flush'ta görünmez, TTL ile yansır.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_muadiller(session, flush_context):
+    for eklendi, objs in ((True, session.new), (False, session.deleted)):
+        for obj in objs:
+            if isinstance(obj, MuadilIlac):
+                bekleyen = session.info.setdefault(_MUADIL_PENDING_KEY, (_muadil_grafi, []))
+                if bekleyen[0] is not _muadil_grafi:
+                    bekleyen = session.info[_MUADIL_PENDING_KEY] = (None, [])
+                bekleyen[1].append((eklendi, obj.ilac_id, obj.muadil_ilac_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_muadil_changes(session):
+    global _muadil_grafi, _muadil_nesli
+    bekleyen = session.info.pop(_MUADIL_PENDING_KEY, None)
+    if bekleyen is None:
+        return
+    kayit, degisiklikler = bekleyen
+    with _muadil_lock:
+        _muadil_nesli += 1
+        if _muadil_grafi is None:
+            return
+        if kayit is not _muadil_grafi:
+            _muadil_grafi = None
+            return
+        # Okuyucular graf üzerinde kilitsiz class_of() çağırır; EquivalenceClasses
+        # yayımlanmış sınıf kümelerini değiştirmediği için bu güvenlidir
+        graf = _muadil_grafi[1]
+        for eklendi, ilac_id, muadil_ilac_id in degisiklikler:
+            if eklendi:
+                graf.add_edge(ilac_id, muadil_ilac_id)
+            else:
+                graf.remove_edge(ilac_id, muadil_ilac_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_muadil_changes(session, previous_transaction):
+    session.info.pop(_MUADIL_PENDING_KEY, None)
+
+
 class IlacRepository:
     """İlaç repository - Database operations for drugs"""
     
@@ -16,7 +346,7 @@ class IlacRepository:
     
     def get_by_id(self, ilac_id: UUID) -> Optional[Ilac]:
         """
-        ID'ye göre ilaç getir
+        ID'ye göre ilaç getir (katalog cache'inden)
         
         Args:
             ilac_id: İlaç UUID
@@ -24,25 +354,86 @@ class IlacRepository:
         Returns:
             Ilac veya None
         """
-        return self.db.query(Ilac).filter(
-            Ilac.id == ilac_id,
+        return self.get_many([ilac_id]).get(ilac_id)
+    
+    def get_many(self, ilac_ids: Sequence[UUID], aktif_only: bool = True) -> Dict[UUID, Ilac]:
+        """
+        Birden fazla ilacı getir - cache'te olanlar SELECT'siz, kalanlar tek sorguda
+        
+        Args:
+            ilac_ids: İlaç UUID'leri
+            aktif_only: Sadece aktif ilaçlar mı
+        
+        Returns:
+            {ilac_id: Ilac} dictionary - bulunamayan (veya aktif_only ise pasif) ilaçlar yer almaz
+        """
+        ilaclar: Dict[UUID, Ilac] = {}
+        eksik = []
+        for ilac_id in dict.fromkeys(ilac_ids):
+            values = _katalog_cache.get(("id", ilac_id))
+            if values is None:
+                eksik.append(ilac_id)
+            else:
+                ilaclar[ilac_id] = attach(self.db, Ilac, values)
+        
+        if eksik:
+            versiyon = _katalog_versiyonu
+            yuklenen = self.db.query(Ilac).filter(Ilac.id.in_(eksik)).all()
+            _katalog_kaydet(yuklenen, versiyon)
+            ilaclar.update((ilac.id, ilac) for ilac in yuklenen)
+        
+        if aktif_only:
+            return {ilac_id: ilac for ilac_id, ilac in ilaclar.items() if ilac.aktif}
+        return ilaclar
+    
+    def get_many_for_order(self, ilac_ids: Sequence[UUID]) -> Dict[UUID, Ilac]:
+        """
+        Sipariş için ilaçları cache'i atlayarak veritabanından getir
+        
+        Katalog cache'i yalnızca değişikliği yapan worker'da temizlenir; diğer
+        worker'lar TTL boyunca eski fiyat ve aktiflik görebilir. Yazma yolunda
+        satırlar okunur ve (PostgreSQL'de) işlem sonuna kadar paylaşımlı kilitlenir
+        (SELECT ... FOR SHARE), böylece sipariş sırasında fiyat değişemez.
+        
+        Args:
+            ilac_ids: İlaç UUID'leri
+        
+        Returns:
+            {ilac_id: Ilac} dictionary - bulunamayan veya pasif ilaçlar yer almaz
+        """
+        if not ilac_ids:
+            return {}
+        
+        ilaclar = self.db.query(Ilac).filter(
+            Ilac.id.in_(list(dict.fromkeys(ilac_ids))),
             Ilac.aktif == True
-        ).first()
+        ).order_by(Ilac.id).with_for_update(read=True).populate_existing().all()
+        
+        return {ilac.id: ilac for ilac in ilaclar}
     
-    def get_by_barkod(self, barkod: str) -> Optional[Ilac]:
+    def get_by_barkod(self, barkod: str, aktif_only: bool = True) -> Optional[Ilac]:
         """
-        Barkoda göre ilaç getir
+        Barkoda göre ilaç getir (katalog cache'inden)
         
         Args:
             barkod: İlaç barkod numarası
+            aktif_only: Sadece aktif ilaç mı
         
         Returns:
             Ilac veya None
         """
-        return self.db.query(Ilac).filter(
-            Ilac.barkod == barkod,
-            Ilac.aktif == True
-        ).first()
+        values = _katalog_cache.get(("barkod", barkod))
+        if values is not None:
+            ilac = attach(self.db, Ilac, values)
+        else:
+            versiyon = _katalog_versiyonu
+            ilac = self.db.query(Ilac).filter(Ilac.barkod == barkod).first()
+            if ilac is not None:
+                _katalog_kaydet([ilac], versiyon)
+        
+        if ilac is None or (aktif_only and not ilac.aktif):
+            return None
+        return ilac
     
     def search(self, params: IlacSearchParams) -> Tuple[List[Ilac], int]:
         """
@@ -54,18 +445,28 @@ class IlacRepository:
         Returns:
             tuple: (ilaclar listesi, toplam kayıt sayısı)
         """
+        ilaclar, total, _ = self.search_page(params.model_copy(update={"exact_total": True}))
+        return ilaclar, total
+    
+    def search_page(self, params: IlacSearchParams) -> Tuple[List[Ilac], Optional[int], bool]:
+        """
+        İlaç arama - toplam sayı isteğe bağlı
+        
+        params.exact_total False ise COUNT sorgusu çalıştırılmaz; sonraki sayfa
+        olup olmadığı page_size + 1 kayıt çekilerek anlaşılır.
+        
+        Args:
+            params: Arama parametreleri
+        
+        Returns:
+            tuple: (ilaclar listesi, toplam kayıt sayısı veya None, sonraki sayfa var mı)
+        """
         query = self.db.query(Ilac).filter(Ilac.aktif == True)
         
         # Text search (ad, barkod veya etken madde)
-        if params.query:
-            search_term = f"%{params.query}%"
-            query = query.filter(
-                or_(
-                    Ilac.ad.ilike(search_term),
-                    Ilac.barkod.ilike(search_term),
-                    Ilac.etken_madde.ilike(search_term)
-                )
-            )
+        arama = normalize_search_text(params.query)
+        if arama:
+            query = query.filter(self._arama_kosulu(arama))
         
         # Kategori filtresi
         if params.kategori:
@@ -81,41 +482,153 @@ class IlacRepository:
         if params.max_fiyat is not None:
             query = query.filter(Ilac.fiyat <= params.max_fiyat)
         
+        offset = (params.page - 1) * params.page_size
+        
+        if not params.exact_total:
+            # Sadece sayfa sorgusu - fazladan çekilen kayıt sonraki sayfanın varlığını gösterir
+            ilaclar = query.order_by(Ilac.ad, Ilac.id).offset(offset).limit(params.page_size + 1).all()
+            return ilaclar[:params.page_size], None, len(ilaclar) > params.page_size
+        
         # Toplam kayıt sayısı
         total = query.count()
         
         # Sayfalama
-        offset = (params.page - 1) * params.page_size
-        ilaclar = query.order_by(Ilac.ad).offset(offset).limit(params.page_size).all()
+        ilaclar = query.order_by(Ilac.ad, Ilac.id).offset(offset).limit(params.page_size).all()
         
-        return ilaclar, total
+        return ilaclar, total, offset + len(ilaclar) < total
+    
+    def _arama_kosulu(self, arama: str):
+        """
+        Normalize edilmiş arama terimi için index kullanan filtre
+        
+        PostgreSQL'de arama_metni üzerindeki pg_trgm GIN index'i '%terim%'
+        LIKE sorgusunu karşılar. Diğer veritabanlarında aday ID'ler bellek içi
+        trigram index'inden alınır.
+        
+        Args:
+            arama: Normalize edilmiş arama terimi
+        
+        Returns:
+            SQLAlchemy filtre ifadesi
+        """
+        like_kosulu = Ilac.arama_metni.like(f"%{_escape_like(arama)}%", escape="\\")
+        if self.db.get_bind().dialect.name == "postgresql":
+            return like_kosulu
+        
+        adaylar = _get_indeks(self.db, "arama").search(arama)
+        if not adaylar:
+            return false()
+        if len(adaylar) > _MAX_ARAMA_ADAYI:
+            # Seçici olmayan sorgu - uzun IN listesi yerine tarama daha ucuz
+            return like_kosulu
+        return Ilac.id.in_(adaylar)
+    
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[IlacAutocompleteItem]:
+        """
+        Yazarken tamamlama - adı, barkodu veya etken maddesindeki bir kelime
+        önek ile başlayan aktif ilaçlar
+        
+        Veritabanına gitmeden bellek içi önek index'inden cevaplanır; ilaç
+        ekleyen/güncelleyen/silen commit'ler yalnızca değişen ilacın
+        kayıtlarını index'te günceller.
+        
+        Args:
+            prefix: Kullanıcının yazdığı metin
+            limit: En fazla öneri sayısı
+        
+        Returns:
+            Öneri listesi
+        """
+        onek = normalize_search_text(prefix)
+        if not onek:
+            return []
+        
+        indeks, oneriler = _get_indeks(self.db, "oneri")
+        oneri_listesi = (oneriler.get(ilac_id) for ilac_id in indeks.search(onek, limit))
+        return [oneri for oneri in oneri_listesi if oneri is not None]
+    
+    def get_muadil_ids(self, ilac_id: UUID) -> Set[UUID]:
+        """
+        Bir ilacın denklik sınıfındaki diğer ilaçların ID'leri (bellek içi muadil grafından)
+        
+        Muadillik iki yönlü ve geçişli kabul edilir; pasif ilaçlar da dahildir.
+        
+        Args:
+            ilac_id: Ana ilacın UUID'si
+        
+        Returns:
+            Muadil ilaç ID'leri
+        """
+        return {muadil_id for muadil_id in _get_muadil_grafi(self.db).class_of(ilac_id) if muadil_id != ilac_id}
     
     def get_muadiller(self, ilac_id: UUID) -> List[Ilac]:
         """
-        Bir ilacın muadillerini getir
+        Bir ilacın aktif muadillerini getir
         
         Args:
             ilac_id: Ana ilacın UUID'si
         
         Returns:
-            Muadil ilaçlar listesi
+            Muadil ilaçlar listesi (ada göre sıralı)
         """
-        # Muadil ilaç ID'lerini al
-        muadil_ids_tuples = self.db.query(MuadilIlac.muadil_ilac_id).filter(
-            MuadilIlac.ilac_id == ilac_id
-        ).all()
+        muadil_ids = self.get_muadil_ids(ilac_id)
+        if not muadil_ids:
+            return []
+        
+        ilaclar = self.get_many(list(muadil_ids))
+        return sorted(ilaclar.values(), key=lambda ilac: (ilac.ad, str(ilac.id)))
+    
+    def get_sepet_secenekleri(self, ilac_ids: Sequence[UUID]) -> Tuple[Dict[UUID, List[UUID]], Dict[UUID, Ilac]]:
+        """
+        Her ilaç için tercih sırasına göre aktif seçenekler: önce ilacın kendisi,
+        sonra ada göre muadilleri
         
-        # ID listesini çıkar
-        ids = [m[0] for m in muadil_ids_tuples]
+        Tüm ilaçlar tek get_many çağrısıyla yüklenir.
+        
+        Args:
+            ilac_ids: İstenen ilaçların UUID'leri
+        
+        Returns:
+            tuple: ({ilac_id: [seçenek ID'leri]}, {ilac_id: Ilac} - seçeneklerdeki ilaçlar)
+        """
+        muadil_ids = {ilac_id: self.get_muadil_ids(ilac_id) for ilac_id in ilac_ids}
+        ilaclar = self.get_many(list(muadil_ids) + [m for ids in muadil_ids.values() for m in ids])
+        
+        secenekler = {}
+        for ilac_id, ids in muadil_ids.items():
+            muadiller = sorted(
+                (m for m in ids if m in ilaclar),
+                key=lambda m: (ilaclar[m].ad, str(m))
+            )
+            secenekler[ilac_id] = ([ilac_id] if ilac_id in ilaclar else []) + muadiller
+        return secenekler, ilaclar
+
+    def get_stoktaki_muadiller(self, ilac_id: UUID, eczane_id: UUID) -> List[Tuple[Ilac, Stok]]:
+        """
+        Bir ilacın eczanede stokta bulunan aktif muadilleri
+        
+        Args:
+            ilac_id: Ana ilacın UUID'si
+            eczane_id: Eczane UUID
         
-        if not ids:
+        Returns:
+            (Ilac, Stok) listesi (ada göre sıralı)
+        """
+        muadil_ids = self.get_muadil_ids(ilac_id)
+        if not muadil_ids:
             return []
         
-        # Muadil ilaçları getir
-        return self.db.query(Ilac).filter(
-            Ilac.id.in_(ids),
-            Ilac.aktif == True
+        stoklar = self.db.query(Stok).filter(
+            Stok.eczane_id == eczane_id,
+            Stok.ilac_id.in_(muadil_ids),
+            Stok.miktar > 0
         ).all()
+        if not stoklar:
+            return []
+        
+        ilaclar = self.get_many([stok.ilac_id for stok in stoklar])
+        sonuc = [(ilaclar[stok.ilac_id], stok) for stok in stoklar if stok.ilac_id in ilaclar]
+        return sorted(sonuc, key=lambda kayit: (kayit[0].ad, str(kayit[0].id)))
     
     def get_with_stok(self, ilac_id: UUID, eczane_id: UUID) -> Tuple[Optional[Ilac], Optional[Stok]]:
         """
@@ -257,3 +770,49 @@ class IlacRepository:
         self.db.delete(muadil)
         self.db.commit()
         return True
+
+
+class AsyncIlacRepository:
+    """
+    İlaç repository - async route handler'ları için AsyncSession ile
+    
+    Sorgular IlacRepository ile aynıdır ve AsyncSession.run_sync ile çalışır:
+    veritabanı beklenirken event loop diğer isteklere döner. Cache'ler ve
+    index'ler senkron repository ile paylaşılır.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def _run(self, method: str, *args, **kwargs):
+        return await self.db.run_sync(
+            lambda session: getattr(IlacRepository(session), method)(*args, **kwargs)
+        )
+    
+    async def get_by_id(self, ilac_id: UUID) -> Optional[Ilac]:
+        """ID'ye göre ilaç getir (katalog cache'inden)"""
+        return await self._run("get_by_id", ilac_id)
+    
+    async def get_many(self, ilac_ids: Sequence[UUID], aktif_only: bool = True) -> Dict[UUID, Ilac]:
+        """Birden fazla ilacı getir - cache'te olanlar SELECT'siz, kalanlar tek sorguda"""
+        return await self._run("get_many", ilac_ids, aktif_only=aktif_only)
+    
+    async def search_page(self, params: IlacSearchParams) -> Tuple[List[Ilac], Optional[int], bool]:
+        """İlaç arama - toplam sayı isteğe bağlı"""
+        return await self._run("search_page", params)
+    
+    async def autocomplete(self, prefix: str, limit: int = 10) -> List[IlacAutocompleteItem]:
+        """Yazarken tamamlama"""
+        return await self._run("autocomplete", prefix, limit)
+    
+    async def get_muadiller(self, ilac_id: UUID) -> List[Ilac]:
+        """Bir ilacın aktif muadillerini getir"""
+        return await self._run("get_muadiller", ilac_id)
+    
+    async def get_stoktaki_muadiller(self, ilac_id: UUID, eczane_id: UUID) -> List[Tuple[Ilac, Stok]]:
+        """Bir ilacın eczanede stokta bulunan aktif muadilleri"""
+        return await self._run("get_stoktaki_muadiller", ilac_id, eczane_id)
+    
+    async def get_sepet_secenekleri(self, ilac_ids: Sequence[UUID]) -> Tuple[Dict[UUID, List[UUID]], Dict[UUID, Ilac]]:
+        """Her ilaç için tercih sırasına göre aktif seçenekler (ilacın kendisi ve muadilleri)"""
+        return await self._run("get_sepet_secenekleri", ilac_ids)
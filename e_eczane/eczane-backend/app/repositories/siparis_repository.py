@@ -0,0 +1,117 @@
+from uuid import UUID
+from typing import List, Optional, Sequence, Tuple, Union
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.siparis import Siparis, SiparisDetay
+from app.models.eczane import Eczane
+from app.models.hasta import Hasta
+from app.utils.enums import SiparisDurum
+from app.utils.pagination import CursorKey, apply_keyset, split_page
+
+
+class SiparisRepository:
+    """Sipariş repository - Toplu sipariş yükleme"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_page_ids(
+        self,
+        hasta_id: Optional[UUID] = None,
+        eczane_id: Optional[UUID] = None,
+        durum: Optional[SiparisDurum] = None,
+        page: int = 1,
+        page_size: int = 20,
+        cursor_key: Optional[CursorKey] = None
+    ) -> Tuple[List[UUID], Optional[str]]:
+        """
+        Hasta veya eczaneye ait siparişlerin bir sayfasını getir (yeniden eskiye)
+        
+        Cursor verilmişse keyset sayfalama kullanılır ve page yok sayılır;
+        verilmemişse OFFSET ile sayfalanır. Her iki durumda da sonraki
+        sayfanın cursor'ı döner.
+        
+        Args:
+            hasta_id: Hasta ID filtresi
+            eczane_id: Eczane ID filtresi
+            durum: Sipariş durumu filtresi
+            page: Sayfa numarası (cursor yoksa)
+            page_size: Sayfa boyutu
+            cursor_key: decode_cursor ile çözülmüş cursor
+        
+        Returns:
+            tuple: (sipariş ID'leri, sonraki sayfa cursor'ı veya None)
+        """
+        query = self.db.query(Siparis.id, Siparis.created_at)
+        
+        if hasta_id:
+            query = query.filter(Siparis.hasta_id == hasta_id)
+        
+        if eczane_id:
+            query = query.filter(Siparis.eczane_id == eczane_id)
+        
+        if durum:
+            query = query.filter(Siparis.durum == durum)
+        
+        query = apply_keyset(query, Siparis, cursor_key)
+        if cursor_key is None:
+            query = query.offset((page - 1) * page_size)
+        
+        rows, next_cursor = split_page(query.limit(page_size + 1).all(), page_size)
+        return [row.id for row in rows], next_cursor
+    
+    def get_many_with_details(self, siparis_ids: Sequence[Union[UUID, str]]) -> List[Siparis]:
+        """
+        Siparişleri detay, ilaç, eczane ve hasta bilgileriyle birlikte getir
+
+        Sorgu sayısı sipariş sayısından bağımsızdır: siparişler eczane ve hasta
+        ile tek sorguda, detaylar ve ilaçları ise tek bir selectin sorgusunda yüklenir.
+
+        Args:
+            siparis_ids: Sipariş ID'leri (sıra korunur)
+
+        Returns:
+            Siparis listesi - verilen ID sırasında
+        """
+        uuid_ids = [
+            siparis_id if isinstance(siparis_id, UUID) else UUID(siparis_id)
+            for siparis_id in siparis_ids
+        ]
+
+        if not uuid_ids:
+            return []
+
+        siparisler = self.db.query(Siparis).options(
+            joinedload(Siparis.eczane).load_only(Eczane.eczane_adi),
+            joinedload(Siparis.hasta).load_only(Hasta.ad, Hasta.soyad),
+            selectinload(Siparis.detaylar).joinedload(SiparisDetay.ilac)
+        ).filter(
+            Siparis.id.in_(uuid_ids)
+        ).all()
+
+        siparis_map = {siparis.id: siparis for siparis in siparisler}
+        return [siparis_map[siparis_id] for siparis_id in uuid_ids if siparis_id in siparis_map]
+
+
+class AsyncSiparisRepository:
+    """
+    Sipariş repository - async route handler'ları için AsyncSession ile
+
+    Sorgular SiparisRepository ile aynıdır ve AsyncSession.run_sync ile
+    çalışır; veritabanı beklenirken event loop serbest kalır.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_page_ids(self, **filtreler) -> Tuple[List[UUID], Optional[str]]:
+        """Hasta veya eczaneye ait siparişlerin bir sayfasını getir (SiparisRepository.get_page_ids)"""
+        return await self.db.run_sync(
+            lambda session: SiparisRepository(session).get_page_ids(**filtreler)
+        )
+
+    async def get_many_with_details(self, siparis_ids: Sequence[Union[UUID, str]]) -> List[Siparis]:
+        """Siparişleri detay, ilaç, eczane ve hasta bilgileriyle birlikte getir"""
+        return await self.db.run_sync(
+            lambda session: SiparisRepository(session).get_many_with_details(siparis_ids)
+        )
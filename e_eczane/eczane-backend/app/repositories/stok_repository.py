@@ -1,6 +1,7 @@
-from typing import List, Optional
+from uuid import UUID
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, case, update
 from app.models.stok import Stok
 from app.models.ilac import Ilac
 from app.schemas.stok import StokCreate, StokUpdate
@@ -93,6 +94,84 @@ class StokRepository:
             self.db.refresh(stok)
         return stok
     
+    def get_for_order(self, eczane_id: UUID, ilac_ids: List[UUID]) -> Dict[UUID, Stok]:
+        """
+        Sepetteki ilaçların stok satırlarını tek sorguda kilitleyerek getir
+        
+        Satırlar ilaç ID sırasıyla kilitlenir (SELECT ... FOR UPDATE); aynı
+        eczaneye gelen eşzamanlı siparişler kilitleri hep aynı sırada aldığı
+        için birbirini kilitlemez (deadlock). Kilitsiz veritabanlarında (SQLite)
+        FOR UPDATE yok sayılır, doğruluk reserve_stock'taki koşullu UPDATE ile
+        korunur.
+        
+        Args:
+            eczane_id: Eczane ID
+            ilac_ids: İlaç ID'leri
+        
+        Returns:
+            {ilac_id: Stok} dictionary - stok kaydı olmayan ilaçlar yer almaz
+        """
+        if not ilac_ids:
+            return {}
+        
+        stoklar = self.db.query(Stok).filter(
+            Stok.eczane_id == eczane_id,
+            Stok.ilac_id.in_(ilac_ids)
+        ).order_by(Stok.ilac_id).with_for_update().all()
+        
+        return {stok.ilac_id: stok for stok in stoklar}
+    
+    def reserve_stock(self, eczane_id: UUID, ilac_miktar_map: Dict[UUID, int]) -> bool:
+        """
+        Sepetteki ilaçların stoğunu tek bir koşullu UPDATE ile atomik olarak düş
+        
+        Kontrol (miktar >= istenen) ile düşüm aynı ifadede olduğundan eşzamanlı
+        siparişler stoğu eksiye düşüremez. Satırlardan biri bile koşulu
+        sağlamazsa etkilenen satır sayısı eksik kalır ve False döner. Commit
+        etmez; çağıran işlemin tamamını commit veya rollback etmelidir.
+        
+        Args:
+            eczane_id: Eczane ID
+            ilac_miktar_map: {ilac_id: miktar} dictionary
+        
+        Returns:
+            bool: Tüm ilaçlar düşüldüyse True
+        """
+        if not ilac_miktar_map:
+            return True
+        
+        istenen = case(ilac_miktar_map, value=Stok.ilac_id)
+        result = self.db.execute(
+            update(Stok).where(
+                Stok.eczane_id == eczane_id,
+                Stok.ilac_id.in_(list(ilac_miktar_map)),
+                Stok.miktar >= istenen
+            ).values(
+                miktar=Stok.miktar - istenen
+            ).execution_options(synchronize_session=False)
+        )
+        return result.rowcount == len(ilac_miktar_map)
+    
+    def release_stock(self, eczane_id: UUID, ilac_miktar_map: Dict[UUID, int]) -> None:
+        """
+        Rezerve edilmiş stoğu atomik olarak geri ekle (sipariş iptali)
+        
+        Commit etmez; çağıran işlem commit etmelidir.
+        
+        Args:
+            eczane_id: Eczane ID
+            ilac_miktar_map: {ilac_id: miktar} dictionary
+        """
+        for ilac_id in sorted(ilac_miktar_map):
+            self.db.execute(
+                update(Stok).where(
+                    Stok.eczane_id == eczane_id,
+                    Stok.ilac_id == ilac_id
+                ).values(
+                    miktar=Stok.miktar + ilac_miktar_map[ilac_id]
+                ).execution_options(synchronize_session=False)
+            )
+    
     def delete(self, stok_id: str) -> bool:
         """Stok kaydını sil"""
         stok = self.get_by_id(stok_id)
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from typing import List
+from uuid import UUID
+from sqlalchemy import delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.token_iptal import TokenIptal
+
+
+class TokenIptalRepository:
+    """İptal edilen token (denylist) repository"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def token_ekle(self, user_id: UUID, jti: str, token_tipi: str, son_gecerlilik: datetime) -> bool:
+        """
+        Tek bir token'ı iptal listesine ekle
+        
+        jti unique olduğundan aynı token'ı eşzamanlı iki istek iptal etmeye
+        çalışırsa yalnızca biri başarılı olur (refresh token tekrar kullanımı).
+        
+        Args:
+            user_id: Token sahibinin ID'si
+            jti: Token kimliği
+            token_tipi: "access" veya "refresh"
+            son_gecerlilik: Token'ın exp zamanı
+        
+        Returns:
+            bool: Eklendiyse True, token zaten iptal edilmişse False
+        """
+        self.db.add(TokenIptal(
+            user_id=user_id,
+            jti=jti,
+            token_tipi=token_tipi,
+            son_gecerlilik=son_gecerlilik
+        ))
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return True
+    
+    def kullanici_ekle(self, user_id: UUID, oncesi_gecersiz: datetime, son_gecerlilik: datetime) -> TokenIptal:
+        """
+        Kullanıcının belirli bir andan önce üretilmiş tüm token'larını iptal et
+        
+        Args:
+            user_id: Kullanıcı ID
+            oncesi_gecersiz: Bu andan önce üretilen token'lar geçersiz
+            son_gecerlilik: O ana kadar üretilmiş en uzun ömürlü token'ın exp zamanı
+        
+        Returns:
+            TokenIptal: Eklenen kayıt
+        """
+        kayit = TokenIptal(
+            user_id=user_id,
+            oncesi_gecersiz=oncesi_gecersiz,
+            son_gecerlilik=son_gecerlilik
+        )
+        self.db.add(kayit)
+        self.db.commit()
+        return kayit
+    
+    def get_yeni_kayitlar(self, sonra: datetime) -> List[TokenIptal]:
+        """
+        Belirli bir andan sonra eklenen, henüz süresi dolmamış iptalleri getir
+        
+        Refresh token iptalleri dahil edilmez; onlar yalnızca /refresh
+        isteğinde veritabanında kontrol edilir.
+        
+        Args:
+            sonra: Bu andan (dahil) sonra eklenen kayıtlar
+        
+        Returns:
+            List[TokenIptal]: Access token ve kullanıcı geneli iptaller
+        """
+        return self.db.query(TokenIptal).filter(
+            TokenIptal.created_at >= sonra,
+            TokenIptal.son_gecerlilik > datetime.now(timezone.utc),
+            or_(TokenIptal.token_tipi.is_(None), TokenIptal.token_tipi == "access")
+        ).all()
+    
+    def temizle(self) -> int:
+        """
+        Süresi dolmuş token'lara ait iptal kayıtlarını sil
+        
+        Returns:
+            int: Silinen kayıt sayısı
+        """
+        sonuc = self.db.execute(
+            delete(TokenIptal)
+            .where(TokenIptal.son_gecerlilik <= datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return sonuc.rowcount
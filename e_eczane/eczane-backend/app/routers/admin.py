@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
-from app.core.database import get_db
-from app.core.dependencies import get_current_admin
+from app.core.database import get_db, get_read_db
+from app.core.dependencies import get_current_admin, get_cursor_key
 from app.models.user import User
 from app.models.eczane import Eczane
 from app.models.hasta import Hasta
@@ -17,16 +17,20 @@ from app.schemas.admin import (
     KullaniciYonetim,
     DashboardIstatistik,
     SiparisIstatistik,
+    CacheIstatistik,
     DoktorDetay,
     DoktorDuzenle,
 )
 from app.schemas.eczane import EczaneResponse
 from app.schemas.hasta import HastaResponse
-from app.schemas.siparis import SiparisResponse, SiparisDetayItem
+from app.schemas.siparis import SiparisResponse, SiparisListResponse
 from app.schemas.doktor import DoktorCreate, DoktorResponse
 from app.services.admin_service import AdminService
+from app.services.siparis_serializer import siparis_to_response, siparisler_to_response
 from app.repositories.admin_repository import AdminRepository
+from app.repositories.ilac_repository import katalog_cache_stats
 from app.utils.enums import OnayDurumu, SiparisDurum
+from app.utils.pagination import CursorKey
 
 router = APIRouter()
 
@@ -59,7 +63,7 @@ def get_profil(
 
 @router.get("/dashboard", response_model=DashboardIstatistik, summary="Dashboard İstatistikleri")
 def get_dashboard(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Dashboard istatistiklerini getir"""
@@ -70,7 +74,7 @@ def get_dashboard(
 
 @router.get("/dashboard/siparis-stats", response_model=SiparisIstatistik, summary="Sipariş İstatistikleri")
 def get_siparis_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Sipariş durum istatistiklerini getir"""
@@ -79,6 +83,14 @@ def get_siparis_stats(
     return SiparisIstatistik(**stats)
 
 
+@router.get("/dashboard/katalog-cache", response_model=CacheIstatistik, summary="İlaç Kataloğu Cache İstatistikleri")
+def get_katalog_cache_stats(
+    current_user: User = Depends(get_current_admin)
+):
+    """Bu süreçteki ilaç kataloğu cache'inin isabet/ıska sayaçları"""
+    return CacheIstatistik(**katalog_cache_stats())
+
+
 @router.get("/eczaneler/bekleyenler", response_model=List[EczaneOnayDetay], summary="Bekleyen Eczaneler")
 def get_bekleyen_eczaneler(
     db: Session = Depends(get_db),
@@ -262,14 +274,15 @@ def update_hasta_durum(
     }
 
 
-@router.get("/siparisler", response_model=List[SiparisResponse], summary="Tüm Siparişler")
+@router.get("/siparisler", response_model=SiparisListResponse, summary="Tüm Siparişler")
 def get_all_siparisler(
     durum: Optional[str] = Query(None, description="Duruma göre filtrele"),
     baslangic_tarih: Optional[date] = Query(None, description="Başlangıç tarihi"),
     bitis_tarih: Optional[date] = Query(None, description="Bitiş tarihi"),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor_key: Optional[CursorKey] = Depends(get_cursor_key),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Tüm siparişleri listele (filtreler ve sayfalama ile)"""
@@ -282,51 +295,29 @@ def get_all_siparisler(
         except ValueError:
             pass
     
-    siparisler = admin_repo.get_all_siparisler(durum_enum, baslangic_tarih, bitis_tarih)
-    
-    # Pagination
-    total = len(siparisler)
-    start = (page - 1) * page_size
-    end = start + page_size
-    siparisler_page = siparisler[start:end]
-    
-    result = []
-    for siparis in siparisler_page:
-        result.append(SiparisResponse(
-            id=str(siparis.id),
-            siparis_no=siparis.siparis_no,
-            eczane_id=str(siparis.eczane_id),
-            eczane_adi=siparis.eczane.eczane_adi,
-            hasta_id=str(siparis.hasta_id),
-            hasta_adi=siparis.hasta.tam_ad,
-            recete_id=str(siparis.recete_id) if siparis.recete_id else None,
-            toplam_tutar=siparis.toplam_tutar,
-            durum=siparis.durum,
-            odeme_durumu=siparis.odeme_durumu,
-            teslimat_adresi=siparis.teslimat_adresi,
-            siparis_notu=siparis.siparis_notu,
-            iptal_nedeni=siparis.iptal_nedeni,
-            created_at=siparis.created_at,
-            updated_at=siparis.updated_at,
-            detaylar=[
-                SiparisDetayItem(
-                    ilac_id=str(d.ilac_id),
-                    ilac_adi=d.ilac.ad,
-                    barkod=d.ilac.barkod,
-                    miktar=d.miktar,
-                    birim_fiyat=d.birim_fiyat,
-                    ara_toplam=d.ara_toplam
-                ) for d in siparis.detaylar
-            ]
-        ))
+    siparis_ids, total, next_cursor = admin_repo.get_all_siparisler(
+        durum_enum,
+        baslangic_tarih,
+        bitis_tarih,
+        page=page,
+        page_size=page_size,
+        cursor_key=cursor_key
+    )
     
-    return result
+    return {
+        "items": siparisler_to_response(siparis_ids, db),
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size,
+        "next_cursor": next_cursor
+    }
 
 
 @router.get("/siparisler/{siparis_id}", response_model=SiparisResponse, summary="Sipariş Detayı")
 def get_siparis_detay(
     siparis_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Sipariş detaylarını görüntüle"""
@@ -338,33 +329,7 @@ def get_siparis_detay(
             detail="Sipariş bulunamadı"
         )
     
-    return SiparisResponse(
-        id=str(siparis.id),
-        siparis_no=siparis.siparis_no,
-        eczane_id=str(siparis.eczane_id),
-        eczane_adi=siparis.eczane.eczane_adi,
-        hasta_id=str(siparis.hasta_id),
-        hasta_adi=siparis.hasta.tam_ad,
-        recete_id=str(siparis.recete_id) if siparis.recete_id else None,
-        toplam_tutar=siparis.toplam_tutar,
-        durum=siparis.durum,
-        odeme_durumu=siparis.odeme_durumu,
-        teslimat_adresi=siparis.teslimat_adresi,
-        siparis_notu=siparis.siparis_notu,
-        iptal_nedeni=siparis.iptal_nedeni,
-        created_at=siparis.created_at,
-        updated_at=siparis.updated_at,
-        detaylar=[
-            SiparisDetayItem(
-                ilac_id=str(d.ilac_id),
-                ilac_adi=d.ilac.ad,
-                barkod=d.ilac.barkod,
-                miktar=d.miktar,
-                birim_fiyat=d.birim_fiyat,
-                ara_toplam=d.ara_toplam
-            ) for d in siparis.detaylar
-        ]
-    )
+    return siparis_to_response(siparis, db)
 
 
 @router.get("/doktorlar", response_model=List[DoktorDetay], summary="Tüm Doktorlar")
@@ -1,22 +1,24 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.core.database import get_db
-from app.core.dependencies import get_current_user
-from app.schemas.auth import UserLogin, Token, PasswordChange, ForgotPasswordRequest, ResetPasswordRequest
+from app.core.dependencies import get_current_user, oauth2_scheme_optional
+from app.schemas.auth import UserLogin, Token, TokenRefresh, PasswordChange, ForgotPasswordRequest, ResetPasswordRequest
 from app.schemas.hasta import HastaCreate, HastaResponse
 from app.schemas.eczane import EczaneCreate, EczaneResponse
 from app.schemas.doktor import DoktorCreate, DoktorResponse
 from app.schemas.user import UserResponse
 from app.services.auth_service import AuthService
 from app.models.user import User
-from app.core.security import verify_password, get_password_hash
+from app.core.security import verify_password_async, get_password_hash_async, decode_access_token
 
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=Token, summary="Kullanıcı Girişi")
-def login(
+async def login(
     login_data: UserLogin,
     db: Session = Depends(get_db)
 ):
@@ -28,7 +30,7 @@ def login(
     - **user_type**: hasta, eczane, admin veya doktor
     """
     auth_service = AuthService(db)
-    return auth_service.login(login_data)
+    return await auth_service.login_async(login_data)
 
 
 @router.post(
@@ -37,7 +39,7 @@ def login(
     status_code=status.HTTP_201_CREATED,
     summary="Hasta Kaydı"
 )
-def register_hasta(
+async def register_hasta(
     hasta_data: HastaCreate,
     db: Session = Depends(get_db)
 ):
@@ -47,7 +49,7 @@ def register_hasta(
     Kayıt sonrası direkt aktif olur, giriş yapabilir
     """
     auth_service = AuthService(db)
-    return auth_service.register_hasta(hasta_data)
+    return await auth_service.register_hasta_async(hasta_data)
 
 
 @router.post(
@@ -55,7 +57,7 @@ def register_hasta(
     status_code=status.HTTP_201_CREATED,
     summary="Eczane Kaydı"
 )
-def register_eczane(
+async def register_eczane(
     eczane_data: EczaneCreate,
     db: Session = Depends(get_db)
 ):
@@ -65,7 +67,7 @@ def register_eczane(
     Kayıt sonrası admin onayı bekler. Onaylanmadan giriş yapamaz.
     """
     auth_service = AuthService(db)
-    eczane = auth_service.register_eczane(eczane_data)
+    eczane = await auth_service.register_eczane_async(eczane_data)
     
     return {
         "id": str(eczane.id),
@@ -92,7 +94,7 @@ def register_eczane(
     status_code=status.HTTP_201_CREATED,
     summary="Doktor Kaydı"
 )
-def register_doktor(
+async def register_doktor(
     doktor_data: DoktorCreate,
     db: Session = Depends(get_db)
 ):
@@ -102,7 +104,7 @@ def register_doktor(
     Kayıt sonrası direkt aktif olur, giriş yapabilir
     """
     auth_service = AuthService(db)
-    doktor = auth_service.register_doktor(doktor_data)
+    doktor = await auth_service.register_doktor_async(doktor_data)
     
     return {
         "id": str(doktor.id),
@@ -129,7 +131,7 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/change-password", summary="Şifre Değiştir")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -140,27 +142,49 @@ def change_password(
     **Authorization header gerekli**: Bearer {access_token}
     """
     # Eski şifre kontrolü
-    if not verify_password(password_data.old_password, current_user.password_hash):
+    if not await verify_password_async(password_data.old_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Mevcut şifreniz hatalı"
         )
     
     # Yeni şifreyi hash'le ve kaydet
-    current_user.password_hash = get_password_hash(password_data.new_password)
-    db.commit()
+    current_user.password_hash = await get_password_hash_async(password_data.new_password)
+    await run_in_threadpool(db.commit)
     
     return {"message": "Şifreniz başarıyla değiştirildi"}
 
 
+@router.post("/refresh", response_model=Token, summary="Token Yenile")
+def refresh_token(
+    request: TokenRefresh,
+    db: Session = Depends(get_db)
+):
+    """
+    Refresh token ile yeni access token ve refresh token döner
+    
+    Gönderilen refresh token iptal edilir (tek kullanımlık); bir sonraki
+    yenilemede yanıttaki yeni refresh token kullanılmalı.
+    """
+    auth_service = AuthService(db)
+    return auth_service.refresh(request.refresh_token)
+
+
 @router.post("/logout", summary="Çıkış Yap")
-def logout():
+def logout(
+    request: Optional[TokenRefresh] = None,
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: Session = Depends(get_db)
+):
     """
-    Çıkış yapar (Frontend'de token'ı siler)
+    Çıkış yapar: Authorization header'daki access token ve gövdede
+    gönderilen refresh token sunucu tarafında iptal edilir
     
-    Not: Sunucu tarafında session yok, token frontend'de silinmeli
+    Token'lar gönderilmezse yalnızca frontend'de silinmeleri yeterlidir
     """
-    return {"message": "Başarıyla çıkış yapıldı"}
+    auth_service = AuthService(db)
+    access_payload = decode_access_token(token) if token else None
+    return auth_service.logout(access_payload, request.refresh_token if request else None)
 
 
 @router.post("/forgot-password", summary="Şifremi Unuttum")
@@ -178,7 +202,7 @@ def forgot_password(
 
 
 @router.post("/reset-password", summary="Şifre Sıfırla")
-def reset_password(
+async def reset_password(
     request: ResetPasswordRequest,
     db: Session = Depends(get_db)
 ):
@@ -190,7 +214,7 @@ def reset_password(
     - **new_password_confirm**: Yeni şifre tekrarı
     """
     auth_service = AuthService(db)
-    return auth_service.reset_password(request.token, request.new_password)
+    return await auth_service.reset_password_async(request.token, request.new_password)
 
 
 @router.get("/verify-reset-token/{token}", summary="Token Doğrula")
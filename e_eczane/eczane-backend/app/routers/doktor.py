@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import uuid
 from datetime import date
-from app.core.database import get_db
-from app.core.dependencies import get_current_doktor
+from app.core.database import get_db, get_async_read_db
+from app.core.dependencies import get_current_doktor, get_current_doktor_profile, get_cursor_key
 from app.models.user import User
 from app.models.doktor import Doktor
 from app.models.recete import Recete, ReceteIlac
@@ -12,25 +13,19 @@ from app.models.ilac import Ilac
 from app.models.hasta import Hasta
 from app.schemas.doktor import DoktorProfileResponse, ReceteCreate, ReceteIlacCreate
 from app.schemas.recete import ReceteResponse
-from app.schemas.ilac import IlacSearchResponse, IlacResponse
-from app.repositories.ilac_repository import IlacRepository
+from app.schemas.ilac import IlacSearchResponse, IlacResponse, IlacAutocompleteItem
+from app.repositories.ilac_repository import IlacRepository, AsyncIlacRepository
 from app.services.recete_service import ReceteService
+from app.utils.pagination import CursorKey, apply_keyset, split_page
 
 router = APIRouter()
 
 
 @router.get("/profil", response_model=DoktorProfileResponse, summary="Doktor Profilini Görüntüle")
-def get_profil(current_user: User = Depends(get_current_doktor), db: Session = Depends(get_db)):
+def get_profil(doktor: Doktor = Depends(get_current_doktor_profile)):
     """
     Giriş yapmış doktorun profil bilgilerini döndürür.
     """
-    doktor = db.query(Doktor).filter(Doktor.user_id == current_user.id).first()
-    if not doktor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doktor profili bulunamadı."
-        )
-    
     return DoktorProfileResponse(
         id=str(doktor.id),
         diploma_no=doktor.diploma_no,
@@ -39,7 +34,7 @@ def get_profil(current_user: User = Depends(get_current_doktor), db: Session = D
         uzmanlik=doktor.uzmanlik,
         hastane=doktor.hastane,
         telefon=doktor.telefon,
-        email=current_user.email
+        email=doktor.user.email
     )
 
 
@@ -48,7 +43,8 @@ async def ara_ilac(
     query: Optional[str] = Query(None, description="İlaç adı veya barkod"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    exact_total: bool = Query(True, description="false: toplam sayı hesaplanmaz (daha hızlı), sadece has_next döner"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_doktor)
 ):
     """
@@ -59,26 +55,42 @@ async def ara_ilac(
     search_params = IlacSearchParams(
         query=query,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        exact_total=exact_total
     )
     
-    ilac_repo = IlacRepository(db)
-    ilaclar, total = ilac_repo.search(search_params)
+    ilac_repo = AsyncIlacRepository(db)
+    ilaclar, total, has_next = await ilac_repo.search_page(search_params)
     
     return {
         "items": ilaclar,
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+        "has_next": has_next
     }
 
 
+@router.get("/ilac/autocomplete", response_model=List[IlacAutocompleteItem], summary="İlaç Otomatik Tamamlama")
+async def autocomplete_ilac(
+    q: str = Query(..., min_length=1, max_length=100, description="İlaç adı, barkod veya etken maddenin başı"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_doktor)
+):
+    """
+    Yazarken ilaç önerileri (Türkçe karakter ve büyük/küçük harf duyarsız)
+    """
+    ilac_repo = AsyncIlacRepository(db)
+    return await ilac_repo.autocomplete(q, limit)
+
+
 @router.post("/recete/yaz", status_code=status.HTTP_201_CREATED, summary="Reçete Yaz")
-async def yaz_recete(
+def yaz_recete(
     recete_data: ReceteCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_doktor)
+    doktor: Doktor = Depends(get_current_doktor_profile)
 ):
     """
     Yeni reçete oluştur
@@ -86,13 +98,6 @@ async def yaz_recete(
     - **tc_no**: Hasta TC Kimlik No
     - **ilaclar**: İlaç listesi [{"ilac_id": "...", "miktar": 1, "kullanim_talimati": "..."}]
     """
-    doktor = db.query(Doktor).filter(Doktor.user_id == current_user.id).first()
-    if not doktor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doktor profili bulunamadı."
-        )
-    
     # TC No doğrula (isteğe bağlı - hasta kayıtlı değilse de reçete yazılabilir)
     hasta = db.query(Hasta).filter(Hasta.tc_no == recete_data.tc_no).first()
     
@@ -116,8 +121,14 @@ async def yaz_recete(
     toplam_tutar = 0
     ilac_detaylari = []
     
+    ilac_repo = IlacRepository(db)
+    ilaclar = ilac_repo.get_many(
+        [uuid.UUID(ilac_item.get("ilac_id")) for ilac_item in recete_data.ilaclar],
+        aktif_only=False
+    )
+    
     for ilac_item in recete_data.ilaclar:
-        ilac = db.query(Ilac).filter(Ilac.id == uuid.UUID(ilac_item.get("ilac_id"))).first()
+        ilac = ilaclar.get(uuid.UUID(ilac_item.get("ilac_id")))
         if not ilac:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -158,34 +169,39 @@ async def yaz_recete(
 
 
 @router.get("/recetelerim", summary="Yazdığım Reçeteler")
-async def listele_recetelerim(
+def listele_recetelerim(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor_key: Optional[CursorKey] = Depends(get_cursor_key),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_doktor)
+    doktor: Doktor = Depends(get_current_doktor_profile)
 ):
     """
     Doktorun yazdığı reçeteleri listeler
-    """
-    doktor = db.query(Doktor).filter(Doktor.user_id == current_user.id).first()
-    if not doktor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Doktor profili bulunamadı."
-        )
     
+    Cursor verilirse page yerine keyset sayfalama kullanılır.
+    """
     # Doktorun yazdığı reçeteler (doktor_adi ile eşleştir)
     query = db.query(Recete).filter(Recete.doktor_adi == doktor.tam_ad)
     
     total = query.count()
-    offset = (page - 1) * page_size
-    receteler = query.order_by(Recete.created_at.desc()).offset(offset).limit(page_size).all()
+    query = apply_keyset(query, Recete, cursor_key)
+    if cursor_key is None:
+        query = query.offset((page - 1) * page_size)
+    receteler, next_cursor = split_page(query.limit(page_size + 1).all(), page_size)
+    
+    # Sayfadaki tüm ilaçlar katalog cache'inden tek seferde
+    ilac_repo = IlacRepository(db)
+    ilaclar = ilac_repo.get_many(
+        [ri.ilac_id for recete in receteler for ri in recete.ilaclar],
+        aktif_only=False
+    )
     
     result = []
     for recete in receteler:
         ilac_listesi = []
         for ri in recete.ilaclar:
-            ilac = db.query(Ilac).filter(Ilac.id == ri.ilac_id).first()
+            ilac = ilaclar.get(ri.ilac_id)
             if ilac:
                 ilac_listesi.append({
                     "ilac_adi": ilac.ad,
@@ -213,5 +229,6 @@ async def listele_recetelerim(
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
+        "total_pages": (total + page_size - 1) // page_size,
+        "next_cursor": next_cursor
     }
@@ -1,80 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_eczane
-from app.models.user import User
+from app.core.database import get_db, get_read_db
+from app.core.dependencies import get_current_eczane_profile, get_cursor_key
 from app.models.eczane import Eczane
 from app.models.siparis import Siparis
-from app.models.hasta import Hasta
 from app.schemas.stok import (
     StokResponse, StokCreate, StokUpdate, 
     StokUyari, IlacEkle
 )
 from app.schemas.eczane import EczaneResponse, EczaneUpdate
 from app.schemas.siparis import (
-    SiparisResponse, SiparisDetayItem,
+    SiparisResponse,
     SiparisDurumGuncelle, SiparisIptal
 )
 from app.services.eczane_service import EczaneService
 from app.services.siparis_service import SiparisService
+from app.services.siparis_serializer import siparis_to_response, siparisler_to_response
 from app.repositories.stok_repository import StokRepository
-from app.repositories.eczane_repository import EczaneRepository
+from app.repositories.siparis_repository import SiparisRepository
 from app.utils.enums import SiparisDurum
-from app.utils.email import send_order_status_email
+from app.utils.pagination import CursorKey, NEXT_CURSOR_HEADER
+from app.utils.email import queue_order_status_email
 
 router = APIRouter(tags=["Eczane"])
 
 
-def siparis_to_response(siparis: Siparis, db: Session) -> SiparisResponse:
-    """
-    Convert a Siparis model to SiparisResponse, properly handling the 
-    detaylar conversion with ilac_adi and barkod from related ilac objects.
-    """
-    # Get eczane and hasta names
-    eczane = db.query(Eczane).filter(Eczane.id == siparis.eczane_id).first()
-    hasta = db.query(Hasta).filter(Hasta.id == siparis.hasta_id).first()
-    
-    # Build detaylar manually because SiparisDetay doesn't have ilac_adi/barkod columns directly
-    detaylar_response = []
-    for detay in siparis.detaylar:
-        detaylar_response.append(SiparisDetayItem(
-            ilac_id=str(detay.ilac_id),
-            ilac_adi=detay.ilac.ad if detay.ilac else "Bilinmeyen İlaç",
-            barkod=detay.ilac.barkod if detay.ilac else "",
-            miktar=detay.miktar,
-            birim_fiyat=detay.birim_fiyat,
-            ara_toplam=detay.ara_toplam
-        ))
-    
-    return SiparisResponse(
-        id=str(siparis.id),
-        siparis_no=siparis.siparis_no,
-        eczane_id=str(siparis.eczane_id),
-        eczane_adi=eczane.eczane_adi if eczane else "Bilinmeyen Eczane",
-        hasta_id=str(siparis.hasta_id),
-        hasta_adi=hasta.tam_ad if hasta else "Bilinmeyen Hasta",
-        recete_id=str(siparis.recete_id) if siparis.recete_id else None,
-        toplam_tutar=siparis.toplam_tutar,
-        durum=siparis.durum,
-        odeme_durumu=siparis.odeme_durumu,
-        teslimat_adresi=siparis.teslimat_adresi,
-        siparis_notu=siparis.siparis_notu,
-        iptal_nedeni=siparis.iptal_nedeni,
-        created_at=siparis.created_at,
-        updated_at=siparis.updated_at,
-        detaylar=detaylar_response
-    )
-
-
 # ==================== PROFİL ====================
 
 @router.get("/profil", response_model=EczaneResponse, summary="Profil Görüntüle")
 def get_profil(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Eczane profilini görüntüle
@@ -82,20 +40,13 @@ def get_profil(
     Returns:
         EczaneResponse: Eczane profil bilgileri
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
-    if not eczane:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Eczane profili bulunamadı"
-        )
     return eczane
 
 @router.put("/profil", response_model=EczaneResponse, summary="Profil Güncelle")
 def update_profil(
     update_data: EczaneUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Eczane profilini güncelle
@@ -106,13 +57,6 @@ def update_profil(
     Returns:
         EczaneResponse: Güncellenmiş profil
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
-    if not eczane:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Eczane profili bulunamadı"
-        )
     eczane_service = EczaneService(db)
     return eczane_service.update_profil(eczane.id, update_data)
 
@@ -121,7 +65,7 @@ def update_profil(
 @router.get("/stoklar", response_model=List[StokResponse], summary="Stokları Listele")
 def list_stoklar(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Eczaneye ait tüm stokları listele
@@ -129,8 +73,6 @@ def list_stoklar(
     Returns:
         List[StokResponse]: Stok listesi
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
     stok_repo = StokRepository(db)
     stoklar = stok_repo.get_by_eczane(eczane.id)
     # This response construction is kept as is because it's for the final JSON output
@@ -140,7 +82,7 @@ def list_stoklar(
 @router.get("/stoklar/uyarilar", response_model=List[StokUyari], summary="Stok Uyarıları")
 def get_stok_uyarilari(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Düşük stok uyarılarını getir
@@ -148,8 +90,6 @@ def get_stok_uyarilari(
     Returns:
         List[StokUyari]: Düşük stok uyarıları
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
     eczane_service = EczaneService(db)
     return eczane_service.get_stok_uyarilari(eczane.id)
 
@@ -157,7 +97,7 @@ def get_stok_uyarilari(
 def add_stok(
     stok_data: StokCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Yeni stok ekle
@@ -168,8 +108,6 @@ def add_stok(
     Returns:
         StokResponse: Oluşturulan stok
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
     stok_repo = StokRepository(db)
     stok = stok_repo.create(eczane.id, stok_data)
     # The response model will handle the conversion
@@ -180,7 +118,7 @@ def update_stok(
     stok_id: uuid.UUID,
     stok_data: StokUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Stok bilgilerini güncelle
@@ -192,8 +130,6 @@ def update_stok(
     Returns:
         StokResponse: Güncellenmiş stok
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
     stok_repo = StokRepository(db)
     stok = stok_repo.get_by_id(stok_id)
     if not stok or stok.eczane_id != eczane.id:
@@ -208,7 +144,7 @@ def update_stok(
 def delete_stok(
     stok_id: uuid.UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Stok kaydını sil
@@ -216,8 +152,6 @@ def delete_stok(
     Args:
         stok_id: Stok ID
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
     stok_repo = StokRepository(db)
     stok = stok_repo.get_by_id(stok_id)
     if not stok or stok.eczane_id != eczane.id:
@@ -232,7 +166,7 @@ def delete_stok(
 def add_recetesiz_urun(
     ilac_data: IlacEkle,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Reçetesiz ilaç/ürün ekle
@@ -248,16 +182,8 @@ def add_recetesiz_urun(
     import traceback
     try:
         print(f"[DEBUG] add_recetesiz_urun called with: {ilac_data}")
-        eczane_repo = EczaneRepository(db)
-        eczane = eczane_repo.get_by_user_id(current_user.id)
         print(f"[DEBUG] Found eczane: {eczane}")
         
-        if not eczane:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Eczane profili bulunamadı"
-            )
-        
         eczane_service = EczaneService(db)
         _, stok = eczane_service.add_recetesiz_ilac(eczane.id, ilac_data)
         print(f"[DEBUG] Created stok: {stok}")
@@ -278,11 +204,13 @@ def add_recetesiz_urun(
 
 @router.get("/siparisler", response_model=List[SiparisResponse], summary="Siparişleri Listele")
 def list_siparisler(
+    response: Response,
     durum: Optional[str] = Query(None, description="Duruma göre filtrele"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    cursor_key: Optional[CursorKey] = Depends(get_cursor_key),
+    db: Session = Depends(get_read_db),
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Eczaneye ait siparişleri listele
@@ -291,30 +219,37 @@ def list_siparisler(
         durum: Sipariş durumu filtresi (opsiyonel)
         page: Sayfa numarası
         page_size: Sayfa boyutu
+        cursor: Keyset cursor (opsiyonel, verilirse page yok sayılır)
     
     Returns:
-        List[SiparisResponse]: Sipariş listesi
+        List[SiparisResponse]: Sipariş listesi; sonraki sayfanın cursor'ı X-Next-Cursor header'ında
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
-    query = db.query(Siparis).filter(Siparis.eczane_id == eczane.id)
+    durum_enum = None
     if durum:
         try:
             durum_enum = SiparisDurum(durum)
-            query = query.filter(Siparis.durum == durum_enum)
         except ValueError:
             pass
     
-    offset = (page - 1) * page_size
-    siparisler = query.order_by(Siparis.created_at.desc()).offset(offset).limit(page_size).all()
-    # Use helper function to properly convert detaylar
-    return [siparis_to_response(s, db) for s in siparisler]
+    siparis_repo = SiparisRepository(db)
+    siparis_ids, next_cursor = siparis_repo.get_page_ids(
+        eczane_id=eczane.id,
+        durum=durum_enum,
+        page=page,
+        page_size=page_size,
+        cursor_key=cursor_key
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    # Sayfadaki siparişleri sabit sayıda sorgu ile dönüştür
+    return siparisler_to_response(siparis_ids, db)
 
 @router.get("/siparisler/{siparis_id}", response_model=SiparisResponse, summary="Sipariş Detayı")
 def get_siparis_detay(
     siparis_id: uuid.UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Sipariş detaylarını görüntüle
@@ -325,8 +260,6 @@ def get_siparis_detay(
     Returns:
         SiparisResponse: Sipariş detayları
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
     siparis = db.query(Siparis).filter(
         Siparis.id == siparis_id,
         Siparis.eczane_id == eczane.id
@@ -342,9 +275,8 @@ def get_siparis_detay(
 def update_siparis_durum(
     siparis_id: uuid.UUID,
     durum_data: SiparisDurumGuncelle,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Sipariş durumunu güncelle (Eczane için)
@@ -356,9 +288,6 @@ def update_siparis_durum(
     Returns:
         SiparisResponse: Güncellenmiş sipariş
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
-    
     # Sipariş kontrolü
     siparis_service = SiparisService(db)
     siparis = siparis_service.get_siparis_by_id_and_eczane(siparis_id, eczane.id)
@@ -368,22 +297,16 @@ def update_siparis_durum(
             detail="Sipariş bulunamadı"
         )
     
-    # E-posta için gerekli bilgileri önceden al (DB session kapandıktan sonra kullanmak için)
+    # E-posta için gerekli bilgileri önceden al
     hasta_email = siparis.hasta.user.email
     hasta_adi = siparis.hasta.tam_ad
     eczane_adi = eczane.eczane_adi
     
-    siparis = siparis_service.update_durum(
-        siparis_id=siparis_id,
-        yeni_durum=durum_data.yeni_durum,
-        user_id=current_user.id,
-        aciklama=durum_data.aciklama
-    )
-    
-    # E-postayı arka planda gönder (yanıtı beklemeden)
+    # E-postayı kuyruğa ekle: durum güncellemesiyle aynı commit'te yazılır,
+    # güncelleme reddedilirse session ile birlikte geri alınır (EmailWorker toplu gönderir)
     status_key = durum_data.yeni_durum.value.upper()
-    background_tasks.add_task(
-        send_order_status_email,
+    queue_order_status_email(
+        db,
         to_email=hasta_email,
         order_id=str(siparis.id),
         status=status_key,
@@ -391,14 +314,20 @@ def update_siparis_durum(
         eczane_adi=eczane_adi
     )
     
+    siparis = siparis_service.update_durum(
+        siparis_id=siparis_id,
+        yeni_durum=durum_data.yeni_durum,
+        user_id=eczane.user_id,
+        aciklama=durum_data.aciklama
+    )
+    
     return siparis_to_response(siparis, db)
 
 @router.post("/siparisler/{siparis_id}/onayla", response_model=SiparisResponse, summary="Sipariş Onayla")
 def onayla_siparis(
     siparis_id: uuid.UUID,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Siparişi onayla ve hazırlanmaya başla
@@ -414,16 +343,15 @@ def onayla_siparis(
         aciklama="Sipariş onaylandı ve hazırlanmaya başlandı"
     )
     # Re-use the update function
-    return update_siparis_durum(siparis_id, durum_data, background_tasks, db, current_user)
+    return update_siparis_durum(siparis_id, durum_data, db, eczane)
 
 
 @router.post("/siparisler/{siparis_id}/iptal", response_model=SiparisResponse, summary="Sipariş İptal Et")
 def iptal_siparis(
     siparis_id: uuid.UUID,
     iptal_data: SiparisIptal,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_eczane)
+    eczane: Eczane = Depends(get_current_eczane_profile)
 ):
     """
     Siparişi iptal et (Eczane için)
@@ -435,9 +363,6 @@ def iptal_siparis(
     Returns:
         SiparisResponse: İptal edilmiş sipariş
     """
-    eczane_repo = EczaneRepository(db)
-    eczane = eczane_repo.get_by_user_id(current_user.id)
-    
     # Sipariş kontrolü
     siparis_service = SiparisService(db)
     siparis = siparis_service.get_siparis_by_id_and_eczane(siparis_id, eczane.id)
@@ -452,15 +377,9 @@ def iptal_siparis(
     hasta_adi = siparis.hasta.tam_ad
     eczane_adi = eczane.eczane_adi
     
-    siparis = siparis_service.iptal_et(
-        siparis_id=siparis_id,
-        iptal_nedeni=iptal_data.iptal_nedeni,
-        user_id=current_user.id
-    )
-    
-    # İptal e-postasını arka planda gönder
-    background_tasks.add_task(
-        send_order_status_email,
+    # İptal e-postasını kuyruğa ekle (iptalle aynı commit'te yazılır)
+    queue_order_status_email(
+        db,
         to_email=hasta_email,
         order_id=str(siparis.id),
         status="IPTAL_EDILDI",
@@ -469,4 +388,10 @@ def iptal_siparis(
         eczane_adi=eczane_adi
     )
     
+    siparis = siparis_service.iptal_et(
+        siparis_id=siparis_id,
+        iptal_nedeni=iptal_data.iptal_nedeni,
+        user_id=eczane.user_id
+    )
+    
     return siparis_to_response(siparis, db)
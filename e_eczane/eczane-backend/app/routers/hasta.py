@@ -1,105 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
 import uuid
-from app.core.database import get_db
-from app.core.dependencies import get_current_hasta
+from app.core.database import get_db, get_read_db, get_async_read_db
+from app.core.dependencies import get_current_hasta, get_current_hasta_profile, get_cursor_key
 from app.models.user import User
 from app.models.hasta import Hasta
-from app.models.eczane import Eczane
 from app.models.siparis import Siparis
 from app.models.recete import Recete
 from app.schemas.hasta import HastaProfileResponse
 from app.schemas.recete import ReceteQuery, ReceteResponse
-from app.schemas.ilac import IlacResponse, IlacSearchParams, MuadilIlacResponse, IlacSearchResponse
+from app.schemas.ilac import (
+    IlacResponse, IlacSearchParams, MuadilIlacResponse, IlacSearchResponse, IlacAutocompleteItem, IlacWithStokResponse
+)
 from app.schemas.siparis import (
     SiparisCreate, SiparisResponse, SiparisIptal,
-    EczaneListItem, SiparisDetayItem
+    EczaneListItem, MuadilliEczaneItem, SepetKarsilama
 )
+from app.schemas.sepet import SepetAddItem
 from app.services.recete_service import ReceteService
 from app.services.siparis_service import SiparisService
-from app.repositories.ilac_repository import IlacRepository
-from app.repositories.eczane_repository import EczaneRepository
+from app.services.siparis_serializer import siparis_to_response, siparisler_to_response_async
+from app.repositories.ilac_repository import AsyncIlacRepository
+from app.repositories.eczane_repository import AsyncEczaneRepository
 from app.repositories.recete_repository import ReceteRepository
+from app.repositories.siparis_repository import AsyncSiparisRepository
 from app.utils.enums import SiparisDurum, OdemeDurum
-from app.utils.email import send_order_status_email
+from app.utils.pagination import CursorKey, NEXT_CURSOR_HEADER
 from app.schemas.odeme import OdemeRequest, OdemeResponse, validate_payment
 
 router = APIRouter()
 
 
-def siparis_to_response(siparis: Siparis, db: Session) -> SiparisResponse:
-    """
-    Convert a Siparis model to SiparisResponse, properly handling the 
-    detaylar conversion with ilac_adi and barkod from related ilac objects.
-    """
-    # Get eczane and hasta names
-    eczane = db.query(Eczane).filter(Eczane.id == siparis.eczane_id).first()
-    hasta = db.query(Hasta).filter(Hasta.id == siparis.hasta_id).first()
-    
-    # Build detaylar manually because SiparisDetay doesn't have ilac_adi/barkod columns directly
-    detaylar_response = []
-    for detay in siparis.detaylar:
-        detaylar_response.append(SiparisDetayItem(
-            ilac_id=str(detay.ilac_id),
-            ilac_adi=detay.ilac.ad if detay.ilac else "Bilinmeyen İlaç",
-            barkod=detay.ilac.barkod if detay.ilac else "",
-            miktar=detay.miktar,
-            birim_fiyat=detay.birim_fiyat,
-            ara_toplam=detay.ara_toplam
-        ))
-    
-    return SiparisResponse(
-        id=str(siparis.id),
-        siparis_no=siparis.siparis_no,
-        eczane_id=str(siparis.eczane_id),
-        eczane_adi=eczane.eczane_adi if eczane else "Bilinmeyen Eczane",
-        hasta_id=str(siparis.hasta_id),
-        hasta_adi=hasta.tam_ad if hasta else "Bilinmeyen Hasta",
-        recete_id=str(siparis.recete_id) if siparis.recete_id else None,
-        toplam_tutar=siparis.toplam_tutar,
-        durum=siparis.durum,
-        odeme_durumu=siparis.odeme_durumu,
-        teslimat_adresi=siparis.teslimat_adresi,
-        siparis_notu=siparis.siparis_notu,
-        iptal_nedeni=siparis.iptal_nedeni,
-        created_at=siparis.created_at,
-        updated_at=siparis.updated_at,
-        detaylar=detaylar_response
-    )
-
-
 @router.get("/profil", response_model=HastaProfileResponse, summary="Hasta Profilini Görüntüle")
-def get_profil(current_user: User = Depends(get_current_hasta), db: Session = Depends(get_db)):
+def get_profil(hasta: Hasta = Depends(get_current_hasta_profile)):
     """
     Giriş yapmış hastanın profil bilgilerini döndürür.
     """
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-    if not hasta:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Hasta profili bulunamadı."
-        )
-    
     # User ve Hasta modellerinden bilgileri birleştir
     profile_data = {
         **hasta.__dict__,
-        "email": current_user.email
+        "email": hasta.user.email
     }
     return HastaProfileResponse.model_validate(profile_data)
 
 @router.post("/recete/sorgula", response_model=ReceteResponse, summary="Reçete Sorgula")
-async def sorgula_recete(
+def sorgula_recete(
     query: ReceteQuery,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_hasta)
+    hasta: Hasta = Depends(get_current_hasta_profile)
 ):
     """
     TC No ve Reçete No ile reçete sorgula
     """
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-    if not hasta:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hasta profili bulunamadı")
     if query.tc_no != hasta.tc_no:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sadece kendi reçetelerinizi sorgulayabilirsiniz")
     
@@ -112,13 +66,10 @@ async def sorgula_recete(
     return recete
 
 @router.get("/recetelerim", response_model=List[ReceteResponse], summary="Reçetelerimi Listele")
-def list_my_receteler(db: Session = Depends(get_db), current_user: User = Depends(get_current_hasta)):
+def list_my_receteler(db: Session = Depends(get_db), hasta: Hasta = Depends(get_current_hasta_profile)):
     """
     Giriş yapmış hastanın tüm reçetelerini listeler.
     """
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-    if not hasta:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hasta profili bulunamadı.")
     
     recete_repo = ReceteRepository(db)
     receteler = recete_repo.get_by_tc_no(hasta.tc_no)
@@ -142,7 +93,8 @@ async def ara_ilac(
     max_fiyat: Optional[float] = Query(None, ge=0),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    exact_total: bool = Query(True, description="false: toplam sayı hesaplanmaz (daha hızlı), sadece has_next döner"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_hasta)
 ):
     from app.utils.enums import IlacKategori
@@ -162,29 +114,45 @@ async def ara_ilac(
         min_fiyat=Decimal(str(min_fiyat)) if min_fiyat else None,
         max_fiyat=Decimal(str(max_fiyat)) if max_fiyat else None,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        exact_total=exact_total
     )
     
-    ilac_repo = IlacRepository(db)
-    ilaclar, total = ilac_repo.search(search_params)
+    ilac_repo = AsyncIlacRepository(db)
+    ilaclar, total, has_next = await ilac_repo.search_page(search_params)
     
     return {
         "items": ilaclar,
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+        "has_next": has_next
     }
 
 
+@router.get("/ilac/autocomplete", response_model=List[IlacAutocompleteItem], summary="İlaç Otomatik Tamamlama")
+async def autocomplete_ilac(
+    q: str = Query(..., min_length=1, max_length=100, description="İlaç adı, barkod veya etken maddenin başı"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_hasta)
+):
+    """
+    Yazarken ilaç önerileri (Türkçe karakter ve büyük/küçük harf duyarsız)
+    """
+    ilac_repo = AsyncIlacRepository(db)
+    return await ilac_repo.autocomplete(q, limit)
+
+
 @router.get("/ilac/{ilac_id}", response_model=IlacResponse, summary="İlaç Detayı")
 async def get_ilac_detay(
     ilac_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_hasta)
 ):
-    ilac_repo = IlacRepository(db)
-    ilac = ilac_repo.get_by_id(ilac_id)
+    ilac_repo = AsyncIlacRepository(db)
+    ilac = await ilac_repo.get_by_id(ilac_id)
     
     if not ilac:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="İlaç bulunamadı")
@@ -195,62 +163,97 @@ async def get_ilac_detay(
 @router.get("/ilac/{ilac_id}/muadiller", response_model=List[MuadilIlacResponse], summary="Muadil İlaçlar")
 async def get_muadil_ilaclar(
     ilac_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_hasta)
 ):
-    ilac_repo = IlacRepository(db)
+    ilac_repo = AsyncIlacRepository(db)
     
-    ilac = ilac_repo.get_by_id(ilac_id)
+    ilac = await ilac_repo.get_by_id(ilac_id)
     if not ilac:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="İlaç bulunamadı")
     
-    muadiller = ilac_repo.get_muadiller(ilac_id)
+    muadiller = await ilac_repo.get_muadiller(ilac_id)
     return muadiller
 
-# ... (rest of the file remains the same)
-# Note: The following endpoints are copied from the original file without changes for brevity
-# but they would also need to be reviewed for similar issues.
 
-@router.get("/eczaneler", response_model=List[EczaneListItem], summary="Eczaneleri Listele (GET)")
-async def get_eczaneler(
-    ilac_ids: str = Query(..., description="Virgülle ayrılmış ilaç ID'leri"),
-    db: Session = Depends(get_db),
+@router.get("/ilac/{ilac_id}/muadiller/stokta", response_model=List[IlacWithStokResponse], summary="Eczanede Stokta Olan Muadiller")
+async def get_stoktaki_muadil_ilaclar(
+    ilac_id: uuid.UUID,
+    eczane_id: uuid.UUID = Query(..., description="Muadillerin aranacağı eczane"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_hasta)
 ):
     """
-    Belirtilen ilaçları stoklarında bulunduran eczaneleri listeler.
-    Eczaneler hastanın konumuna göre (mahalle > ilçe > il) sıralanır.
+    İlacın seçilen eczanede stokta bulunan muadilleri
+    
+    Asıl ilaç eczanede tükendiğinde hastaya aynı eczaneden alabileceği
+    muadilleri göstermek için kullanılır.
+    
+    Returns:
+        List[IlacWithStokResponse]: Stoktaki muadiller (ada göre sıralı)
     """
-    # Parse comma-separated ilac_ids
-    ilac_id_list = [id.strip() for id in ilac_ids.split(',') if id.strip()]
+    ilac_repo = AsyncIlacRepository(db)
     
-    if not ilac_id_list:
-        return []
+    ilac = await ilac_repo.get_by_id(ilac_id)
+    if not ilac:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="İlaç bulunamadı")
     
-    # Hasta bilgilerini al (konum için)
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
+    stoktakiler = await ilac_repo.get_stoktaki_muadiller(ilac_id, eczane_id)
+    return [
+        IlacWithStokResponse.model_validate(muadil).model_copy(
+            update={"stok_durumu": stok.stok_durumu, "stok_miktari": stok.miktar}
+        )
+        for muadil, stok in stoktakiler
+    ]
+
+# ... (rest of the file remains the same)
+# Note: The following endpoints are copied from the original file without changes for brevity
+# but they would also need to be reviewed for similar issues.
+
+# Koordinat bazlı aramada limit verilmezse dönecek eczane sayısı
+VARSAYILAN_YAKIN_ECZANE_SAYISI = 20
+
+
+async def _eczane_listesi(
+    db: AsyncSession,
+    hasta: Hasta,
+    ilac_id_list: List[str],
+    limit: Optional[int]
+) -> List[EczaneListItem]:
+    """
+    İlaçları stokta bulunduran eczaneleri hastanın konumuna göre listele
     
+    Hastanın koordinatları varsa en yakın eczaneler mesafeye göre, yoksa
+    mahalle > ilçe > il önceliğine göre sıralanır.
+    """
     # Hasta lokasyon bilgilerini doğrudan kullan
-    hasta_mahalle = hasta.mahalle if hasta else None
-    hasta_ilce = hasta.ilce if hasta else None
-    hasta_il = hasta.il if hasta else None
-    
-    eczane_repo = EczaneRepository(db)
-    eczaneler_with_stock = eczane_repo.find_eczaneler_with_stock(
-        ilac_id_list,
-        hasta_mahalle,
-        hasta_ilce,
-        hasta_il
-    )
+    hasta_mahalle = hasta.mahalle
+    hasta_ilce = hasta.ilce
+    hasta_il = hasta.il
+    
+    eczane_repo = AsyncEczaneRepository(db)
+    if hasta.enlem is not None and hasta.boylam is not None:
+        eczaneler_with_stock = await eczane_repo.find_nearest_eczaneler_with_stock(
+            ilac_id_list,
+            hasta.enlem,
+            hasta.boylam,
+            k=limit or VARSAYILAN_YAKIN_ECZANE_SAYISI,
+            hasta_il=hasta_il
+        )
+    else:
+        eczaneler_with_stock = [
+            (eczane, stok_bilgileri, tum_urunler_mevcut, None)
+            for eczane, stok_bilgileri, tum_urunler_mevcut in await eczane_repo.find_eczaneler_with_stock(
+                ilac_id_list,
+                hasta_mahalle,
+                hasta_ilce,
+                hasta_il,
+                limit=limit
+            )
+        ]
     
     result = []
-    for eczane, stok_bilgileri in eczaneler_with_stock:
-        ilac_miktar_map = {ilac_id: 1 for ilac_id in ilac_id_list}
-        stok_yeterli, eksik = eczane_repo.check_stock_availability(
-            str(eczane.id),
-            ilac_miktar_map
-        )
-        
+    for eczane, stok_bilgileri, tum_urunler_mevcut, mesafe_km in eczaneler_with_stock:
         result.append(EczaneListItem(
             id=str(eczane.id),
             eczane_adi=eczane.eczane_adi,
@@ -261,47 +264,104 @@ async def get_eczaneler(
             il=eczane.il,
             eczaci_tam_ad=eczane.eczaci_tam_ad,
             stok_durumu=stok_bilgileri,
-            tum_urunler_mevcut=stok_yeterli
+            tum_urunler_mevcut=tum_urunler_mevcut,
+            mesafe_km=round(mesafe_km, 2) if mesafe_km is not None else None
         ))
     
     return result
 
 
+@router.get("/eczaneler", response_model=List[EczaneListItem], summary="Eczaneleri Listele (GET)")
+async def get_eczaneler(
+    ilac_ids: str = Query(..., description="Virgülle ayrılmış ilaç ID'leri"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="En fazla kaç eczane listeleneceği"),
+    db: AsyncSession = Depends(get_async_read_db),
+    hasta: Hasta = Depends(get_current_hasta_profile)
+):
+    """
+    Belirtilen ilaçları stoklarında bulunduran eczaneleri listeler.
+    Hastanın koordinatları varsa en yakın eczaneler mesafeye göre,
+    yoksa konuma göre (mahalle > ilçe > il) sıralanır.
+    """
+    # Parse comma-separated ilac_ids
+    ilac_id_list = [id.strip() for id in ilac_ids.split(',') if id.strip()]
+    
+    if not ilac_id_list:
+        return []
+    
+    return await _eczane_listesi(db, hasta, ilac_id_list, limit)
+
+
 @router.post("/eczane/listele", response_model=List[EczaneListItem], summary="Eczane Listele")
 async def listele_eczaneler(
     ilac_ids: List[str],
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_hasta)
+    limit: Optional[int] = Query(None, ge=1, le=100, description="En fazla kaç eczane listeleneceği"),
+    db: AsyncSession = Depends(get_async_read_db),
+    hasta: Hasta = Depends(get_current_hasta_profile)
 ):
     """
     Belirtilen ilaçları stoklarında bulunduran eczaneleri listeler (POST version).
-    Eczaneler hastanın konumuna göre (mahalle > ilçe > il) sıralanır.
+    Hastanın koordinatları varsa en yakın eczaneler mesafeye göre,
+    yoksa konuma göre (mahalle > ilçe > il) sıralanır.
     """
-    # Hasta bilgilerini al (konum için)
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-    
-    # Hasta lokasyon bilgilerini doğrudan kullan
-    hasta_mahalle = hasta.mahalle if hasta else None
-    hasta_ilce = hasta.ilce if hasta else None
-    hasta_il = hasta.il if hasta else None
-    
-    eczane_repo = EczaneRepository(db)
-    eczaneler_with_stock = eczane_repo.find_eczaneler_with_stock(
-        ilac_ids,
-        hasta_mahalle,
-        hasta_ilce,
-        hasta_il
+    return await _eczane_listesi(db, hasta, ilac_ids, limit)
+
+
+@router.post("/eczane/muadil-ile-listele", response_model=List[MuadilliEczaneItem], summary="Muadillerle Karşılayan Eczaneler")
+async def listele_muadilli_eczaneler(
+    sepet_items: List[SepetAddItem],
+    limit: Optional[int] = Query(None, ge=1, le=100, description="En fazla kaç eczane listeleneceği"),
+    db: AsyncSession = Depends(get_async_read_db),
+    hasta: Hasta = Depends(get_current_hasta_profile)
+):
+    """
+    Sepetteki ilaçları asıl halleriyle veya muadilleriyle karşılayabilen
+    eczaneleri listeler. Her kalem için önce asıl ilaç, stok yetmezse ada
+    göre sıralı muadilleri denenir. Bir kalem tek bir ilaçla karşılanır:
+    miktar asıl ilaç ile muadili arasında bölünmez (ör. 3 kutu istenip 2 asıl
+    + 1 muadil stokta varsa o eczane listelenmez). Eczaneler konuma göre
+    (koordinat varsa mesafe, yoksa mahalle > ilçe > il) sıralanır.
+    """
+    sepet: Dict[uuid.UUID, int] = {}
+    for item in sepet_items:
+        try:
+            ilac_id = uuid.UUID(item.ilac_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Geçersiz ilaç ID: {item.ilac_id}"
+            )
+        sepet[ilac_id] = sepet.get(ilac_id, 0) + item.miktar
+
+    if not sepet:
+        return []
+
+    secenekler, ilaclar = await AsyncIlacRepository(db).get_sepet_secenekleri(list(sepet))
+    eczaneler = await AsyncEczaneRepository(db).find_eczaneler_for_sepet(
+        sepet,
+        secenekler,
+        hasta_mahalle=hasta.mahalle,
+        hasta_ilce=hasta.ilce,
+        hasta_il=hasta.il,
+        enlem=hasta.enlem,
+        boylam=hasta.boylam,
+        limit=limit
     )
-    
+
     result = []
-    for eczane, stok_bilgileri in eczaneler_with_stock:
-        ilac_miktar_map = {ilac_id: 1 for ilac_id in ilac_ids}
-        stok_yeterli, eksik = eczane_repo.check_stock_availability(
-            str(eczane.id),
-            ilac_miktar_map
-        )
-        
-        result.append(EczaneListItem(
+    for eczane, karsilama, mesafe_km in eczaneler:
+        kalemler = [
+            SepetKarsilama(
+                istenen_ilac_id=str(istenen_ilac_id),
+                karsilayan_ilac_id=str(karsilayan_ilac_id),
+                ilac_adi=ilaclar[karsilayan_ilac_id].ad,
+                miktar=sepet[istenen_ilac_id],
+                stok_miktari=stok_miktari,
+                muadil=karsilayan_ilac_id != istenen_ilac_id
+            )
+            for istenen_ilac_id, (karsilayan_ilac_id, stok_miktari) in karsilama.items()
+        ]
+        result.append(MuadilliEczaneItem(
             id=str(eczane.id),
             eczane_adi=eczane.eczane_adi,
             adres=eczane.adres,
@@ -310,19 +370,19 @@ async def listele_eczaneler(
             ilce=eczane.ilce,
             il=eczane.il,
             eczaci_tam_ad=eczane.eczaci_tam_ad,
-            stok_durumu=stok_bilgileri,
-            tum_urunler_mevcut=stok_yeterli
+            karsilama=kalemler,
+            muadil_gerekli=any(kalem.muadil for kalem in kalemler),
+            mesafe_km=round(mesafe_km, 2) if mesafe_km is not None else None
         ))
-    
+
     return result
 
 
 @router.post("/siparis/olustur", response_model=SiparisResponse, status_code=status.HTTP_201_CREATED, summary="Sipariş Oluştur")
-async def olustur_siparis(
+def olustur_siparis(
     siparis_data: SiparisCreate,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_hasta)
+    hasta: Hasta = Depends(get_current_hasta_profile)
 ):
     import traceback
     import logging
@@ -331,32 +391,14 @@ async def olustur_siparis(
     try:
         logger.info(f"Creating order with data: {siparis_data}")
         
-        hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-        if not hasta:
-            raise HTTPException(status_code=404, detail="Hasta profili bulunamadı")
-        
-        # Eczane adını önceden al
-        eczane_repo = EczaneRepository(db)
-        eczane = eczane_repo.get_by_id(uuid.UUID(siparis_data.eczane_id))
-        eczane_adi = eczane.eczane_adi if eczane else "Eczane"
-        
+        # Sipariş e-postası siparişle aynı commit'te kuyruğa eklenir (EmailWorker toplu gönderir)
         siparis_service = SiparisService(db)
         siparis = siparis_service.create_siparis(
             hasta_id=str(hasta.id),
-            user_id=str(current_user.id),
+            user_id=str(hasta.user_id),
             siparis_data=siparis_data
         )
         
-        # E-postayı arka planda gönder
-        background_tasks.add_task(
-            send_order_status_email,
-            to_email=siparis.hasta.user.email,
-            order_id=str(siparis.id),
-            status="BEKLEMEDE",
-            patient_name=siparis.hasta.tam_ad,
-            eczane_adi=eczane_adi
-        )
-        
         response = siparis_to_response(siparis, db)
         return response
         
@@ -373,36 +415,45 @@ async def olustur_siparis(
 
 @router.get("/siparislerim", response_model=List[SiparisResponse], summary="Siparişlerimi Listele")
 async def listele_siparislerim(
+    response: Response,
     durum: Optional[str] = Query(None, description="Duruma göre filtrele"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_hasta)
+    cursor_key: Optional[CursorKey] = Depends(get_cursor_key),
+    db: AsyncSession = Depends(get_async_read_db),
+    hasta: Hasta = Depends(get_current_hasta_profile)
 ):
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-    query = db.query(Siparis).filter(Siparis.hasta_id == hasta.id)
-    
+    """
+    Hastanın siparişlerini listeler (yeniden eskiye).
+    Sonraki sayfanın cursor'ı X-Next-Cursor header'ında döner.
+    """
+    durum_enum = None
     if durum:
         try:
             durum_enum = SiparisDurum(durum)
-            query = query.filter(Siparis.durum == durum_enum)
         except ValueError:
             pass
     
-    total = query.count()
-    offset = (page - 1) * page_size
-    siparisler = query.order_by(Siparis.created_at.desc()).offset(offset).limit(page_size).all()
+    siparis_repo = AsyncSiparisRepository(db)
+    siparis_ids, next_cursor = await siparis_repo.get_page_ids(
+        hasta_id=hasta.id,
+        durum=durum_enum,
+        page=page,
+        page_size=page_size,
+        cursor_key=cursor_key
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
-    # Use helper function to properly convert detaylar
-    return [siparis_to_response(s, db) for s in siparisler]
+    # Sayfadaki siparişleri sabit sayıda sorgu ile dönüştür
+    return await siparisler_to_response_async(siparis_ids, db)
 
 @router.get("/siparislerim/{siparis_id}", response_model=SiparisResponse, summary="Sipariş Detayı")
-async def get_siparis_detay(
+def get_siparis_detay(
     siparis_id: uuid.UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_hasta)
+    db: Session = Depends(get_read_db),
+    hasta: Hasta = Depends(get_current_hasta_profile)
 ):
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
     siparis = db.query(Siparis).filter(
         Siparis.id == siparis_id,
         Siparis.hasta_id == hasta.id
@@ -416,17 +467,15 @@ async def get_siparis_detay(
     return siparis_to_response(siparis, db)
 
 @router.post("/siparislerim/{siparis_id}/iptal", response_model=SiparisResponse, summary="Sipariş İptal Et")
-async def iptal_siparis(
+def iptal_siparis(
     siparis_id: uuid.UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_hasta)
+    hasta: Hasta = Depends(get_current_hasta_profile)
 ):
     """
     Hasta kendi siparişini iptal eder.
     İptal nedeni otomatik olarak 'Hasta tarafından iptal edildi' şeklinde kaydedilir.
     """
-    hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-    
     siparis = db.query(Siparis).filter(
         Siparis.id == siparis_id,
         Siparis.hasta_id == hasta.id
@@ -442,34 +491,23 @@ async def iptal_siparis(
     siparis = siparis_service.iptal_et(
         siparis_id=siparis_id,
         iptal_nedeni="Hasta tarafından iptal edildi",
-        user_id=current_user.id
+        user_id=hasta.user_id
     )
     return siparis_to_response(siparis, db)
 
 
 @router.post("/odeme/yap", response_model=OdemeResponse, summary="Ödeme Yap ve Sipariş Oluştur")
-async def odeme_yap(
+def odeme_yap(
     odeme_data: OdemeRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_hasta)
+    hasta: Hasta = Depends(get_current_hasta_profile)
 ):
     import traceback
     import logging
     logger = logging.getLogger(__name__)
     
     try:
-        logger.info(f"Processing payment for user: {current_user.id}")
-        
-        hasta = db.query(Hasta).filter(Hasta.user_id == current_user.id).first()
-        if not hasta:
-            return OdemeResponse(
-                basarili=False,
-                islem_id=None,
-                mesaj="Hasta profili bulunamadı",
-                siparis_id=None,
-                siparis_no=None
-            )
+        logger.info(f"Processing payment for user: {hasta.user_id}")
         
         payment_result = validate_payment(odeme_data.kart_bilgisi.kart_numarasi)
         
@@ -507,14 +545,10 @@ async def odeme_yap(
             siparis_notu=siparis_bilgileri.get("siparis_notu")
         )
         
-        eczane_repo = EczaneRepository(db)
-        eczane = eczane_repo.get_by_id(uuid.UUID(siparis_data.eczane_id))
-        eczane_adi = eczane.eczane_adi if eczane else "Eczane"
-        
         siparis_service = SiparisService(db)
         siparis = siparis_service.create_siparis(
             hasta_id=str(hasta.id),
-            user_id=str(current_user.id),
+            user_id=str(hasta.user_id),
             siparis_data=siparis_data
         )
         
@@ -522,15 +556,6 @@ async def odeme_yap(
         db.commit()
         db.refresh(siparis)
         
-        background_tasks.add_task(
-            send_order_status_email,
-            to_email=siparis.hasta.user.email,
-            order_id=str(siparis.id),
-            status="BEKLEMEDE",
-            patient_name=siparis.hasta.tam_ad,
-            eczane_adi=eczane_adi
-        )
-        
         logger.info(f"Payment successful. Order created: {siparis.siparis_no}")
         
         return OdemeResponse(
@@ -28,6 +28,7 @@ from app.schemas.siparis import (
     SiparisDetayItem,
     SiparisCreate,
     SiparisResponse,
+    SiparisListResponse,
     SiparisDurumGuncelle,
     SiparisIptal,
     EczaneListItem,
@@ -91,6 +92,7 @@ __all__ = [
     "SiparisDetayItem",
     "SiparisCreate",
     "SiparisResponse",
+    "SiparisListResponse",
     "SiparisDurumGuncelle",
     "SiparisIptal",
     "EczaneListItem",
@@ -87,6 +87,15 @@ class SiparisIstatistik(BaseModel):
     iptal_edildi: int
 
 
+class CacheIstatistik(BaseModel):
+    """Süreç içi cache isabet/ıska sayaçları"""
+    hits: int
+    misses: int
+    hit_ratio: float
+    size: int
+    version: Optional[int] = None
+
+
 class DoktorDetay(BaseModel):
     """Doktor detay bilgisi (Admin için)"""
     id: str
@@ -15,6 +15,8 @@ class EczaneBase(BaseModel):
     mahalle: str = Field(..., min_length=2, max_length=100)
     ilce: Optional[str] = Field(None, max_length=100)
     il: Optional[str] = Field(None, max_length=100)
+    enlem: Optional[float] = Field(None, ge=-90, le=90)
+    boylam: Optional[float] = Field(None, ge=-180, le=180)
     
     eczaci_adi: str = Field(..., min_length=2, max_length=100)
     eczaci_soyadi: str = Field(..., min_length=2, max_length=100)
@@ -92,6 +94,8 @@ class EczaneUpdate(BaseModel):
     mahalle: Optional[str] = None
     ilce: Optional[str] = None
     il: Optional[str] = None
+    enlem: Optional[float] = Field(None, ge=-90, le=90)
+    boylam: Optional[float] = Field(None, ge=-180, le=180)
     banka_hesap_no: Optional[str] = None
     iban: Optional[str] = None
 
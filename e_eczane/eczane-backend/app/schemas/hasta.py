@@ -14,6 +14,8 @@ class HastaBase(BaseModel):
     mahalle: Optional[str] = Field(None, max_length=100)
     ilce: Optional[str] = Field(None, max_length=100)
     il: Optional[str] = Field(None, max_length=100)
+    enlem: Optional[float] = Field(None, ge=-90, le=90)
+    boylam: Optional[float] = Field(None, ge=-180, le=180)
     telefon: str = Field(..., min_length=10, max_length=20)
     profil_resmi_url: Optional[str] = None
     
@@ -66,6 +68,8 @@ class HastaUpdate(BaseModel):
     mahalle: Optional[str] = Field(None, max_length=100)
     ilce: Optional[str] = Field(None, max_length=100)
     il: Optional[str] = Field(None, max_length=100)
+    enlem: Optional[float] = Field(None, ge=-90, le=90)
+    boylam: Optional[float] = Field(None, ge=-180, le=180)
     telefon: Optional[str] = Field(None, min_length=10, max_length=20)
     profil_resmi_url: Optional[str] = None
 
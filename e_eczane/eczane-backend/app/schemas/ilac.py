@@ -78,6 +78,22 @@ class IlacResponse(IlacBase):
 
 
 
+class IlacAutocompleteItem(BaseModel):
+    """İlaç otomatik tamamlama önerisi"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: UUID
+    ad: str
+    barkod: str
+    etken_madde: Optional[str] = None
+    fiyat: Decimal
+    receteli: bool
+    
+    @field_serializer('id')
+    def serialize_id(self, value: UUID) -> str:
+        return str(value)
+
+
 class IlacWithStokResponse(IlacResponse):
     """Stok bilgisi ile ilaç response"""
     stok_durumu: Optional[str] = Field(None, description="tukendi, azaliyor, yeterli")
@@ -107,12 +123,14 @@ class IlacSearchParams(BaseModel):
     max_fiyat: Optional[Decimal] = Field(None, ge=0)
     page: int = Field(1, ge=1, description="Sayfa numarası")
     page_size: int = Field(20, ge=1, le=100, description="Sayfa başına kayıt")
+    exact_total: bool = Field(True, description="False ise COUNT sorgusu çalıştırılmaz, sadece has_next döner")
 
 
 class IlacSearchResponse(BaseModel):
     """İlaç arama sonucu response"""
     items: List[IlacResponse]
-    total: int = Field(..., ge=0, description="Toplam kayıt sayısı")
+    total: Optional[int] = Field(None, ge=0, description="Toplam kayıt sayısı (exact_total=false ise boş)")
     page: int = Field(..., ge=1, description="Mevcut sayfa")
     page_size: int = Field(..., ge=1, description="Sayfa başına kayıt")
-    total_pages: int = Field(..., ge=0, description="Toplam sayfa sayısı")
+    total_pages: Optional[int] = Field(None, ge=0, description="Toplam sayfa sayısı (exact_total=false ise boş)")
+    has_next: bool = Field(False, description="Sonraki sayfa var mı")
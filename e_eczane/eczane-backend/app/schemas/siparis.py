@@ -70,6 +70,16 @@ class SiparisResponse(BaseModel):
     detaylar: List[SiparisDetayItem]
 
 
+class SiparisListResponse(BaseModel):
+    """Sayfalı sipariş listesi response"""
+    items: List[SiparisResponse]
+    total: int = Field(..., ge=0, description="Toplam kayıt sayısı")
+    page: int = Field(..., ge=1, description="Mevcut sayfa")
+    page_size: int = Field(..., ge=1, description="Sayfa başına kayıt")
+    total_pages: int = Field(..., ge=0, description="Toplam sayfa sayısı")
+    next_cursor: Optional[str] = Field(None, description="Sonraki sayfa için keyset cursor")
+
+
 class SiparisDurumGuncelle(BaseModel):
     """Sipariş durumu güncelleme (Eczane için)"""
     model_config = ConfigDict(
@@ -127,4 +137,30 @@ class EczaneListItem(BaseModel):
         description="İlaç stok durumu: {ilac_id: {'miktar': int, 'stok_durumu': str}}"
     )
     tum_urunler_mevcut: bool = Field(..., description="Tüm ürünler stoklarda mevcut mu?")
+    mesafe_km: Optional[float] = Field(None, description="Hastaya uzaklık (koordinatlar biliniyorsa)")
+
+
 
+class SepetKarsilama(BaseModel):
+    """Sepetteki bir kalemi eczanede karşılayan ilaç"""
+    istenen_ilac_id: str
+    karsilayan_ilac_id: str
+    ilac_adi: str
+    miktar: int = Field(..., ge=1, description="İstenen miktar")
+    stok_miktari: int = Field(..., ge=0, description="Karşılayan ilacın eczanedeki stoğu")
+    muadil: bool = Field(..., description="Asıl ilaç yerine muadili mi veriliyor?")
+
+
+class MuadilliEczaneItem(BaseModel):
+    """Sepeti asıl ilaçlar veya muadilleriyle karşılayabilen eczane"""
+    id: str
+    eczane_adi: str
+    adres: str
+    telefon: str
+    mahalle: str
+    ilce: Optional[str] = None
+    il: Optional[str] = None
+    eczaci_tam_ad: str
+    karsilama: List[SepetKarsilama]
+    muadil_gerekli: bool = Field(..., description="En az bir kalem muadille mi karşılanıyor?")
+    mesafe_km: Optional[float] = Field(None, description="Hastaya uzaklık (koordinatlar biliniyorsa)")
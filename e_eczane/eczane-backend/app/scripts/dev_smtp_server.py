@@ -0,0 +1,149 @@
+"""
+Geliştirme ve testler için yerel SMTP sunucusu
+Gelen e-postaları gerçekten göndermez; bellekte tutar ve konsola yazar.
+
+Kullanım: python -m app.scripts.dev_smtp_server --port 1025
+(.env: MAIL_SERVER=localhost, MAIL_PORT=1025, MAIL_STARTTLS=false)
+"""
+
+import argparse
+import asyncio
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from typing import Dict, List, Optional, Tuple
+
+
+class DevSMTPServer:
+    """
+    Minimal SMTP sunucusu (EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+    
+    Attributes:
+        mesajlar: Alınan e-postalar (gönderen, alıcılar, ham içerik)
+        baglanti_sayisi: Açılan SMTP bağlantısı sayısı
+        reddedilecekler: Alıcı -> (kod, mesaj); bu alıcılar RCPT aşamasında reddedilir
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, yazdir: bool = False):
+        self.host = host
+        self.port = port
+        self.yazdir = yazdir
+        self.mesajlar: List[Tuple[str, List[str], bytes]] = []
+        self.baglanti_sayisi = 0
+        self.reddedilecekler: Dict[str, Tuple[int, str]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+    
+    async def baslat(self) -> None:
+        """Sunucuyu başlat (port=0 ise boş bir port seçilir)"""
+        self._server = await asyncio.start_server(self._istemci, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def durdur(self) -> None:
+        """Sunucuyu durdur"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+    
+    async def _istemci(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.baglanti_sayisi += 1
+        
+        async def yanit(satir: str) -> None:
+            writer.write(satir.encode() + b"\r\n")
+            await writer.drain()
+        
+        gonderen: Optional[str] = None
+        alicilar: List[str] = []
+        await yanit("220 localhost E-Eczane dev SMTP")
+        
+        try:
+            while True:
+                satir = await reader.readline()
+                if not satir:
+                    break
+                komut = satir.decode("utf-8", errors="replace").rstrip("\r\n")
+                fiil, _, arguman = komut.partition(" ")
+                fiil = fiil.upper()
+                
+                if fiil == "EHLO":
+                    await yanit("250-localhost\r\n250-8BITMIME\r\n250-SMTPUTF8\r\n250 AUTH PLAIN LOGIN")
+                elif fiil == "HELO":
+                    await yanit("250 localhost")
+                elif fiil == "AUTH":
+                    # Her kimlik bilgisi kabul edilir
+                    yontem, _, ilk_yanit = arguman.partition(" ")
+                    if yontem.upper() == "LOGIN":
+                        adimlar = ["VXNlcm5hbWU6", "UGFzc3dvcmQ6"]
+                        if ilk_yanit:
+                            adimlar = adimlar[1:]
+                    else:
+                        adimlar = [] if ilk_yanit else [""]
+                    for adim in adimlar:
+                        await yanit(f"334 {adim}")
+                        await reader.readline()
+                    await yanit("235 2.7.0 Authentication successful")
+                elif fiil == "MAIL":
+                    gonderen = arguman.partition("<")[2].partition(">")[0]
+                    alicilar = []
+                    await yanit("250 OK")
+                elif fiil == "RCPT":
+                    alici = arguman.partition("<")[2].partition(">")[0]
+                    if alici in self.reddedilecekler:
+                        kod, mesaj = self.reddedilecekler[alici]
+                        await yanit(f"{kod} {mesaj}")
+                    else:
+                        alicilar.append(alici)
+                        await yanit("250 OK")
+                elif fiil == "DATA":
+                    if not alicilar:
+                        await yanit("503 Bad sequence of commands")
+                        continue
+                    await yanit("354 End data with <CR><LF>.<CR><LF>")
+                    satirlar = []
+                    while True:
+                        veri = await reader.readline()
+                        if not veri or veri == b".\r\n":
+                            break
+                        satirlar.append(veri[1:] if veri.startswith(b"..") else veri)
+                    icerik = b"".join(satirlar)
+                    self.mesajlar.append((gonderen, alicilar, icerik))
+                    if self.yazdir:
+                        konu = str(make_header(decode_header(message_from_bytes(icerik).get("Subject", ""))))
+                        print(f"📧 {gonderen} -> {', '.join(alicilar)}: {konu}")
+                    gonderen, alicilar = None, []
+                    await yanit("250 OK: queued")
+                elif fiil == "RSET":
+                    gonderen, alicilar = None, []
+                    await yanit("250 OK")
+                elif fiil == "NOOP":
+                    await yanit("250 OK")
+                elif fiil == "QUIT":
+                    await yanit("221 Bye")
+                    break
+                else:
+                    await yanit("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def main(host: str, port: int) -> None:
+    server = DevSMTPServer(host, port, yazdir=True)
+    await server.baslat()
+    print(f"✅ Dev SMTP sunucusu {server.host}:{server.port} adresinde dinliyor (Ctrl+C ile durdur)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.durdur()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yerel geliştirme SMTP sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(main(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
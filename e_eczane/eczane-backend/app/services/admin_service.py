@@ -12,6 +12,7 @@ from app.schemas.doktor import DoktorCreate
 from app.repositories.admin_repository import AdminRepository
 from app.utils.enums import OnayDurumu, UserType, BildirimTip
 from app.core.security import get_password_hash
+from app.core import token_denylist
 
 
 class AdminService:
@@ -211,6 +212,11 @@ class AdminService:
         self.db.add(bildirim)
         
         self.db.commit()
+        
+        # Pasif yapılan kullanıcının açık oturumları hemen geçersiz olsun
+        if not yonetim_data.is_active:
+            token_denylist.kullanici_tokenlarini_iptal_et(self.db, user.id)
+        
         self.db.refresh(user)
         
         return user
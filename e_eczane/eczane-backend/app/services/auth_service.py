@@ -1,6 +1,8 @@
-from typing import Optional
+from typing import Any, Dict, Optional
+from uuid import UUID
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from app.models.user import User
 from app.models.hasta import Hasta
 from app.models.eczane import Eczane
@@ -11,10 +13,12 @@ from app.schemas.eczane import EczaneCreate
 from app.schemas.doktor import DoktorCreate
 from app.core.security import (
     verify_password, get_password_hash, create_access_token, 
-    create_refresh_token, create_password_reset_token, verify_password_reset_token
+    create_refresh_token, create_password_reset_token, verify_password_reset_token,
+    verify_password_async, get_password_hash_async, decode_refresh_token
 )
+from app.core import token_denylist
 from app.utils.enums import UserType, OnayDurumu
-from app.utils.email import send_password_reset_email
+from app.utils.email import queue_password_reset_email
 from datetime import timedelta
 from app.core.config import settings
 
@@ -41,19 +45,56 @@ class AuthService:
         # Kullanıcıyı bul
         user = self._find_user_by_identifier(login_data.identifier, login_data.user_type)
         
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Kullanıcı adı veya şifre hatalı"
-            )
-        
         # Şifre kontrolü
-        if not verify_password(login_data.password, user.password_hash):
+        sifre_dogru = user is not None and verify_password(login_data.password, user.password_hash)
+        self._check_credentials(user, sifre_dogru)
+        self._check_hesap(user)
+        
+        return self._create_tokens(user)
+    
+    async def login_async(self, login_data: UserLogin) -> Token:
+        """
+        Kullanıcı girişi (async endpoint'ler için)
+        
+        Veritabanı işleri threadpool'da, bcrypt doğrulaması sınırlı hash
+        havuzunda beklenir; giriş yoğunluğu diğer istekleri aç bırakmaz.
+        
+        Args:
+            login_data: Login bilgileri (identifier, password, user_type)
+        
+        Returns:
+            Token: Access token ve refresh token
+        """
+        user = await run_in_threadpool(
+            self._find_user_by_identifier, login_data.identifier, login_data.user_type
+        )
+        
+        sifre_dogru = user is not None and await verify_password_async(login_data.password, user.password_hash)
+        self._check_credentials(user, sifre_dogru)
+        await run_in_threadpool(self._check_hesap, user)
+        
+        return self._create_tokens(user)
+    
+    def _check_credentials(self, user: Optional[User], sifre_dogru: bool) -> None:
+        """
+        Kullanıcı bulundu ve şifre doğru mu kontrol et
+        
+        Raises:
+            HTTPException: Kullanıcı bulunamadı veya şifre yanlış
+        """
+        if not user or not sifre_dogru:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Kullanıcı adı veya şifre hatalı"
             )
+    
+    def _check_hesap(self, user: User) -> None:
+        """
+        Hesap token almaya uygun mu kontrol et (login ve refresh için)
         
+        Raises:
+            HTTPException: Hesap pasif veya eczane onaylanmamış
+        """
         # Kullanıcı aktif mi?
         if not user.is_active:
             raise HTTPException(
@@ -77,8 +118,13 @@ class AuthService:
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Eczane kaydınız henüz onaylanmadı. Durum: {eczane.onay_durumu.value}"
                 )
+    
+    def _create_tokens(self, user: User) -> Token:
+        """
+        Kullanıcı için access ve refresh token oluştur
         
-        # Token oluştur
+        Hesap kontrolleri yapılmaz; çağıran önce _check_hesap'i çalıştırmalıdır.
+        """
         token_data = {
             "user_id": str(user.id),
             "email": user.email,
@@ -100,7 +146,74 @@ class AuthService:
             user_id=str(user.id)
         )
     
-    def register_hasta(self, hasta_data: HastaCreate) -> Hasta:
+    def refresh(self, refresh_token: str) -> Token:
+        """
+        Refresh token ile yeni access ve refresh token al (rotasyon)
+        
+        Her refresh token yalnızca bir kez kullanılabilir: kullanılan token iptal
+        listesine eklenir. İptal edilmiş bir refresh token tekrar gelirse token
+        çalınmış sayılır ve kullanıcının tüm oturumları kapatılır.
+        
+        Args:
+            refresh_token: Login veya önceki refresh'te alınan refresh token
+        
+        Returns:
+            Token: Yeni access token ve refresh token
+        
+        Raises:
+            HTTPException: Token geçersiz, iptal edilmiş veya hesap kullanılamıyor
+        """
+        gecersiz = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Geçersiz veya süresi dolmuş refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        
+        payload = decode_refresh_token(refresh_token)
+        if payload is None:
+            raise gecersiz
+        try:
+            user_id = UUID(payload["user_id"])
+        except ValueError:
+            raise gecersiz
+        
+        # Refresh nadir bir istek: diğer worker'lardaki iptalleri beklemeden al
+        token_denylist.senkronize_et(self.db, zorla=True)
+        if token_denylist.iptal_edildi_mi(payload):
+            raise gecersiz
+        
+        # Login'deki hesap kontrolleri: pasifleşen veya onayı kaldırılan eczane yeni token alamaz
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise gecersiz
+        self._check_hesap(user)
+        
+        if not token_denylist.token_iptal_et(self.db, payload):
+            # Daha önce kullanılmış refresh token
+            token_denylist.kullanici_tokenlarini_iptal_et(self.db, user_id)
+            raise gecersiz
+        
+        return self._create_tokens(user)
+    
+    def logout(self, access_payload: Optional[Dict[str, Any]], refresh_token: Optional[str] = None) -> dict:
+        """
+        Çıkış: access token'ı ve (verildiyse) refresh token'ı iptal et
+        
+        Args:
+            access_payload: Doğrulanmış access token claim'leri (token yoksa None)
+            refresh_token: Aynı oturumun refresh token'ı
+        """
+        if access_payload and "type" not in access_payload and access_payload.get("jti") and access_payload.get("user_id"):
+            token_denylist.token_iptal_et(self.db, access_payload)
+        
+        if refresh_token:
+            payload = decode_refresh_token(refresh_token)
+            if payload is not None:
+                token_denylist.token_iptal_et(self.db, payload)
+        
+        return {"message": "Başarıyla çıkış yapıldı"}
+    
+    def register_hasta(self, hasta_data: HastaCreate, password_hash: Optional[str] = None) -> Hasta:
         """
         Hasta kaydı
         """
@@ -123,7 +236,7 @@ class AuthService:
         # User oluştur
         user = User(
             email=hasta_data.email,
-            password_hash=get_password_hash(hasta_data.password),
+            password_hash=password_hash or get_password_hash(hasta_data.password),
             user_type=UserType.HASTA,
             is_active=True
         )
@@ -140,6 +253,8 @@ class AuthService:
             mahalle=hasta_data.mahalle,
             ilce=hasta_data.ilce,
             il=hasta_data.il,
+            enlem=hasta_data.enlem,
+            boylam=hasta_data.boylam,
             telefon=hasta_data.telefon,
             profil_resmi_url=hasta_data.profil_resmi_url
         )
@@ -149,7 +264,7 @@ class AuthService:
         
         return hasta
     
-    def register_eczane(self, eczane_data: EczaneCreate) -> Eczane:
+    def register_eczane(self, eczane_data: EczaneCreate, password_hash: Optional[str] = None) -> Eczane:
         """
         Eczane kaydı (Onay beklemede olarak)
         """
@@ -172,7 +287,7 @@ class AuthService:
         # User oluştur
         user = User(
             email=eczane_data.email,
-            password_hash=get_password_hash(eczane_data.password),
+            password_hash=password_hash or get_password_hash(eczane_data.password),
             user_type=UserType.ECZANE,
             is_active=True
         )
@@ -189,6 +304,8 @@ class AuthService:
             mahalle=eczane_data.mahalle,
             ilce=eczane_data.ilce,
             il=eczane_data.il,
+            enlem=eczane_data.enlem,
+            boylam=eczane_data.boylam,
             eczaci_adi=eczane_data.eczaci_adi,
             eczaci_soyadi=eczane_data.eczaci_soyadi,
             eczaci_diploma_no=eczane_data.eczaci_diploma_no,
@@ -202,7 +319,7 @@ class AuthService:
         
         return eczane
     
-    def register_doktor(self, doktor_data: DoktorCreate) -> Doktor:
+    def register_doktor(self, doktor_data: DoktorCreate, password_hash: Optional[str] = None) -> Doktor:
         """
         Doktor kaydı (Direkt aktif)
         """
@@ -225,7 +342,7 @@ class AuthService:
         # User oluştur
         user = User(
             email=doktor_data.email,
-            password_hash=get_password_hash(doktor_data.password),
+            password_hash=password_hash or get_password_hash(doktor_data.password),
             user_type=UserType.DOKTOR,
             is_active=True
         )
@@ -248,6 +365,32 @@ class AuthService:
         
         return doktor
     
+    async def register_hasta_async(self, hasta_data: HastaCreate) -> Hasta:
+        """Hasta kaydı (async endpoint'ler için)"""
+        return await self._register_async(self.register_hasta, hasta_data)
+    
+    async def register_eczane_async(self, eczane_data: EczaneCreate) -> Eczane:
+        """Eczane kaydı (async endpoint'ler için)"""
+        return await self._register_async(self.register_eczane, eczane_data)
+    
+    async def register_doktor_async(self, doktor_data: DoktorCreate) -> Doktor:
+        """Doktor kaydı (async endpoint'ler için)"""
+        return await self._register_async(self.register_doktor, doktor_data)
+    
+    async def _register_async(self, register, kayit_data):
+        """
+        Şifreyi sınırlı hash havuzunda hash'le, kaydı threadpool'da oluştur
+        
+        Args:
+            register: Kayıt metodu (register_hasta, register_eczane, register_doktor)
+            kayit_data: Kayıt verisi
+        
+        Returns:
+            Oluşturulan profil
+        """
+        password_hash = await get_password_hash_async(kayit_data.password)
+        return await run_in_threadpool(register, kayit_data, password_hash)
+    
     def _find_user_by_identifier(self, identifier: str, user_type: UserType) -> Optional[User]:
         """
         Identifier'a göre kullanıcı bul (Email, TC No, Sicil No veya Diploma No)
@@ -283,7 +426,7 @@ class AuthService:
     
     def forgot_password(self, email: str) -> dict:
         """
-        Şifre sıfırlama e-postası gönder
+        Şifre sıfırlama e-postasını gönderim kuyruğuna ekle
         
         Güvenlik nedeniyle her zaman aynı yanıtı döner
         """
@@ -291,15 +434,21 @@ class AuthService:
         
         if user:
             token = create_password_reset_token(email)
-            send_password_reset_email(email, token)
+            queue_password_reset_email(self.db, email, token)
+            self.db.commit()
         
         return {
             "message": "Eğer bu e-posta adresi sistemimizde kayıtlıysa, şifre sıfırlama linki gönderildi."
         }
     
-    def reset_password(self, token: str, new_password: str) -> dict:
+    def reset_password(self, token: str, new_password: str, password_hash: Optional[str] = None) -> dict:
         """
         Token ile şifre sıfırlama
+        
+        Args:
+            token: Şifre sıfırlama token'ı
+            new_password: Yeni şifre
+            password_hash: Yeni şifrenin önceden hesaplanmış hash'i (async yoldan)
         """
         email = verify_password_reset_token(token)
         
@@ -317,11 +466,27 @@ class AuthService:
                 detail="Kullanıcı bulunamadı"
             )
         
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = password_hash or get_password_hash(new_password)
         self.db.commit()
         
+        # Eski şifreyle açılmış oturumları kapat
+        token_denylist.kullanici_tokenlarini_iptal_et(self.db, user.id)
+        
         return {"message": "Şifreniz başarıyla değiştirildi"}
     
+    async def reset_password_async(self, token: str, new_password: str) -> dict:
+        """
+        Token ile şifre sıfırlama (async endpoint'ler için)
+        """
+        if not verify_password_reset_token(token):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Geçersiz veya süresi dolmuş token"
+            )
+        
+        password_hash = await get_password_hash_async(new_password)
+        return await run_in_threadpool(self.reset_password, token, new_password, password_hash)
+    
     def verify_reset_token(self, token: str) -> dict:
         """
         Şifre sıfırlama token'ının geçerliliğini kontrol et
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+import aiosmtplib
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.email_outbox import EmailOutbox
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from app.utils.email import build_mime_message
+
+logger = logging.getLogger(__name__)
+
+# Worker kendi session'ını kullanır; alınan kayıtlar commit sonrası expire edilmez
+# (gönderim sırasında her alan için ayrı SELECT atılmasın)
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Mesaj bu hatalardan biriyle reddedildiyse sorun bağlantıda değil, mesajın kendisindedir
+MESAJ_HATALARI = (
+    aiosmtplib.SMTPRecipientsRefused,
+    aiosmtplib.SMTPSenderRefused,
+    aiosmtplib.SMTPDataError,
+)
+
+
+class EmailWorker:
+    """
+    Outbox'taki e-postaları toplu gönderen arka plan worker'ı
+    
+    SMTP bağlantısı (STARTTLS + login) batch'ler arasında açık tutulup yeniden
+    kullanılır, EMAIL_SMTP_IDLE_SECONDS boyunca kullanılmazsa kapatılır.
+    Gönderilemeyen e-postalar üstel artan beklemeyle (EMAIL_RETRY_BASE_SECONDS,
+    2x, 4x, ... en fazla EMAIL_RETRY_MAX_SECONDS) yeniden denenir; 5xx ile
+    reddedilenler ya da EMAIL_MAX_ATTEMPTS denemeyi aşanlar BASARISIZ olur.
+    """
+    
+    def __init__(
+        self,
+        session_factory=WorkerSessionLocal,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+        self.poll_interval = poll_interval if poll_interval is not None else settings.EMAIL_POLL_INTERVAL_SECONDS
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._son_kullanim = 0.0
+        self._durdur: Optional[asyncio.Event] = None
+        self._gorev: Optional[asyncio.Task] = None
+    
+    def _bosta_kaldi(self) -> bool:
+        return time.monotonic() - self._son_kullanim > settings.EMAIL_SMTP_IDLE_SECONDS
+    
+    async def _baglanti(self) -> aiosmtplib.SMTP:
+        """Açık SMTP bağlantısını döndür, yoksa (veya boşta kalıp kapandıysa) yenisini kur"""
+        if self._smtp is not None and self._smtp.is_connected and not self._bosta_kaldi():
+            return self._smtp
+        await self.kapat()
+        
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            start_tls=settings.MAIL_STARTTLS,
+            timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS
+        )
+        await smtp.connect()
+        if settings.MAIL_USERNAME:
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        
+        self._smtp = smtp
+        self._son_kullanim = time.monotonic()
+        return smtp
+    
+    async def kapat(self) -> None:
+        """SMTP bağlantısını kapat"""
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+    
+    async def _gonder(self, kayit: EmailOutbox) -> None:
+        mesaj = build_mime_message(kayit.alici, kayit.konu, kayit.metin, kayit.html)
+        smtp = await self._baglanti()
+        try:
+            await smtp.send_message(mesaj, sender=settings.MAIL_FROM, recipients=[kayit.alici])
+        except aiosmtplib.SMTPServerDisconnected:
+            # Sunucu açık tuttuğumuz bağlantıyı kapatmış olabilir: bir kez yeni bağlantıyla dene
+            await self.kapat()
+            smtp = await self._baglanti()
+            await smtp.send_message(mesaj, sender=settings.MAIL_FROM, recipients=[kayit.alici])
+        self._son_kullanim = time.monotonic()
+    
+    def _al(self) -> List[EmailOutbox]:
+        db = self.session_factory()
+        try:
+            # Kilit süresi: bağlantı zaman aşımı + her mesaj için bir gönderim payı
+            kilit_suresi = timedelta(seconds=settings.EMAIL_SMTP_TIMEOUT_SECONDS * 2 + self.batch_size)
+            return EmailOutboxRepository(db).al_gonderilecekler(self.batch_size, kilit_suresi)
+        finally:
+            db.close()
+    
+    def _sonuclari_kaydet(self, gonderilenler: List[UUID], hatalar: List[Tuple[UUID, str, Optional[datetime]]]) -> None:
+        db = self.session_factory()
+        try:
+            repo = EmailOutboxRepository(db)
+            repo.isaretle_gonderildi(gonderilenler)
+            repo.isaretle_hatali(hatalar)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def sonraki_deneme(deneme_sayisi: int, kalici: bool = False) -> Optional[datetime]:
+        """
+        Başarısız denemeden sonraki gönderim zamanını hesapla
+        
+        Args:
+            deneme_sayisi: Bu deneme dahil yapılan deneme sayısı
+            kalici: Hata kalıcı mı (5xx)
+        
+        Returns:
+            Optional[datetime]: Sonraki deneme zamanı, tekrar denenmeyecekse None
+        """
+        if kalici or deneme_sayisi >= settings.EMAIL_MAX_ATTEMPTS:
+            return None
+        bekleme = min(
+            settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (deneme_sayisi - 1),
+            settings.EMAIL_RETRY_MAX_SECONDS
+        )
+        return datetime.now(timezone.utc) + timedelta(seconds=bekleme)
+    
+    async def gonder_toplu(self) -> int:
+        """
+        Zamanı gelmiş e-postalardan bir batch'i gönder
+        
+        Veritabanı işlemleri thread'de çalışır, event loop bloklanmaz.
+        
+        Returns:
+            int: İşlenen (gönderilen veya hatası kaydedilen) kayıt sayısı
+        """
+        kayitlar = await asyncio.to_thread(self._al)
+        gonderilenler: List[UUID] = []
+        hatalar: List[Tuple[UUID, str, Optional[datetime]]] = []
+        
+        for i, kayit in enumerate(kayitlar):
+            try:
+                await self._gonder(kayit)
+            except MESAJ_HATALARI as e:
+                kodlar = [r.code for r in e.recipients] if isinstance(e, aiosmtplib.SMTPRecipientsRefused) else [e.code]
+                kalici = all(kod >= 500 for kod in kodlar)
+                hatalar.append((kayit.id, str(e), self.sonraki_deneme(kayit.deneme_sayisi + 1, kalici)))
+                continue
+            except (aiosmtplib.SMTPException, OSError) as e:
+                # Bağlantı kurulamadı veya koptu: batch'in geri kalanı da gönderilemez
+                logger.warning(f"SMTP bağlantı hatası: {e}")
+                await self.kapat()
+                hatalar.extend(
+                    (k.id, str(e), self.sonraki_deneme(k.deneme_sayisi + 1))
+                    for k in kayitlar[i:]
+                )
+                break
+            gonderilenler.append(kayit.id)
+        
+        if kayitlar:
+            await asyncio.to_thread(self._sonuclari_kaydet, gonderilenler, hatalar)
+        return len(kayitlar)
+    
+    async def calistir(self) -> None:
+        """Durdurulana kadar outbox'ı periyodik olarak boşalt"""
+        self._durdur = self._durdur or asyncio.Event()
+        while not self._durdur.is_set():
+            try:
+                islenen = await self.gonder_toplu()
+            except Exception:
+                logger.exception("E-posta outbox işlenemedi")
+                islenen = 0
+            
+            # Batch doluysa kuyrukta daha fazlası vardır: beklemeden devam et
+            if islenen >= self.batch_size:
+                continue
+            if self._smtp is not None and self._bosta_kaldi():
+                await self.kapat()
+            try:
+                await asyncio.wait_for(self._durdur.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+        await self.kapat()
+    
+    def baslat(self) -> None:
+        """Worker'ı mevcut event loop'ta arka plan görevi olarak başlat"""
+        self._durdur = asyncio.Event()
+        self._gorev = asyncio.create_task(self.calistir())
+    
+    async def durdur(self) -> None:
+        """Worker'ı durdur ve açık SMTP bağlantısını kapat"""
+        if self._gorev is None:
+            return
+        self._durdur.set()
+        await self._gorev
+        self._gorev = None
@@ -5,6 +5,7 @@ from decimal import Decimal
 from app.schemas.recete import ReceteQuery, ReceteResponse, ReceteIlacItem
 from app.models.ilac import Ilac
 from app.models.recete import Recete, ReceteIlac, ReceteDurum
+from app.repositories.ilac_repository import IlacRepository
 from app.utils.enums import IlacKategori
 import random
 
@@ -48,8 +49,14 @@ class ReceteService:
         ilac_listesi = []
         toplam_tutar = Decimal('0.00')
         
+        # İlaç bilgileri katalog cache'inden (kalem başına sorgu yerine)
+        ilaclar = IlacRepository(self.db).get_many(
+            [recete_ilac.ilac_id for recete_ilac in recete.ilaclar],
+            aktif_only=False
+        )
+        
         for recete_ilac in recete.ilaclar:
-            ilac = recete_ilac.ilac
+            ilac = ilaclar[recete_ilac.ilac_id]
             ara_toplam = ilac.fiyat * recete_ilac.miktar
             toplam_tutar += ara_toplam
             
@@ -187,7 +194,7 @@ class ReceteService:
     def _get_or_create_fake_ilac(self, barkod: str) -> Optional[Ilac]:
         """Fake ilaç getir veya oluştur"""
         # Database'de var mı kontrol et
-        ilac = self.db.query(Ilac).filter(Ilac.barkod == barkod).first()
+        ilac = IlacRepository(self.db).get_by_barkod(barkod, aktif_only=False)
         if ilac:
             return ilac
         
@@ -0,0 +1,98 @@
+from uuid import UUID
+from typing import List, Sequence, Union
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.siparis import Siparis
+from app.schemas.siparis import SiparisResponse, SiparisDetayItem
+from app.repositories.siparis_repository import SiparisRepository
+
+
+def _build_response(siparis: Siparis) -> SiparisResponse:
+    """Önceden yüklenmiş Siparis modelini SiparisResponse'a dönüştür"""
+    # SiparisDetay'da ilac_adi/barkod kolonu yok, ilişkili ilaçtan alınır
+    detaylar_response = [
+        SiparisDetayItem(
+            ilac_id=str(detay.ilac_id),
+            ilac_adi=detay.ilac.ad if detay.ilac else "Bilinmeyen İlaç",
+            barkod=detay.ilac.barkod if detay.ilac else "",
+            miktar=detay.miktar,
+            birim_fiyat=detay.birim_fiyat,
+            ara_toplam=detay.ara_toplam
+        )
+        for detay in siparis.detaylar
+    ]
+
+    return SiparisResponse(
+        id=str(siparis.id),
+        siparis_no=siparis.siparis_no,
+        eczane_id=str(siparis.eczane_id),
+        eczane_adi=siparis.eczane.eczane_adi if siparis.eczane else "Bilinmeyen Eczane",
+        hasta_id=str(siparis.hasta_id),
+        hasta_adi=siparis.hasta.tam_ad if siparis.hasta else "Bilinmeyen Hasta",
+        recete_id=str(siparis.recete_id) if siparis.recete_id else None,
+        toplam_tutar=siparis.toplam_tutar,
+        durum=siparis.durum,
+        odeme_durumu=siparis.odeme_durumu,
+        teslimat_adresi=siparis.teslimat_adresi,
+        siparis_notu=siparis.siparis_notu,
+        iptal_nedeni=siparis.iptal_nedeni,
+        created_at=siparis.created_at,
+        updated_at=siparis.updated_at,
+        detaylar=detaylar_response
+    )
+
+
+def siparisler_to_response(
+    siparis_ids: Sequence[Union[UUID, str]],
+    db: Session
+) -> List[SiparisResponse]:
+    """
+    Sipariş ID listesini SiparisResponse listesine dönüştür
+
+    Tüm siparişler, detaylar, ilaçlar, eczane ve hasta adları sabit sayıda
+    sorgu ile yüklenir; sorgu sayısı sayfa boyutuyla artmaz.
+
+    Args:
+        siparis_ids: Sipariş ID'leri (sıra korunur)
+        db: Database session
+
+    Returns:
+        List[SiparisResponse]: Sipariş response listesi
+    """
+    siparis_repo = SiparisRepository(db)
+    siparisler = siparis_repo.get_many_with_details(siparis_ids)
+    return [_build_response(siparis) for siparis in siparisler]
+
+
+def siparis_to_response(siparis: Siparis, db: Session) -> SiparisResponse:
+    """
+    Tek bir Siparis modelini SiparisResponse'a dönüştür
+
+    Args:
+        siparis: Sipariş modeli
+        db: Database session
+
+    Returns:
+        SiparisResponse: Sipariş response
+    """
+    return siparisler_to_response([siparis.id], db)[0]
+
+
+async def siparisler_to_response_async(
+    siparis_ids: Sequence[Union[UUID, str]],
+    db: AsyncSession
+) -> List[SiparisResponse]:
+    """
+    siparisler_to_response'un AsyncSession karşılığı
+
+    Yükleme ve dönüştürme run_sync içinde yapılır; ilişkilere erişim
+    greenlet dışında örtük I/O başlatmaz.
+
+    Args:
+        siparis_ids: Sipariş ID'leri (sıra korunur)
+        db: Async database session
+
+    Returns:
+        List[SiparisResponse]: Sipariş response listesi
+    """
+    return await db.run_sync(lambda session: siparisler_to_response(siparis_ids, session))
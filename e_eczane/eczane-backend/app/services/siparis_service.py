@@ -1,17 +1,19 @@
 from uuid import UUID
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date, timedelta
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from decimal import Decimal
 from app.models.siparis import Siparis, SiparisDetay, SiparisDurumGecmisi
-from app.models.stok import Stok
 from app.models.bildirim import Bildirim
 from app.models.recete import Recete, ReceteDurum
 from app.schemas.siparis import SiparisCreate, SiparisResponse
 from app.utils.enums import SiparisDurum, OdemeDurum, BildirimTip
 from app.repositories.eczane_repository import EczaneRepository
 from app.repositories.ilac_repository import IlacRepository
+from app.repositories.stok_repository import StokRepository
+from app.utils.email import queue_order_status_email
 
 # Reçete geçerlilik süresi (gün)
 RECETE_GECERLILIK_SURESI = 2
@@ -53,18 +55,30 @@ class SiparisService:
                 detail="Eczane bulunamadı"
             )
         
-        # Stok kontrolü
-        ilac_miktar_map = {
-            item.ilac_id: item.miktar 
-            for item in siparis_data.items
-        }
-        
-        stok_yeterli, eksik_ilaclar = eczane_repo.check_stock_availability(
-            UUID(siparis_data.eczane_id),
-            ilac_miktar_map
-        )
+        # Stok kontrolü - aynı ilaç birden fazla kalemde olabilir; aynı ilacın
+        # farklı yazılmış ID'leri (büyük/küçük harf, tire) tek kalemde toplanır
+        ilac_miktar_map: Dict[UUID, int] = {}
+        for item in siparis_data.items:
+            ilac_id = UUID(item.ilac_id)
+            ilac_miktar_map[ilac_id] = ilac_miktar_map.get(ilac_id, 0) + item.miktar
+        ilac_uuids = list(ilac_miktar_map)
+        
+        # Sepetin tüm stok ve ilaç kayıtları birer sorguda yüklenir
+        stok_repo = StokRepository(self.db)
+        stoklar = stok_repo.get_for_order(eczane.id, ilac_uuids)
+        
+        eksik_ilaclar = {}
+        for ilac_id, istenen_miktar in ilac_miktar_map.items():
+            stok = stoklar.get(ilac_id)
+            mevcut_miktar = stok.miktar if stok else 0
+            if mevcut_miktar < istenen_miktar:
+                eksik_ilaclar[str(ilac_id)] = {
+                    "istenen": istenen_miktar,
+                    "mevcut": mevcut_miktar,
+                    "eksik": istenen_miktar - mevcut_miktar
+                }
         
-        if not stok_yeterli:
+        if eksik_ilaclar:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -73,15 +87,23 @@ class SiparisService:
                 }
             )
         
+        # Fiyat ve aktiflik yazma yolunda cache'ten değil veritabanından okunur
+        ilac_repo = IlacRepository(self.db)
+        ilaclar = ilac_repo.get_many_for_order(ilac_uuids)
+        bulunamayan_ilaclar = [str(ilac_id) for ilac_id in ilac_uuids if ilac_id not in ilaclar]
+        if bulunamayan_ilaclar:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "message": "Bazı ilaçlar bulunamadı",
+                    "ilac_ids": bulunamayan_ilaclar
+                }
+            )
+        
         # Reçeteli ilaç kontrolü - güvenlik duvarı
         # Eğer sipariş reçetesiz ise, sepette reçeteli ilaç olmamalı
-        ilac_repo = IlacRepository(self.db)
         if not siparis_data.recete_id:
-            receteli_ilaclar = []
-            for item in siparis_data.items:
-                ilac = ilac_repo.get_by_id(UUID(item.ilac_id))
-                if ilac and ilac.receteli:
-                    receteli_ilaclar.append(ilac.ad)
+            receteli_ilaclar = [ilac.ad for ilac in ilaclar.values() if ilac.receteli]
             
             if receteli_ilaclar:
                 raise HTTPException(
@@ -129,8 +151,19 @@ class SiparisService:
                     detail=f"Reçetenin geçerlilik süresi dolmuş. Reçeteler {RECETE_GECERLILIK_SURESI} gün içinde kullanılmalıdır."
                 )
         
+        # Fiyatlar istemciden değil veritabanındaki ilaç kaydından alınır
+        detay_satirlari = []
+        for item in siparis_data.items:
+            birim_fiyat = ilaclar[UUID(item.ilac_id)].fiyat
+            detay_satirlari.append({
+                "ilac_id": UUID(item.ilac_id),
+                "miktar": item.miktar,
+                "birim_fiyat": birim_fiyat,
+                "ara_toplam": birim_fiyat * item.miktar
+            })
+        
         # Toplam tutarı hesapla
-        toplam_tutar = sum(item.ara_toplam for item in siparis_data.items)
+        toplam_tutar = sum(satir["ara_toplam"] for satir in detay_satirlari)
         
         # Sipariş oluştur - convert string IDs to UUIDs
         siparis = Siparis(
@@ -147,26 +180,28 @@ class SiparisService:
         self.db.add(siparis)
         self.db.flush()  # ID'yi al
         
-        # Sipariş detaylarını ekle - convert ilac_id to UUID
-        for item in siparis_data.items:
-            detay = SiparisDetay(
-                siparis_id=siparis.id,
-                ilac_id=UUID(item.ilac_id),
-                miktar=item.miktar,
-                birim_fiyat=item.birim_fiyat,
-                ara_toplam=item.ara_toplam
-            )
-            self.db.add(detay)
+        # Sipariş detaylarını tek bir toplu INSERT ile ekle
+        self.db.execute(
+            insert(SiparisDetay),
+            [{"siparis_id": siparis.id, **satir} for satir in detay_satirlari]
+        )
         
-        # Stokları azalt
-        for ilac_id, miktar in ilac_miktar_map.items():
-            stok = self.db.query(Stok).filter(
-                Stok.eczane_id == UUID(siparis_data.eczane_id),
-                Stok.ilac_id == UUID(ilac_id)
-            ).first()
-            
-            if stok:
-                stok.miktar -= miktar
+        # Stokları atomik olarak düş - kilitsiz veritabanlarında yukarıdaki
+        # kontrolden sonra başka bir sipariş stoğu tüketmiş olabilir; bu
+        # durumda sepetin tamamı geri alınır
+        if not stok_repo.reserve_stock(eczane.id, ilac_miktar_map):
+            self.db.rollback()
+            _, eksik_ilaclar = eczane_repo.check_stock_availability(
+                UUID(siparis_data.eczane_id),
+                ilac_miktar_map
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "Bazı ilaçlar için stok yetersiz",
+                    "eksik_ilaclar": eksik_ilaclar
+                }
+            )
         
         # Durum geçmişi ekle - use user_id (users.id), not hasta_id (hastalar.id)
         gecmis = SiparisDurumGecmisi(
@@ -192,6 +227,16 @@ class SiparisService:
         if recete:
             recete.durum = ReceteDurum.KULLANILDI
         
+        # Hastaya e-posta: siparişle aynı commit'te kuyruğa yazılır
+        queue_order_status_email(
+            self.db,
+            to_email=siparis.hasta.user.email,
+            order_id=str(siparis.id),
+            status="BEKLEMEDE",
+            patient_name=siparis.hasta.tam_ad,
+            eczane_adi=eczane.eczane_adi
+        )
+        
         self.db.commit()
         self.db.refresh(siparis)
         
@@ -348,14 +393,10 @@ class SiparisService:
             )
         
         # Stokları geri ekle
+        iade_map: Dict[UUID, int] = {}
         for detay in siparis.detaylar:
-            stok = self.db.query(Stok).filter(
-                Stok.eczane_id == siparis.eczane_id,
-                Stok.ilac_id == detay.ilac_id
-            ).first()
-            
-            if stok:
-                stok.miktar += detay.miktar
+            iade_map[detay.ilac_id] = iade_map.get(detay.ilac_id, 0) + detay.miktar
+        StokRepository(self.db).release_stock(siparis.eczane_id, iade_map)
         
         # Eski durumu kaydet
         eski_durum = siparis.durum
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Type
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe, boyut sınırlı (LRU) ve süreli (TTL) bellek içi cache
+
+    Kapasite dolduğunda en uzun süredir kullanılmayan kayıt atılır; süresi
+    dolan kayıtlar okunurken düşürülür.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        maxsize: int,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            ttl_seconds: Kayıtların geçerlilik süresi (0 veya negatif = cache kapalı)
+            maxsize: En fazla kayıt sayısı
+            clock: Zaman kaynağı (testlerde değiştirilebilir)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Geçerli kaydı döndür, yoksa default"""
+        if not self.enabled:
+            return default
+
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Kaydı ekle veya güncelle
+
+        Args:
+            key: Anahtar
+            value: Değer
+            ttl_seconds: Bu kayda özel süre (None = varsayılan)
+        """
+        if not self.enabled:
+            return
+
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Kaydı sil (yoksa sessizce geç)"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Tüm kayıtları sil"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """İsabet/ıska sayaçları ve doluluk"""
+        with self._lock:
+            toplam = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / toplam if toplam else 0.0,
+                "size": len(self._data),
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+def snapshot(obj) -> dict:
+    """Model instance'ının kolon değerlerini kopyala"""
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def attach(db: Session, model: Type, values: dict):
+    """
+    Cache'teki kolon değerlerinden session'a bağlı bir instance üret (SELECT çalıştırmadan)
+
+    Dönen nesne normal bir persistent nesne gibidir: ilişkileri lazy yüklenir,
+    değişiklikleri commit ile kaydedilir. Session'da aynı kayıt zaten varsa o döner.
+    """
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return db.merge(obj, load=False)
@@ -1,358 +1,233 @@
-import smtplib
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import escape
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.repositories.email_outbox_repository import EmailOutboxRepository
 
+# Şablonlar ilk kullanımda bir kez derlenip cache'lenir; auto_reload kapalı olduğundan render'da dosya kontrol edilmez
+SABLON_DIZINI = Path(__file__).resolve().parent.parent / "templates" / "email"
+sablonlar = Environment(
+    loader=FileSystemLoader(SABLON_DIZINI),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True
+)
 
-def send_password_reset_email(to_email: str, reset_token: str) -> bool:
-    reset_link = f"{settings.FRONTEND_URL}/reset-password/{reset_token}"
+# Kendi şablonu olan sipariş durumları (siparis_durumlari/<durum>.html), diğerleri _varsayilan'ı kullanır
+SIPARIS_DURUM_SABLONLARI = {"BEKLEMEDE", "ONAYLANDI", "HAZIRLANIYOR", "YOLDA", "TESLIM_EDILDI", "IPTAL_EDILDI"}
+
+# Ön derlemede dinamik alanların yerine konan işaret (HTML kaçışından etkilenmeyen karakterler)
+_ALAN = "\x1e{}\x1e"
+_ALAN_DESENI = re.compile(r"\x1e(\w+)\x1e")
+
+
+class OnDerlenmisSablon:
+    """
+    Dinamik alanları işaret olarak bırakılıp bir kez render edilmiş şablon
     
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Şifre Sıfırlama</title>
-    </head>
-    <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f7fa;">
-        <table role="presentation" style="width: 100%; border-collapse: collapse;">
-            <tr>
-                <td align="center" style="padding: 40px 0;">
-                    <table role="presentation" style="width: 600px; border-collapse: collapse; background-color: #ffffff; border-radius: 16px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
-                        <!-- Header -->
-                        <tr>
-                            <td style="padding: 40px 40px 30px 40px; text-align: center; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 16px 16px 0 0;">
-                                <h1 style="margin: 0; color: #ffffff; font-size: 28px; font-weight: 700;">
-                                    🏥 E-Eczane Sistemi
-                                </h1>
-                            </td>
-                        </tr>
-                        
-                        <!-- Content -->
-                        <tr>
-                            <td style="padding: 40px;">
-                                <h2 style="margin: 0 0 20px 0; color: #1a202c; font-size: 24px; font-weight: 600;">
-                                    Şifre Sıfırlama Talebi
-                                </h2>
-                                <p style="margin: 0 0 20px 0; color: #4a5568; font-size: 16px; line-height: 1.6;">
-                                    Merhaba,
-                                </p>
-                                <p style="margin: 0 0 30px 0; color: #4a5568; font-size: 16px; line-height: 1.6;">
-                                    E-Eczane hesabınız için şifre sıfırlama talebinde bulundunuz. 
-                                    Şifrenizi sıfırlamak için aşağıdaki butona tıklayın:
-                                </p>
-                                
-                                <!-- Button -->
-                                <table role="presentation" style="width: 100%; border-collapse: collapse;">
-                                    <tr>
-                                        <td align="center" style="padding: 20px 0;">
-                                            <a href="{reset_link}" 
-                                               style="display: inline-block; padding: 16px 40px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: #ffffff; text-decoration: none; font-size: 16px; font-weight: 600; border-radius: 8px; box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);">
-                                                Şifremi Sıfırla
-                                            </a>
-                                        </td>
-                                    </tr>
-                                </table>
-                                
-                                <p style="margin: 30px 0 15px 0; color: #718096; font-size: 14px; line-height: 1.6;">
-                                    Buton çalışmıyorsa, aşağıdaki linki tarayıcınıza kopyalayın:
-                                </p>
-                                <p style="margin: 0 0 30px 0; word-break: break-all;">
-                                    <a href="{reset_link}" style="color: #667eea; font-size: 14px;">
-                                        {reset_link}
-                                    </a>
-                                </p>
-                                
-                                <!-- Warning -->
-                                <div style="padding: 16px; background-color: #fff5f5; border-left: 4px solid #fc8181; border-radius: 4px; margin: 20px 0;">
-                                    <p style="margin: 0; color: #c53030; font-size: 14px;">
-                                        ⚠️ Bu link <strong>1 saat</strong> içinde geçerliliğini yitirecektir.
-                                    </p>
-                                </div>
-                                
-                                <p style="margin: 20px 0 0 0; color: #718096; font-size: 14px; line-height: 1.6;">
-                                    Eğer şifre sıfırlama talebinde bulunmadıysanız, bu e-postayı görmezden gelebilirsiniz. 
-                                    Hesabınız güvende kalacaktır.
-                                </p>
-                            </td>
-                        </tr>
-                        
-                        <!-- Footer -->
-                        <tr>
-                            <td style="padding: 30px 40px; background-color: #f7fafc; border-radius: 0 0 16px 16px; text-align: center;">
-                                <p style="margin: 0 0 10px 0; color: #a0aec0; font-size: 12px;">
-                                    Bu e-posta E-Eczane Sistemi tarafından otomatik olarak gönderilmiştir.
-                                </p>
-                                <p style="margin: 0; color: #a0aec0; font-size: 12px;">
-                                    © 2025 E-Eczane Sistemi. Tüm hakları saklıdır.
-                                </p>
-                            </td>
-                        </tr>
-                    </table>
-                </td>
-            </tr>
-        </table>
-    </body>
-    </html>
+    Her gönderimde Jinja tekrar çalıştırılmaz; sabit parçalar arasına
+    yalnızca alan değerleri yerleştirilir.
     """
     
-    text_content = f"""
-    E-Eczane Sistemi - Şifre Sıfırlama
+    def __init__(self, render_edilmis: str):
+        # split sonucu: çift indeksler sabit metin, tek indeksler alan adı
+        self._parcalar = _ALAN_DESENI.split(render_edilmis)
+        self._alanlar = [(i, self._parcalar[i]) for i in range(1, len(self._parcalar), 2)]
+        self._alan_adlari = frozenset(alan for _, alan in self._alanlar)
     
-    Merhaba,
+    def doldur(self, degerler: Dict[str, str], kacis=None) -> str:
+        """
+        Alanları doldur
+        
+        Args:
+            degerler: Alan adı -> değer
+            kacis: Değerlere uygulanacak dönüşüm (HTML için escape); aynı alan
+                şablonda birden fazla geçse de her değere bir kez uygulanır
+        
+        Returns:
+            str: Son metin
+        """
+        if not self._alanlar:
+            return self._parcalar[0]
+        if kacis is not None:
+            degerler = {alan: kacis(degerler[alan]) for alan in self._alan_adlari}
+        parcalar = self._parcalar[:]
+        for i, alan in self._alanlar:
+            parcalar[i] = degerler[alan]
+        return "".join(parcalar)
+
+
+def _on_derle(sablon_adi: str, baglam: dict) -> OnDerlenmisSablon:
+    return OnDerlenmisSablon(sablonlar.get_template(sablon_adi).render(baglam))
+
+
+def _isaretler(*alanlar: str) -> Dict[str, str]:
+    return {alan: _ALAN.format(alan) for alan in alanlar}
+
+
+def build_mime_message(to_email: str, subject: str, text_content: str, html_content: Optional[str] = None) -> MIMEMultipart:
+    """
+    Düz metin + HTML alternatifli MIME mesajı oluştur
     
-    E-Eczane hesabınız için şifre sıfırlama talebinde bulundunuz.
+    Args:
+        to_email: Alıcı e-posta adresi
+        subject: Konu
+        text_content: Düz metin gövde
+        html_content: HTML gövde
     
-    Şifrenizi sıfırlamak için aşağıdaki linke tıklayın:
-    {reset_link}
+    Returns:
+        MIMEMultipart: Gönderime hazır mesaj
+    """
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM}>"
+    msg["To"] = to_email
     
-    Bu link 1 saat içinde geçerliliğini yitirecektir.
+    msg.attach(MIMEText(text_content, "plain", "utf-8"))
+    if html_content:
+        msg.attach(MIMEText(html_content, "html", "utf-8"))
     
-    Eğer şifre sıfırlama talebinde bulunmadıysanız, bu e-postayı görmezden gelebilirsiniz.
+    return msg
+
+
+@lru_cache(maxsize=None)
+def _sifre_sifirlama_sablonlari() -> Tuple[OnDerlenmisSablon, OnDerlenmisSablon]:
+    baglam = _isaretler("reset_link")
+    return _on_derle("sifre_sifirlama.txt", baglam), _on_derle("sifre_sifirlama.html", baglam)
+
+
+def build_password_reset_email(reset_token: str) -> Tuple[str, str, str]:
+    """
+    Şifre sıfırlama e-postasının içeriğini oluştur
     
-    E-Eczane Sistemi
+    Returns:
+        Tuple[str, str, str]: (konu, düz metin, HTML)
+    """
+    metin, html = _sifre_sifirlama_sablonlari()
+    degerler = {"reset_link": f"{settings.FRONTEND_URL}/reset-password/{reset_token}"}
+    return "E-Eczane - Şifre Sıfırlama", metin.doldur(degerler), html.doldur(degerler, escape)
+
+
+def queue_password_reset_email(db: Session, to_email: str, reset_token: str) -> EmailOutbox:
     """
+    Şifre sıfırlama e-postasını gönderim kuyruğuna (outbox) ekle
     
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = "E-Eczane - Şifre Sıfırlama"
-        msg["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM}>"
-        msg["To"] = to_email
-        
-        part1 = MIMEText(text_content, "plain", "utf-8")
-        part2 = MIMEText(html_content, "html", "utf-8")
-        
-        msg.attach(part1)
-        msg.attach(part2)
-        
-        with smtplib.SMTP(settings.MAIL_SERVER, settings.MAIL_PORT) as server:
-            server.starttls()
-            server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
-            server.sendmail(settings.MAIL_FROM, to_email, msg.as_string())
-        
-        return True
-        
-    except Exception as e:
-        print(f"E-posta gönderme hatası: {e}")
-        return False
+    Gönderim istek içinde yapılmaz; EmailWorker kuyruktaki e-postaları
+    açık tutulan SMTP bağlantısı üzerinden toplu olarak gönderir. Kayıt
+    commit edilmez, çağıran commit eder.
+    
+    Args:
+        db: Database session
+        to_email: Alıcı e-posta adresi
+        reset_token: Şifre sıfırlama token'ı
+    
+    Returns:
+        EmailOutbox: Kuyruğa eklenen kayıt
+    """
+    subject, text_content, html_content = build_password_reset_email(reset_token)
+    return EmailOutboxRepository(db).ekle(to_email, subject, text_content, html_content)
 
 
-def send_order_status_email(
-    to_email: str, 
+@lru_cache(maxsize=None)
+def _siparis_durumu_sablonlari(
+    durum_sablonu: str,
+    eczane_var: bool,
+    iptal_nedeni_var: bool
+) -> Tuple[OnDerlenmisSablon, OnDerlenmisSablon, OnDerlenmisSablon]:
+    """
+    Sipariş durumu e-postasının (konu, metin, HTML) şablonlarını ön derle
+    
+    Eczane adı ve iptal nedeninin olup olmaması şablonun yapısını değiştirdiği
+    için her kombinasyon ayrı derlenir (durum başına en fazla 4 varyant).
+    """
+    baglam = _isaretler("durum", "patient_name", "siparis_kodu")
+    baglam.update(
+        durum_sablonu=f"siparis_durumlari/{durum_sablonu}.html",
+        frontend_url=settings.FRONTEND_URL,
+        eczane_adi=_ALAN.format("eczane_adi") if eczane_var else None,
+        cancel_reason=_ALAN.format("cancel_reason") if iptal_nedeni_var else None
+    )
+    baslik = sablonlar.get_template(baglam["durum_sablonu"]).make_module(baglam).baslik()
+    return (
+        OnDerlenmisSablon(f"E-Eczane - {baslik}"),
+        _on_derle("siparis_durumu.txt", baglam),
+        _on_derle("siparis_durumu.html", baglam)
+    )
+
+
+def build_order_status_email(
     order_id: str, 
     status: str, 
     patient_name: str,
     cancel_reason: str = None,
     eczane_adi: str = None
-) -> bool:
+) -> Tuple[str, str, str]:
     """
-    Sipariş durumu değişikliği e-postası gönder
+    Sipariş durumu değişikliği e-postasının içeriğini oluştur
     
     Args:
-        to_email: Hasta e-posta adresi
         order_id: Sipariş ID
         status: Sipariş durumu (BEKLEMEDE, ONAYLANDI, HAZIRLANIYOR, YOLDA, TESLIM_EDILDI, IPTAL_EDILDI)
         patient_name: Hasta adı
-        cancel_reason: İptal nedeni (sadece IPTAL_EDILDI durumu için)
+        cancel_reason: İptal nedeni
         eczane_adi: Eczane adı
     
     Returns:
-        bool: E-posta başarıyla gönderildiyse True
+        Tuple[str, str, str]: (konu, düz metin, HTML)
     """
-    status_messages = {
-        "BEKLEMEDE": {
-            "title": "Siparişiniz Alındı 🛒",
-            "message": f"Siparişiniz başarıyla oluşturuldu ve {eczane_adi or 'eczane'} tarafından onay bekliyor.",
-            "color": "#3182ce",
-            "icon": "🛒"
-        },
-        "ONAYLANDI": {
-            "title": "Siparişiniz Onaylandı! ✅",
-            "message": f"{eczane_adi or 'Eczane'} siparişinizi onayladı ve hazırlama işlemine başlıyor.",
-            "color": "#48bb78",
-            "icon": "✅"
-        },
-        "HAZIRLANIYOR": {
-            "title": "Siparişiniz Hazırlanıyor 📦",
-            "message": f"{eczane_adi or 'Eczane'} siparişinizi hazırlıyor. Kısa süre içinde yola çıkacak.",
-            "color": "#ed8936", 
-            "icon": "📦"
-        },
-        "YOLDA": {
-            "title": "Siparişiniz Yolda! 🚚",
-            "message": "Siparişiniz kargoya verildi ve size doğru yola çıktı. Teslimat için hazır olun!",
-            "color": "#4299e1",
-            "icon": "🚚"
-        },
-        "TESLIM_EDILDI": {
-            "title": "Siparişiniz Teslim Edildi! 🎉",
-            "message": "Siparişiniz başarıyla teslim edildi. Geçmiş olsun, sağlıklı günler dileriz! İyi günlerde kullanın.",
-            "color": "#9f7aea",
-            "icon": "🎉"
-        },
-        "IPTAL_EDILDI": {
-            "title": "Siparişiniz İptal Edildi ❌",
-            "message": f"Siparişiniz iptal edilmiştir.{(' İptal nedeni: ' + cancel_reason) if cancel_reason else ''} Ödemeniz iade edilecektir.",
-            "color": "#e53e3e",
-            "icon": "❌"
-        }
+    durum_sablonu = status.lower() if status in SIPARIS_DURUM_SABLONLARI else "_varsayilan"
+    konu, metin, html = _siparis_durumu_sablonlari(durum_sablonu, bool(eczane_adi), bool(cancel_reason))
+    degerler = {
+        "durum": status,
+        "patient_name": patient_name,
+        "siparis_kodu": order_id[:8].upper(),
+        "eczane_adi": eczane_adi,
+        "cancel_reason": cancel_reason
     }
-    
-    status_info = status_messages.get(status, {
-        "title": f"Sipariş Durumu: {status}",
-        "message": "Siparişinizin durumu güncellendi.",
-        "color": "#667eea",
-        "icon": "📋"
-    })
-    
-    # İptal durumunda özel uyarı kutusu
-    cancel_box = ""
-    if status == "IPTAL_EDILDI" and cancel_reason:
-        cancel_box = f"""
-                                <div style="padding: 16px; background-color: #fff5f5; border-left: 4px solid #fc8181; border-radius: 4px; margin: 20px 0;">
-                                    <p style="margin: 0; color: #c53030; font-size: 14px;">
-                                        <strong>İptal Nedeni:</strong> {cancel_reason}
-                                    </p>
-                                </div>
-        """
-    
-    # Teslim edildi durumunda geçmiş olsun kutusu
-    gecmis_olsun_box = ""
-    if status == "TESLIM_EDILDI":
-        gecmis_olsun_box = """
-                                <div style="padding: 20px; background-color: #f0fff4; border-left: 4px solid #48bb78; border-radius: 4px; margin: 20px 0; text-align: center;">
-                                    <p style="margin: 0; color: #276749; font-size: 16px; font-weight: 600;">
-                                        💚 Geçmiş Olsun, Sağlıklı Günler Dileriz!
-                                    </p>
-                                </div>
-        """
-    
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Sipariş Durumu</title>
-    </head>
-    <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f7fa;">
-        <table role="presentation" style="width: 100%; border-collapse: collapse;">
-            <tr>
-                <td align="center" style="padding: 40px 0;">
-                    <table role="presentation" style="width: 600px; border-collapse: collapse; background-color: #ffffff; border-radius: 16px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
-                        <!-- Header -->
-                        <tr>
-                            <td style="padding: 40px 40px 30px 40px; text-align: center; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 16px 16px 0 0;">
-                                <h1 style="margin: 0; color: #ffffff; font-size: 28px; font-weight: 700;">
-                                    🏥 E-Eczane Sistemi
-                                </h1>
-                            </td>
-                        </tr>
-                        
-                        <!-- Content -->
-                        <tr>
-                            <td style="padding: 40px;">
-                                <div style="text-align: center; margin-bottom: 30px;">
-                                    <span style="font-size: 64px;">{status_info['icon']}</span>
-                                </div>
-                                
-                                <h2 style="margin: 0 0 20px 0; color: {status_info['color']}; font-size: 24px; font-weight: 600; text-align: center;">
-                                    {status_info['title']}
-                                </h2>
-                                
-                                <p style="margin: 0 0 20px 0; color: #4a5568; font-size: 16px; line-height: 1.6;">
-                                    Merhaba {patient_name},
-                                </p>
-                                <p style="margin: 0 0 30px 0; color: #4a5568; font-size: 16px; line-height: 1.6;">
-                                    {status_info['message']}
-                                </p>
-                                
-                                <!-- Order Info -->
-                                <div style="padding: 20px; background-color: #f7fafc; border-radius: 8px; margin: 20px 0;">
-                                    <p style="margin: 0 0 10px 0; color: #4a5568; font-size: 14px;">
-                                        <strong>Sipariş No:</strong> #{order_id[:8].upper()}
-                                    </p>
-                                    {f'<p style="margin: 0; color: #4a5568; font-size: 14px;"><strong>Eczane:</strong> {eczane_adi}</p>' if eczane_adi else ''}
-                                </div>
-                                
-                                {cancel_box}
-                                {gecmis_olsun_box}
-                                
-                                <!-- Button -->
-                                <table role="presentation" style="width: 100%; border-collapse: collapse;">
-                                    <tr>
-                                        <td align="center" style="padding: 20px 0;">
-                                            <a href="{settings.FRONTEND_URL}/hasta/siparisler" 
-                                               style="display: inline-block; padding: 16px 40px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: #ffffff; text-decoration: none; font-size: 16px; font-weight: 600; border-radius: 8px; box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);">
-                                                Siparişlerimi Görüntüle
-                                            </a>
-                                        </td>
-                                    </tr>
-                                </table>
-                            </td>
-                        </tr>
-                        
-                        <!-- Footer -->
-                        <tr>
-                            <td style="padding: 30px 40px; background-color: #f7fafc; border-radius: 0 0 16px 16px; text-align: center;">
-                                <p style="margin: 0 0 10px 0; color: #a0aec0; font-size: 12px;">
-                                    Bu e-posta E-Eczane Sistemi tarafından otomatik olarak gönderilmiştir.
-                                </p>
-                                <p style="margin: 0; color: #a0aec0; font-size: 12px;">
-                                    © 2025 E-Eczane Sistemi. Tüm hakları saklıdır.
-                                </p>
-                            </td>
-                        </tr>
-                    </table>
-                </td>
-            </tr>
-        </table>
-    </body>
-    </html>
+    return konu.doldur(degerler), metin.doldur(degerler), html.doldur(degerler, escape)
+
+
+def queue_order_status_email(
+    db: Session,
+    to_email: str, 
+    order_id: str, 
+    status: str, 
+    patient_name: str,
+    cancel_reason: str = None,
+    eczane_adi: str = None
+) -> EmailOutbox:
     """
+    Sipariş durumu değişikliği e-postasını gönderim kuyruğuna (outbox) ekle
     
-    # Plain text version
-    cancel_text = f"\nİptal Nedeni: {cancel_reason}" if cancel_reason else ""
-    gecmis_olsun_text = "\n\n💚 Geçmiş Olsun, Sağlıklı Günler Dileriz!" if status == "TESLIM_EDILDI" else ""
+    Kayıt commit edilmez: durum değişikliğini yazan commit ile birlikte
+    kaydedilir, geri alınan değişiklik için e-posta gönderilmez.
     
-    text_content = f"""
-    E-Eczane Sistemi - Sipariş Durumu
-    
-    Merhaba {patient_name},
-    
-    {status_info['title']}
-    
-    {status_info['message']}
-    
-    Sipariş No: #{order_id[:8].upper()}
-    {f'Eczane: {eczane_adi}' if eczane_adi else ''}{cancel_text}{gecmis_olsun_text}
-    
-    Siparişlerinizi görüntülemek için: {settings.FRONTEND_URL}/hasta/siparisler
+    Args:
+        db: Database session
+        to_email: Hasta e-posta adresi
+        order_id: Sipariş ID
+        status: Sipariş durumu (BEKLEMEDE, ONAYLANDI, HAZIRLANIYOR, YOLDA, TESLIM_EDILDI, IPTAL_EDILDI)
+        patient_name: Hasta adı
+        cancel_reason: İptal nedeni (sadece IPTAL_EDILDI durumu için)
+        eczane_adi: Eczane adı
     
-    E-Eczane Sistemi
+    Returns:
+        EmailOutbox: Kuyruğa eklenen kayıt
     """
-    
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = f"E-Eczane - {status_info['title']}"
-        msg["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM}>"
-        msg["To"] = to_email
-        
-        part1 = MIMEText(text_content, "plain", "utf-8")
-        part2 = MIMEText(html_content, "html", "utf-8")
-        
-        msg.attach(part1)
-        msg.attach(part2)
-        
-        with smtplib.SMTP(settings.MAIL_SERVER, settings.MAIL_PORT) as server:
-            server.starttls()
-            server.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
-            server.sendmail(settings.MAIL_FROM, to_email, msg.as_string())
-        
-        return True
-        
-    except Exception as e:
-        print(f"E-posta gönderme hatası: {e}")
-        return False
+    subject, text_content, html_content = build_order_status_email(
+        order_id=order_id,
+        status=status,
+        patient_name=patient_name,
+        cancel_reason=cancel_reason,
+        eczane_adi=eczane_adi
+    )
+    return EmailOutboxRepository(db).ekle(to_email, subject, text_content, html_content)
 
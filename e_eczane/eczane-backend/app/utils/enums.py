@@ -48,3 +48,9 @@ class ReceteDurum(str, Enum):
     IPTAL = "iptal"
 
 
+class EmailDurum(str, Enum):
+    BEKLEMEDE = "beklemede"
+    GONDERILDI = "gonderildi"
+    BASARISIZ = "basarisiz"
+
+
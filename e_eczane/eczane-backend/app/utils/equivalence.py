@@ -0,0 +1,172 @@
+from collections import deque
+from itertools import count
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Set, Tuple
+
+_BOS: FrozenSet[Hashable] = frozenset()
+
+
+class EquivalenceClasses:
+    """
+    Kenar listesinden denklik sınıfları (bağlı bileşenler)
+
+    Her düğüm bir sınıf etiketine, her etiket sınıfın üyelerini tutan
+    frozenset'e bağlıdır. class_of() iki sözlük okumasıyla yayımlanmış kümeyi
+    kopyalamadan döndürür (O(1)); kümede düğümün kendisi de vardır.
+
+    - İlk yükleme: kenarlar yol sıkıştırmalı, boyuta göre birleştiren bir
+      union-find ile gruplanır, her sınıfın kümesi bir kez oluşturulur:
+      O(E·α(N) + N).
+    - add_edge: iki sınıf birleşirken yalnızca küçük sınıfın düğümleri yeniden
+      etiketlenir (O(min(|A|, |B|))), okuyucular için yeni birleşik küme
+      oluşturulur (O(|A| + |B|)).
+    - remove_edge: etkilenen sınıf yeniden dolaşılır (O(|sınıf|)); bölündüyse
+      küçük parça yeni etikete taşınır.
+
+    Sınıf kümeleri yayımlandıktan sonra hiç değiştirilmez (copy-on-write):
+    class_of() kilitsiz okunabilir; yazmalar (add_edge/remove_edge) çağıran
+    tarafından sıraya sokulmalıdır.
+
+    Aynı çift birden fazla kez eklenebilir (a→b ve b→a gibi); kenar, son
+    kopyası silinene kadar yerinde kalır.
+    """
+
+    def __init__(self, edges: Iterable[Tuple[Hashable, Hashable]] = ()):
+        """
+        Args:
+            edges: (a, b) çiftleri - yönsüz kabul edilir
+        """
+        self._adjacency: Dict[Hashable, Dict[Hashable, int]] = {}
+        self._labels: Dict[Hashable, int] = {}
+        self._classes: Dict[int, FrozenSet[Hashable]] = {}
+        self._next_label = count()
+
+        parent: Dict[Hashable, Hashable] = {}
+        size: Dict[Hashable, int] = {}
+
+        def find(node: Hashable) -> Hashable:
+            root = node
+            while parent[root] != root:
+                root = parent[root]
+            while parent[node] != root:
+                parent[node], node = root, parent[node]
+            return root
+
+        for a, b in edges:
+            if a == b:
+                continue
+            for node, other in ((a, b), (b, a)):
+                neighbours = self._adjacency.setdefault(node, {})
+                neighbours[other] = neighbours.get(other, 0) + 1
+                if node not in parent:
+                    parent[node] = node
+                    size[node] = 1
+            root_a, root_b = find(a), find(b)
+            if root_a == root_b:
+                continue
+            if size[root_a] < size[root_b]:
+                root_a, root_b = root_b, root_a
+            parent[root_b] = root_a
+            size[root_a] += size[root_b]
+
+        groups: Dict[Hashable, List[Hashable]] = {}
+        for node in parent:
+            groups.setdefault(find(node), []).append(node)
+        for members in groups.values():
+            self._publish(members)
+
+    def add_edge(self, a: Hashable, b: Hashable) -> None:
+        """a ile b arasına kenar ekle, sınıfları farklıysa birleştir"""
+        if a == b:
+            return
+        for node, other in ((a, b), (b, a)):
+            neighbours = self._adjacency.setdefault(node, {})
+            neighbours[other] = neighbours.get(other, 0) + 1
+
+        label_a = self._labels.get(a)
+        if label_a is None:
+            label_a = self._publish([a])
+        label_b = self._labels.get(b)
+        if label_b is None:
+            label_b = self._publish([b])
+        if label_a == label_b:
+            return
+
+        big, small = label_a, label_b
+        if len(self._classes[big]) < len(self._classes[small]):
+            big, small = small, big
+        # Önce birleşik küme yayımlanır, sonra küçük sınıf taşınır: eski
+        # etiketi okuyan okuyucu o ana kadar geçerli kümeyi görmeye devam eder
+        small_members = self._classes[small]
+        self._classes[big] = self._classes[big] | small_members
+        for node in small_members:
+            self._labels[node] = big
+        del self._classes[small]
+
+    def remove_edge(self, a: Hashable, b: Hashable) -> None:
+        """a ile b arasındaki bir kenar kopyasını sil, sınıf bölündüyse ayır"""
+        count_ab = self._adjacency.get(a, {}).get(b, 0)
+        if count_ab == 0:
+            return
+        if count_ab > 1:
+            self._adjacency[a][b] -= 1
+            self._adjacency[b][a] -= 1
+            return
+
+        del self._adjacency[a][b]
+        del self._adjacency[b][a]
+
+        reachable = self._reachable(a)
+        if b in reachable:
+            return
+
+        # Sınıf ikiye bölündü: küçük parça yeni etikete taşınır
+        label = self._labels[a]
+        rest = self._classes[label] - reachable
+        reachable = frozenset(reachable)
+        moved, kept = (reachable, rest) if len(reachable) <= len(rest) else (rest, reachable)
+        self._publish(moved)
+        self._classes[label] = kept
+
+        for node in (a, b):
+            if not self._adjacency.get(node):
+                self._adjacency.pop(node, None)
+                del self._classes[self._labels.pop(node)]
+
+    def class_of(self, node: Hashable) -> FrozenSet[Hashable]:
+        """
+        Düğümün denklik sınıfı (kopyalanmadan)
+
+        Args:
+            node: Düğüm
+
+        Returns:
+            FrozenSet: Düğümün kendisi dahil sınıfın üyeleri; hiç kenarı
+                olmayan düğüm için boş küme
+        """
+        while True:
+            label = self._labels.get(node)
+            if label is None:
+                return _BOS
+            members = self._classes.get(label)
+            # Etiket okunduktan sonra sınıf taşındıysa yeni etiketle tekrar dene
+            if members is not None and node in members:
+                return members
+
+    def _publish(self, members: Iterable[Hashable]) -> int:
+        """Üyeler için yeni etiketli sınıf kümesi yayımla ve düğümleri ona yönlendir"""
+        label = next(self._next_label)
+        self._classes[label] = frozenset(members)
+        for node in self._classes[label]:
+            self._labels[node] = label
+        return label
+
+    def _reachable(self, start: Hashable) -> Set[Hashable]:
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbour in self._adjacency.get(node, {}):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return seen
@@ -0,0 +1,137 @@
+import math
+from typing import List, Tuple
+
+
+# Eczane konumları bu hassasiyette saklanır (~150m x 150m hücre)
+GEOHASH_PRECISION = 7
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_EARTH_RADIUS_KM = 6371.0088
+_KM_PER_DEGREE = math.pi * _EARTH_RADIUS_KM / 180
+
+
+def geohash_encode(enlem: float, boylam: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Koordinatı geohash string'ine dönüştür
+
+    Ortak öneki olan geohash'ler aynı hücrededir; bu sayede normal bir
+    B-tree index üzerinde LIKE 'önek%' sorgusu ile alan araması yapılabilir.
+
+    Args:
+        enlem: Enlem (-90, 90)
+        boylam: Boylam (-180, 180)
+        precision: Karakter sayısı
+
+    Returns:
+        str: Geohash
+    """
+    enlem_araligi = [-90.0, 90.0]
+    boylam_araligi = [-180.0, 180.0]
+    karakterler = []
+    bit_sayisi = 0
+    deger = 0
+    boylam_biti = True
+
+    while len(karakterler) < precision:
+        aralik, koordinat = (boylam_araligi, boylam) if boylam_biti else (enlem_araligi, enlem)
+        orta = (aralik[0] + aralik[1]) / 2
+        if koordinat >= orta:
+            deger = (deger << 1) | 1
+            aralik[0] = orta
+        else:
+            deger = deger << 1
+            aralik[1] = orta
+        boylam_biti = not boylam_biti
+
+        bit_sayisi += 1
+        if bit_sayisi == 5:
+            karakterler.append(_BASE32[deger])
+            bit_sayisi = 0
+            deger = 0
+
+    return "".join(karakterler)
+
+
+def geohash_cell_size_deg(precision: int) -> Tuple[float, float]:
+    """
+    Verilen hassasiyetteki bir hücrenin boyutu
+
+    Args:
+        precision: Geohash karakter sayısı
+
+    Returns:
+        tuple: (enlem derecesi, boylam derecesi)
+    """
+    bitler = precision * 5
+    boylam_bitleri = (bitler + 1) // 2
+    enlem_bitleri = bitler // 2
+    return 180.0 / (2 ** enlem_bitleri), 360.0 / (2 ** boylam_bitleri)
+
+
+def geohash_cells_around(enlem: float, boylam: float, precision: int) -> List[str]:
+    """
+    Noktanın bulunduğu hücre ve çevresindeki 8 komşu hücre
+
+    Args:
+        enlem: Enlem
+        boylam: Boylam
+        precision: Geohash karakter sayısı
+
+    Returns:
+        List[str]: Tekrarsız hücre geohash'leri (merkez hücre ilk sırada)
+    """
+    enlem_adim, boylam_adim = geohash_cell_size_deg(precision)
+    hucreler = []
+    for d_enlem in (0, -1, 1):
+        for d_boylam in (0, -1, 1):
+            komsu_enlem = enlem + d_enlem * enlem_adim
+            if not -90.0 <= komsu_enlem <= 90.0:
+                continue
+            # Antimeridyen geçişinde boylamı sar
+            komsu_boylam = (boylam + d_boylam * boylam_adim + 180.0) % 360.0 - 180.0
+            hucre = geohash_encode(komsu_enlem, komsu_boylam, precision)
+            if hucre not in hucreler:
+                hucreler.append(hucre)
+    return hucreler
+
+
+def covered_radius_km(enlem: float, precision: int) -> float:
+    """
+    3x3 hücre bloğunun merkez noktadan itibaren kesin olarak kapsadığı yarıçap
+
+    Nokta merkez hücrenin herhangi bir yerinde olabileceği için blok kenarına
+    olan en kısa mesafe en az bir hücre boyutudur.
+
+    Args:
+        enlem: Noktanın enlemi
+        precision: Geohash karakter sayısı
+
+    Returns:
+        float: Kilometre
+    """
+    enlem_adim, boylam_adim = geohash_cell_size_deg(precision)
+    enlem_km = enlem_adim * _KM_PER_DEGREE
+    # Boylam derecesi bloğun kutba yakın kenarında (en fazla iki hücre ötede) en kısadır
+    kenar_enlemi = min(90.0, abs(enlem) + 2 * enlem_adim)
+    boylam_km = boylam_adim * _KM_PER_DEGREE * math.cos(math.radians(kenar_enlemi))
+    return min(enlem_km, boylam_km)
+
+
+def haversine_km(enlem1: float, boylam1: float, enlem2: float, boylam2: float) -> float:
+    """
+    İki nokta arasındaki büyük daire mesafesi
+
+    Args:
+        enlem1: Birinci nokta enlemi
+        boylam1: Birinci nokta boylamı
+        enlem2: İkinci nokta enlemi
+        boylam2: İkinci nokta boylamı
+
+    Returns:
+        float: Kilometre
+    """
+    phi1, phi2 = math.radians(enlem1), math.radians(enlem2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(boylam2 - boylam1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,95 @@
+import base64
+import json
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Query
+
+
+CursorKey = Tuple[datetime, UUID]
+
+# Liste olarak dönen endpoint'lerde sonraki sayfa cursor'ı bu header'da taşınır
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """
+    (created_at, id) anahtarını opak bir cursor string'ine dönüştür
+
+    Args:
+        created_at: Sayfadaki son kaydın oluşturulma zamanı
+        row_id: Sayfadaki son kaydın ID'si
+
+    Returns:
+        str: URL-safe base64 cursor
+    """
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(row_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    """
+    Cursor string'ini (created_at, id) anahtarına çevir
+
+    Args:
+        cursor: encode_cursor ile üretilmiş cursor
+
+    Returns:
+        tuple: (created_at, id)
+
+    Raises:
+        ValueError: Cursor bozuk veya geçersiz
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), UUID(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Geçersiz cursor") from e
+
+
+def apply_keyset(query: Query, model, cursor_key: Optional[CursorKey]) -> Query:
+    """
+    Sorguya (created_at, id) üzerinden azalan keyset filtresi ve sıralaması uygula
+
+    Cursor verilmişse yalnızca anahtardan sonra gelen kayıtlar döner; böylece
+    derin sayfalar OFFSET ile satır atlamadan ilk sayfa maliyetinde okunur.
+
+    Args:
+        query: model.id ve model.created_at kolonlarını seçen sorgu
+        model: created_at ve id kolonları olan model
+        cursor_key: decode_cursor sonucu veya None (ilk sayfa)
+
+    Returns:
+        Query: Filtrelenmiş ve sıralanmış sorgu
+    """
+    if cursor_key is not None:
+        created_at, row_id = cursor_key
+        query = query.filter(
+            or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id)
+            )
+        )
+
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+
+def split_page(rows: List, page_size: int) -> Tuple[List, Optional[str]]:
+    """
+    page_size + 1 ile okunmuş satırları sayfaya ve sonraki cursor'a ayır
+
+    Args:
+        rows: id ve created_at alanları olan satırlar (en fazla page_size + 1)
+        page_size: Sayfa boyutu
+
+    Returns:
+        tuple: (sayfadaki satırlar, sonraki sayfa cursor'ı veya None)
+    """
+    if len(rows) <= page_size:
+        return rows, None
+
+    page = rows[:page_size]
+    last = page[-1]
+    return page, encode_cursor(last.created_at, last.id)
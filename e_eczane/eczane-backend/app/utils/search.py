@@ -0,0 +1,231 @@
+import unicodedata
+from bisect import bisect_left, bisect_right
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+# Türkçe büyük/küçük harf dönüşümü: str.lower() "İ" harfini "i̇" yapar, "I" harfini "i" yapar
+_TR_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+
+# Arama metninde noktasız ı da i'ye katlanır (klavyede Türkçe karakter kullanmayanlar için)
+_TR_FOLD = str.maketrans({"ı": "i"})
+
+
+def normalize_search_text(*parts: Optional[str]) -> str:
+    """
+    Arama için metni normalize et
+
+    Türkçe kurallarıyla küçük harfe çevirir, aksanları atar (ç→c, ğ→g, ş→s,
+    ö→o, ü→u, ı→i) ve boşlukları sadeleştirir. "AĞRI", "Ağrı" ve "agri"
+    aynı metne dönüşür.
+
+    Args:
+        parts: Birleştirilecek metin parçaları (None olanlar atlanır)
+
+    Returns:
+        str: Normalize edilmiş metin
+    """
+    text = " ".join(part for part in parts if part)
+    text = text.translate(_TR_LOWER).lower().translate(_TR_FOLD)
+    text = "".join(
+        char for char in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(char)
+    )
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Metnin 3 karakterlik parçaları
+
+    Args:
+        text: Normalize edilmiş metin
+
+    Returns:
+        Set[str]: Trigram kümesi (3 karakterden kısa metin için boş)
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Bellek içi trigram ters index'i - alt metin (substring) araması için
+
+    Sorgunun her trigram'ı için kayıt listeleri kesiştirilir, kalan adaylarda
+    gerçek alt metin kontrolü yapılır. Böylece arama süresi tablo boyutuna
+    değil, sorguyla eşleşen kayıt sayısına bağlıdır.
+
+    Yayımlanmış kayıt listeleri değiştirilmez; update() değişen trigram'ların
+    listelerini yenisiyle değiştirir. Böylece search() kilitsiz okunabilir,
+    update() çağrıları çağıran tarafından sıraya sokulmalıdır.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[Hashable, str]]):
+        """
+        Args:
+            documents: (anahtar, normalize edilmiş metin) çiftleri
+        """
+        self._texts: Dict[Hashable, str] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+        for key, text in documents:
+            self._texts[key] = text
+            for gram in trigrams(text):
+                self._postings.setdefault(gram, set()).add(key)
+
+    def update(self, key: Hashable, text: Optional[str]) -> None:
+        """
+        Tek kaydın metnini değiştir veya kaydı sil
+
+        Yalnızca eklenen/çıkan trigram'ların listeleri yeniden oluşturulur
+        (liste boyutu kadar kopya); index'in geri kalanı dokunulmadan kalır.
+
+        Args:
+            key: Kayıt anahtarı
+            text: Yeni normalize edilmiş metin (None: kaydı sil)
+        """
+        old = self._texts.get(key)
+        if old == text:
+            return
+        old_grams = trigrams(old) if old is not None else set()
+        new_grams = trigrams(text) if text is not None else set()
+
+        if text is None:
+            del self._texts[key]
+        for gram in old_grams - new_grams:
+            posting = self._postings[gram] - {key}
+            if posting:
+                self._postings[gram] = posting
+            else:
+                del self._postings[gram]
+        for gram in new_grams - old_grams:
+            self._postings[gram] = self._postings.get(gram, set()) | {key}
+        if text is not None:
+            self._texts[key] = text
+
+    def search(self, term: str) -> Set[Hashable]:
+        """
+        Metninde term geçen kayıtların anahtarları
+
+        Args:
+            term: Normalize edilmiş arama terimi
+
+        Returns:
+            Set: Eşleşen anahtarlar
+        """
+        grams = trigrams(term)
+        if not grams:
+            # 3 karakterden kısa sorgular index'ten yararlanamaz
+            return {key for key, text in self._texts.copy().items() if term in text}
+
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+
+        return {key for key in candidates if term in self._texts.get(key, "")}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+
+class PrefixIndex:
+    """
+    Bellek içi önek (prefix) index'i - yazarken tamamlama (autocomplete) için
+
+    Her metnin kelime başlarından itibaren son ekleri sıralı bir dizide tutulur;
+    arama ikili arama (bisect) ile ilk eşleşmeye atlar ve yalnızca limit kadar
+    kaydı dolaşır. Böylece "500" sorgusu "Parol 500mg" ile de eşleşir.
+
+    Diziler yayımlandıktan sonra değiştirilmez: update() değişikliği kopyalar
+    üzerinde yapıp tek atamayla yayımlar, search() kilitsiz okunabilir.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[Hashable, Iterable[str]]]):
+        """
+        Args:
+            documents: (anahtar, normalize edilmiş metinler) çiftleri
+        """
+        self._documents: Dict[Hashable, List[str]] = {}
+        entries = []
+        for key, texts in documents:
+            suffixes = self._documents[key] = _suffixes(texts)
+            entries.extend((term, key) for term in suffixes)
+        entries.sort(key=lambda entry: entry[0])
+        self._entries: Tuple[List[str], List[Hashable]] = (
+            [term for term, _ in entries],
+            [key for _, key in entries]
+        )
+
+    def update(self, key: Hashable, texts: Optional[Iterable[str]]) -> None:
+        """
+        Tek kaydın metinlerini değiştir veya kaydı sil
+
+        Kaydın eski son ekleri ikili aramayla bulunup çıkarılır, yenileri sıralı
+        yerlerine eklenir; index yeniden sıralanmaz. Maliyet dizilerin bir
+        kopyası (O(n)) ve kaydın son ek sayısı kadar ekleme/silmedir.
+
+        Args:
+            key: Kayıt anahtarı
+            texts: Yeni normalize edilmiş metinler (None: kaydı sil)
+        """
+        old = self._documents.get(key, [])
+        new = _suffixes(texts) if texts is not None else []
+        if old == new:
+            return
+
+        terms, keys = (list(array) for array in self._entries)
+        for term in old:
+            position = bisect_left(terms, term)
+            while keys[position] != key:
+                position += 1
+            del terms[position]
+            del keys[position]
+        for term in new:
+            position = bisect_right(terms, term)
+            terms.insert(position, term)
+            keys.insert(position, key)
+        self._entries = (terms, keys)
+
+        if texts is None:
+            self._documents.pop(key, None)
+        else:
+            self._documents[key] = new
+
+    def search(self, prefix: str, limit: int) -> List[Hashable]:
+        """
+        Metinlerinden birinde bir kelime prefix ile başlayan kayıtlar
+
+        Args:
+            prefix: Normalize edilmiş önek
+            limit: En fazla sonuç sayısı
+
+        Returns:
+            List: Tekrarsız anahtarlar (eşleşen metne göre alfabetik)
+        """
+        terms, keys = self._entries
+        results: List[Hashable] = []
+        seen: Set[Hashable] = set()
+        position = bisect_left(terms, prefix)
+        while position < len(terms) and len(results) < limit:
+            if not terms[position].startswith(prefix):
+                break
+            key = keys[position]
+            if key not in seen:
+                seen.add(key)
+                results.append(key)
+            position += 1
+        return results
+
+    def __len__(self) -> int:
+        return len(self._entries[0])
+
+
+def _suffixes(texts: Iterable[str]) -> List[str]:
+    """Metinlerin kelime başlarından başlayan son ekleri"""
+    return [text[start:] for text in texts for start in _word_starts(text)]
+
+
+def _word_starts(text: str) -> List[int]:
+    """Metindeki kelimelerin başlangıç konumları"""
+    return [i for i, char in enumerate(text) if char != " " and (i == 0 or text[i - 1] == " ")]
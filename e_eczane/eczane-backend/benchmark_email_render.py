@@ -0,0 +1,102 @@
+"""
+E-posta şablonu render hızı (saniyede render edilen e-posta)
+
+İki yol karşılaştırılır:
+- jinja:        her e-postada Jinja şablonunun tamamı render edilir
+- on_derlenmis: build_order_status_email / build_password_reset_email
+                (şablon bir kez render edilir, her gönderimde yalnızca alanlar doldurulur)
+
+Kullanım:
+    python benchmark_email_render.py
+    python benchmark_email_render.py --adet 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, '.')
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.config import settings
+from app.utils.email import (
+    SIPARIS_DURUM_SABLONLARI,
+    build_order_status_email,
+    build_password_reset_email,
+    sablonlar,
+)
+
+DURUMLAR = sorted(SIPARIS_DURUM_SABLONLARI)
+
+
+def siparis_parametreleri(i: int) -> dict:
+    durum = DURUMLAR[i % len(DURUMLAR)]
+    return {
+        "order_id": f"{i:08x}-0000-4000-8000-000000000000",
+        "status": durum,
+        "patient_name": f"Hasta {i}",
+        "cancel_reason": "Stokta kalmadı" if durum == "IPTAL_EDILDI" else None,
+        "eczane_adi": "Merkez Eczanesi" if i % 3 else None,
+    }
+
+
+def jinja_siparis(p: dict):
+    baglam = {
+        "durum": p["status"],
+        "durum_sablonu": f"siparis_durumlari/{p['status'].lower()}.html",
+        "frontend_url": settings.FRONTEND_URL,
+        "patient_name": p["patient_name"],
+        "siparis_kodu": p["order_id"][:8].upper(),
+        "eczane_adi": p["eczane_adi"],
+        "cancel_reason": p["cancel_reason"],
+    }
+    baslik = sablonlar.get_template(baglam["durum_sablonu"]).make_module(baglam).baslik()
+    return (
+        f"E-Eczane - {baslik}",
+        sablonlar.get_template("siparis_durumu.txt").render(baglam),
+        sablonlar.get_template("siparis_durumu.html").render(baglam),
+    )
+
+
+def jinja_sifre(token: str):
+    baglam = {"reset_link": f"{settings.FRONTEND_URL}/reset-password/{token}"}
+    return (
+        "E-Eczane - Şifre Sıfırlama",
+        sablonlar.get_template("sifre_sifirlama.txt").render(baglam),
+        sablonlar.get_template("sifre_sifirlama.html").render(baglam),
+    )
+
+
+def olc(fonksiyon, parametreler) -> float:
+    # Isınma: şablon derleme / ön derleme ölçüme dahil edilmez
+    for p in parametreler[:50]:
+        fonksiyon(p)
+    baslangic = time.perf_counter()
+    for p in parametreler:
+        fonksiyon(p)
+    return len(parametreler) / (time.perf_counter() - baslangic)
+
+
+def main(adet: int) -> None:
+    siparisler = [siparis_parametreleri(i) for i in range(adet)]
+    tokenlar = [f"token-{i}" for i in range(adet)]
+
+    sonuclar = [
+        ("sipariş durumu", "jinja", olc(jinja_siparis, siparisler)),
+        ("sipariş durumu", "on_derlenmis", olc(lambda p: build_order_status_email(**p), siparisler)),
+        ("şifre sıfırlama", "jinja", olc(jinja_sifre, tokenlar)),
+        ("şifre sıfırlama", "on_derlenmis", olc(build_password_reset_email, tokenlar)),
+    ]
+
+    print(f"{adet} e-posta")
+    print(f"{'e-posta':<18}{'yol':<15}{'e-posta/sn':>12}")
+    for eposta, yol, hiz in sonuclar:
+        print(f"{eposta:<18}{yol:<15}{hiz:>12,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="E-posta şablonu render benchmark'ı")
+    parser.add_argument("--adet", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.adet)
@@ -0,0 +1,76 @@
+"""
+Access token doğrulama hızı (saniyede doğrulanan token)
+
+Karşılaştırılan yollar:
+- jose:        python-jose ile her istekte tam doğrulama (önceki davranış)
+- hmac:        standart kütüphane ile HS* doğrulama (JWT_BACKEND=hmac)
+- cache_jose:  decode_access_token, jose backend'i + doğrulanmış token cache'i
+- cache_hmac:  decode_access_token, hmac backend'i + doğrulanmış token cache'i
+
+Her istek, oturum açmış --kullanici kadar kullanıcının token'larından birini taşır.
+
+Kullanım:
+    python benchmark_jwt_decode.py
+    python benchmark_jwt_decode.py --istek 50000 --kullanici 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, '.')
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core import security
+from app.core.security import create_access_token, decode_access_token
+
+
+def olc(fonksiyon, tokenlar) -> float:
+    baslangic = time.perf_counter()
+    for token in tokenlar:
+        fonksiyon(token)
+    return len(tokenlar) / (time.perf_counter() - baslangic)
+
+
+def cacheli(backend):
+    def coz(token):
+        return decode_access_token(token)
+
+    def calistir(tokenlar):
+        security._jwt_decode = backend
+        security.clear_token_cache()
+        return olc(coz, tokenlar)
+    return calistir
+
+
+def main(istek: int, kullanici: int) -> None:
+    kullanici_tokenlari = [
+        create_access_token({"user_id": f"{i:08d}-0000-4000-8000-000000000000", "user_type": "hasta"})
+        for i in range(kullanici)
+    ]
+    tokenlar = [kullanici_tokenlari[i % kullanici] for i in range(istek)]
+
+    # İki backend aynı claim'leri döndürmeli
+    for token in kullanici_tokenlari:
+        assert security._jwt_decode_jose(token) == security._jwt_decode_hmac(token)
+
+    sonuclar = [
+        ("jose", olc(security._jwt_decode_jose, tokenlar)),
+        ("hmac", olc(security._jwt_decode_hmac, tokenlar)),
+        ("cache_jose", cacheli(security._jwt_decode_jose)(tokenlar)),
+        ("cache_hmac", cacheli(security._jwt_decode_hmac)(tokenlar)),
+    ]
+
+    print(f"{istek} istek, {kullanici} kullanıcı")
+    print(f"{'yol':<14}{'token/sn':>12}")
+    for yol, hiz in sonuclar:
+        print(f"{yol:<14}{hiz:>12,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JWT doğrulama benchmark'ı")
+    parser.add_argument("--istek", type=int, default=20000)
+    parser.add_argument("--kullanici", type=int, default=100)
+    args = parser.parse_args()
+    main(args.istek, args.kullanici)
@@ -0,0 +1,57 @@
+"""
+Migration script to add the normalized search column (arama_metni) to the
+ilaclar table and the pg_trgm GIN index used by drug search.
+Run this script once to apply the database changes.
+"""
+import sys
+sys.path.insert(0, '.')
+
+from sqlalchemy import text
+from app.core.database import engine
+from app.utils.search import normalize_search_text
+
+def add_ilac_search_index():
+    """Add ilaclar.arama_metni, fill it and create the trigram index"""
+
+    with engine.connect() as conn:
+        try:
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = 'ilaclar' AND column_name = 'arama_metni'
+            """))
+
+            if result.fetchone() is None:
+                conn.execute(text("ALTER TABLE ilaclar ADD COLUMN arama_metni TEXT"))
+                print("✅ Added column: ilaclar.arama_metni")
+            else:
+                print("ℹ️  Column already exists: ilaclar.arama_metni")
+
+        except Exception as e:
+            print(f"❌ Error adding column ilaclar.arama_metni: {e}")
+
+        # Mevcut ilaçların arama metnini doldur
+        rows = conn.execute(text("SELECT id, ad, barkod, etken_madde FROM ilaclar")).fetchall()
+        for row in rows:
+            conn.execute(
+                text("UPDATE ilaclar SET arama_metni = :arama_metni WHERE id = :id"),
+                {"arama_metni": normalize_search_text(row.ad, row.barkod, row.etken_madde), "id": row.id}
+            )
+        print(f"✅ Search text updated for {len(rows)} drugs")
+
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_ilaclar_arama_metni_trgm
+                ON ilaclar USING gin (arama_metni gin_trgm_ops)
+            """))
+            print("✅ Created index: ix_ilaclar_arama_metni_trgm")
+        except Exception as e:
+            print(f"❌ Error creating index ix_ilaclar_arama_metni_trgm: {e}")
+
+        conn.commit()
+        print("\n✅ Migration completed successfully!")
+
+if __name__ == "__main__":
+    print("🔄 Running migration: Add search index to ilaclar table\n")
+    add_ilac_search_index()
@@ -0,0 +1,83 @@
+"""
+Migration script to add coordinate columns (enlem, boylam) to hastalar and
+eczaneler tables, and the geohash grid index used by nearest-pharmacy search.
+Run this script once to apply the database changes.
+"""
+import sys
+sys.path.insert(0, '.')
+
+from sqlalchemy import text
+from app.core.database import engine
+from app.utils.geo import geohash_encode
+
+def add_location_coordinates():
+    """Add enlem, boylam (and eczaneler.geohash) columns if they don't exist"""
+    
+    with engine.connect() as conn:
+        columns_to_add = [
+            ("hastalar", "enlem", "DOUBLE PRECISION"),
+            ("hastalar", "boylam", "DOUBLE PRECISION"),
+            ("eczaneler", "enlem", "DOUBLE PRECISION"),
+            ("eczaneler", "boylam", "DOUBLE PRECISION"),
+            ("eczaneler", "geohash", "VARCHAR(12)")
+        ]
+        
+        for table_name, column_name, column_type in columns_to_add:
+            try:
+                # Check if column exists
+                result = conn.execute(text(f"""
+                    SELECT column_name 
+                    FROM information_schema.columns 
+                    WHERE table_name = '{table_name}' AND column_name = '{column_name}'
+                """))
+                
+                if result.fetchone() is None:
+                    conn.execute(text(f"""
+                        ALTER TABLE {table_name} 
+                        ADD COLUMN {column_name} {column_type}
+                    """))
+                    print(f"✅ Added column: {table_name}.{column_name}")
+                else:
+                    print(f"ℹ️  Column already exists: {table_name}.{column_name}")
+                    
+            except Exception as e:
+                print(f"❌ Error adding column {table_name}.{column_name}: {e}")
+        
+        # LIKE 'prefix%' araması C dışı collation'da yalnızca varchar_pattern_ops
+        # index'i kullanabilir; eski (varsayılan ops) index varsa yeniden oluşturulur
+        try:
+            indexdef = conn.execute(text("""
+                SELECT indexdef FROM pg_indexes
+                WHERE tablename = 'eczaneler' AND indexname = 'ix_eczaneler_geohash'
+            """)).scalar()
+            
+            if indexdef is None or "varchar_pattern_ops" not in indexdef:
+                conn.execute(text("DROP INDEX IF EXISTS ix_eczaneler_geohash"))
+                conn.execute(text("""
+                    CREATE INDEX ix_eczaneler_geohash 
+                    ON eczaneler (geohash varchar_pattern_ops)
+                """))
+                print("✅ Created index: ix_eczaneler_geohash (varchar_pattern_ops)")
+            else:
+                print("ℹ️  Index already exists: ix_eczaneler_geohash")
+        except Exception as e:
+            print(f"❌ Error creating index ix_eczaneler_geohash: {e}")
+        
+        # Koordinatı olan eczanelerin geohash'ini doldur
+        rows = conn.execute(text("""
+            SELECT id, enlem, boylam FROM eczaneler
+            WHERE enlem IS NOT NULL AND boylam IS NOT NULL
+        """)).fetchall()
+        for row in rows:
+            conn.execute(
+                text("UPDATE eczaneler SET geohash = :geohash WHERE id = :id"),
+                {"geohash": geohash_encode(row.enlem, row.boylam), "id": row.id}
+            )
+        print(f"✅ Geohash updated for {len(rows)} pharmacies")
+        
+        conn.commit()
+        print("\n✅ Migration completed successfully!")
+
+if __name__ == "__main__":
+    print("🔄 Running migration: Add coordinates to hastalar and eczaneler tables\n")
+    add_location_coordinates()
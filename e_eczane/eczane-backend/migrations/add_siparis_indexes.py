@@ -0,0 +1,36 @@
+"""
+Migration script to add listing indexes to siparisler table.
+Run this script once to apply the database changes.
+"""
+import sys
+sys.path.insert(0, '.')
+
+from sqlalchemy import text
+from app.core.database import engine
+
+def add_siparis_indexes():
+    """Create indexes used by order listing queries if they don't exist"""
+    
+    with engine.connect() as conn:
+        indexes_to_add = [
+            ("ix_siparisler_created_at", "created_at"),
+            ("ix_siparisler_hasta_id_created_at", "hasta_id, created_at"),
+            ("ix_siparisler_eczane_id_created_at", "eczane_id, created_at"),
+        ]
+        
+        for index_name, columns in indexes_to_add:
+            try:
+                conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS {index_name} 
+                    ON siparisler ({columns})
+                """))
+                print(f"✅ Created index: {index_name}")
+            except Exception as e:
+                print(f"❌ Error creating index {index_name}: {e}")
+        
+        conn.commit()
+        print("\n✅ Migration completed successfully!")
+
+if __name__ == "__main__":
+    print("🔄 Running migration: Add listing indexes to siparisler table\n")
+    add_siparis_indexes()
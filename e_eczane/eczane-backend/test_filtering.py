@@ -37,7 +37,7 @@ def test_filtering():
         print("\n=== WITHOUT LOCATION FILTER ===")
         results_no_filter = repo.find_eczaneler_with_stock([str(ilac.id)])
         print(f"Total pharmacies found: {len(results_no_filter)}")
-        for eczane, stok_info in results_no_filter[:3]:
+        for eczane, stok_info, _ in results_no_filter[:3]:
             print(f"  {eczane.eczane_adi}: il={eczane.il}")
         
         print(f"\n=== WITH LOCATION FILTER (il={hasta.il}) ===")
@@ -48,7 +48,7 @@ def test_filtering():
             hasta_il=hasta.il
         )
         print(f"Filtered pharmacies found: {len(results_with_filter)}")
-        for eczane, stok_info in results_with_filter:
+        for eczane, stok_info, _ in results_with_filter:
             print(f"  {eczane.eczane_adi}: il={eczane.il}, ilce={eczane.ilce}, mahalle={eczane.mahalle}")
         
         # Check if filtering is working
@@ -1,9 +1,16 @@
+import os
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+
+# Testlerde e-posta outbox worker'ı çalışmasın (gerçek SMTP sunucusuna bağlanmaya çalışır)
+os.environ.setdefault("EMAIL_WORKER_ENABLED", "false")
+# bcrypt'in en düşük maliyeti: şifre hash'leri testlerde milisaniyeler sürer
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 from app.main import app
-from app.core.database import get_db, Base
-from .database import TestingSessionLocal, engine
+from app.core.database import get_db, get_async_db, Base
+from .database import TestingSessionLocal, AsyncTestingSessionLocal, engine
 
 # Test veritabanını oluştur ve temizle
 Base.metadata.create_all(bind=engine)
@@ -15,7 +22,12 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture(scope="session")
 def client():
@@ -1,5 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -7,3 +9,7 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async route handler'ları için aynı veritabanı (aiosqlite)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
@@ -0,0 +1,233 @@
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models.base import Base
+from app.models.user import User
+from app.models.eczane import Eczane
+from app.models.hasta import Hasta
+from app.models.siparis import Siparis
+from app.repositories.admin_repository import AdminRepository, clear_dashboard_cache
+from app.utils.enums import UserType, OnayDurumu, SiparisDurum, OdemeDurum
+from app.utils.pagination import decode_cursor
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestSessionLocal = sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db_session():
+    """Create a test database session"""
+    Base.metadata.create_all(bind=engine)
+    clear_dashboard_cache()
+    session = TestSessionLocal()
+    yield session
+    session.close()
+    clear_dashboard_cache()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def siparisler(db_session):
+    """Son 10 güne yayılmış, günde bir sipariş oluştur"""
+    eczane_user = User(email="eczane@test.com", password_hash="hashed", user_type=UserType.ECZANE, is_active=True)
+    hasta_user = User(email="hasta@test.com", password_hash="hashed", user_type=UserType.HASTA, is_active=True)
+    db_session.add_all([eczane_user, hasta_user])
+    db_session.flush()
+
+    eczane = Eczane(
+        user_id=eczane_user.id,
+        sicil_no="TEST123456",
+        eczane_adi="Test Eczane",
+        eczaci_adi="Mehmet",
+        eczaci_soyadi="Yılmaz",
+        eczaci_diploma_no="EC123456",
+        telefon="0312 123 45 67",
+        adres="Test Adres",
+        mahalle="Kızılay",
+        banka_hesap_no="1234567890",
+        iban="TR123456789012345678901234",
+        onay_durumu=OnayDurumu.ONAYLANDI
+    )
+    hasta = Hasta(
+        user_id=hasta_user.id,
+        tc_no="12345678901",
+        ad="Ali",
+        soyad="Demir",
+        telefon="0532 111 22 33",
+        adres="Hasta Adres"
+    )
+    db_session.add_all([eczane, hasta])
+    db_session.flush()
+
+    bugun = datetime.combine(date.today(), datetime.min.time()).replace(hour=12, tzinfo=timezone.utc)
+    result = []
+    for gun in range(10):
+        siparis = Siparis(
+            hasta_id=hasta.id,
+            eczane_id=eczane.id,
+            toplam_tutar=Decimal("10.00"),
+            durum=SiparisDurum.TESLIM_EDILDI if gun % 2 == 0 else SiparisDurum.BEKLEMEDE,
+            odeme_durumu=OdemeDurum.ODENDI,
+            teslimat_adresi="Test Adres",
+            created_at=bugun - timedelta(days=gun)
+        )
+        db_session.add(siparis)
+        result.append(siparis)
+    db_session.commit()
+    return result
+
+
+class TestAdminRepositorySiparisler:
+    """Test paged admin order listing"""
+
+    def test_first_page_and_total(self, db_session, siparisler):
+        """Test page slice is newest first and total counts all rows"""
+        repo = AdminRepository(db_session)
+
+        ids, total, _ = repo.get_all_siparisler(page=1, page_size=4)
+
+        assert total == 10
+        assert ids == [s.id for s in siparisler[:4]]
+
+    def test_last_page(self, db_session, siparisler):
+        """Test last partial page"""
+        repo = AdminRepository(db_session)
+
+        ids, total, _ = repo.get_all_siparisler(page=3, page_size=4)
+
+        assert total == 10
+        assert ids == [s.id for s in siparisler[8:]]
+
+    def test_durum_filter(self, db_session, siparisler):
+        """Test durum filter applies to both page and total"""
+        repo = AdminRepository(db_session)
+
+        ids, total, _ = repo.get_all_siparisler(durum=SiparisDurum.TESLIM_EDILDI, page=1, page_size=50)
+
+        assert total == 5
+        assert ids == [s.id for s in siparisler[::2]]
+
+    def test_date_range_is_inclusive(self, db_session, siparisler):
+        """Test baslangic/bitis dates include whole days"""
+        repo = AdminRepository(db_session)
+        bugun = date.today()
+
+        ids, total, _ = repo.get_all_siparisler(
+            baslangic_tarih=bugun - timedelta(days=3),
+            bitis_tarih=bugun - timedelta(days=1),
+            page=1,
+            page_size=50
+        )
+
+        assert total == 3
+        assert ids == [s.id for s in siparisler[1:4]]
+
+    def test_cursor_pages_match_offset_pages(self, db_session, siparisler):
+        """Test walking with next_cursor returns the same rows as offset pages"""
+        repo = AdminRepository(db_session)
+
+        seen = []
+        cursor_key = None
+        while True:
+            ids, total, next_cursor = repo.get_all_siparisler(page_size=3, cursor_key=cursor_key)
+            seen.extend(ids)
+            if next_cursor is None:
+                break
+            cursor_key = decode_cursor(next_cursor)
+
+        assert total == 10
+        assert seen == [s.id for s in siparisler]
+
+    def test_cursor_handles_equal_created_at(self, db_session, siparisler):
+        """Test rows sharing created_at are neither skipped nor repeated"""
+        ayni_zaman = siparisler[0].created_at
+        for siparis in siparisler:
+            siparis.created_at = ayni_zaman
+        db_session.commit()
+        repo = AdminRepository(db_session)
+
+        seen = []
+        cursor_key = None
+        while True:
+            ids, _, next_cursor = repo.get_all_siparisler(page_size=4, cursor_key=cursor_key)
+            seen.extend(ids)
+            if next_cursor is None:
+                break
+            cursor_key = decode_cursor(next_cursor)
+
+        assert len(seen) == 10
+        assert set(seen) == {s.id for s in siparisler}
+
+
+class TestAdminRepositoryDashboard:
+    """Test aggregated dashboard statistics and their snapshot cache"""
+
+    def _statements(self, fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        return result, statements
+
+    def test_stats_in_two_statements(self, db_session, siparisler):
+        """Test dashboard and status counts match the data and need two SELECTs"""
+        repo = AdminRepository(db_session)
+
+        stats, statements = self._statements(repo.get_dashboard_stats)
+
+        assert len(statements) == 2
+        assert stats == {
+            "toplam_hasta": 1,
+            "toplam_eczane": 1,
+            "aktif_eczane": 1,
+            "bekleyen_eczane": 0,
+            "toplam_siparis": 10,
+            "bugunku_siparis": 1,
+            "toplam_ciro": 50.0,
+            "bugunku_ciro": 10.0
+        }
+        assert repo.get_siparis_stats() == {
+            "beklemede": 5,
+            "onaylandi": 0,
+            "hazirlaniyor": 0,
+            "yolda": 0,
+            "teslim_edildi": 5,
+            "iptal_edildi": 0
+        }
+
+    def test_snapshot_is_cached(self, db_session, siparisler):
+        """Test repeated reads are served from the snapshot until it is cleared"""
+        repo = AdminRepository(db_session)
+        repo.get_dashboard_stats()
+        siparisler[1].durum = SiparisDurum.TESLIM_EDILDI
+        db_session.commit()
+
+        (stats, durumlar), statements = self._statements(
+            lambda: (repo.get_dashboard_stats(), repo.get_siparis_stats())
+        )
+        assert statements == []
+        assert stats["toplam_ciro"] == 50.0
+        assert durumlar["teslim_edildi"] == 5
+
+        clear_dashboard_cache()
+        assert repo.get_dashboard_stats()["toplam_ciro"] == 60.0
+        assert repo.get_siparis_stats()["teslim_edildi"] == 6
+
+    def test_empty_database(self, db_session):
+        """Test aggregates over empty tables return zeros"""
+        stats = AdminRepository(db_session).get_dashboard_stats()
+
+        assert stats["toplam_siparis"] == 0
+        assert stats["toplam_ciro"] == 0.0
+        assert AdminRepository(db_session).get_siparis_stats()["beklemede"] == 0
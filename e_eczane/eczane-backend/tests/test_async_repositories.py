@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.database import async_database_url
+from app.models.base import Base
+from app.models.ilac import Ilac
+from app.repositories import ilac_repository
+from app.repositories.ilac_repository import AsyncIlacRepository, IlacRepository
+from app.schemas.ilac import IlacSearchParams
+from app.utils.enums import IlacKategori
+
+
+@pytest.fixture
+def veritabani(tmp_path):
+    """Aynı SQLite dosyasına bağlı senkron ve async session factory'leri"""
+    url = f"sqlite:///{tmp_path / 'async_test.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    ilac_repository.invalidate_katalog()
+
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    for i, (ad, etken_madde) in enumerate([
+        ("Parol 500mg", "Parasetamol"),
+        ("Minoset 500mg", "Parasetamol"),
+        ("İBUFEN 400mg", "İbuprofen"),
+    ]):
+        db.add(Ilac(
+            ad=ad,
+            barkod=f"869900000000{i}",
+            kategori=IlacKategori.NORMAL,
+            kullanim_talimati="Günde 1 tablet",
+            fiyat=Decimal("10.00"),
+            receteli=False,
+            etken_madde=etken_madde
+        ))
+    db.commit()
+    db.close()
+
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    yield SessionLocal, async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    ilac_repository.invalidate_katalog()
+    engine.dispose()
+
+
+class TestAsyncDatabaseUrl:
+    """Test the sync → async driver mapping"""
+
+    def test_drivers(self):
+        assert async_database_url("postgresql://u:p@localhost/db").drivername == "postgresql+asyncpg"
+        assert async_database_url("postgresql+psycopg2://u:p@localhost/db").drivername == "postgresql+asyncpg"
+        assert async_database_url("sqlite:///./test.db").drivername == "sqlite+aiosqlite"
+        assert async_database_url("sqlite+aiosqlite:///./test.db").drivername == "sqlite+aiosqlite"
+
+
+class TestAsyncIlacRepository:
+    """Test the AsyncSession repository returns what the sync one does"""
+
+    def test_search_matches_sync(self, veritabani):
+        SessionLocal, AsyncSessionLocal = veritabani
+        params = IlacSearchParams(query="parasetamol", page=1, page_size=10)
+
+        db = SessionLocal()
+        beklenen = IlacRepository(db).search_page(params)
+        beklenen = ([ilac.ad for ilac in beklenen[0]], beklenen[1], beklenen[2])
+        db.close()
+
+        async def ara():
+            async with AsyncSessionLocal() as async_db:
+                ilaclar, total, has_next = await AsyncIlacRepository(async_db).search_page(params)
+                return [ilac.ad for ilac in ilaclar], total, has_next
+
+        assert asyncio.run(ara()) == beklenen == (["Minoset 500mg", "Parol 500mg"], 2, False)
+
+    def test_concurrent_requests(self, veritabani):
+        """Test concurrent coroutines each use their own session and share the caches"""
+        _, AsyncSessionLocal = veritabani
+
+        async def istek(sorgu):
+            async with AsyncSessionLocal() as async_db:
+                repo = AsyncIlacRepository(async_db)
+                ilaclar, _, _ = await repo.search_page(IlacSearchParams(query=sorgu, page=1, page_size=10))
+                oneriler = await repo.autocomplete(sorgu)
+                return sorted(ilac.ad for ilac in ilaclar), [oneri.ad for oneri in oneriler]
+
+        async def hepsi():
+            return await asyncio.gather(*(istek(sorgu) for sorgu in ["parol", "ibufen"] * 5))
+
+        sonuclar = asyncio.run(hepsi())
+        assert sonuclar[0] == (["Parol 500mg"], ["Parol 500mg"])
+        assert sonuclar[1] == (["İBUFEN 400mg"], ["İBUFEN 400mg"])
+        assert len(set(map(str, sonuclar))) == 2
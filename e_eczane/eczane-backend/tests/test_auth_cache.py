@@ -0,0 +1,251 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from fastapi import HTTPException
+from app.core import auth_cache, token_denylist
+from app.core.dependencies import get_current_user, get_current_eczane_profile, get_current_hasta_profile
+from app.core.security import create_access_token, get_password_hash
+from app.models.base import Base
+from app.models.user import User
+from app.models.eczane import Eczane
+from app.schemas.admin import KullaniciYonetim
+from app.schemas.eczane import EczaneUpdate
+from app.services.admin_service import AdminService
+from app.services.eczane_service import EczaneService
+from app.utils.cache import TTLCache
+from app.utils.enums import UserType, OnayDurumu
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestSessionLocal = sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db_session():
+    """Create a test database session"""
+    Base.metadata.create_all(bind=engine)
+    auth_cache.clear()
+    token_denylist.clear()
+    session = TestSessionLocal()
+    # İptal listesi önceden yüklensin: sorgu sayıları yalnızca kullanıcı/profil okumalarını ölçer
+    token_denylist.senkronize_et(session)
+    yield session
+    session.close()
+    auth_cache.clear()
+    token_denylist.clear()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def query_counter():
+    """Engine üzerinde çalışan SELECT ifadelerini say"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def eczane_user(db_session):
+    """Onaylı eczane kullanıcısı oluştur"""
+    user = User(
+        email="eczane@test.com",
+        password_hash=get_password_hash("Secret123!"),
+        user_type=UserType.ECZANE,
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.flush()
+    db_session.add(Eczane(
+        user_id=user.id,
+        sicil_no="TEST123456",
+        eczane_adi="Test Eczane",
+        eczaci_adi="Mehmet",
+        eczaci_soyadi="Yılmaz",
+        eczaci_diploma_no="EC123456",
+        telefon="03121234567",
+        adres="Test Adres",
+        mahalle="Kızılay",
+        banka_hesap_no="1234567890",
+        iban="TR123456789012345678901234",
+        onay_durumu=OnayDurumu.ONAYLANDI
+    ))
+    db_session.commit()
+    return user.id
+
+
+def current_user(user_id):
+    """get_current_user'ı yeni bir request session'ı ile çalıştır"""
+    token = create_access_token({"user_id": str(user_id)})
+    db = TestSessionLocal()
+    try:
+        user = get_current_user(token, db)
+        return user, auth_cache.get_profile(db, user), db
+    except Exception:
+        db.close()
+        raise
+
+
+class TestTTLCache:
+    """Test the TTL/LRU cache"""
+
+    def test_expires_after_ttl(self):
+        """Test entries disappear once their TTL has passed"""
+        now = [0.0]
+        cache = TTLCache(ttl_seconds=10, maxsize=10, clock=lambda: now[0])
+        cache.set("a", 1)
+
+        now[0] = 9.9
+        assert cache.get("a") == 1
+        now[0] = 10.0
+        assert cache.get("a") is None
+
+    def test_evicts_least_recently_used(self):
+        """Test the least recently read entry is evicted first"""
+        cache = TTLCache(ttl_seconds=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_disabled_when_ttl_zero(self):
+        """Test a zero TTL turns the cache off"""
+        cache = TTLCache(ttl_seconds=0, maxsize=10)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestAuthCache:
+    """Test cached user/profile lookups in get_current_user"""
+
+    def test_second_request_hits_cache(self, db_session, eczane_user, query_counter):
+        """Test user and profile are read from the DB only on the first request"""
+        user, profile, db = current_user(eczane_user)
+        db.close()
+        assert len(query_counter) == 2
+
+        query_counter.clear()
+        user, profile, db = current_user(eczane_user)
+        assert len(query_counter) == 0
+        assert user.email == "eczane@test.com"
+        assert profile.eczane_adi == "Test Eczane"
+        db.close()
+
+    def test_cached_user_changes_are_saved(self, db_session, eczane_user):
+        """Test a cached user can still be modified and committed"""
+        current_user(eczane_user)[2].close()
+        user, _, db = current_user(eczane_user)
+
+        user.password_hash = "yeni-hash"
+        db.commit()
+        db.close()
+
+        db_session.expire_all()
+        assert db_session.get(User, eczane_user).password_hash == "yeni-hash"
+
+    def test_deactivation_invalidates(self, db_session, eczane_user):
+        """Test an admin deactivation is seen on the next request"""
+        current_user(eczane_user)[2].close()
+
+        AdminService(db_session).update_kullanici_durum(
+            eczane_user,
+            KullaniciYonetim(is_active=False, neden="Test")
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            current_user(eczane_user)
+        assert exc_info.value.status_code == 403
+
+    def test_profile_update_invalidates(self, db_session, eczane_user):
+        """Test a profile update is seen on the next request"""
+        _, profile, db = current_user(eczane_user)
+        eczane_id = profile.id
+        db.close()
+
+        EczaneService(db_session).update_profil(eczane_id, EczaneUpdate(eczane_adi="Yeni Eczane"))
+
+        _, profile, db = current_user(eczane_user)
+        assert profile.eczane_adi == "Yeni Eczane"
+        db.close()
+
+    def test_password_change_invalidates(self, db_session, eczane_user):
+        """Test a password change through any session drops the cached user"""
+        current_user(eczane_user)[2].close()
+
+        user = db_session.get(User, eczane_user)
+        user.password_hash = "degisti"
+        db_session.commit()
+
+        user, _, db = current_user(eczane_user)
+        assert user.password_hash == "degisti"
+        db.close()
+
+    def test_rollback_keeps_cache(self, db_session, eczane_user, query_counter):
+        """Test a rolled back change does not invalidate"""
+        current_user(eczane_user)[2].close()
+
+        user = db_session.get(User, eczane_user)
+        user.is_active = False
+        db_session.flush()
+        db_session.rollback()
+
+        query_counter.clear()
+        user, _, db = current_user(eczane_user)
+        assert user.is_active is True
+        assert len(query_counter) == 0
+        db.close()
+
+
+def current_profile(dependency, user_id):
+    """Profil dependency'sini yeni bir request session'ı ile çalıştır"""
+    token = create_access_token({"user_id": str(user_id)})
+    db = TestSessionLocal()
+    try:
+        return dependency(token, db), db
+    except Exception:
+        db.close()
+        raise
+
+
+class TestProfileDependency:
+    """Test user + profile resolution in the profile dependencies"""
+
+    def test_single_query_then_cache(self, db_session, eczane_user, query_counter):
+        """Test user and profile are loaded with one joined query, then from cache"""
+        eczane, db = current_profile(get_current_eczane_profile, eczane_user)
+        db.close()
+        assert len(query_counter) == 1
+
+        query_counter.clear()
+        eczane, db = current_profile(get_current_eczane_profile, eczane_user)
+        assert eczane.eczane_adi == "Test Eczane"
+        assert eczane.user.email == "eczane@test.com"
+        assert len(query_counter) == 0
+        db.close()
+
+    def test_wrong_role_forbidden(self, db_session, eczane_user):
+        """Test a user of another role gets 403"""
+        with pytest.raises(HTTPException) as exc_info:
+            current_profile(get_current_hasta_profile, eczane_user)
+        assert exc_info.value.status_code == 403
+
+    def test_missing_profile_not_found(self, db_session, eczane_user):
+        """Test a user without a profile row gets 404"""
+        db_session.query(Eczane).delete()
+        db_session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            current_profile(get_current_eczane_profile, eczane_user)
+        assert exc_info.value.status_code == 404
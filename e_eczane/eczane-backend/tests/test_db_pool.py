@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.core.database import OlculenAsyncQueuePool, OlculenQueuePool, engine_ayarlari, pool_metrics
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool_test.db'}"
+
+
+class TestPoolMetrics:
+    """Test the measuring connection pools"""
+
+    def test_counts_checkouts_and_overflow(self, db_url):
+        engine = create_engine(db_url, poolclass=OlculenQueuePool, pool_size=1, max_overflow=2)
+        try:
+            with engine.connect() as c1, engine.connect() as c2:
+                c1.execute(text("SELECT 1"))
+                c2.execute(text("SELECT 1"))
+                metrik = engine.pool.metrics()
+                assert metrik["checked_out"] == 2
+                assert metrik["overflow"] == 1
+
+            metrik = engine.pool.metrics()
+            assert metrik["checked_out"] == 0
+            assert metrik["peak_checked_out"] == 2
+            assert metrik["checkouts"] == 2
+            assert metrik["wait_max_ms"] >= metrik["wait_avg_ms"] > 0
+            assert metrik["timeouts"] == 0
+        finally:
+            engine.dispose()
+
+    def test_saturated_pool_waits_then_times_out(self, db_url):
+        engine = create_engine(db_url, poolclass=OlculenQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+        try:
+            with engine.connect():
+                with pytest.raises(PoolTimeoutError):
+                    engine.connect()
+
+                # Bağlantı bırakılınca bekleyen istek alır
+                serbest = threading.Event()
+                sonuc = []
+
+                def bekle():
+                    serbest.set()
+                    with engine.connect() as conn:
+                        sonuc.append(conn.execute(text("SELECT 1")).scalar())
+
+                engine.pool._timeout = 5
+                t = threading.Thread(target=bekle)
+                t.start()
+                serbest.wait()
+            t.join()
+
+            metrik = engine.pool.metrics()
+            assert sonuc == [1]
+            assert metrik["timeouts"] == 1
+            assert metrik["checkouts"] == 2
+            assert metrik["peak_checked_out"] == 1
+        finally:
+            engine.dispose()
+
+    def test_async_pool(self, tmp_path):
+        async def calistir():
+            engine = create_async_engine(
+                f"sqlite+aiosqlite:///{tmp_path / 'pool_async.db'}",
+                poolclass=OlculenAsyncQueuePool,
+                pool_size=2,
+                max_overflow=0
+            )
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            metrik = engine.sync_engine.pool.metrics()
+            await engine.dispose()
+            return metrik
+
+        metrik = asyncio.run(calistir())
+        assert metrik["checkouts"] == 1
+        assert metrik["pool_size"] == 2
+
+    def test_app_pools_publish_metrics(self):
+        metrikler = pool_metrics()
+        assert set(metrikler) == {"sync", "async"}
+        assert metrikler["sync"]["pool_size"] == settings.DB_POOL_SIZE
+
+
+class TestEngineAyarlari:
+    """Test engine arguments are built from Settings"""
+
+    def test_pool_settings(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+        monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 4)
+        monkeypatch.setattr(settings, "DB_POOL_RECYCLE_SECONDS", 60)
+        monkeypatch.setattr(settings, "DB_POOL_PRE_PING", False)
+        monkeypatch.setattr(settings, "DB_ECHO", True)
+
+        ayarlar = engine_ayarlari(make_url("postgresql://u:p@localhost/db"))
+        assert ayarlar["poolclass"] is OlculenQueuePool
+        assert (ayarlar["pool_size"], ayarlar["max_overflow"], ayarlar["pool_recycle"]) == (3, 4, 60)
+        assert ayarlar["pool_pre_ping"] is False
+        assert ayarlar["echo"] is True
+        assert "connect_args" not in ayarlar
+
+        async_ayarlar = engine_ayarlari(make_url("postgresql+asyncpg://u:p@localhost/db"), async_engine=True)
+        assert async_ayarlar["poolclass"] is OlculenAsyncQueuePool
+
+    def test_statement_timeout(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+        assert engine_ayarlari(make_url("postgresql://u:p@localhost/db"))["connect_args"] == {
+            "options": "-c statement_timeout=5000"
+        }
+        assert engine_ayarlari(make_url("postgresql+asyncpg://u:p@localhost/db"), async_engine=True)["connect_args"] == {
+            "server_settings": {"statement_timeout": "5000"}
+        }
+        # SQLite'ta karşılığı yok
+        assert "connect_args" not in engine_ayarlari(make_url("sqlite:///./x.db"))
@@ -2,8 +2,9 @@ import pytest
 from sqlalchemy.orm import Session
 from decimal import Decimal
 import time
+from uuid import uuid4
 from app.core.database import SessionLocal
-from app.repositories.eczane_repository import EczaneRepository
+from app.repositories.eczane_repository import EczaneRepository, _sepeti_karsila
 from app.models.eczane import Eczane
 from app.models.user import User
 from app.models.ilac import Ilac
@@ -211,11 +212,12 @@ class TestEczaneRepository:
         assert len(results) >= 1
         
         # Check structure
-        eczane_found, stok_info = results[0]
+        eczane_found, stok_info, tum_urunler_mevcut = results[0]
         assert eczane_found.id == eczane.id
         assert str(ilac.id) in stok_info
         assert stok_info[str(ilac.id)]["miktar"] == 10
         assert stok_info[str(ilac.id)]["stok_durumu"] == "yeterli"
+        assert tum_urunler_mevcut is True
     
     def test_find_eczaneler_with_stock_same_mahalle_first(
         self, eczane_repository, sample_ilac_data, db_session
@@ -294,8 +296,17 @@ class TestEczaneRepository:
         assert len(results) >= 2
         
         # First result should be from Çankaya
-        first_eczane, _ = results[0]
+        first_eczane, _, _ = results[0]
         assert first_eczane.mahalle == "Çankaya"
+        
+        # Limit applies after ranking
+        limited = eczane_repository.find_eczaneler_with_stock(
+            [str(ilac.id)],
+            hasta_mahalle="Çankaya",
+            limit=1
+        )
+        assert len(limited) == 1
+        assert limited[0][0].id == eczane1.id
     
     def test_find_eczaneler_zero_stock_not_included(
         self, eczane_repository, sample_eczane_data, sample_ilac_data, db_session
@@ -317,7 +328,7 @@ class TestEczaneRepository:
         results = eczane_repository.find_eczaneler_with_stock([str(ilac.id)])
         
         # Should not include pharmacy with zero stock
-        eczane_ids = [e.id for e, _ in results]
+        eczane_ids = [e.id for e, _, _ in results]
         assert eczane.id not in eczane_ids
     
     def test_check_stock_availability_sufficient(
@@ -443,6 +454,94 @@ class TestEczaneRepository:
         assert str(ilac2.id) in eksik
         assert str(ilac1.id) not in eksik
 
+    
+    def test_check_stock_availability_bulk(
+        self, eczane_repository, sample_eczane_data, sample_ilac_data, db_session
+    ):
+        """Test bulk stock check returns a result per pharmacy"""
+        eczane, user = sample_eczane_data
+        ilac = sample_ilac_data
+        
+        db_session.add(Stok(eczane_id=eczane.id, ilac_id=ilac.id, miktar=4))
+        db_session.commit()
+        
+        bos_eczane_id = uuid4()
+        result = eczane_repository.check_stock_availability_bulk(
+            [eczane.id, bos_eczane_id],
+            {str(ilac.id): 3}
+        )
+        
+        assert result[eczane.id] == (True, {})
+        is_sufficient, eksik = result[bos_eczane_id]
+        assert is_sufficient == False
+        assert eksik[str(ilac.id)]["mevcut"] == 0
+
+    
+    def test_find_eczaneler_for_sepet_with_muadil(
+        self, eczane_repository, sample_eczane_data, sample_ilac_data, db_session
+    ):
+        """Test a cart is filled with an equivalent when the original is out of stock"""
+        eczane, user = sample_eczane_data
+        ilac = sample_ilac_data
+        timestamp = str(int(time.time() * 1000))[-8:]
+        
+        muadil = Ilac(
+            barkod=f"TESTECZM{timestamp}",
+            ad="Test Muadil",
+            kategori=IlacKategori.NORMAL,
+            fiyat=Decimal("40.00"),
+            kullanim_talimati="Test talimat",
+            receteli=False,
+            aktif=True
+        )
+        db_session.add(muadil)
+        db_session.flush()
+        db_session.add_all([
+            Stok(eczane_id=eczane.id, ilac_id=ilac.id, miktar=0),
+            Stok(eczane_id=eczane.id, ilac_id=muadil.id, miktar=5)
+        ])
+        db_session.commit()
+        
+        secenekler = {ilac.id: [ilac.id, muadil.id]}
+        results = eczane_repository.find_eczaneler_for_sepet({ilac.id: 3}, secenekler)
+        
+        sonuc = {e.id: karsilama for e, karsilama, _ in results}
+        assert sonuc[eczane.id] == {ilac.id: (muadil.id, 5)}
+        
+        # Aynı muadil iki kalemi birlikte karşılayamaz
+        sepet = {ilac.id: 3, muadil.id: 3}
+        secenekler[muadil.id] = [muadil.id, ilac.id]
+        results = eczane_repository.find_eczaneler_for_sepet(sepet, secenekler)
+        assert eczane.id not in [e.id for e, _, _ in results]
+
+
+
+class TestSepetiKarsila:
+    """Test the per-pharmacy assignment of cart items to drugs or equivalents"""
+    
+    def test_backtracks_past_first_choice(self):
+        """Test an assignment is found when the first-fit choice blocks a later item"""
+        a, b, c = uuid4(), uuid4(), uuid4()
+        sepet = {a: 1, c: 2}
+        secenekler = {a: [a, b], c: [c, a]}
+        
+        assert _sepeti_karsila(sepet, secenekler, {a: 2, b: 1}) == {a: b, c: a}
+    
+    def test_keeps_preference_order(self):
+        """Test the preferred option is used when it leaves the rest satisfiable"""
+        a, b, c = uuid4(), uuid4(), uuid4()
+        sepet = {a: 1, c: 1}
+        secenekler = {a: [a, b], c: [c, a]}
+        
+        assert _sepeti_karsila(sepet, secenekler, {a: 1, b: 1, c: 1}) == {a: a, c: c}
+    
+    def test_item_not_split_across_equivalents(self):
+        """Test a quantity is never split between a drug and its equivalent"""
+        a, b = uuid4(), uuid4()
+        
+        assert _sepeti_karsila({a: 3}, {a: [a, b]}, {a: 2, b: 1}) is None
+        assert _sepeti_karsila({a: 3}, {a: [a, b]}, {a: 2, b: 3}) == {a: b}
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,267 @@
+import asyncio
+import aiosmtplib
+import pytest
+from datetime import datetime, timezone
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.models.base import Base
+from app.models.email_outbox import EmailOutbox
+from app.scripts.dev_smtp_server import DevSMTPServer
+from app.services.email_worker import EmailWorker
+from app.utils.email import (
+    SIPARIS_DURUM_SABLONLARI,
+    build_order_status_email,
+    build_password_reset_email,
+    queue_order_status_email,
+    queue_password_reset_email,
+    sablonlar,
+)
+from app.utils.enums import EmailDurum
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Outbox için ayrı SQLite veritabanı"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox_test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def smtp_ayarlari(monkeypatch):
+    """Worker'ı yerel dev SMTP sunucusuna yönlendir (port testte atanır)"""
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_USERNAME", "kullanici")
+    monkeypatch.setattr(settings, "MAIL_PASSWORD", "sifre")
+    return monkeypatch
+
+
+def kuyruga_ekle(session_factory, adet):
+    db = session_factory()
+    for i in range(adet):
+        queue_order_status_email(
+            db,
+            to_email=f"hasta{i}@example.com",
+            order_id=f"{i:08d}-0000-0000-0000-000000000000",
+            status="ONAYLANDI",
+            patient_name=f"Hasta {i}",
+            eczane_adi="Test Eczanesi"
+        )
+    db.commit()
+    db.close()
+
+
+def kayitlar(session_factory):
+    db = session_factory()
+    try:
+        return {k.alici: k for k in db.query(EmailOutbox).all()}
+    finally:
+        db.close()
+
+
+async def sunucu_ile(smtp_ayarlari, islem):
+    sunucu = DevSMTPServer(port=0)
+    await sunucu.baslat()
+    smtp_ayarlari.setattr(settings, "MAIL_PORT", sunucu.port)
+    try:
+        await islem(sunucu)
+    finally:
+        await sunucu.durdur()
+    return sunucu
+
+
+class TestEmailOutbox:
+    """Test the outbox worker against the local dev SMTP server"""
+
+    def test_batches_reuse_one_connection(self, session_factory, smtp_ayarlari):
+        kuyruga_ekle(session_factory, 5)
+        worker = EmailWorker(session_factory=session_factory, batch_size=3)
+
+        async def gonder(sunucu):
+            assert await worker.gonder_toplu() == 3
+            assert await worker.gonder_toplu() == 2
+            assert await worker.gonder_toplu() == 0
+            await worker.kapat()
+
+        sunucu = asyncio.run(sunucu_ile(smtp_ayarlari, gonder))
+
+        assert len(sunucu.mesajlar) == 5
+        assert sunucu.baglanti_sayisi == 1
+        assert all(k.durum == EmailDurum.GONDERILDI for k in kayitlar(session_factory).values())
+
+        gonderen, alicilar, icerik = sunucu.mesajlar[0]
+        assert gonderen == settings.MAIL_FROM
+        assert alicilar == ["hasta0@example.com"]
+        konu = str(make_header(decode_header(message_from_bytes(icerik)["Subject"])))
+        assert konu == "E-Eczane - Siparişiniz Onaylandı! ✅"
+
+    def test_password_reset_is_queued_not_sent(self, session_factory):
+        db = session_factory()
+        kayit = queue_password_reset_email(db, "unuttum@example.com", "token123")
+        db.close()
+
+        assert kayit.durum == EmailDurum.BEKLEMEDE
+        assert kayit.konu == "E-Eczane - Şifre Sıfırlama"
+        assert "/reset-password/token123" in kayit.metin
+
+    def test_queue_is_committed_by_caller(self, session_factory):
+        """Test a rolled-back business change leaves no email behind"""
+        db = session_factory()
+        queue_password_reset_email(db, "unuttum@example.com", "token123")
+        db.rollback()
+        db.close()
+
+        assert kayitlar(session_factory) == {}
+
+    def test_transient_and_permanent_rejections(self, session_factory, smtp_ayarlari):
+        kuyruga_ekle(session_factory, 3)
+        worker = EmailWorker(session_factory=session_factory)
+
+        async def gonder(sunucu):
+            sunucu.reddedilecekler["hasta1@example.com"] = (451, "4.3.0 Try again later")
+            sunucu.reddedilecekler["hasta2@example.com"] = (550, "5.1.1 No such user")
+            assert await worker.gonder_toplu() == 3
+            # Yeniden deneme zamanı gelmeden kayıt tekrar alınmaz
+            assert await worker.gonder_toplu() == 0
+            await worker.kapat()
+
+        sunucu = asyncio.run(sunucu_ile(smtp_ayarlari, gonder))
+        sonuc = kayitlar(session_factory)
+
+        assert len(sunucu.mesajlar) == 1
+        assert sonuc["hasta0@example.com"].durum == EmailDurum.GONDERILDI
+
+        gecici = sonuc["hasta1@example.com"]
+        assert gecici.durum == EmailDurum.BEKLEMEDE
+        assert gecici.deneme_sayisi == 1
+        assert "451" in gecici.son_hata
+        assert gecici.sonraki_deneme.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+
+        kalici = sonuc["hasta2@example.com"]
+        assert kalici.durum == EmailDurum.BASARISIZ
+        assert kalici.deneme_sayisi == 1
+
+    def test_connection_failure_retries_whole_batch(self, session_factory, smtp_ayarlari):
+        kuyruga_ekle(session_factory, 2)
+        # Kapalı port: bağlantı kurulamaz
+        smtp_ayarlari.setattr(settings, "MAIL_PORT", 1)
+        smtp_ayarlari.setattr(settings, "EMAIL_SMTP_TIMEOUT_SECONDS", 2)
+        worker = EmailWorker(session_factory=session_factory)
+
+        assert asyncio.run(worker.gonder_toplu()) == 2
+        for kayit in kayitlar(session_factory).values():
+            assert kayit.durum == EmailDurum.BEKLEMEDE
+            assert kayit.deneme_sayisi == 1
+
+    def test_reconnect_closes_dropped_connection(self, session_factory, smtp_ayarlari):
+        """Test the old connection is closed before retrying on a new one"""
+        kuyruga_ekle(session_factory, 2)
+        worker = EmailWorker(session_factory=session_factory, batch_size=1)
+
+        async def gonder(sunucu):
+            assert await worker.gonder_toplu() == 1
+            eski = worker._smtp
+
+            async def koptu(*args, **kwargs):
+                raise aiosmtplib.SMTPServerDisconnected("koptu")
+
+            eski.send_message = koptu
+            assert await worker.gonder_toplu() == 1
+            assert worker._smtp is not eski
+            assert not eski.is_connected
+            await worker.kapat()
+
+        sunucu = asyncio.run(sunucu_ile(smtp_ayarlari, gonder))
+        assert len(sunucu.mesajlar) == 2
+        assert sunucu.baglanti_sayisi == 2
+
+    def test_background_loop(self, session_factory, smtp_ayarlari):
+        """Test the worker drains the outbox in the background and closes the connection on stop"""
+        kuyruga_ekle(session_factory, 4)
+        worker = EmailWorker(session_factory=session_factory, batch_size=2, poll_interval=0.05)
+
+        async def calistir(sunucu):
+            worker.baslat()
+            for _ in range(100):
+                if len(sunucu.mesajlar) == 4:
+                    break
+                await asyncio.sleep(0.05)
+            await worker.durdur()
+            assert worker._smtp is None
+
+        sunucu = asyncio.run(sunucu_ile(smtp_ayarlari, calistir))
+        assert len(sunucu.mesajlar) == 4
+        assert sunucu.baglanti_sayisi == 1
+
+    def test_backoff(self, monkeypatch):
+        monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_SECONDS", 30)
+        monkeypatch.setattr(settings, "EMAIL_RETRY_MAX_SECONDS", 100)
+        monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 4)
+        simdi = datetime.now(timezone.utc)
+
+        def bekleme(deneme):
+            return round((EmailWorker.sonraki_deneme(deneme) - simdi).total_seconds())
+
+        assert [bekleme(1), bekleme(2), bekleme(3)] == [30, 60, 100]
+        assert EmailWorker.sonraki_deneme(4) is None
+        assert EmailWorker.sonraki_deneme(1, kalici=True) is None
+
+
+class TestEmailSablonlari:
+    """Test the precompiled email templates render like a full Jinja render"""
+
+    @pytest.mark.parametrize("durum", sorted(SIPARIS_DURUM_SABLONLARI) + ["BILINMEYEN"])
+    @pytest.mark.parametrize("eczane_adi", [None, "Merkez Eczanesi"])
+    def test_matches_full_render(self, durum, eczane_adi):
+        cancel_reason = "Stokta kalmadı" if durum == "IPTAL_EDILDI" else None
+        konu, metin, html = build_order_status_email(
+            order_id="abcdef12-0000-0000-0000-000000000000",
+            status=durum,
+            patient_name="Ayşe Yılmaz",
+            cancel_reason=cancel_reason,
+            eczane_adi=eczane_adi
+        )
+
+        baglam = {
+            "durum": durum,
+            "durum_sablonu": f"siparis_durumlari/{durum.lower() if durum in SIPARIS_DURUM_SABLONLARI else '_varsayilan'}.html",
+            "frontend_url": settings.FRONTEND_URL,
+            "patient_name": "Ayşe Yılmaz",
+            "siparis_kodu": "ABCDEF12",
+            "eczane_adi": eczane_adi,
+            "cancel_reason": cancel_reason
+        }
+        assert metin == sablonlar.get_template("siparis_durumu.txt").render(baglam)
+        assert html == sablonlar.get_template("siparis_durumu.html").render(baglam)
+        assert konu.startswith("E-Eczane - ")
+        assert "#ABCDEF12" in metin
+        if durum == "BILINMEYEN":
+            assert konu == "E-Eczane - Sipariş Durumu: BILINMEYEN"
+
+    def test_html_fields_are_escaped(self):
+        _, metin, html = build_order_status_email(
+            order_id="abcdef12",
+            status="IPTAL_EDILDI",
+            patient_name="<script>x</script>",
+            cancel_reason="Stok & fiyat",
+            eczane_adi="A&B Eczanesi"
+        )
+        assert "<script>" not in html
+        assert "&lt;script&gt;x&lt;/script&gt;" in html
+        assert "Stok &amp; fiyat" in html
+        assert "A&amp;B Eczanesi" in html
+        # Düz metin kaçışsız kalır
+        assert "Merhaba <script>x</script>," in metin
+        assert "İptal Nedeni: Stok & fiyat" in metin
+
+    def test_password_reset(self):
+        konu, metin, html = build_password_reset_email("tok-123")
+        link = f"{settings.FRONTEND_URL}/reset-password/tok-123"
+        assert konu == "E-Eczane - Şifre Sıfırlama"
+        assert link in metin
+        assert html.count(link) == 3
@@ -0,0 +1,192 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models.base import Base
+from app.models.user import User
+from app.models.eczane import Eczane
+from app.models.ilac import Ilac
+from app.models.stok import Stok
+from app.repositories.eczane_repository import EczaneRepository
+from app.utils.enums import UserType, OnayDurumu, IlacKategori
+from app.utils.geo import (
+    geohash_encode, geohash_cells_around, covered_radius_km, haversine_km
+)
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestSessionLocal = sessionmaker(bind=engine)
+
+# Kızılay, Ankara
+HASTA_KONUMU = (39.9208, 32.8541)
+
+
+@pytest.fixture
+def db_session():
+    """Create a test database session"""
+    Base.metadata.create_all(bind=engine)
+    session = TestSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def query_counter():
+    """Engine üzerinde çalışan SQL ifadelerini say"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def ilac(db_session):
+    """Create a test drug"""
+    ilac = Ilac(
+        ad="Test İlaç",
+        barkod="8699000000000",
+        kategori=IlacKategori.NORMAL,
+        kullanim_talimati="Günde 1 kez 1 tablet",
+        receteli=False,
+        fiyat=Decimal("10.00"),
+        aktif=True
+    )
+    db_session.add(ilac)
+    db_session.commit()
+    return ilac
+
+
+def create_eczane(db_session, ilac, ad, enlem=None, boylam=None, miktar=5):
+    """Stoklu, onaylı bir eczane oluştur"""
+    user = User(email=f"{ad}@test.com", password_hash="hashed", user_type=UserType.ECZANE, is_active=True)
+    db_session.add(user)
+    db_session.flush()
+
+    eczane = Eczane(
+        user_id=user.id,
+        sicil_no=f"TEST{ad}",
+        eczane_adi=ad,
+        eczaci_adi="Mehmet",
+        eczaci_soyadi="Yılmaz",
+        eczaci_diploma_no="EC123456",
+        telefon="0312 123 45 67",
+        adres="Test Adres",
+        mahalle="Kızılay",
+        il="Ankara",
+        banka_hesap_no="1234567890",
+        iban="TR123456789012345678901234",
+        onay_durumu=OnayDurumu.ONAYLANDI,
+        enlem=enlem,
+        boylam=boylam
+    )
+    db_session.add(eczane)
+    db_session.flush()
+    db_session.add(Stok(eczane_id=eczane.id, ilac_id=ilac.id, miktar=miktar))
+    db_session.commit()
+    return eczane
+
+
+class TestGeohash:
+    """Test geohash helpers"""
+
+    def test_encode_known_value(self):
+        """Test encoding matches the reference geohash"""
+        assert geohash_encode(42.605, -5.603, 5) == "ezs42"
+
+    def test_cells_around_include_center_and_neighbors(self):
+        """Test the 3x3 block is centered on the point's own cell"""
+        hucreler = geohash_cells_around(*HASTA_KONUMU, 6)
+
+        assert len(hucreler) == 9
+        assert hucreler[0] == geohash_encode(*HASTA_KONUMU, 6)
+
+    def test_haversine(self):
+        """Test distance between Ankara and Istanbul"""
+        mesafe = haversine_km(39.9208, 32.8541, 41.0082, 28.9784)
+
+        assert 340 < mesafe < 360
+
+    def test_covered_radius_shrinks_with_precision(self):
+        """Test finer cells cover a smaller guaranteed radius"""
+        assert covered_radius_km(39.9, 7) < covered_radius_km(39.9, 5)
+
+
+class TestNearestEczaneler:
+    """Test k-nearest pharmacy search"""
+
+    def test_geohash_set_from_coordinates(self, db_session, ilac):
+        """Test geohash column follows coordinate changes"""
+        eczane = create_eczane(db_session, ilac, "yakin", *HASTA_KONUMU)
+        assert eczane.geohash == geohash_encode(*HASTA_KONUMU)
+
+        eczane.enlem = None
+        db_session.commit()
+        assert eczane.geohash is None
+
+    def test_sorted_by_distance(self, db_session, ilac):
+        """Test results are the k nearest in distance order"""
+        uzak = create_eczane(db_session, ilac, "uzak", 39.97, 32.80)
+        yakin = create_eczane(db_session, ilac, "yakin", 39.921, 32.855)
+        orta = create_eczane(db_session, ilac, "orta", 39.93, 32.86)
+        create_eczane(db_session, ilac, "istanbul", 41.0082, 28.9784)
+        repo = EczaneRepository(db_session)
+
+        results = repo.find_nearest_eczaneler_with_stock([str(ilac.id)], *HASTA_KONUMU, k=3)
+
+        assert [r[0].id for r in results] == [yakin.id, orta.id, uzak.id]
+        assert all(r[2] for r in results)
+        assert results[0][3] < results[1][3] < results[2][3]
+
+    def test_matches_brute_force(self, db_session, ilac):
+        """Test grid search returns the same pharmacies as a full scan"""
+        koordinatlar = [(39.80 + i * 0.013, 32.70 + (i * 7 % 23) * 0.011) for i in range(25)]
+        for i, (enlem, boylam) in enumerate(koordinatlar):
+            create_eczane(db_session, ilac, f"e{i}", enlem, boylam)
+        repo = EczaneRepository(db_session)
+
+        results = repo.find_nearest_eczaneler_with_stock([str(ilac.id)], *HASTA_KONUMU, k=5)
+
+        beklenen = sorted(haversine_km(*HASTA_KONUMU, enlem, boylam) for enlem, boylam in koordinatlar)[:5]
+        assert [round(r[3], 6) for r in results] == [round(m, 6) for m in beklenen]
+
+    def test_out_of_stock_excluded(self, db_session, ilac):
+        """Test pharmacies without stock are skipped"""
+        create_eczane(db_session, ilac, "bos", *HASTA_KONUMU, miktar=0)
+        dolu = create_eczane(db_session, ilac, "dolu", 39.95, 32.85)
+        repo = EczaneRepository(db_session)
+
+        results = repo.find_nearest_eczaneler_with_stock([str(ilac.id)], *HASTA_KONUMU, k=5)
+
+        assert [r[0].id for r in results] == [dolu.id]
+
+    def test_pharmacies_without_coordinates_appended(self, db_session, ilac):
+        """Test pharmacies lacking coordinates come after located ones"""
+        koordinatsiz = create_eczane(db_session, ilac, "koordinatsiz")
+        yakin = create_eczane(db_session, ilac, "yakin", 39.921, 32.855)
+        repo = EczaneRepository(db_session)
+
+        results = repo.find_nearest_eczaneler_with_stock([str(ilac.id)], *HASTA_KONUMU, k=5)
+
+        assert [r[0].id for r in results] == [yakin.id, koordinatsiz.id]
+        assert results[1][3] is None
+
+    def test_dense_area_reads_few_rows(self, db_session, ilac, query_counter):
+        """Test a dense neighbourhood is answered from the finest cells"""
+        for i in range(10):
+            create_eczane(db_session, ilac, f"e{i}", 39.9208 + i * 0.0002, 32.8541)
+        repo = EczaneRepository(db_session)
+        ilac_id = str(ilac.id)
+
+        query_counter.clear()
+        results = repo.find_nearest_eczaneler_with_stock([ilac_id], *HASTA_KONUMU, k=3)
+
+        assert len(results) == 3
+        # İlk hücre bloğu yeterli: bir aday sorgusu + bir stok sorgusu
+        assert len(query_counter) == 2
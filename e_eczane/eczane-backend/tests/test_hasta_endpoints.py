@@ -2,10 +2,13 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db
 from app.core.security import create_access_token
-from app.models import User, Hasta, Ilac, Recete, ReceteIlac
+from app.models import User, Hasta, Ilac, MuadilIlac, Recete, ReceteIlac, Stok
+from app.repositories.ilac_repository import invalidate_katalog, invalidate_muadil_grafi
 from app.utils.enums import UserType
 from decimal import Decimal
 import datetime
@@ -14,6 +17,9 @@ import datetime
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_hasta.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async handler'lar aynı dosyayı aiosqlite ile okur (TestClient her seferinde yeni event loop açar)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_hasta.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
 
 @pytest.fixture(scope="function")
 def db():
@@ -31,7 +37,11 @@ def client(db):
     """Create test client"""
     def override_get_db():
         yield db
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as async_db:
+            yield async_db
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -152,6 +162,31 @@ class TestHastaEndpoints:
         response = client.get(f"/api/hasta/ilac/{non_existent_id}", headers={"Authorization": f"Bearer {hasta_token}"})
         assert response.status_code == 404
 
+    def test_stoktaki_muadiller(self, client, hasta_token, test_data, db):
+        import uuid
+        ilac1, ilac2 = test_data["ilac1"], test_data["ilac2"]
+        eczane_id = uuid.uuid4()
+        db.add_all([
+            MuadilIlac(ilac_id=ilac1.id, muadil_ilac_id=ilac2.id),
+            Stok(eczane_id=eczane_id, ilac_id=ilac2.id, miktar=5, min_stok=10),
+        ])
+        db.commit()
+        invalidate_katalog()
+        invalidate_muadil_grafi()
+        headers = {"Authorization": f"Bearer {hasta_token}"}
+
+        response = client.get(f"/api/hasta/ilac/{ilac1.id}/muadiller/stokta?eczane_id={eczane_id}", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [(m["ad"], m["stok_miktari"], m["stok_durumu"]) for m in data] == [("Aspirin", 5, "azaliyor")]
+
+        # Başka eczanede stok yok
+        response = client.get(f"/api/hasta/ilac/{ilac1.id}/muadiller/stokta?eczane_id={uuid.uuid4()}", headers=headers)
+        assert response.json() == []
+        response = client.get(f"/api/hasta/ilac/{uuid.uuid4()}/muadiller/stokta?eczane_id={eczane_id}", headers=headers)
+        assert response.status_code == 404
+        invalidate_muadil_grafi()
+
     def test_list_my_receteler(self, client, hasta_token, test_data):
         response = client.get("/api/hasta/recetelerim", headers={"Authorization": f"Bearer {hasta_token}"})
         assert response.status_code == 200
@@ -0,0 +1,521 @@
+import sys
+import threading
+import uuid
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models.base import Base
+from app.models.ilac import Ilac, MuadilIlac
+from app.models.stok import Stok
+from app.repositories import ilac_repository
+from app.repositories.ilac_repository import IlacRepository
+from app.schemas.ilac import IlacCreate, IlacSearchParams, IlacUpdate
+from app.utils.enums import IlacKategori
+from app.utils.equivalence import EquivalenceClasses
+from app.utils.search import PrefixIndex, TrigramIndex, normalize_search_text
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestSessionLocal = sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db_session():
+    """Create a test database session"""
+    Base.metadata.create_all(bind=engine)
+    ilac_repository.invalidate_katalog()
+    ilac_repository.invalidate_muadil_grafi()
+    session = TestSessionLocal()
+    yield session
+    session.close()
+    ilac_repository.invalidate_katalog()
+    ilac_repository.invalidate_muadil_grafi()
+    Base.metadata.drop_all(bind=engine)
+
+
+def ilac_ekle(db, ad, barkod, etken_madde=None, aktif=True):
+    ilac = Ilac(
+        ad=ad,
+        barkod=barkod,
+        kategori=IlacKategori.NORMAL,
+        kullanim_talimati="Günde 1 tablet",
+        fiyat=Decimal("10.00"),
+        receteli=False,
+        etken_madde=etken_madde,
+        aktif=aktif
+    )
+    db.add(ilac)
+    db.commit()
+    return ilac
+
+
+@pytest.fixture
+def katalog(db_session):
+    """Küçük bir ilaç kataloğu"""
+    ilac_ekle(db_session, "Parol 500mg", "8699000000001", "Parasetamol")
+    ilac_ekle(db_session, "Ağrı Kesici Jel", "8699000000002", "Diklofenak")
+    ilac_ekle(db_session, "İBUFEN 400mg", "8699000000003", "İbuprofen")
+    ilac_ekle(db_session, "Eski İlaç", "8699000000004", "Parasetamol", aktif=False)
+
+
+def ara(db, query):
+    ilaclar, total = IlacRepository(db).search(IlacSearchParams(query=query, page=1, page_size=20))
+    return sorted(ilac.ad for ilac in ilaclar), total
+
+
+class TestNormalize:
+    """Test Turkish-aware search normalization"""
+
+    def test_turkish_case_and_diacritics(self):
+        """Test dotted/dotless i and Turkish letters fold to ASCII lowercase"""
+        assert normalize_search_text("AĞRI") == "agri"
+        assert normalize_search_text("İBUFEN") == "ibufen"
+        assert normalize_search_text("Işık", "Çözelti") == "isik cozelti"
+
+    def test_skips_empty_parts(self):
+        """Test None parts and extra whitespace are dropped"""
+        assert normalize_search_text("  Parol ", None, "500mg") == "parol 500mg"
+        assert normalize_search_text(None) == ""
+
+
+class TestTrigramIndex:
+    """Test the in-memory trigram index"""
+
+    def test_substring_match(self):
+        """Test matches are verified substrings, not just shared trigrams"""
+        index = TrigramIndex([(1, "parol 500mg"), (2, "paroksetin"), (3, "aspirin")])
+
+        assert index.search("aro") == {1, 2}
+        assert index.search("parol") == {1}
+        assert index.search("rolp") == set()
+
+    def test_short_term(self):
+        """Test terms shorter than a trigram still match"""
+        index = TrigramIndex([(1, "parol"), (2, "aspirin")])
+
+        assert index.search("pa") == {1}
+
+    def test_update_matches_rebuild(self):
+        """Test updating and removing one document gives the same results as a rebuild"""
+        index = TrigramIndex([(1, "parol 500mg"), (2, "paroksetin"), (3, "aspirin")])
+        index.update(1, "coraspin 100mg")
+        index.update(2, None)
+        index.update(4, "parol 500mg")
+        yeniden = TrigramIndex([(1, "coraspin 100mg"), (3, "aspirin"), (4, "parol 500mg")])
+
+        for term in ("aro", "parol", "aspirin", "100", "pa", "oks"):
+            assert index.search(term) == yeniden.search(term)
+        assert len(index) == 3
+
+
+class TestPrefixIndex:
+    """Test the in-memory prefix index"""
+
+    def test_matches_word_starts(self):
+        """Test any word of any text can be the start of a match"""
+        index = PrefixIndex([(1, ["parol 500mg", "parasetamol"]), (2, ["aspirin 500mg"])])
+
+        assert index.search("par", 10) == [1]
+        assert index.search("500", 10) == [1, 2]
+        assert index.search("rol", 10) == []
+
+    def test_limit_and_unique(self):
+        """Test each key is returned once and the limit is respected"""
+        index = PrefixIndex([(1, ["ab", "abc"]), (2, ["abd"]), (3, ["abe"])])
+
+        assert index.search("ab", 2) == [1, 2]
+        assert index.search("ab", 10) == [1, 2, 3]
+
+    def test_update_matches_rebuild(self):
+        """Test updating and removing one document gives the same results as a rebuild"""
+        index = PrefixIndex([(1, ["parol 500mg"]), (2, ["aspirin 500mg"]), (3, ["ab"])])
+        eski_diziler = index._entries
+        index.update(1, ["coraspin 100mg", "asetilsalisilik asit"])
+        index.update(3, None)
+        index.update(4, ["parol 500mg"])
+        yeniden = PrefixIndex([(1, ["coraspin 100mg", "asetilsalisilik asit"]), (2, ["aspirin 500mg"]), (4, ["parol 500mg"])])
+
+        assert index._entries == yeniden._entries
+        for prefix in ("a", "as", "500", "100", "par", "ab"):
+            assert index.search(prefix, 10) == yeniden.search(prefix, 10)
+        # Yayımlanmış diziler değiştirilmez (kilitsiz okuyucular için)
+        assert eski_diziler[0] == sorted(eski_diziler[0])
+        assert len(eski_diziler[0]) == 5
+
+
+class TestIlacSearch:
+    """Test IlacRepository.search on the indexed backend"""
+
+    def test_turkish_insensitive_search(self, db_session, katalog):
+        """Test queries match regardless of Turkish case and diacritics"""
+        assert ara(db_session, "agri") == (["Ağrı Kesici Jel"], 1)
+        assert ara(db_session, "AĞRI") == (["Ağrı Kesici Jel"], 1)
+        assert ara(db_session, "ibufen") == (["İBUFEN 400mg"], 1)
+
+    def test_searches_barkod_and_etken_madde(self, db_session, katalog):
+        """Test barcode and active ingredient are searched, inactive drugs are not"""
+        assert ara(db_session, "0000002") == (["Ağrı Kesici Jel"], 1)
+        assert ara(db_session, "parasetamol") == (["Parol 500mg"], 1)
+
+    def test_like_wildcards_are_literal(self, db_session, katalog):
+        """Test % and _ in the query are not treated as wildcards"""
+        assert ara(db_session, "%") == ([], 0)
+        assert ara(db_session, "p_rol") == ([], 0)
+
+    def test_index_refreshes_after_commit(self, db_session, katalog):
+        """Test drugs added or renamed after the index was built are found"""
+        assert ara(db_session, "aspirin") == ([], 0)
+
+        ilac = ilac_ekle(db_session, "Aspirin 100mg", "8699000000005")
+        assert ara(db_session, "aspirin") == (["Aspirin 100mg"], 1)
+
+        ilac.ad = "Coraspin 100mg"
+        db_session.commit()
+        assert ara(db_session, "aspirin") == ([], 0)
+        assert ara(db_session, "coraspin") == (["Coraspin 100mg"], 1)
+
+    def test_search_text_column_maintained(self, db_session, katalog):
+        """Test arama_metni is filled on insert and kept current on update"""
+        ilac = db_session.query(Ilac).filter(Ilac.barkod == "8699000000001").one()
+        assert ilac.arama_metni == "parol 500mg 8699000000001 parasetamol"
+
+        ilac.etken_madde = "Asetaminofen"
+        db_session.commit()
+        assert ilac.arama_metni == "parol 500mg 8699000000001 asetaminofen"
+
+
+class TestIlacSearchPage:
+    """Test optional totals in IlacRepository.search_page"""
+
+    def sayfa(self, db, page, exact_total):
+        params = IlacSearchParams(page=page, page_size=2, exact_total=exact_total)
+        ilaclar, total, has_next = IlacRepository(db).search_page(params)
+        return [ilac.ad for ilac in ilaclar], total, has_next
+
+    def test_exact_total(self, db_session, katalog):
+        """Test exact mode returns the total and has_next"""
+        assert self.sayfa(db_session, 1, True) == (["Ağrı Kesici Jel", "Parol 500mg"], 3, True)
+        assert self.sayfa(db_session, 2, True) == (["İBUFEN 400mg"], 3, False)
+
+    def test_skip_count(self, db_session, katalog):
+        """Test skipping the total runs a single statement and still reports has_next"""
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            assert self.sayfa(db_session, 1, False) == (["Ağrı Kesici Jel", "Parol 500mg"], None, True)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        assert len(statements) == 1
+        assert "count" not in statements[0].lower()
+
+        assert self.sayfa(db_session, 2, False) == (["İBUFEN 400mg"], None, False)
+
+
+class TestIlacAutocomplete:
+    """Test IlacRepository.autocomplete"""
+
+    def oneriler(self, db, prefix, limit=10):
+        return [oneri.ad for oneri in IlacRepository(db).autocomplete(prefix, limit)]
+
+    def test_turkish_prefix(self, db_session, katalog):
+        """Test prefixes of name, barcode and active ingredient are folded for Turkish"""
+        assert self.oneriler(db_session, "AĞR") == ["Ağrı Kesici Jel"]
+        assert self.oneriler(db_session, "ibu") == ["İBUFEN 400mg"]
+        assert self.oneriler(db_session, "8699000000003") == ["İBUFEN 400mg"]
+        assert self.oneriler(db_session, "paraset") == ["Parol 500mg"]
+        assert self.oneriler(db_session, "500") == ["Parol 500mg"]
+        assert self.oneriler(db_session, " ") == []
+
+    def test_served_from_memory(self, db_session, katalog):
+        """Test warm autocomplete requests run no SQL"""
+        self.oneriler(db_session, "par")
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            assert self.oneriler(db_session, "parol") == ["Parol 500mg"]
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        assert statements == []
+
+    def test_fresh_after_repository_writes(self, db_session, katalog):
+        """Test create, update and delete through the repository refresh suggestions"""
+        repo = IlacRepository(db_session)
+        assert self.oneriler(db_session, "asp") == []
+        indeks = ilac_repository._indeksler["oneri"]
+
+        ilac = repo.create(IlacCreate(
+            barkod="8699000000005",
+            ad="Aspirin 100mg",
+            kategori=IlacKategori.NORMAL,
+            kullanim_talimati="Günde 1 tablet alınız",
+            fiyat=Decimal("15.00"),
+            receteli=False
+        ))
+        assert self.oneriler(db_session, "asp") == ["Aspirin 100mg"]
+
+        repo.update(ilac.id, IlacUpdate(ad="Coraspin 100mg"))
+        assert self.oneriler(db_session, "asp") == []
+        assert self.oneriler(db_session, "cora") == ["Coraspin 100mg"]
+
+        repo.delete(ilac.id)
+        assert self.oneriler(db_session, "cora") == []
+        # Değişiklikler index yeniden kurulmadan artımlı işlendi
+        assert ilac_repository._indeksler["oneri"] is indeks
+
+    def test_single_rebuild_keeps_changes_made_during_it(self, db_session, katalog, monkeypatch):
+        """Test an expired index is rebuilt by one caller and replays commits made meanwhile"""
+        self.oneriler(db_session, "par")
+        eski = ilac_repository._indeksler["oneri"][1]
+        monkeypatch.setattr(ilac_repository.settings, "DRUG_SEARCH_INDEX_TTL_SECONDS", 0)
+        olustur = ilac_repository._INDEKS_OLUSTURUCULAR["oneri"]
+        kurulumlar = []
+
+        def yavas_olustur(rows):
+            kurulumlar.append(rows)
+            # Kurulum sürerken: diğer istekler eski index'ten cevaplanır...
+            db = TestSessionLocal()
+            assert ilac_repository._get_indeks(db, "oneri") is eski
+            # ...ve commit edilen değişiklik (sorgudan sonra) kaybolmaz
+            ilac_ekle(db, "Aspirin 100mg", "8699000000005")
+            db.close()
+            return olustur(rows)
+
+        monkeypatch.setitem(ilac_repository._INDEKS_OLUSTURUCULAR, "oneri", yavas_olustur)
+        assert self.oneriler(db_session, "asp") == ["Aspirin 100mg"]
+        assert len(kurulumlar) == 1
+        assert ilac_repository._indeksler["oneri"][1] is not eski
+        assert ilac_repository._kurulumlar == {}
+
+
+class TestIlacKatalogCache:
+    """Test the process-local catalog cache behind get_by_id/get_many/get_by_barkod"""
+
+    @pytest.fixture
+    def sayac(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        yield statements
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    def ilac_idleri(self, db):
+        return {ilac.barkod: ilac.id for ilac in db.query(Ilac).all()}
+
+    def test_get_many_hits_cache(self, db_session, katalog, sayac):
+        """Test cached drugs are served without SQL and misses share one query"""
+        idler = self.ilac_idleri(db_session)
+        db_session.expunge_all()
+        repo = IlacRepository(db_session)
+
+        sayac.clear()
+        assert repo.get_by_id(idler["8699000000001"]).ad == "Parol 500mg"
+        assert len(sayac) == 1
+
+        sayac.clear()
+        ilaclar = repo.get_many(list(idler.values()))
+        assert len(sayac) == 1
+        assert {ilac.ad for ilac in ilaclar.values()} == {"Parol 500mg", "Ağrı Kesici Jel", "İBUFEN 400mg"}
+
+        sayac.clear()
+        db = TestSessionLocal()
+        assert len(IlacRepository(db).get_many(list(idler.values()), aktif_only=False)) == 4
+        assert IlacRepository(db).get_by_barkod("8699000000002").ad == "Ağrı Kesici Jel"
+        db.close()
+        assert len(sayac) == 0
+
+        stats = ilac_repository.katalog_cache_stats()
+        assert stats["hits"] >= 5
+        assert stats["misses"] >= 3
+
+    def test_inactive_filtered(self, db_session, katalog):
+        """Test inactive drugs are cached but only returned when asked for"""
+        eski_id = self.ilac_idleri(db_session)["8699000000004"]
+        repo = IlacRepository(db_session)
+
+        assert repo.get_by_id(eski_id) is None
+        assert repo.get_by_barkod("8699000000004") is None
+        assert repo.get_many([eski_id], aktif_only=False)[eski_id].ad == "Eski İlaç"
+
+    def test_repository_writes_invalidate(self, db_session, katalog):
+        """Test update and delete through IlacRepository are visible to the next read"""
+        ilac_id = self.ilac_idleri(db_session)["8699000000001"]
+        repo = IlacRepository(db_session)
+        versiyon = ilac_repository.katalog_cache_stats()["version"]
+
+        repo.get_by_id(ilac_id)
+        repo.update(ilac_id, IlacUpdate(fiyat=Decimal("12.50")))
+        assert ilac_repository.katalog_cache_stats()["version"] > versiyon
+
+        db = TestSessionLocal()
+        assert IlacRepository(db).get_by_id(ilac_id).fiyat == Decimal("12.50")
+        db.close()
+
+        repo.delete(ilac_id)
+        db = TestSessionLocal()
+        assert IlacRepository(db).get_by_id(ilac_id) is None
+        db.close()
+
+    def test_write_evicts_only_that_drug(self, db_session, katalog):
+        """Test a commit drops only the changed drug's id and barcode entries"""
+        idler = self.ilac_idleri(db_session)
+        repo = IlacRepository(db_session)
+        for barkod, ilac_id in idler.items():
+            repo.get_by_id(ilac_id)
+            repo.get_by_barkod(barkod)
+        boyut = ilac_repository.katalog_cache_stats()["size"]
+
+        repo.update(idler["8699000000001"], IlacUpdate(ad="Parol 1000mg"))
+
+        assert ilac_repository.katalog_cache_stats()["size"] == boyut - 2
+        db = TestSessionLocal()
+        assert IlacRepository(db).get_by_barkod("8699000000001").ad == "Parol 1000mg"
+        db.close()
+
+    def test_stale_read_not_cached(self, db_session, katalog):
+        """Test a read that raced with an invalidation does not repopulate the cache"""
+        ilac = db_session.query(Ilac).filter(Ilac.barkod == "8699000000001").one()
+        versiyon = ilac_repository.katalog_cache_stats()["version"]
+
+        ilac_repository.invalidate_katalog()
+        ilac_repository._katalog_kaydet([ilac], versiyon)
+
+        assert ilac_repository.katalog_cache_stats()["size"] == 0
+
+
+class TestEquivalenceClasses:
+    """Test the equivalence classes behind the muadil graph"""
+
+    def test_transitive_and_bidirectional(self):
+        """Test A~B and C~B put A, B and C in one class"""
+        siniflar = EquivalenceClasses([("a", "b"), ("c", "b"), ("x", "y")])
+        assert siniflar.class_of("a") == {"a", "b", "c"}
+        assert siniflar.class_of("b") == {"b", "a", "c"}
+        assert siniflar.class_of("y") == {"y", "x"}
+        assert siniflar.class_of("z") == set()
+
+    def test_remove_edge_splits_class(self):
+        """Test removing a bridge splits the class and duplicate edges survive one removal"""
+        siniflar = EquivalenceClasses([("a", "b"), ("b", "c"), ("c", "d"), ("b", "a")])
+
+        siniflar.remove_edge("b", "c")
+        assert siniflar.class_of("a") == {"a", "b"}
+        assert siniflar.class_of("d") == {"d", "c"}
+
+        siniflar.remove_edge("a", "b")
+        assert siniflar.class_of("a") == {"a", "b"}
+        siniflar.remove_edge("b", "a")
+        assert siniflar.class_of("a") == set()
+        assert siniflar.class_of("c") == {"c", "d"}
+
+    def test_remove_edge_keeps_cycle(self):
+        """Test removing an edge inside a cycle keeps the class intact"""
+        siniflar = EquivalenceClasses([("a", "b"), ("b", "c"), ("c", "a")])
+        siniflar.remove_edge("a", "b")
+        assert siniflar.class_of("a") == {"a", "b", "c"}
+
+
+    def test_concurrent_reads_during_updates(self):
+        """Test lock-free readers never see a half-merged or half-split class"""
+        siniflar = EquivalenceClasses([(i, i + 1) for i in range(199)])
+        hatalar = []
+        bitti = threading.Event()
+
+        def oku():
+            try:
+                while not bitti.is_set():
+                    denkler = siniflar.class_of(99)
+                    # Ya tek parça zincir ya da 99-100 kenarından bölünmüş ilk yarı
+                    if denkler not in (tam_sinif, yari_sinif):
+                        hatalar.append(len(denkler))
+            except Exception as exc:
+                hatalar.append(exc)
+
+        tam_sinif = frozenset(range(200))
+        yari_sinif = frozenset(range(100))
+        okuyucular = [threading.Thread(target=oku) for _ in range(4)]
+        eski_aralik = sys.getswitchinterval()
+        # Thread'ler arası geçişi sıklaştır: yarım kalmış güncelleme görülebilsin
+        sys.setswitchinterval(1e-6)
+        for t in okuyucular:
+            t.start()
+        try:
+            for _ in range(300):
+                siniflar.remove_edge(99, 100)
+                siniflar.add_edge(99, 100)
+        finally:
+            bitti.set()
+            for t in okuyucular:
+                t.join()
+            sys.setswitchinterval(eski_aralik)
+
+        assert hatalar == []
+        assert siniflar.class_of(99) is siniflar.class_of(0)
+        assert siniflar.class_of(99) == tam_sinif
+
+
+class TestMuadilGrafi:
+    """Test muadil lookups served from the precomputed equivalence classes"""
+
+    @pytest.fixture
+    def idler(self, db_session, katalog):
+        ilac_ekle(db_session, "Minoset 500mg", "8699000000005", "Parasetamol")
+        idler = {ilac.barkod[-1]: ilac.id for ilac in db_session.query(Ilac).all()}
+        # 1~5 ve 5~4 (pasif): 1, 5 ve 4 aynı sınıfta
+        db_session.add_all([
+            MuadilIlac(ilac_id=idler["1"], muadil_ilac_id=idler["5"]),
+            MuadilIlac(ilac_id=idler["4"], muadil_ilac_id=idler["5"]),
+        ])
+        db_session.commit()
+        return idler
+
+    def test_transitive_active_equivalents(self, db_session, idler):
+        """Test equivalents are bidirectional, transitive and skip inactive drugs"""
+        repo = IlacRepository(db_session)
+        assert [ilac.ad for ilac in repo.get_muadiller(idler["1"])] == ["Minoset 500mg"]
+        assert [ilac.ad for ilac in repo.get_muadiller(idler["5"])] == ["Parol 500mg"]
+        assert repo.get_muadil_ids(idler["1"]) == {idler["4"], idler["5"]}
+        assert repo.get_muadiller(idler["2"]) == []
+
+    def test_add_and_remove_update_graph(self, db_session, idler):
+        """Test add_muadil/remove_muadil update the cached graph without a rebuild"""
+        repo = IlacRepository(db_session)
+        assert repo.get_muadil_ids(idler["2"]) == set()
+        graf = ilac_repository._muadil_grafi
+
+        repo.add_muadil(idler["2"], idler["4"])
+        assert repo.get_muadil_ids(idler["2"]) == {idler["1"], idler["4"], idler["5"]}
+
+        assert repo.remove_muadil(idler["4"], idler["5"])
+        assert repo.get_muadil_ids(idler["1"]) == {idler["5"]}
+        assert repo.get_muadil_ids(idler["2"]) == {idler["4"]}
+        assert ilac_repository._muadil_grafi is graf
+
+    def test_in_stock_equivalents(self, db_session, idler):
+        """Test only equivalents with stock at the given pharmacy are returned"""
+        eczane_id = uuid.uuid4()
+        db_session.add_all([
+            Stok(eczane_id=eczane_id, ilac_id=idler["5"], miktar=3),
+            Stok(eczane_id=eczane_id, ilac_id=idler["1"], miktar=0),
+            Stok(eczane_id=uuid.uuid4(), ilac_id=idler["1"], miktar=7),
+        ])
+        db_session.commit()
+        repo = IlacRepository(db_session)
+
+        sonuc = repo.get_stoktaki_muadiller(idler["1"], eczane_id)
+        assert [(ilac.ad, stok.miktar) for ilac, stok in sonuc] == [("Minoset 500mg", 3)]
+        assert repo.get_stoktaki_muadiller(idler["5"], eczane_id) == []
@@ -0,0 +1,211 @@
+import shutil
+from decimal import Decimal
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.core import auth_cache, database
+from app.core.database import (
+    Base, ReadYourWritesMiddleware, get_async_db, get_db, get_read_db, primary_gerekli, yazma_kaydet
+)
+from app.core.security import create_access_token
+from app.models import Eczane, Hasta, Ilac, Siparis, Stok, User
+from app.repositories.ilac_repository import invalidate_katalog
+from app.utils.enums import OnayDurumu, UserType
+
+
+def _session_factory(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    return (
+        engine,
+        sessionmaker(autocommit=False, autoflush=False, bind=engine),
+        async_sessionmaker(bind=async_engine, expire_on_commit=False),
+    )
+
+
+@pytest.fixture
+def veritabanlari(tmp_path):
+    """Primary ve (dosya kopyasıyla oluşturulan, geride kalan) replika"""
+    primary_path = tmp_path / "primary.db"
+    replika_path = tmp_path / "replika.db"
+    primary_engine, PrimarySession, AsyncPrimarySession = _session_factory(primary_path)
+    Base.metadata.create_all(bind=primary_engine)
+
+    db = PrimarySession()
+    user = User(email="replika@test.com", password_hash="hash", user_type=UserType.HASTA, is_active=True)
+    baska_user = User(email="baska@test.com", password_hash="hash", user_type=UserType.HASTA, is_active=True)
+    eczane_user = User(email="replika-eczane@test.com", password_hash="hash", user_type=UserType.ECZANE, is_active=True)
+    db.add_all([user, baska_user, eczane_user])
+    db.commit()
+    db.add(Hasta(user_id=user.id, tc_no="22222222222", ad="Test", soyad="Hasta", adres="Test Adres", telefon="5550001122"))
+    db.add(Hasta(user_id=baska_user.id, tc_no="33333333333", ad="Baska", soyad="Hasta", adres="Test Adres", telefon="5550003344"))
+    eczane = Eczane(
+        user_id=eczane_user.id, sicil_no="REP123456", eczane_adi="Replika Eczane", eczaci_adi="Mehmet",
+        eczaci_soyadi="Yılmaz", eczaci_diploma_no="EC654321", telefon="0312 123 45 67", adres="Test Adres",
+        mahalle="Kızılay", banka_hesap_no="1234567890", iban="TR123456789012345678901234",
+        onay_durumu=OnayDurumu.ONAYLANDI
+    )
+    eski = Ilac(ad="Parol", barkod="8690000000001", fiyat=Decimal("25.50"), kategori="normal", receteli=False, kullanim_talimati="Günde 1 defa")
+    db.add_all([eczane, eski])
+    db.flush()
+    db.add(Stok(eczane_id=eczane.id, ilac_id=eski.id, miktar=10))
+    db.commit()
+
+    # Replika bu andaki primary'nin kopyası; sonraki yazmalar ona ulaşmaz
+    primary_engine.dispose()
+    shutil.copy(primary_path, replika_path)
+    replika_engine, ReplikaSession, AsyncReplikaSession = _session_factory(replika_path)
+
+    yeni = Ilac(ad="Aspirin", barkod="8690000000002", fiyat=Decimal("30.00"), kategori="normal", receteli=False, kullanim_talimati="Günde 1 defa")
+    db.add(yeni)
+    db.commit()
+
+    veri = {
+        "token": create_access_token({"user_id": str(user.id), "email": user.email, "user_type": "hasta"}),
+        "baska_token": create_access_token({"user_id": str(baska_user.id), "email": baska_user.email, "user_type": "hasta"}),
+        "eczane_id": str(eczane.id),
+        "eski_ilac_id": str(eski.id),
+        "yeni_ilac_id": str(yeni.id),
+    }
+    db.close()
+
+    yield veri, PrimarySession, AsyncPrimarySession, ReplikaSession, AsyncReplikaSession
+
+    primary_engine.dispose()
+    replika_engine.dispose()
+
+
+@pytest.fixture
+def client(veritabanlari, monkeypatch):
+    _, PrimarySession, AsyncPrimarySession, ReplikaSession, AsyncReplikaSession = veritabanlari
+
+    def override_get_db():
+        db = PrimarySession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncPrimarySession() as db:
+            yield db
+
+    monkeypatch.setattr(database, "ReadSessionLocal", ReplikaSession)
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", AsyncReplikaSession)
+    eski_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    database._son_yazanlar.clear()
+    auth_cache.clear()
+    invalidate_katalog()
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(eski_overrides)
+    database._son_yazanlar.clear()
+    auth_cache.clear()
+    invalidate_katalog()
+
+
+class TestReadReplica:
+    """Test read-only endpoints are served from the replica unless the client just wrote"""
+
+    def test_reads_go_to_replica(self, client, veritabanlari):
+        veri = veritabanlari[0]
+        headers = {"Authorization": f"Bearer {veri['token']}"}
+
+        assert client.get(f"/api/hasta/ilac/{veri['eski_ilac_id']}", headers=headers).status_code == 200
+        # Replikaya henüz ulaşmamış kayıt
+        assert client.get(f"/api/hasta/ilac/{veri['yeni_ilac_id']}", headers=headers).status_code == 404
+
+    def test_recent_writer_reads_primary(self, client, veritabanlari):
+        veri = veritabanlari[0]
+        headers = {"Authorization": f"Bearer {veri['token']}"}
+
+        yazma_kaydet(headers["Authorization"])
+        invalidate_katalog()
+        assert client.get(f"/api/hasta/ilac/{veri['yeni_ilac_id']}", headers=headers).status_code == 200
+
+        # Diğer istemciler replikadan okumaya devam eder
+        assert primary_gerekli("Bearer baska-istemci") is False
+
+    def test_order_visible_to_its_creator_immediately(self, client, veritabanlari):
+        """Test an order created through the API is listed at once from the primary"""
+        veri, PrimarySession, _, ReplikaSession, _ = veritabanlari
+        headers = {"Authorization": f"Bearer {veri['token']}"}
+        baska_headers = {"Authorization": f"Bearer {veri['baska_token']}"}
+
+        response = client.post("/api/hasta/siparis/olustur", headers=headers, json={
+            "eczane_id": veri["eczane_id"],
+            "items": [{
+                "ilac_id": veri["eski_ilac_id"],
+                "ilac_adi": "Parol",
+                "barkod": "8690000000001",
+                "miktar": 2,
+                "birim_fiyat": "25.50",
+                "ara_toplam": "51.00"
+            }],
+            "teslimat_adresi": "Test Adres"
+        })
+        assert response.status_code == 201
+        siparis_id = response.json()["id"]
+
+        # Replikada sipariş yok; liste yalnızca primary'den okunursa döner
+        replika = ReplikaSession()
+        assert replika.query(Siparis).count() == 0
+        replika.close()
+        primary = PrimarySession()
+        assert primary.query(Siparis).count() == 1
+        primary.close()
+
+        siparisler = client.get("/api/hasta/siparislerim", headers=headers)
+        assert siparisler.status_code == 200
+        assert [s["id"] for s in siparisler.json()] == [siparis_id]
+
+        # Yazmayan istemci replikadan okumaya devam eder
+        assert primary_gerekli(baska_headers["Authorization"]) is False
+        assert client.get(f"/api/hasta/ilac/{veri['yeni_ilac_id']}", headers=baska_headers).status_code == 404
+        assert client.get(f"/api/hasta/ilac/{veri['eski_ilac_id']}", headers=baska_headers).status_code == 200
+
+
+class TestReadYourWritesMiddleware:
+    """Test which requests make a client sticky to the primary"""
+
+    @pytest.fixture
+    def mini_app(self, monkeypatch):
+        monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker())
+        database._son_yazanlar.clear()
+        mini = FastAPI()
+        mini.add_middleware(ReadYourWritesMiddleware)
+        mini.dependency_overrides[get_db] = lambda: None
+
+        @mini.post("/yaz")
+        def yaz():
+            return {}
+
+        @mini.post("/hatali")
+        def hatali():
+            raise HTTPException(status_code=400)
+
+        @mini.post("/listele")
+        def listele(db=Depends(get_read_db)):
+            return {}
+
+        yield TestClient(mini)
+        database._son_yazanlar.clear()
+
+    @pytest.mark.parametrize("yol, yapiskan", [("/yaz", True), ("/hatali", False), ("/listele", False)])
+    def test_only_successful_writes_are_recorded(self, mini_app, yol, yapiskan):
+        mini_app.post(yol, headers={"Authorization": "Bearer x"})
+        assert primary_gerekli("Bearer x") is yapiskan
+        assert primary_gerekli("Bearer y") is False
+
+    def test_noop_without_replica(self, mini_app, monkeypatch):
+        monkeypatch.setattr(database, "ReadSessionLocal", None)
+        mini_app.post("/yaz", headers={"Authorization": "Bearer x"})
+        assert primary_gerekli("Bearer x") is False
@@ -7,12 +7,15 @@ from app.services.recete_service import ReceteService
 from app.schemas.recete import ReceteQuery, ReceteResponse, ReceteIlacItem
 from app.models.recete import Recete, ReceteIlac, ReceteDurum
 from app.models.ilac import Ilac
+from app.repositories.ilac_repository import invalidate_katalog
 from app.utils.enums import IlacKategori
 
 
 @pytest.fixture(scope="function")
 def db_session():
     """Database session fixture"""
+    # Toplu silmeler katalog cache'ine yansımaz: önceki testlerden kalan kayıtlar düşürülür
+    invalidate_katalog()
     db = SessionLocal()
     try:
         yield db
@@ -29,6 +32,7 @@ def db_session():
             db.query(Recete).filter(Recete.recete_no.like('%RCT2025%')).delete(synchronize_session=False)
             db.query(Ilac).filter(Ilac.barkod.like('8699%')).delete(synchronize_session=False)
             db.commit()
+            invalidate_katalog()
         except Exception as e:
             print(f"Cleanup error: {e}")
             db.rollback()
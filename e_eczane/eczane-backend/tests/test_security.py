@@ -4,9 +4,22 @@ import os
 # Proje root'unu path'e ekle
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import asyncio
+import base64
+import threading
+import time
+from datetime import timedelta
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from app.core import security
+from app.core.config import settings
 from app.core.security import (
     get_password_hash,
     verify_password,
+    get_password_hash_async,
+    verify_password_async,
+    PasswordHashPool,
     create_access_token,
     decode_access_token
 )
@@ -27,6 +40,49 @@ def test_password_hashing():
     print("✅ Password hashing çalışıyor!")
 
 
+def test_password_hashing_async():
+    """Async password hashing test (bcrypt maliyeti ayardan gelir)"""
+    async def hash_ve_dogrula():
+        hashed = await get_password_hash_async("TestSifre123!")
+        return (
+            hashed,
+            await verify_password_async("TestSifre123!", hashed),
+            await verify_password_async("YanlisSifre", hashed)
+        )
+    
+    hashed, dogru, yanlis = asyncio.run(hash_ve_dogrula())
+    assert hashed.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert dogru is True
+    assert yanlis is False
+    # Senkron yol aynı hash'i doğrular
+    assert verify_password("TestSifre123!", hashed) is True
+
+
+def test_password_hash_pool_is_bounded():
+    """Havuz dolu ve kuyruk sınırı aşılınca 503, metrikler kuyruk derinliğini gösterir"""
+    pool = PasswordHashPool(max_workers=2, max_queue=1)
+    serbest = threading.Event()
+    futures = [pool._gonder(serbest.wait) for _ in range(3)]
+    
+    # 2 iş çalışıyor, 1 iş sırada: yeni iş reddedilir
+    for _ in range(100):
+        if pool.metrics()["active"] == 2:
+            break
+        threading.Event().wait(0.01)
+    with pytest.raises(HTTPException) as exc:
+        pool.run(len, "x")
+    assert exc.value.status_code == 503
+    
+    metrics = pool.metrics()
+    assert metrics["active"] == 2
+    assert metrics["queue_depth"] == 1
+    assert metrics["rejected"] == 1
+    
+    serbest.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert pool.metrics()["completed"] == 3
+    assert pool.metrics()["queue_depth"] == 0
 
 
 def test_jwt_token():
@@ -51,13 +107,75 @@ def test_jwt_token():
     print("✅ JWT token çalışıyor!")
 
 
+def _ornek_tokenlar():
+    payload = {"user_id": "123e4567-e89b-12d3-a456-426614174000", "user_type": "hasta"}
+    gecerli = create_access_token(payload)
+    header, govde, imza = gecerli.split(".")
+    alg_none = base64.urlsafe_b64encode(b'{"alg":"none","typ":"JWT"}').rstrip(b"=").decode()
+    return {
+        "gecerli": gecerli,
+        "suresi_dolmus": create_access_token(payload, expires_delta=timedelta(minutes=-1)),
+        "yanlis_anahtar": jwt.encode({**payload, "exp": int(time.time()) + 60}, "baska-anahtar", algorithm=settings.ALGORITHM),
+        "alg_none": f"{alg_none}.{govde}.",
+        "alg_hs512": jwt.encode({**payload, "exp": int(time.time()) + 60}, settings.SECRET_KEY, algorithm="HS512"),
+        "degistirilmis": f"{header}.{create_access_token({'user_id': 'baska'}).split('.')[1]}.{imza}",
+        "aud": jwt.encode({**payload, "aud": "x", "exp": int(time.time()) + 60}, settings.SECRET_KEY, algorithm=settings.ALGORITHM),
+        "bozuk": "bu.bir-token.degil",
+        "bos": "",
+    }
 
 
-if __name__ == "__main__":
-    test_password_hashing()
-    test_jwt_token()
+@pytest.mark.parametrize("ad", list(_ornek_tokenlar().keys()))
+def test_jwt_backends_agree(ad):
+    """hmac backend'i her token için jose ile aynı kararı verir"""
+    token = _ornek_tokenlar()[ad]
+    
+    def coz(backend):
+        try:
+            return backend(token)
+        except security.JWTError:
+            return None
+    
+    jose_sonuc = coz(security._jwt_decode_jose)
+    assert coz(security._jwt_decode_hmac) == jose_sonuc
+    assert (jose_sonuc is not None) == (ad == "gecerli")
 
 
+def test_decode_cache_respects_exp(monkeypatch):
+    """Aynı token ikinci kez cache'ten döner; exp geçince cache kullanılmaz"""
+    security.clear_token_cache()
+    cagrilar = []
+    asil = security._jwt_decode
+    monkeypatch.setattr(security, "_jwt_decode", lambda token: cagrilar.append(token) or asil(token))
+    
+    token = create_access_token({"user_id": "u1"}, expires_delta=timedelta(minutes=5))
+    ilk = decode_access_token(token)
+    ikinci = decode_access_token(token)
+    assert ilk == ikinci and ilk["user_id"] == "u1"
+    assert len(cagrilar) == 1
+    
+    # Dönen sözlüğü değiştirmek cache'i etkilemez
+    ikinci["user_id"] = "degisti"
+    assert decode_access_token(token)["user_id"] == "u1"
+    assert len(cagrilar) == 1
+    
+    # Saat exp'i geçti: cache'teki claim'ler kullanılmaz, token yeniden doğrulanır
+    gercek_time = time.time
+    monkeypatch.setattr(security.time, "time", lambda: gercek_time() + 600)
+    decode_access_token(token)
+    assert len(cagrilar) == 2
+    
+    # Geçersiz token cache'lenmez
+    monkeypatch.setattr(security.time, "time", gercek_time)
+    assert decode_access_token("bu.bir-token.degil") is None
+    assert decode_access_token("bu.bir-token.degil") is None
+    assert len(cagrilar) == 4
+    security.clear_token_cache()
 
 
+if __name__ == "__main__":
+    test_password_hashing()
+    test_password_hashing_async()
+    test_jwt_token()
+
 
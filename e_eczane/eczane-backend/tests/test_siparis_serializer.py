@@ -0,0 +1,189 @@
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models.base import Base
+from app.models.user import User
+from app.models.eczane import Eczane
+from app.models.hasta import Hasta
+from app.models.ilac import Ilac
+from app.models.siparis import Siparis, SiparisDetay
+from app.services.siparis_serializer import siparisler_to_response, siparis_to_response
+from app.utils.enums import (
+    UserType, OnayDurumu, IlacKategori,
+    SiparisDurum, OdemeDurum
+)
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestSessionLocal = sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db_session():
+    """Create a test database session"""
+    Base.metadata.create_all(bind=engine)
+    session = TestSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def query_counter():
+    """Engine üzerinde çalışan SQL ifadelerini say"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def create_siparisler(db_session, adet: int):
+    """Her biri iki kalemli, farklı hasta/eczane çiftlerine ait siparişler oluştur"""
+    ilaclar = []
+    for i in range(2):
+        ilac = Ilac(
+            ad=f"Test İlaç {i}",
+            barkod=f"869900000000{i}",
+            kategori=IlacKategori.NORMAL,
+            kullanim_talimati="Günde 1 kez 1 tablet",
+            receteli=False,
+            fiyat=Decimal("10.00"),
+            aktif=True
+        )
+        db_session.add(ilac)
+        ilaclar.append(ilac)
+    db_session.flush()
+
+    siparis_ids = []
+    for i in range(adet):
+        eczane_user = User(
+            email=f"eczane{i}@test.com",
+            password_hash="hashed",
+            user_type=UserType.ECZANE,
+            is_active=True
+        )
+        hasta_user = User(
+            email=f"hasta{i}@test.com",
+            password_hash="hashed",
+            user_type=UserType.HASTA,
+            is_active=True
+        )
+        db_session.add_all([eczane_user, hasta_user])
+        db_session.flush()
+
+        eczane = Eczane(
+            user_id=eczane_user.id,
+            sicil_no=f"TEST{i:06d}",
+            eczane_adi=f"Test Eczane {i}",
+            eczaci_adi="Mehmet",
+            eczaci_soyadi="Yılmaz",
+            eczaci_diploma_no="EC123456",
+            telefon="0312 123 45 67",
+            adres="Test Adres",
+            mahalle="Kızılay",
+            banka_hesap_no="1234567890",
+            iban="TR123456789012345678901234",
+            onay_durumu=OnayDurumu.ONAYLANDI
+        )
+        hasta = Hasta(
+            user_id=hasta_user.id,
+            tc_no=f"{i:011d}",
+            ad="Ali",
+            soyad=f"Demir{i}",
+            telefon="0532 111 22 33",
+            adres="Hasta Adres"
+        )
+        db_session.add_all([eczane, hasta])
+        db_session.flush()
+
+        siparis = Siparis(
+            hasta_id=hasta.id,
+            eczane_id=eczane.id,
+            toplam_tutar=Decimal("30.00"),
+            durum=SiparisDurum.BEKLEMEDE,
+            odeme_durumu=OdemeDurum.ODENDI,
+            teslimat_adresi="Test Adres"
+        )
+        db_session.add(siparis)
+        db_session.flush()
+
+        for ilac in ilaclar:
+            db_session.add(SiparisDetay(
+                siparis_id=siparis.id,
+                ilac_id=ilac.id,
+                miktar=1,
+                birim_fiyat=Decimal("10.00"),
+                ara_toplam=Decimal("10.00")
+            ))
+        siparis_ids.append(siparis.id)
+
+    db_session.commit()
+    db_session.expunge_all()
+    return siparis_ids
+
+
+class TestSiparisSerializer:
+    """Test batch order serialization"""
+
+    def test_response_fields(self, db_session):
+        """Test serialized orders include names and details in the given order"""
+        siparis_ids = create_siparisler(db_session, 3)
+
+        result = siparisler_to_response(list(reversed(siparis_ids)), db_session)
+
+        assert [r.id for r in result] == [str(s) for s in reversed(siparis_ids)]
+        assert result[0].eczane_adi == "Test Eczane 2"
+        assert result[0].hasta_adi == "Ali Demir2"
+        assert len(result[0].detaylar) == 2
+        assert {d.barkod for d in result[0].detaylar} == {"8699000000000", "8699000000001"}
+
+    def test_unknown_ids_are_skipped(self, db_session):
+        """Test missing orders are silently dropped"""
+        siparis_ids = create_siparisler(db_session, 1)
+
+        result = siparisler_to_response([str(uuid4()), str(siparis_ids[0])], db_session)
+
+        assert len(result) == 1
+        assert result[0].id == str(siparis_ids[0])
+
+    def test_empty_list(self, db_session, query_counter):
+        """Test empty input runs no queries"""
+        assert siparisler_to_response([], db_session) == []
+        assert len(query_counter) == 0
+
+    def test_single_order(self, db_session):
+        """Test single order helper"""
+        siparis_ids = create_siparisler(db_session, 1)
+        siparis = db_session.query(Siparis).filter(Siparis.id == siparis_ids[0]).first()
+
+        response = siparis_to_response(siparis, db_session)
+
+        assert response.id == str(siparis.id)
+        assert response.eczane_adi == "Test Eczane 0"
+
+    def test_query_count_constant(self, db_session, query_counter):
+        """Test query count does not grow with page size"""
+        siparis_ids = create_siparisler(db_session, 20)
+        # Her iki sayfa da boş identity map ile başlasın (oluşturulan nesneler GC'ye bağlı kalmasın)
+        db_session.expunge_all()
+
+        query_counter.clear()
+        siparisler_to_response(siparis_ids[:2], db_session)
+        small_page_queries = len(query_counter)
+        db_session.expunge_all()
+
+        query_counter.clear()
+        result = siparisler_to_response(siparis_ids, db_session)
+        large_page_queries = len(query_counter)
+
+        assert len(result) == 20
+        assert small_page_queries == large_page_queries
+        assert large_page_queries <= 3
@@ -1,7 +1,7 @@
 import pytest
 from decimal import Decimal
-from uuid import uuid4
-from sqlalchemy import create_engine
+from uuid import UUID, uuid4
+from sqlalchemy import create_engine, event, update
 from sqlalchemy.orm import sessionmaker
 from app.models.base import Base
 from app.models.user import User
@@ -12,6 +12,8 @@ from app.models.ilac import Ilac
 from app.models.stok import Stok
 from app.models.siparis import Siparis, SiparisDetay, SiparisDurumGecmisi
 from app.models.bildirim import Bildirim
+from app.models.email_outbox import EmailOutbox
+from app.repositories.ilac_repository import IlacRepository, invalidate_katalog
 from app.services.siparis_service import SiparisService
 from app.schemas.siparis import SiparisCreate, SiparisDetayItem
 from app.utils.enums import (
@@ -529,3 +531,204 @@ class TestSiparisService:
             SiparisDetay.siparis_id == siparis.id
         ).all()
         assert len(detaylar) == 2
+
+
+def sepet_olustur(db_session, eczane, adet):
+    """Her biri stoklu, reçetesiz adet kadar ilaçtan oluşan sepet kalemleri"""
+    items = []
+    for i in range(adet):
+        ilac = Ilac(
+            ad=f"Sepet İlaç {i}",
+            barkod=f"86990000{i:05d}",
+            kategori=IlacKategori.NORMAL,
+            kullanim_talimati="Günde 1 kez 1 tablet",
+            receteli=False,
+            fiyat=Decimal("10.00"),
+            aktif=True
+        )
+        db_session.add(ilac)
+        db_session.flush()
+        db_session.add(Stok(eczane_id=eczane.id, ilac_id=ilac.id, miktar=10))
+        items.append(SiparisDetayItem(
+            ilac_id=str(ilac.id),
+            ilac_adi=ilac.ad,
+            barkod=ilac.barkod,
+            miktar=2,
+            birim_fiyat=Decimal("10.00"),
+            ara_toplam=Decimal("20.00")
+        ))
+    db_session.commit()
+    return items
+
+
+class TestSiparisSepetYolu:
+    """Test the bulk-loaded cart path of create_siparis"""
+    
+    def _siparis_ver(self, db_session, ids, items):
+        eczane_id, hasta_id, hasta_user_id = ids
+        return SiparisService(db_session).create_siparis(
+            hasta_id=str(hasta_id),
+            user_id=str(hasta_user_id),
+            siparis_data=SiparisCreate(
+                eczane_id=str(eczane_id),
+                items=items,
+                teslimat_adresi="Test Adres"
+            )
+        )
+    
+    def _sorgu_sayisi(self, db_session, ids, items):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            self._siparis_ver(db_session, ids, items)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        return len(statements)
+    
+    def _ids(self, data):
+        return data["eczane"].id, data["hasta"].id, data["hasta_user"].id
+    
+    def test_statement_count_constant(self, db_session, setup_test_data):
+        """Test a 20-item cart runs as many statements as a 1-item cart"""
+        ids = self._ids(setup_test_data)
+        items = sepet_olustur(db_session, setup_test_data["eczane"], 21)
+        tek_kalem, yirmi_kalem = items[:1], items[1:]
+        
+        tek_kalem_sorgu = self._sorgu_sayisi(db_session, ids, tek_kalem)
+        db_session.expunge_all()
+        yirmi_kalem_sorgu = self._sorgu_sayisi(db_session, ids, yirmi_kalem)
+        
+        assert yirmi_kalem_sorgu == tek_kalem_sorgu
+        
+        stoklar = db_session.query(Stok.miktar).filter(
+            Stok.ilac_id.in_([UUID(item.ilac_id) for item in yirmi_kalem])
+        ).all()
+        assert {miktar for (miktar,) in stoklar} == {8}
+    
+    def test_prices_come_from_catalog(self, db_session, setup_test_data):
+        """Test client-supplied prices are replaced by catalog prices"""
+        data = setup_test_data
+        items = [
+            SiparisDetayItem(
+                ilac_id=str(data["ilac1"].id),
+                ilac_adi=data["ilac1"].ad,
+                barkod=data["ilac1"].barkod,
+                miktar=2,
+                birim_fiyat=Decimal("0.01"),
+                ara_toplam=Decimal("0.02")
+            )
+        ]
+        
+        siparis = self._siparis_ver(db_session, self._ids(data), items)
+        
+        assert siparis.toplam_tutar == Decimal("51.00")
+        detay = db_session.query(SiparisDetay).filter(SiparisDetay.siparis_id == siparis.id).one()
+        assert detay.birim_fiyat == Decimal("25.50")
+    
+    def test_same_drug_with_differently_written_ids(self, db_session, setup_test_data):
+        """Test cart lines naming one drug with upper- and lower-case UUIDs are reserved together"""
+        data = setup_test_data
+        ilac = data["ilac1"]
+        
+        def kalem(ilac_id, miktar):
+            return SiparisDetayItem(
+                ilac_id=ilac_id,
+                ilac_adi=ilac.ad,
+                barkod=ilac.barkod,
+                miktar=miktar,
+                birim_fiyat=ilac.fiyat,
+                ara_toplam=ilac.fiyat * miktar
+            )
+        
+        items = [kalem(str(ilac.id), 2), kalem(str(ilac.id).upper(), 3)]
+        siparis = self._siparis_ver(db_session, self._ids(data), items)
+        
+        assert siparis.toplam_tutar == ilac.fiyat * 5
+        stok = db_session.query(Stok).filter(
+            Stok.eczane_id == data["eczane"].id,
+            Stok.ilac_id == ilac.id
+        ).one()
+        assert stok.miktar == 95
+        
+        # Toplam istenen miktar stoğu aşarsa eksik ilaç tek kez raporlanır
+        with pytest.raises(HTTPException) as exc:
+            self._siparis_ver(db_session, self._ids(data), [kalem(str(ilac.id), 90), kalem(str(ilac.id).upper(), 10)])
+        assert exc.value.detail["eksik_ilaclar"] == {
+            str(ilac.id): {"istenen": 100, "mevcut": 95, "eksik": 5}
+        }
+    
+    def test_email_committed_with_order(self, db_session, setup_test_data):
+        """Test the patient email is queued in the order's transaction"""
+        data = setup_test_data
+        items = sepet_olustur(db_session, data["eczane"], 1)
+        
+        siparis = self._siparis_ver(db_session, self._ids(data), items)
+        db_session.rollback()
+        
+        kayit = db_session.query(EmailOutbox).one()
+        assert kayit.alici == data["hasta_user"].email
+        assert str(siparis.id)[:8].upper() in kayit.metin
+        
+        # Reddedilen sipariş kuyrukta e-posta bırakmaz
+        items[0].miktar = 1000
+        with pytest.raises(HTTPException):
+            self._siparis_ver(db_session, self._ids(data), items)
+        db_session.rollback()
+        assert db_session.query(EmailOutbox).count() == 1
+    
+    def test_unknown_drug_rejected(self, db_session, setup_test_data):
+        """Test a cart line with a drug that has stock but no active catalog entry"""
+        data = setup_test_data
+        data["ilac1"].aktif = False
+        db_session.commit()
+        items = [
+            SiparisDetayItem(
+                ilac_id=str(data["ilac1"].id),
+                ilac_adi=data["ilac1"].ad,
+                barkod=data["ilac1"].barkod,
+                miktar=1,
+                birim_fiyat=data["ilac1"].fiyat,
+                ara_toplam=data["ilac1"].fiyat
+            )
+        ]
+        
+        with pytest.raises(HTTPException) as exc:
+            self._siparis_ver(db_session, self._ids(data), items)
+        
+        assert exc.value.status_code == 404
+        assert db_session.query(Siparis).count() == 0
+    
+    def test_stale_catalog_cache_is_ignored(self, db_session, setup_test_data):
+        """Test price and active flag changed by another worker are not read from the cache"""
+        data = setup_test_data
+        ilac1_id, ilac2_id = data["ilac1"].id, data["ilac2"].id
+        invalidate_katalog()
+        IlacRepository(db_session).get_many([ilac1_id, ilac2_id])
+        
+        # Başka worker'ın değişikliği: bu süreçteki cache temizlenmez
+        db_session.execute(update(Ilac).where(Ilac.id == ilac1_id).values(fiyat=Decimal("40.00")))
+        db_session.execute(update(Ilac).where(Ilac.id == ilac2_id).values(aktif=False))
+        db_session.commit()
+        assert IlacRepository(db_session).get_many([ilac1_id])[ilac1_id].fiyat == Decimal("25.50")
+        
+        def kalem(ilac_id):
+            return SiparisDetayItem(
+                ilac_id=str(ilac_id),
+                ilac_adi="İlaç",
+                barkod="0",
+                miktar=1,
+                birim_fiyat=Decimal("25.50"),
+                ara_toplam=Decimal("25.50")
+            )
+        
+        siparis = self._siparis_ver(db_session, self._ids(data), [kalem(ilac1_id)])
+        assert siparis.toplam_tutar == Decimal("40.00")
+        
+        with pytest.raises(HTTPException) as exc:
+            self._siparis_ver(db_session, self._ids(data), [kalem(ilac2_id)])
+        assert exc.value.status_code == 404
+        invalidate_katalog()
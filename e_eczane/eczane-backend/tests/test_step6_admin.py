@@ -268,11 +268,12 @@ def test_8_all_orders():
         
         if response.status_code == 200:
             result = response.json()
-            print_success(f"Orders listed! Count: {len(result)}")
+            items = result.get("items", [])
+            print_success(f"Orders listed! Count: {len(items)} / Total: {result.get('total')}")
             
-            if len(result) > 0:
-                print_info(f"First order: {result[0].get('siparis_no')}")
-                print_info(f"Status: {result[0].get('durum')}")
+            if len(items) > 0:
+                print_info(f"First order: {items[0].get('siparis_no')}")
+                print_info(f"Status: {items[0].get('durum')}")
             else:
                 print_info("No orders yet")
             
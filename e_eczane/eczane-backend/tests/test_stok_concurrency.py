@@ -0,0 +1,195 @@
+import threading
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from fastapi import HTTPException
+from app.models.base import Base
+from app.models.user import User
+from app.models.eczane import Eczane
+from app.models.hasta import Hasta
+from app.models.ilac import Ilac
+from app.models.stok import Stok
+from app.models.siparis import Siparis, SiparisDetay
+from app.services.siparis_service import SiparisService
+from app.repositories.stok_repository import StokRepository
+from app.schemas.siparis import SiparisCreate, SiparisDetayItem
+from app.utils.enums import UserType, OnayDurumu, IlacKategori
+
+
+BASLANGIC_STOK = 10
+SIPARIS_MIKTARI = 3
+ESZAMANLI_SIPARIS = 12
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Thread'ler arasında paylaşılabilen dosya tabanlı SQLite veritabanı"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stok.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def test_data(session_factory):
+    """Tek ilaç stoklu bir eczane ve bir hasta oluştur"""
+    db = session_factory()
+    eczane_user = User(email="eczane@test.com", password_hash="hashed", user_type=UserType.ECZANE, is_active=True)
+    hasta_user = User(email="hasta@test.com", password_hash="hashed", user_type=UserType.HASTA, is_active=True)
+    db.add_all([eczane_user, hasta_user])
+    db.flush()
+
+    eczane = Eczane(
+        user_id=eczane_user.id,
+        sicil_no="TEST123456",
+        eczane_adi="Test Eczane",
+        eczaci_adi="Mehmet",
+        eczaci_soyadi="Yılmaz",
+        eczaci_diploma_no="EC123456",
+        telefon="0312 123 45 67",
+        adres="Test Adres",
+        mahalle="Kızılay",
+        banka_hesap_no="1234567890",
+        iban="TR123456789012345678901234",
+        onay_durumu=OnayDurumu.ONAYLANDI
+    )
+    hasta = Hasta(
+        user_id=hasta_user.id,
+        tc_no="12345678901",
+        ad="Ali",
+        soyad="Demir",
+        telefon="0532 111 22 33",
+        adres="Hasta Adres"
+    )
+    ilac = Ilac(
+        ad="Parol 500mg",
+        barkod="8699123456789",
+        kategori=IlacKategori.NORMAL,
+        kullanim_talimati="Günde 3 kez 1 tablet",
+        receteli=False,
+        fiyat=Decimal("25.50"),
+        aktif=True
+    )
+    db.add_all([eczane, hasta, ilac])
+    db.flush()
+    db.add(Stok(eczane_id=eczane.id, ilac_id=ilac.id, miktar=BASLANGIC_STOK))
+    db.commit()
+
+    data = {
+        "eczane_id": eczane.id,
+        "hasta_id": hasta.id,
+        "hasta_user_id": hasta_user.id,
+        "ilac_id": ilac.id
+    }
+    db.close()
+    return data
+
+
+def siparis_ver(session_factory, data, miktar=SIPARIS_MIKTARI):
+    """Ayrı bir session ile tek kalemli sipariş oluştur"""
+    db = session_factory()
+    try:
+        siparis_data = SiparisCreate(
+            eczane_id=str(data["eczane_id"]),
+            items=[SiparisDetayItem(
+                ilac_id=str(data["ilac_id"]),
+                ilac_adi="Parol 500mg",
+                barkod="8699123456789",
+                miktar=miktar,
+                birim_fiyat=Decimal("25.50"),
+                ara_toplam=Decimal("25.50") * miktar
+            )],
+            teslimat_adresi="Test Adres"
+        )
+        return SiparisService(db).create_siparis(
+            hasta_id=str(data["hasta_id"]),
+            user_id=str(data["hasta_user_id"]),
+            siparis_data=siparis_data
+        )
+    finally:
+        db.close()
+
+
+def mevcut_stok(session_factory, data) -> int:
+    db = session_factory()
+    try:
+        return db.query(Stok.miktar).filter(Stok.eczane_id == data["eczane_id"]).scalar()
+    finally:
+        db.close()
+
+
+class TestStokRezervasyonu:
+    """Test atomic stock reservation in create_siparis"""
+
+    def test_stale_check_does_not_oversell(self, session_factory, test_data, monkeypatch):
+        """Test a passed availability check cannot push stock below zero"""
+        get_for_order = StokRepository.get_for_order
+        tuketilen = BASLANGIC_STOK - 2
+
+        def yuklendikten_sonra_tuket(self, eczane_id, ilac_ids):
+            # Ön kontrol yüklenen satırlarla geçer; düşümden önce başka bir
+            # sipariş stoğu tüketir (kilitsiz SQLite'ta ara yazma mümkündür)
+            stoklar = get_for_order(self, eczane_id, ilac_ids)
+            baska = session_factory()
+            baska.execute(
+                update(Stok).where(Stok.eczane_id == eczane_id).values(miktar=Stok.miktar - tuketilen)
+            )
+            baska.commit()
+            baska.close()
+            return stoklar
+
+        monkeypatch.setattr(StokRepository, "get_for_order", yuklendikten_sonra_tuket)
+
+        with pytest.raises(HTTPException) as exc_info:
+            siparis_ver(session_factory, test_data, miktar=SIPARIS_MIKTARI)
+
+        # Düşüm koşullu UPDATE'te reddedilir: sipariş ve detayları geri alınır
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail["eksik_ilaclar"] == {
+            str(test_data["ilac_id"]): {"istenen": SIPARIS_MIKTARI, "mevcut": 2, "eksik": SIPARIS_MIKTARI - 2}
+        }
+        assert mevcut_stok(session_factory, test_data) == 2
+
+        db = session_factory()
+        assert db.query(Siparis).count() == 0
+        assert db.query(SiparisDetay).count() == 0
+        db.close()
+
+    def test_parallel_orders_never_oversell(self, session_factory, test_data):
+        """Test parallel orders at one pharmacy keep stock non-negative"""
+        barrier = threading.Barrier(ESZAMANLI_SIPARIS)
+        basarili = []
+        reddedilen = []
+        hatalar = []
+
+        def worker():
+            barrier.wait()
+            try:
+                siparis_ver(session_factory, test_data)
+                basarili.append(1)
+            except HTTPException as e:
+                reddedilen.append(e.status_code)
+            except Exception as e:
+                hatalar.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(ESZAMANLI_SIPARIS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert hatalar == []
+        assert len(basarili) == BASLANGIC_STOK // SIPARIS_MIKTARI
+        assert set(reddedilen) == {400}
+
+        kalan = mevcut_stok(session_factory, test_data)
+        assert kalan >= 0
+        assert kalan == BASLANGIC_STOK - len(basarili) * SIPARIS_MIKTARI
+
+        db = session_factory()
+        assert db.query(Siparis).count() == len(basarili)
+        db.close()
@@ -0,0 +1,234 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from fastapi import HTTPException
+from app.core import auth_cache, token_denylist
+from app.core.dependencies import get_current_user
+from app.core.security import create_password_reset_token, decode_access_token, decode_refresh_token
+from app.models.base import Base
+from app.models.eczane import Eczane
+from app.models.token_iptal import TokenIptal
+from app.models.user import User
+from app.repositories.token_iptal_repository import TokenIptalRepository
+from app.schemas.admin import KullaniciYonetim
+from app.services.admin_service import AdminService
+from app.services.auth_service import AuthService
+from app.utils.enums import OnayDurumu, UserType
+
+
+# Test database setup
+TEST_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestSessionLocal = sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db_session():
+    """Create a test database session"""
+    Base.metadata.create_all(bind=engine)
+    auth_cache.clear()
+    token_denylist.clear()
+    session = TestSessionLocal()
+    yield session
+    session.close()
+    auth_cache.clear()
+    token_denylist.clear()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def hasta_user(db_session):
+    """Aktif hasta kullanıcısı oluştur"""
+    user = User(
+        email="hasta@test.com",
+        password_hash="hash",
+        user_type=UserType.HASTA,
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def current_user(token):
+    """get_current_user'ı yeni bir request session'ı ile çalıştır"""
+    db = TestSessionLocal()
+    try:
+        return get_current_user(token, db)
+    finally:
+        db.close()
+
+
+def assert_rejected(token):
+    with pytest.raises(HTTPException) as exc_info:
+        current_user(token)
+    assert exc_info.value.status_code == 401
+
+
+class TestTokenRevocation:
+    """Test logout, refresh rotation and the in-memory denylist"""
+
+    def test_tokens_have_jti(self, db_session, hasta_user):
+        tokens = AuthService(db_session)._create_tokens(hasta_user)
+        access = decode_access_token(tokens.access_token)
+        refresh = decode_refresh_token(tokens.refresh_token)
+
+        assert access["jti"] != refresh["jti"]
+        assert isinstance(access["iat"], float)
+        assert decode_refresh_token(tokens.access_token) is None
+
+    def test_refresh_token_is_not_an_access_token(self, db_session, hasta_user):
+        tokens = AuthService(db_session)._create_tokens(hasta_user)
+        assert_rejected(tokens.refresh_token)
+
+    def test_logout_revokes_only_that_session(self, db_session, hasta_user):
+        service = AuthService(db_session)
+        oturum = service._create_tokens(hasta_user)
+        diger_oturum = service._create_tokens(hasta_user)
+        assert current_user(oturum.access_token).id == hasta_user.id
+
+        service.logout(decode_access_token(oturum.access_token), oturum.refresh_token)
+
+        assert_rejected(oturum.access_token)
+        assert current_user(diger_oturum.access_token).id == hasta_user.id
+        with pytest.raises(HTTPException):
+            service.refresh(oturum.refresh_token)
+
+    def test_refresh_rotates(self, db_session, hasta_user):
+        service = AuthService(db_session)
+        ilk = service._create_tokens(hasta_user)
+
+        yeni = service.refresh(ilk.refresh_token)
+        assert yeni.refresh_token != ilk.refresh_token
+        assert current_user(yeni.access_token).id == hasta_user.id
+
+        # Eski refresh token tekrar kullanıldı: çalınmış sayılır, tüm oturumlar kapanır
+        with pytest.raises(HTTPException) as exc_info:
+            service.refresh(ilk.refresh_token)
+        assert exc_info.value.status_code == 401
+        assert_rejected(yeni.access_token)
+        with pytest.raises(HTTPException):
+            service.refresh(yeni.refresh_token)
+
+        # Sonradan açılan oturum etkilenmez
+        assert current_user(service._create_tokens(hasta_user).access_token).id == hasta_user.id
+
+    def test_refresh_applies_login_checks(self, db_session, hasta_user):
+        """Test an inactive user or an unapproved pharmacy cannot refresh"""
+        service = AuthService(db_session)
+        oturum = service._create_tokens(hasta_user)
+        hasta_user.is_active = False
+        db_session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.refresh(oturum.refresh_token)
+        assert exc_info.value.status_code == 403
+
+        eczaci = User(email="eczane@test.com", password_hash="hash", user_type=UserType.ECZANE, is_active=True)
+        db_session.add(eczaci)
+        db_session.commit()
+        eczane = Eczane(
+            user_id=eczaci.id, sicil_no="SC-1", eczane_adi="Test Eczane", adres="Adres", telefon="5550001122",
+            mahalle="Merkez", eczaci_adi="Ali", eczaci_soyadi="Veli", eczaci_diploma_no="D-1",
+            banka_hesap_no="1", iban="TR00", onay_durumu=OnayDurumu.ONAYLANDI
+        )
+        db_session.add(eczane)
+        db_session.commit()
+        oturum = service._create_tokens(eczaci)
+
+        eczane.onay_durumu = OnayDurumu.REDDEDILDI
+        db_session.commit()
+        with pytest.raises(HTTPException) as exc_info:
+            service.refresh(oturum.refresh_token)
+        assert exc_info.value.status_code == 403
+
+        # Reddedilen refresh token tüketilmez; onay geri gelince kullanılabilir
+        eczane.onay_durumu = OnayDurumu.ONAYLANDI
+        db_session.commit()
+        assert current_user(service.refresh(oturum.refresh_token).access_token).id == eczaci.id
+
+    def test_deactivation_revokes_existing_tokens(self, db_session, hasta_user):
+        token = AuthService(db_session)._create_tokens(hasta_user).access_token
+        current_user(token)
+
+        AdminService(db_session).update_kullanici_durum(
+            hasta_user.id,
+            KullaniciYonetim(is_active=False, neden="Test")
+        )
+        assert_rejected(token)
+
+    def test_check_does_not_query(self, db_session, hasta_user):
+        """Test a cached user with a revoked or valid token needs no SELECT"""
+        service = AuthService(db_session)
+        gecerli = service._create_tokens(hasta_user).access_token
+        iptal = service._create_tokens(hasta_user).access_token
+        service.logout(decode_access_token(iptal))
+        current_user(gecerli)
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            current_user(gecerli)
+            assert_rejected(iptal)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        assert statements == []
+
+    def test_other_worker_revocation_is_synced(self, db_session, hasta_user, monkeypatch):
+        """Test a revocation written by another process is seen after the sync interval"""
+        token = AuthService(db_session)._create_tokens(hasta_user).access_token
+        current_user(token)
+
+        # Başka bir worker'ın iptali: yalnızca veritabanına yazılır
+        payload = decode_access_token(token)
+        TokenIptalRepository(db_session).token_ekle(
+            hasta_user.id, payload["jti"], "access", datetime.fromtimestamp(payload["exp"], timezone.utc)
+        )
+        assert current_user(token).id == hasta_user.id
+
+        monkeypatch.setattr(token_denylist.settings, "TOKEN_REVOCATION_SYNC_SECONDS", 0)
+        assert_rejected(token)
+
+        # Süresi dolmuş kayıtlar temizlenir
+        db_session.add(TokenIptal(
+            user_id=hasta_user.id,
+            jti="eski",
+            token_tipi="access",
+            son_gecerlilik=datetime.now(timezone.utc) - timedelta(minutes=1)
+        ))
+        db_session.commit()
+        assert TokenIptalRepository(db_session).temizle() == 1
+        assert db_session.query(TokenIptal).count() == 1
+
+    def test_periodic_purge_does_not_commit_request_session(self, db_session, hasta_user, monkeypatch):
+        """Test the hourly purge runs on its own session, not the caller's"""
+        db_session.add(TokenIptal(
+            user_id=hasta_user.id,
+            jti="eski",
+            token_tipi="access",
+            son_gecerlilik=datetime.now(timezone.utc) - timedelta(minutes=1)
+        ))
+        db_session.commit()
+
+        commitler = []
+        monkeypatch.setattr(db_session, "commit", lambda: commitler.append(1))
+        monkeypatch.setattr(token_denylist, "_TEMIZLIK_ARALIGI", 0)
+        token_denylist.senkronize_et(db_session, zorla=True)
+
+        assert commitler == []
+        assert db_session.query(TokenIptal).filter(TokenIptal.jti == "eski").count() == 0
+
+    def test_password_reset_revokes_sessions(self, db_session, hasta_user):
+        service = AuthService(db_session)
+        oturum = service._create_tokens(hasta_user)
+
+        service.reset_password(create_password_reset_token(hasta_user.email), "YeniSifre123", password_hash="yeni-hash")
+
+        assert_rejected(oturum.access_token)
+        with pytest.raises(HTTPException):
+            service.refresh(oturum.refresh_token)
@@ -12,7 +12,7 @@ export const getProfile = async () => {
 
 // Search medicines
 export const searchMedicines = async (params) => {
-    const response = await api.get('/api/doktor/ilac/ara', { params });
+    const response = await api.get('/api/doktor/ilac/ara', { params: { exact_total: false, ...params } });
     return response.data;
 };
 
@@ -18,7 +18,7 @@ export const updateProfile = async (profileData) => {
 
 // Search medicines
 export const searchMedicines = async (params) => {
-  const response = await api.get('/api/hasta/ilac/ara', { params });
+  const response = await api.get('/api/hasta/ilac/ara', { params: { exact_total: false, ...params } });
   return response.data;
 };
 
@@ -56,6 +56,13 @@ export const getPharmaciesWithStock = async (ilacIds) => {
   return response.data;
 };
 
+// Get pharmacies that can fill the cart with the original medicines or their equivalents
+// items: [{ ilac_id, miktar }]
+export const getPharmaciesWithEquivalents = async (items) => {
+  const response = await api.post('/api/hasta/eczane/muadil-ile-listele', items);
+  return response.data;
+};
+
 // Get cart - This will need to be implemented in the backend
 export const getCart = async () => {
   // For now, return empty cart since backend endpoints don't exist
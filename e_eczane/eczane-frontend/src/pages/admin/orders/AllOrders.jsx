@@ -26,7 +26,7 @@ const AllOrders = () => {
         try {
             const params = filter ? { durum: filter } : {};
             const data = await adminApi.getAllOrders(params);
-            setOrders(data || []);
+            setOrders(data?.items || []);
         } catch (err) {
             console.error('Error fetching orders:', err);
             setOrders([]);